@@ -8,6 +8,14 @@ if sys.platform == 'win32':
 import json
 from pathlib import Path
 from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+from processor.ingest.normalize import NESTED_BAR_SPEC, Const, Field, compile_spec
+
+normalize_bar = compile_spec({
+    **NESTED_BAR_SPEC,
+    'delta_close': Field('bar.volume_stats.delta_close', 0),
+    'tick_size': Const(0.1),
+    'bar': Field('bar', {}),
+})
 
 export_dir = Path(r"C:\Users\Administrator\Documents\NinjaTrader 8\smc_exports_enhanced")
 # Pick Oct 14 (186 LONG, highest)
@@ -23,26 +31,7 @@ module14 = Fix14MgannSwing(threshold_ticks=6)
 
 results = []
 for raw_bar in bars:
-    bar_data = raw_bar.get('bar', {})
-    vol_stats = bar_data.get('volume_stats', {})
-    
-    bar_state = {
-        'high': bar_data.get('h', 0),
-        'low': bar_data.get('l', 0),
-        'open': bar_data.get('o', 0),
-        'close': bar_data.get('c', 0),
-        'volume': vol_stats.get('total_volume', 0),
-        'delta': vol_stats.get('delta_close', 0),
-        'delta_close': vol_stats.get('delta_close', 0),
-        'tick_size': 0.1,
-        'timestamp': raw_bar.get('timestamp', ''),
-        'bar': bar_data,
-        'ext_bos_up': bar_data.get('ext_bos_up', False),
-        'ext_bos_down': bar_data.get('ext_bos_down', False),
-        'ext_choch_up': bar_data.get('ext_choch_up', False),
-        'ext_choch_down': bar_data.get('ext_choch_down', False),
-        'ext_dir': bar_data.get('ext_dir', 0),
-    }
+    bar_state = normalize_bar(raw_bar)
     
     processed = module14.process_bar(bar_state)
     results.append(processed)
@@ -0,0 +1,27 @@
+"""
+Int bitsets over candidate lists, for evaluating many filter combinations.
+
+Each predicate value is evaluated once per candidate and stored as an int with
+bit i set when candidate i passes; a combination of predicates is then the
+bitwise AND of their bitsets. Used by the eval_filtered_signals leaderboard and
+the tune_pullback threshold search.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+
+def bitset(indices: Iterable[int], n: int) -> int:
+    """Int with bit i set for each index < n (built as bytes, not by repeated OR)."""
+    buf = bytearray((n + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Set bit positions, ascending."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -15,16 +15,27 @@ Outcome model:
 - Uses future bars' high/low to check TP/SL.
 - If both TP/SL touch in the same bar, counts as loss (conservative).
 - Skips trades with entry/sl/tp missing or 0.
+
+Leaderboard mode (`--leaderboard`) evaluates every combination of a filter grid
+(FILTER_GRID or `--grid grid.json`) in one pass: each predicate/threshold is
+computed once as a bitset over all bars, every candidate retest is resolved
+once into an outcome table, and a combination is the bitwise AND of its
+predicates' bitsets. Combinations are ranked by PF (or `--rank-by`).
 """
 from __future__ import annotations
 
 import argparse
 import json
+from collections.abc import Callable, Iterable, Sequence
+from itertools import product
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any
 
+from processor.backtest.bitsets import bitset, iter_bits
+from processor.backtest.outcomes import HIT_OPEN, HIT_TP, high_low_arrays, resolve_outcomes
+from processor.ingest.columnar_cache import load_records
 
-DEFAULT_FILTER = {
+DEFAULT_FILTER: dict[str, Any] = {
     "min_retest_quality": 0.75,
     "allowed_retest_types": {"edge", "shallow"},
     "min_fvg_quality": 0.2,
@@ -34,15 +45,32 @@ DEFAULT_FILTER = {
     "max_lookahead": 70,
 }
 
+# Leaderboard grid: candidate values per passes_filter() setting
+FILTER_GRID: dict[str, Sequence[Any]] = {
+    "min_retest_quality": [0.5, 0.6, 0.75, 0.9],
+    "allowed_retest_types": [{"edge"}, {"edge", "shallow"}, {"edge", "shallow", "no_touch"}],
+    "min_fvg_quality": [0.0, 0.2, 0.5],
+    "min_confluence": [0.0, 0.05, 0.1, 0.2],
+    "require_alignment": [False, True],
+    "allowed_market": [set(), {"trending_weak", "trending_strong"}, {"trending_strong"}],
+}
+
+RANK_KEYS = ("pf", "winrate_pct", "avg_rr", "trades")
+
+RETEST_SIGNALS = {"fvg_retest_bull", "fvg_retest_bear"}
 
-def load_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
+# Settings holding a set of allowed values (lists in a --grid file)
+SET_SETTINGS = ("allowed_retest_types", "allowed_market")
+
+
+def load_jsonl(path: Path) -> Iterable[dict[str, Any]]:
     with path.open("r", encoding="utf-8") as f:
         for line in f:
             if line.strip():
                 yield json.loads(line)
 
 
-def get_high_low(bar: Dict[str, Any]) -> Tuple[float, float]:
+def get_high_low(bar: dict[str, Any]) -> tuple[float, float]:
     """Gracefully fetch high/low from top-level or nested bar{}."""
     high = bar.get("high")
     low = bar.get("low")
@@ -53,18 +81,23 @@ def get_high_low(bar: Dict[str, Any]) -> Tuple[float, float]:
     return float(high or 0.0), float(low or 0.0)
 
 
-def passes_filter(rec: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
+def _at_least(value: Any, threshold: float) -> bool:
+    """Score test of passes_filter(): a null score fails like a low one."""
+    return value is not None and not value < threshold
+
+
+def passes_filter(rec: dict[str, Any], cfg: dict[str, Any]) -> bool:
     if not rec.get("fvg_retest_detected"):
         return False
     if rec.get("fvg_retest_type") not in cfg["allowed_retest_types"]:
         return False
-    if rec.get("signal_type") not in {"fvg_retest_bull", "fvg_retest_bear"}:
+    if rec.get("signal_type") not in RETEST_SIGNALS:
         return False
-    if rec.get("fvg_retest_quality_score", 0) < cfg["min_retest_quality"]:
+    if not _at_least(rec.get("fvg_retest_quality_score", 0), cfg["min_retest_quality"]):
         return False
-    if rec.get("fvg_quality_score", 0) < cfg["min_fvg_quality"]:
+    if not _at_least(rec.get("fvg_quality_score", 0), cfg["min_fvg_quality"]):
         return False
-    if rec.get("confluence_score", 0) < cfg["min_confluence"]:
+    if not _at_least(rec.get("confluence_score", 0), cfg["min_confluence"]):
         return False
     if cfg["require_alignment"] and not rec.get("mtf_is_aligned", False):
         return False
@@ -74,48 +107,46 @@ def passes_filter(rec: Dict[str, Any], cfg: Dict[str, Any]) -> bool:
     return True
 
 
+def _check_trade(entry: float, sl: float, tp: float, direction: int) -> bool:
+    """Trades evaluate_trade() can resolve: prices set and positive risk."""
+    if entry == 0 or sl == 0 or tp == 0:
+        return False
+    if direction not in (1, -1):
+        return False
+    risk = (entry - sl) if direction == 1 else (sl - entry)
+    return risk > 0
+
+
+def _trade_result(outcome: dict[str, Any]) -> dict[str, Any]:
+    if outcome["hit"] == HIT_OPEN:
+        return {"outcome": "open", "bars_to_exit": outcome["bars_to_exit"], "rr": 0.0}
+    if outcome["hit"] == HIT_TP:
+        return {"outcome": "win", "bars_to_exit": outcome["bars_to_exit"], "rr": outcome["rr"]}
+    return {"outcome": "loss", "bars_to_exit": outcome["bars_to_exit"], "rr": -1.0}
+
+
 def evaluate_trade(
-    records: List[Dict[str, Any]],
+    records: list[dict[str, Any]],
     idx: int,
     direction: int,
     entry: float,
     sl: float,
     tp: float,
     max_lookahead: int,
-) -> Optional[Dict[str, Any]]:
+) -> dict[str, Any] | None:
     """Evaluate TP/SL hit using future bars. Conservative if both hit."""
-    if entry == 0 or sl == 0 or tp == 0:
-        return None
-    if direction not in (1, -1):
+    if not _check_trade(entry, sl, tp, direction):
         return None
 
-    risk = (entry - sl) if direction == 1 else (sl - entry)
-    if risk <= 0:
-        return None
-    target = (tp - entry) if direction == 1 else (entry - tp)
-    rr = target / risk if risk > 0 else 0
-
-    last_bar = min(len(records) - 1, idx + max_lookahead)
-    for j in range(idx + 1, last_bar + 1):
-        hi, lo = get_high_low(records[j])
-        if direction == 1:
-            hit_sl = lo <= sl
-            hit_tp = hi >= tp
-        else:
-            hit_sl = hi >= sl
-            hit_tp = lo <= tp
-
-        if hit_sl and hit_tp:
-            return {"outcome": "loss", "bars_to_exit": j - idx, "rr": -1.0}
-        if hit_sl:
-            return {"outcome": "loss", "bars_to_exit": j - idx, "rr": -1.0}
-        if hit_tp:
-            return {"outcome": "win", "bars_to_exit": j - idx, "rr": rr}
-
-    return {"outcome": "open", "bars_to_exit": max_lookahead, "rr": 0.0}
-
-
-def summarize(trades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    window = records[idx : idx + max_lookahead + 1]
+    highs, lows = high_low_arrays(window, get_high_low)
+    outcome = resolve_outcomes(
+        highs, lows, [0], [direction], [entry], [sl], [tp], max_lookahead, backend="python"
+    )[0]
+    return _trade_result(outcome)
+
+
+def summarize(trades: list[dict[str, Any]]) -> dict[str, Any]:
     wins = [t for t in trades if t["outcome"] == "win"]
     losses = [t for t in trades if t["outcome"] == "loss"]
     opens = [t for t in trades if t["outcome"] == "open"]
@@ -137,9 +168,19 @@ def summarize(trades: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
-def process_file(path: Path, cfg: Dict[str, Any]) -> Dict[str, Any]:
-    records = list(load_jsonl(path))
-    trades: List[Dict[str, Any]] = []
+def signal_levels(
+    records: Sequence[dict[str, Any]], select: Callable[[dict[str, Any]], bool]
+) -> list[tuple[int, int, float, float, float]]:
+    """
+    Entry/SL/TP of every selected bar whose trade can be resolved.
+
+    SL/TP fall back to the last non-zero stop/target seen for the direction,
+    then to the FVG bounds and RR=3, so every bar is scanned in order.
+
+    Returns:
+        (index, direction, entry, sl, tp) per resolvable selected bar.
+    """
+    signals: list[tuple[int, int, float, float, float]] = []
 
     # Track last non-zero stop/tp seen per direction (inferred from fvg_type)
     last_stop_bull: float | None = None
@@ -175,7 +216,7 @@ def process_file(path: Path, cfg: Dict[str, Any]) -> Dict[str, Any]:
             elif dir_hint == -1:
                 last_tp_bear = tp_val
 
-        if not passes_filter(rec, cfg):
+        if not select(rec):
             continue
         direction = 1 if rec.get("signal_type") == "fvg_retest_bull" else -1
 
@@ -223,25 +264,164 @@ def process_file(path: Path, cfg: Dict[str, Any]) -> Dict[str, Any]:
             if risk > 0:
                 tp = entry + 3 * risk if direction == 1 else entry - 3 * risk
 
-        outcome = evaluate_trade(
-            records,
-            i,
-            direction,
-            entry,
-            sl,
-            tp,
-            max_lookahead=cfg["max_lookahead"],
-        )
         # Skip trades where SL/TP could not be resolved
-        if outcome is None:
+        if not _check_trade(entry, sl, tp, direction):
             continue
-        trades.append(outcome | {"index": i, "direction": direction})
+        signals.append((i, direction, entry, sl, tp))
+
+    return signals
+
+
+def resolve_trades(
+    records: Sequence[dict[str, Any]],
+    signals: Sequence[tuple[int, int, float, float, float]],
+    max_lookahead: int,
+) -> list[dict[str, Any]]:
+    """Resolve signal_levels() output into trade results, in one batch."""
+    trades: list[dict[str, Any]] = []
+    if signals:
+        highs, lows = high_low_arrays(records, get_high_low)
+        index, directions, entries, sls, tps = (list(col) for col in zip(*signals, strict=True))
+        outcomes = resolve_outcomes(
+            highs, lows, index, directions, entries, sls, tps, max_lookahead
+        )
+        for (i, direction, *_), outcome in zip(signals, outcomes, strict=True):
+            trades.append(_trade_result(outcome) | {"index": i, "direction": direction})
+    return trades
+
+
+def _load(path: Path, cache_dir: Path | None, use_cache: bool) -> list[dict[str, Any]]:
+    return load_records(path, cache_dir) if use_cache else list(load_jsonl(path))
+
+
+def process_file(
+    path: Path, cfg: dict[str, Any], cache_dir: Path | None = None, use_cache: bool = False
+) -> dict[str, Any]:
+    records = _load(path, cache_dir, use_cache)
+    # Resolvable signals, evaluated in one batch after the scan
+    signals = signal_levels(records, lambda rec: passes_filter(rec, cfg))
+    trades = resolve_trades(records, signals, cfg["max_lookahead"])
 
     summary = summarize(trades)
     summary["file"] = path.name
     return summary
 
 
+def filter_bitsets(
+    records: Sequence[dict[str, Any]], grid: dict[str, Sequence[Any]]
+) -> dict[tuple[str, Any], int]:
+    """
+    One bitset per passes_filter() predicate value in the grid.
+
+    Bits are only set for retest candidates (the checks every filter makes:
+    fvg_retest_detected and a retest signal_type), so the AND of one bitset
+    per grid key selects exactly the bars passes_filter() accepts for that
+    combination. Set-valued settings are keyed by frozenset.
+    """
+    candidates = [
+        i for i, rec in enumerate(records)
+        if rec.get("fvg_retest_detected") and rec.get("signal_type") in RETEST_SIGNALS
+    ]
+    n = len(records)
+    scores = {
+        "min_retest_quality": "fvg_retest_quality_score",
+        "min_fvg_quality": "fvg_quality_score",
+        "min_confluence": "confluence_score",
+    }
+    bits: dict[tuple[str, Any], int] = {}
+    for key, values in grid.items():
+        for value in values:
+            if key in scores:
+                field = scores[key]
+                hits = (i for i in candidates if _at_least(records[i].get(field, 0), value))
+            elif key == "allowed_retest_types":
+                value = frozenset(value)
+                hits = (i for i in candidates if records[i].get("fvg_retest_type") in value)
+            elif key == "require_alignment":
+                hits = (
+                    i for i in candidates
+                    if not value or records[i].get("mtf_is_aligned", False)
+                )
+            elif key == "allowed_market":
+                value = frozenset(value)
+                hits = (
+                    i for i in candidates
+                    if not value
+                    or records[i].get("market_condition") is None
+                    or records[i].get("market_condition") in value
+                )
+            else:
+                raise ValueError(f"unknown filter setting {key!r}")
+            bits[key, value] = bitset(hits, n)
+    return bits
+
+
+def _jsonable(value: Any) -> Any:
+    return sorted(value) if isinstance(value, (set, frozenset, list)) else value
+
+
+def filter_leaderboard(
+    paths: Sequence[Path],
+    grid: dict[str, Sequence[Any]] = FILTER_GRID,
+    max_lookahead: int = DEFAULT_FILTER["max_lookahead"],
+    rank_by: str = "pf",
+    min_trades: int = 5,
+    cache_dir: Path | None = None,
+    use_cache: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Evaluate every filter combination in `grid` over all files at once.
+
+    Each file is read and scanned once: candidate retests get their trade
+    resolved into an outcome table and each predicate value a bitset. Files
+    are laid end to end in one bit space, so a combination's trades are the
+    set bits of the AND of its bitsets: the trades process_file() takes from
+    each file with that filter, pooled in file and bar order.
+
+    Returns:
+        summarize() output plus rank and filter settings per combination with
+        at least `min_trades` trades, best first by `rank_by` (ties: more
+        trades first).
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"unknown rank key {rank_by!r}; expected one of {RANK_KEYS}")
+    keys = list(grid)
+    bits: dict[tuple[str, Any], int] = {}
+    table: dict[int, dict[str, Any]] = {}  # global bar position -> trade result
+    offset = 0
+    for path in paths:
+        records = _load(Path(path), cache_dir, use_cache)
+        for bit_key, mask in filter_bitsets(records, grid).items():
+            bits[bit_key] = bits.get(bit_key, 0) | (mask << offset)
+        signals = signal_levels(
+            records,
+            lambda rec: bool(rec.get("fvg_retest_detected"))
+            and rec.get("signal_type") in RETEST_SIGNALS,
+        )
+        for trade in resolve_trades(records, signals, max_lookahead):
+            table[offset + trade["index"]] = trade
+        offset += len(records)
+    resolvable = bitset(table, offset)
+
+    board = []
+    for combo in product(*(grid[key] for key in keys)):
+        mask = resolvable
+        for key, value in zip(keys, combo, strict=True):
+            if key in SET_SETTINGS:
+                value = frozenset(value)
+            mask &= bits[key, value]
+            if not mask:
+                break
+        if mask.bit_count() < min_trades:
+            continue
+        summary = summarize([table[i] for i in iter_bits(mask)])
+        summary["filter"] = {key: _jsonable(value) for key, value in zip(keys, combo, strict=True)}
+        board.append(summary)
+
+    board.sort(key=lambda row: (row[rank_by], row["trades"]), reverse=True)
+    return [{"rank": rank, **row} for rank, row in enumerate(board, 1)]
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Filter enriched JSONL and compute winrate/PF.")
     parser.add_argument(
@@ -256,14 +436,68 @@ def main() -> None:
         default=DEFAULT_FILTER["max_lookahead"],
         help="Bars to look ahead for TP/SL hit.",
     )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Load inputs via the memory-mapped columnar cache (built on first use).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Columnar cache root (default: <input dir>/.smc_cache).",
+    )
+    parser.add_argument(
+        "--leaderboard",
+        nargs="?",
+        const="filter_leaderboard.json",
+        default=None,
+        metavar="PATH",
+        help="Rank every filter combination of the grid and write the leaderboard to PATH "
+        "(default: filter_leaderboard.json).",
+    )
+    parser.add_argument(
+        "--grid",
+        default=None,
+        help="JSON file of {setting: [values]} replacing FILTER_GRID (lists for set settings).",
+    )
+    parser.add_argument("--rank-by", choices=RANK_KEYS, default="pf")
+    parser.add_argument(
+        "--min-trades", type=int, default=5, help="Leave out combinations with fewer trades."
+    )
+    parser.add_argument("--top", type=int, default=20, help="Leaderboard rows to print.")
     args = parser.parse_args()
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+
+    if args.leaderboard is not None:
+        grid = FILTER_GRID
+        if args.grid:
+            grid = json.loads(Path(args.grid).read_text(encoding="utf-8"))
+        board = filter_leaderboard(
+            [Path(p) for p in args.inputs],
+            grid,
+            max_lookahead=args.max_lookahead,
+            rank_by=args.rank_by,
+            min_trades=args.min_trades,
+            cache_dir=cache_dir,
+            use_cache=args.use_cache,
+        )
+        Path(args.leaderboard).write_text(json.dumps(board, indent=2), encoding="utf-8")
+        print(json.dumps(board[: args.top], indent=2))
+        return
 
     cfg = DEFAULT_FILTER.copy()
     cfg["max_lookahead"] = args.max_lookahead
 
     summaries = []
     for p in args.inputs:
-        summaries.append(process_file(Path(p), cfg))
+        summaries.append(
+            process_file(
+                Path(p),
+                cfg,
+                cache_dir=cache_dir,
+                use_cache=args.use_cache,
+            )
+        )
 
     print(json.dumps(summaries, indent=2))
 
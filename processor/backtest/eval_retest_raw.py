@@ -15,8 +15,17 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List
 
+from processor.backtest.outcomes import HIT_OPEN, HIT_TP, high_low_arrays, resolve_outcomes
 from processor.modules.fix12_fvg_retest import FVGRetestModule
 
+MAX_LOOKAHEAD = 50
+
+
+def _high_low(rec: Dict[str, Any]) -> tuple[float, float]:
+    hi = rec.get("high") or rec.get("bar", {}).get("h", 0.0)
+    lo = rec.get("low") or rec.get("bar", {}).get("l", 0.0)
+    return hi, lo
+
 
 def load_jsonl(path: Path) -> List[Dict[str, Any]]:
     records: List[Dict[str, Any]] = []
@@ -33,7 +42,11 @@ def evaluate(records: List[Dict[str, Any]]) -> Dict[str, Any]:
     for bar in records:
         enriched.append(module.process_bar(bar, history=enriched))
 
-    trades: List[Dict[str, Any]] = []
+    signals: List[int] = []
+    directions: List[int] = []
+    entries: List[float] = []
+    sls: List[float] = []
+    tps: List[float] = []
     for i, rec in enumerate(enriched):
         if not rec.get("fvg_retest_detected"):
             continue
@@ -56,22 +69,26 @@ def evaluate(records: List[Dict[str, Any]]) -> Dict[str, Any]:
         if risk <= 0:
             continue
         tp = entry + 3 * risk if direction == 1 else entry - 3 * risk
+        signals.append(i)
+        directions.append(direction)
+        entries.append(entry)
+        sls.append(sl)
+        tps.append(tp)
 
-        # simulate forward
-        outcome = "open"
-        rr = 0.0
-        for j in range(i + 1, min(len(enriched), i + 51)):
-            hi = enriched[j].get("high") or enriched[j].get("bar", {}).get("h", 0.0)
-            lo = enriched[j].get("low") or enriched[j].get("bar", {}).get("l", 0.0)
-            hit_sl = lo <= sl if direction == 1 else hi >= sl
-            hit_tp = hi >= tp if direction == 1 else lo <= tp
-            if hit_sl and hit_tp:
-                outcome = "loss"; rr = -1.0; break
-            if hit_sl:
-                outcome = "loss"; rr = -1.0; break
-            if hit_tp:
-                outcome = "win"; rr = 3.0; break
-        trades.append({"outcome": outcome, "rr": rr})
+    # simulate forward (all signals in one batch)
+    trades: List[Dict[str, Any]] = []
+    if signals:
+        highs, lows = high_low_arrays(enriched, _high_low)
+        outcomes = resolve_outcomes(
+            highs, lows, signals, directions, entries, sls, tps, MAX_LOOKAHEAD
+        )
+        for res in outcomes:
+            if res["hit"] == HIT_OPEN:
+                trades.append({"outcome": "open", "rr": 0.0})
+            elif res["hit"] == HIT_TP:
+                trades.append({"outcome": "win", "rr": 3.0})
+            else:
+                trades.append({"outcome": "loss", "rr": -1.0})
 
     wins = [t for t in trades if t["outcome"] == "win"]
     losses = [t for t in trades if t["outcome"] == "loss"]
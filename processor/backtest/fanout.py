@@ -0,0 +1,277 @@
+"""
+Multi-strategy fan-out backtest: one upstream pass, N strategies.
+
+Each bar is normalized and run through the upstream modules (Fix14MgannSwing)
+once; every strategy then sees it through its own BarOverlay, so strategies
+(different classes, or one class with different configs) cannot see or clobber
+each other's outputs. Each strategy has its own TradeSimulator, fed exactly as
+run_full_backtest.py feeds its single simulator, so a V1 slot reproduces that
+script's trades.
+
+Signal adapters turn a strategy's outputs into the TradeSimulator signal dict:
+- V1 emits `signal` with a `trade` dict already;
+- V2/V3 write `signal_type` (LONG/SHORT) and flat entry_price/sl/tp/risk/reward.
+
+Strategy specs are `name[:key=value,...]`, e.g. `v1`, `v1:risk_reward_ratio=2.5`,
+`v3:tick_size=0.25` (values parsed as JSON, else kept as strings).
+
+Usage:
+python -m processor.backtest.fanout --strategies v1 v2 v3 "v1:risk_reward_ratio=2.0"
+python -m processor.backtest.fanout --data-dir data_backtesst --output fanout_results.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from processor.backtest.trade_simulator import TradeSimulator
+from processor.core.bar_record import BarOverlay
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+from processor.modules.fix16_strategy_v2 import Fix16StrategyV2
+from processor.modules.fix16_strategy_v3 import Fix16StrategyV3
+
+Signal = Optional[Dict[str, Any]]
+
+
+def v1_signal(bar: Dict[str, Any]) -> Signal:
+    """Signal emitted by Fix16StrategyV1 (already in TradeSimulator form)."""
+    return bar.get('signal')
+
+
+def level_signal(bar: Dict[str, Any]) -> Signal:
+    """Signal from the flat signal_type/entry_price/sl/tp fields of V2/V3."""
+    direction = bar.get('signal_type')
+    if direction not in ('LONG', 'SHORT'):
+        return None
+    return {
+        'timestamp': bar.get('timestamp'),
+        'bar_index': bar.get('bar_index'),
+        'direction': direction,
+        'leg': bar.get('mgann_leg_index'),
+        'fvg_new': bool(bar.get('fvg_detected')),
+        'trade': {
+            'entry': bar['entry_price'],
+            'sl': bar['sl'],
+            'tp': bar['tp'],
+            'risk': bar['risk'],
+            'reward': bar['reward'],
+        },
+    }
+
+
+# name -> (strategy class, signal adapter)
+STRATEGIES: Dict[str, tuple] = {
+    'v1': (Fix16StrategyV1, v1_signal),
+    'v2': (Fix16StrategyV2, level_signal),
+    'v3': (Fix16StrategyV3, level_signal),
+}
+
+
+@dataclass
+class StrategySlot:
+    """One strategy instance with its simulator and counters."""
+
+    label: str
+    module: Any
+    adapter: Callable[[Dict[str, Any]], Signal]
+    simulator: TradeSimulator = field(default_factory=TradeSimulator)
+    signals: int = 0
+    long_signals: int = 0
+    short_signals: int = 0
+    errors: int = 0
+    bars: int = 0  # bars processed in the current file (trade exit_bar index)
+
+    def on_bar(self, bar: Dict[str, Any], session: Optional[str]) -> None:
+        """Run the strategy on an isolated view of `bar` and simulate its trades."""
+        try:
+            view = self.module.process_bar(BarOverlay(bar))
+            self.simulator.update_trades(view, self.bars)
+            signal = self.adapter(view)
+            if signal is not None:
+                self.signals += 1
+                if signal['direction'] == 'LONG':
+                    self.long_signals += 1
+                else:
+                    self.short_signals += 1
+                self.simulator.add_signal(signal, 0, session=session)
+            self.bars += 1
+        except Exception:  # noqa: BLE001 - a failing bar is skipped, as in run_full_backtest
+            self.errors += 1
+
+    def result(self, keep_trades: bool = False) -> Dict[str, Any]:
+        module = self.module
+        open_trades = self.simulator.open_trades
+        report = self.simulator.stats.report() or {}
+        result = {
+            'strategy': self.label,
+            'module': type(module).__name__,
+            'config': module.cache_config() if hasattr(module, 'cache_config') else None,
+            'signals': self.signals,
+            'long_signals': self.long_signals,
+            'short_signals': self.short_signals,
+            'errors': self.errors,
+            'open_trades': len(open_trades),
+            'summary': self.simulator.get_stats(),
+            'by_direction': report.get('by_direction', {}),
+            'by_session': report.get('by_session', {}),
+        }
+        if keep_trades:
+            for trade in open_trades:
+                trade['status'] = 'open_eod'
+                trade['exit_reason'] = 'END_OF_DATA'
+            result['closed_trades'] = self.simulator.closed_trades
+            result['open_trade_list'] = open_trades
+        return result
+
+
+def _parse_value(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def build_slot(spec: str) -> StrategySlot:
+    """StrategySlot from a `name[:key=value,...]` spec."""
+    name, _, options = spec.partition(':')
+    if name not in STRATEGIES:
+        raise ValueError(f"unknown strategy {name!r}; expected one of {sorted(STRATEGIES)}")
+    cls, adapter = STRATEGIES[name]
+    kwargs = {}
+    for item in filter(None, options.split(',')):
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"bad strategy option {item!r} in {spec!r} (expected key=value)")
+        kwargs[key.strip()] = _parse_value(value.strip())
+    return StrategySlot(spec, cls(**kwargs), adapter)
+
+
+def run_fanout(
+    data_files: Sequence[Path],
+    slots: Sequence[StrategySlot],
+    upstream: Optional[Sequence[Any]] = None,
+    keep_trades: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run every strategy over the files with a single upstream pass per bar.
+
+    Args:
+        data_files: Exporter JSONL files, in processing order.
+        slots: Strategies to compare (labels must be unique).
+        upstream: Modules run once per bar before the strategies (default:
+            Fix14MgannSwing(threshold_ticks=6), as in run_full_backtest.py).
+        keep_trades: Include each strategy's trade lists in its result; without
+            it the simulators keep only their running stats.
+
+    Returns:
+        {"bars": total bars, "upstream_errors": n, "strategies": [result per slot]}.
+    """
+    labels = [slot.label for slot in slots]
+    if len(set(labels)) != len(labels):
+        raise ValueError(f"duplicate strategy labels in {labels}")
+    if upstream is None:
+        upstream = [Fix14MgannSwing(threshold_ticks=6)]
+
+    for slot in slots:
+        slot.simulator.keep_trades = keep_trades
+
+    total_bars = 0
+    upstream_errors = 0
+    for path in data_files:
+        for slot in slots:
+            slot.bars = 0
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    raw_bar = json.loads(line.strip())
+                    bar = normalize_bar(raw_bar)
+                    for module in upstream:
+                        bar = module.process_bar(bar)
+                except json.JSONDecodeError:
+                    continue
+                except Exception:  # noqa: BLE001 - skip the bar for every strategy
+                    upstream_errors += 1
+                    continue
+                total_bars += 1
+                session = raw_bar.get('session')
+                for slot in slots:
+                    slot.on_bar(bar, session)
+
+    return {
+        'bars': total_bars,
+        'upstream_errors': upstream_errors,
+        'strategies': [slot.result(keep_trades) for slot in slots],
+    }
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    """Side-by-side strategy results."""
+    header = (
+        f"{'strategy':<32} {'signals':>7} {'L/S':>9} {'trades':>6} {'win%':>6} "
+        f"{'PF':>6} {'net':>10} {'max_dd':>8} {'bars':>6} {'open':>5}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results['strategies']:
+        s = r['summary']
+        ls = f"{r['long_signals']}/{r['short_signals']}"
+        if s is None:
+            lines.append(f"{r['strategy']:<32} {r['signals']:>7} {ls:>9} {0:>6} {'-':>6} "
+                         f"{'-':>6} {'-':>10} {'-':>8} {'-':>6} {r['open_trades']:>5}")
+            continue
+        lines.append(
+            f"{r['strategy']:<32} {r['signals']:>7} {ls:>9} {s['total_trades']:>6} "
+            f"{s['win_rate'] * 100:>5.1f}% {s['profit_factor']:>6.2f} "
+            f"{s['net_profit']:>10,.2f} {s['max_drawdown']:>8.2f} "
+            f"{s['avg_bars_held']:>6.1f} {r['open_trades']:>5}"
+        )
+    lines.append(f"bars: {results['bars']}  upstream errors: {results['upstream_errors']}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Backtest several strategies in one pass over shared upstream modules."
+    )
+    parser.add_argument("--data-dir", default="data_backtesst", help="Directory of JSONL files")
+    parser.add_argument(
+        "--strategies",
+        nargs="+",
+        default=["v1", "v2", "v3"],
+        help="Strategy specs name[:key=value,...] with name in v1/v2/v3 (default: v1 v2 v3).",
+    )
+    parser.add_argument("--threshold-ticks", type=int, default=6, help="Fix14 swing threshold")
+    parser.add_argument("--output", default=None, help="Path to write results JSON")
+    parser.add_argument(
+        "--trades", action="store_true", help="Include trade lists in the results JSON."
+    )
+    args = parser.parse_args()
+
+    data_files = sorted(Path(args.data_dir).glob("*.jsonl"))
+    if not data_files:
+        print(f"❌ No JSONL files found in {args.data_dir}")
+        return 1
+    try:
+        slots = [build_slot(spec) for spec in args.strategies]
+    except (TypeError, ValueError) as exc:
+        parser.error(str(exc))
+
+    results = run_fanout(
+        data_files,
+        slots,
+        upstream=[Fix14MgannSwing(threshold_ticks=args.threshold_ticks)],
+        keep_trades=args.trades,
+    )
+    print(format_table(results))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"✓ Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
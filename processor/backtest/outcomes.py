@@ -0,0 +1,251 @@
+"""
+Batch TP/SL outcome resolution for backtest signals.
+
+Given per-bar high/low arrays and one entry/SL/TP/direction per signal bar,
+finds the first bar after the signal (within `max_lookahead`) where the stop or
+the target is touched:
+
+- LONG (direction 1): SL hit when low <= sl, TP hit when high >= tp.
+- SHORT (any other direction): SL hit when high >= sl, TP hit when low <= tp.
+- SL and TP on the same bar counts as a loss (`sl_tp_same_bar`).
+- No hit within the window: `open`, with bars_to_exit = max_lookahead.
+
+NumPy (the `ml` extra) resolves all signals at once with a signals x lookahead
+hit matrix; without it the same rules run as a per-signal scan over the
+pre-extracted arrays. Both backends give identical results.
+
+resolve_targets() covers parameter sweeps: one stop and a ladder of targets
+(e.g. several R:R ratios) resolved in a single forward scan per signal.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from math import inf
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+HIT_TP = "tp"
+HIT_SL = "sl"
+HIT_SAME_BAR = "sl_tp_same_bar"
+HIT_OPEN = "open"
+
+BACKENDS = ("auto", "numpy", "python")
+
+# Signals per NumPy block, bounding the hit matrices to chunk x max_lookahead
+_CHUNK = 4096
+
+
+def high_low_arrays(
+    records: Iterable[Dict[str, Any]],
+    get_high_low: Callable[[Dict[str, Any]], Tuple[float, float]],
+) -> Tuple[array, array]:
+    """Extract float high/low arrays from records with the caller's accessor."""
+    highs = array("d")
+    lows = array("d")
+    for rec in records:
+        high, low = get_high_low(rec)
+        highs.append(high)
+        lows.append(low)
+    return highs, lows
+
+
+def resolve_targets(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    start: int,
+    direction: int,
+    sl: float,
+    targets: Sequence[float],
+) -> List[Tuple[str, Any]]:
+    """
+    Resolve one stop against several targets in a single scan.
+
+    Same hit rules as resolve_outcomes(), except that the scan starts at bar
+    `start` itself and runs to the end of the arrays (no lookahead limit), as
+    a simulator checking every open trade on every bar does. Targets still
+    open when the stop is hit resolve with it.
+
+    Args:
+        highs: Bar highs.
+        lows: Bar lows.
+        start: First bar checked.
+        direction: 1 for LONG, anything else is treated as SHORT.
+        sl: Stop price.
+        targets: Target prices, any order.
+
+    Returns:
+        (hit, exit_index) per target, in input order; hit is tp, sl,
+        sl_tp_same_bar or open (exit_index None).
+    """
+    results: List[Tuple[str, Any]] = [(HIT_OPEN, None)] * len(targets)
+    long = direction == 1
+    # Pending targets sorted so the ones a bar reaches form a prefix (LONG) or
+    # suffix (SHORT)
+    pending = sorted((t, k) for k, t in enumerate(targets))
+    for j in range(start, len(highs)):
+        if not pending:
+            break
+        high = highs[j]
+        low = lows[j]
+        if long:
+            cut = bisect_right(pending, (high, inf))
+            reached, pending_left = pending[:cut], pending[cut:]
+            stop_hit = low <= sl
+        else:
+            cut = bisect_left(pending, (low, -inf))
+            reached, pending_left = pending[cut:], pending[:cut]
+            stop_hit = high >= sl
+        if stop_hit:
+            for _, k in reached:
+                results[k] = (HIT_SAME_BAR, j)
+            for _, k in pending_left:
+                results[k] = (HIT_SL, j)
+            break
+        for _, k in reached:
+            results[k] = (HIT_TP, j)
+        pending = pending_left
+    return results
+
+
+def _load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def resolve_outcomes(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    signal_index: Sequence[int],
+    direction: Sequence[int],
+    entry: Sequence[float],
+    sl: Sequence[float],
+    tp: Sequence[float],
+    max_lookahead: int,
+    backend: str = "auto",
+) -> List[Dict[str, Any]]:
+    """
+    Resolve the first SL/TP hit for every signal.
+
+    Args:
+        highs: Bar highs, indexed like signal_index.
+        lows: Bar lows.
+        signal_index: Bar index of each signal; bars after it are scanned.
+        direction: 1 for LONG, anything else is treated as SHORT.
+        entry: Entry price per signal.
+        sl: Stop price per signal (risk must be positive).
+        tp: Target price per signal.
+        max_lookahead: Bars scanned after the signal bar.
+        backend: "auto" (NumPy when installed), "numpy" or "python".
+
+    Returns:
+        One dict per signal, in input order: hit (tp/sl/sl_tp_same_bar/open),
+        exit_index (bar index or None), bars_to_exit, and rr (reward/risk on
+        TP, -1.0 on SL, 0.0 open).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown outcome backend {backend!r}; expected one of {BACKENDS}")
+    np = _load_numpy() if backend in ("auto", "numpy") else None
+    if np is None and backend == "numpy":
+        raise ImportError("numpy is required for backend='numpy' (pip install .[ml])")
+
+    n_signals = len(signal_index)
+    if not (len(direction) == len(entry) == len(sl) == len(tp) == n_signals):
+        raise ValueError("signal arrays must have the same length")
+    if np is None:
+        return _resolve_python(highs, lows, signal_index, direction, entry, sl, tp, max_lookahead)
+
+    results: List[Dict[str, Any]] = []
+    for start in range(0, n_signals, _CHUNK):
+        stop = start + _CHUNK
+        results.extend(
+            _resolve_numpy(
+                np,
+                highs,
+                lows,
+                signal_index[start:stop],
+                direction[start:stop],
+                entry[start:stop],
+                sl[start:stop],
+                tp[start:stop],
+                max_lookahead,
+            )
+        )
+    return results
+
+
+def _outcome(hit: str, exit_index, bars: int, rr: float) -> Dict[str, Any]:
+    return {"hit": hit, "exit_index": exit_index, "bars_to_exit": bars, "rr": rr}
+
+
+def _resolve_python(highs, lows, signal_index, direction, entry, sl, tp, max_lookahead):
+    last_bar = len(highs) - 1
+    results = []
+    for i, d, e, s, t in zip(signal_index, direction, entry, sl, tp):
+        outcome = _outcome(HIT_OPEN, None, max_lookahead, 0.0)
+        for j in range(i + 1, min(last_bar, i + max_lookahead) + 1):
+            if d == 1:
+                hit_sl = lows[j] <= s
+                hit_tp = highs[j] >= t
+            else:
+                hit_sl = highs[j] >= s
+                hit_tp = lows[j] <= t
+            if hit_sl:
+                outcome = _outcome(HIT_SAME_BAR if hit_tp else HIT_SL, j, j - i, -1.0)
+                break
+            if hit_tp:
+                rr = (t - e) / (e - s) if d == 1 else (e - t) / (s - e)
+                outcome = _outcome(HIT_TP, j, j - i, rr)
+                break
+        results.append(outcome)
+    return results
+
+
+def _resolve_numpy(np, highs, lows, signal_index, direction, entry, sl, tp, max_lookahead):
+    n_signals = len(signal_index)
+    n_bars = len(highs)
+    if not n_signals:
+        return []
+    if max_lookahead <= 0 or not n_bars:
+        return [_outcome(HIT_OPEN, None, max_lookahead, 0.0) for _ in range(n_signals)]
+
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    idx = np.asarray(signal_index, dtype=np.int64)
+    is_long = np.asarray(direction) == 1
+    e = np.asarray(entry, dtype=np.float64)
+    s = np.asarray(sl, dtype=np.float64)
+    t = np.asarray(tp, dtype=np.float64)
+
+    # Bar indexes scanned per signal (rows) and whether they exist
+    bars = idx[:, None] + np.arange(1, max_lookahead + 1)[None, :]
+    in_range = bars < n_bars
+    bars = np.minimum(bars, n_bars - 1)
+    window_high = highs[bars]
+    window_low = lows[bars]
+
+    long_rows = is_long[:, None]
+    hit_sl = np.where(long_rows, window_low <= s[:, None], window_high >= s[:, None]) & in_range
+    hit_tp = np.where(long_rows, window_high >= t[:, None], window_low <= t[:, None]) & in_range
+
+    first = (hit_sl | hit_tp).argmax(axis=1)
+    rows = np.arange(n_signals)
+    sl_first = hit_sl[rows, first]
+    tp_first = hit_tp[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):  # only TP rows are read
+        rr = np.where(is_long, t - e, e - t) / np.where(is_long, e - s, s - e)
+
+    results = []
+    for k in range(n_signals):
+        bars_to_exit = int(first[k]) + 1
+        exit_index = int(idx[k]) + bars_to_exit
+        if sl_first[k]:
+            hit = HIT_SAME_BAR if tp_first[k] else HIT_SL
+            results.append(_outcome(hit, exit_index, bars_to_exit, -1.0))
+        elif tp_first[k]:
+            results.append(_outcome(HIT_TP, exit_index, bars_to_exit, float(rr[k])))
+        else:
+            results.append(_outcome(HIT_OPEN, None, max_lookahead, 0.0))
+    return results
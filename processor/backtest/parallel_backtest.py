@@ -0,0 +1,304 @@
+"""
+Parallel Strategy V1 backtest (same results layout as run_full_backtest.py).
+
+Each data file is a shard run in its own worker process with fresh
+Fix14MgannSwing / Fix16StrategyV1 instances:
+
+- Warm-up: the worker first replays the previous file (or its last
+  `--warmup-bars` bars) through the modules, discarding signals, to rebuild
+  swing/leg and FVG state at the file boundary. The strategy's bar counter
+  starts at the warm-up's global bar offset, so signal bar indexes and the FVG
+  cleanup cadence are global as well.
+- Results equal a sequential run only if the boundary state depends on no
+  more than the warm-up window. Swing/leg state restarts on every trend
+  change, but a trend (or an FVG zone younger than fvg_max_age) that spans
+  the whole warm-up is not reproduced; widen --warmup-bars when in doubt.
+- Trades still open at the end of a shard are continued in the parent over the
+  next files' bar highs/lows (returned by the workers).
+- Closed trades are merged by (exit file, exit bar, signal order), which is the
+  order the sequential simulator closes them in.
+
+Usage:
+python -m processor.backtest.parallel_backtest --data-dir data_backtesst --output backtest_results_full.json --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from processor.backtest.trade_simulator import TradeSimulator
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+
+DEFAULT_CONFIG = {
+    "threshold_ticks": 6,
+    "tick_size": 0.1,
+    "risk_reward_ratio": 3.0,
+    "sl_buffer_ticks": 2,
+}
+
+
+@dataclass
+class Shard:
+    index: int
+    path: Path
+    offset: int  # global bar index of the first bar in `path`
+    warmup_path: Optional[Path] = None
+    warmup_skip: int = 0  # leading bars of warmup_path not replayed
+    config: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_CONFIG))
+
+    @property
+    def start_count(self) -> int:
+        """Strategy bar counter at the first replayed bar."""
+        if self.warmup_path is None:
+            return self.offset
+        return self.offset - count_bars(self.warmup_path) + self.warmup_skip
+
+
+def count_bars(path: Path) -> int:
+    """Bars in a JSONL file as counted by the backtest loop (non-blank lines)."""
+    with Path(path).open("rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def _iter_bars(path: Path, skip: int = 0) -> Iterator[dict[str, Any]]:
+    with Path(path).open("r") as f:
+        seen = 0
+        for line in f:
+            if not line.strip():
+                continue
+            seen += 1
+            if seen <= skip:
+                continue
+            try:
+                yield json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+
+
+def run_shard(shard: Shard) -> Dict[str, Any]:
+    """
+    Run one file with warm-up; the per-bar loop mirrors run_full_backtest.process_file.
+
+    Returns:
+        file_stats, closed/open trades (in simulator order) and the (high, low)
+        of every simulated bar for continuing carried-over trades.
+    """
+    cfg = shard.config
+    mgann = Fix14MgannSwing(threshold_ticks=cfg["threshold_ticks"])
+    strategy = Fix16StrategyV1(
+        tick_size=cfg["tick_size"],
+        risk_reward_ratio=cfg["risk_reward_ratio"],
+        sl_buffer_ticks=cfg["sl_buffer_ticks"],
+    )
+    strategy.bar_count = shard.start_count
+
+    if shard.warmup_path is not None:
+        for raw_bar in _iter_bars(shard.warmup_path, shard.warmup_skip):
+            try:
+                strategy.process_bar(mgann.process_bar(normalize_bar(raw_bar)))
+            except Exception:  # noqa: BLE001 - same tolerance as the main loop
+                continue
+
+    simulator = TradeSimulator()
+    counts: dict[str, int] = {
+        "bars": 0,
+        "signals": 0,
+        "long_signals": 0,
+        "short_signals": 0,
+    }
+    bars_hl: List[Tuple[float, float]] = []
+    for raw_bar in _iter_bars(shard.path):
+        try:
+            bar = strategy.process_bar(mgann.process_bar(normalize_bar(raw_bar)))
+            simulator.update_trades(bar, counts["bars"])
+            bars_hl.append((bar.get("high", 0), bar.get("low", 0)))
+
+            if "signal" in bar:
+                signal = bar["signal"]
+                counts["signals"] += 1
+                if signal["direction"] == "LONG":
+                    counts["long_signals"] += 1
+                else:
+                    counts["short_signals"] += 1
+                simulator.add_signal(signal, 0, session=raw_bar.get("session"))
+
+            counts["bars"] += 1
+        except Exception as e:  # noqa: BLE001
+            print(f"⚠️  {shard.path.name}: error processing bar {counts['bars']}: {e}")
+            continue
+
+    return {
+        "index": shard.index,
+        "file_stats": {"file": shard.path.name, **counts},
+        "closed_trades": simulator.closed_trades,
+        "open_trades": simulator.open_trades,
+        "bars_hl": bars_hl,
+    }
+
+
+def plan_shards(
+    data_files: List[Path],
+    warmup_bars: Optional[int] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> List[Shard]:
+    """
+    One shard per file, each warmed up on the previous file.
+
+    Args:
+        data_files: Files in backtest order.
+        warmup_bars: Bars of the previous file to replay (None: all, 0: none).
+        config: Module parameters (DEFAULT_CONFIG keys).
+    """
+    cfg = {**DEFAULT_CONFIG, **(config or {})}
+    shards: List[Shard] = []
+    offset = 0
+    prev: Optional[Path] = None
+    prev_bars = 0
+    for idx, path in enumerate(data_files):
+        shard = Shard(index=idx, path=path, offset=offset, config=cfg)
+        if prev is not None and warmup_bars != 0:
+            shard.warmup_path = prev
+            if warmup_bars is not None:
+                shard.warmup_skip = max(0, prev_bars - warmup_bars)
+        shards.append(shard)
+        prev_bars = count_bars(path)
+        offset += prev_bars
+        prev = path
+    return shards
+
+
+def merge_shards(results: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Combine shard outputs in file order.
+
+    Returns:
+        (file_stats, closed_trades, open_trades) as a sequential run produces them.
+    """
+    results = sorted(results, key=lambda r: r["index"])
+    keyed_closed: List[Tuple[Tuple[int, int, int, int], Dict]] = []
+    carried: List[Tuple[Tuple[int, int], Dict]] = []  # (signal order, trade)
+    file_stats = []
+
+    for res in results:
+        idx = res["index"]
+        file_stats.append(res["file_stats"])
+
+        # Trades opened in earlier files keep running over this file's bars
+        if carried:
+            sim = TradeSimulator()
+            order = {id(t): seq for seq, t in carried}
+            sim.open_trades = [t for _, t in carried]
+            for bar_idx, (high, low) in enumerate(res["bars_hl"]):
+                sim.update_trades({"high": high, "low": low}, bar_idx)
+            for trade in sim.closed_trades:
+                keyed_closed.append(((idx, trade["exit_bar"]) + order[id(trade)], trade))
+            carried = [(order[id(t)], t) for t in sim.open_trades]
+
+        opened = res["closed_trades"] + res["open_trades"]
+        seqs = {id(t): (idx, n) for n, t in enumerate(sorted(opened, key=_signal_order))}
+        for trade in res["closed_trades"]:
+            keyed_closed.append(((idx, trade["exit_bar"]) + seqs[id(trade)], trade))
+        carried.extend((seqs[id(t)], t) for t in res["open_trades"])
+        carried.sort(key=lambda item: item[0])
+
+    keyed_closed.sort(key=lambda item: item[0])
+    return file_stats, [t for _, t in keyed_closed], [t for _, t in carried]
+
+
+def _signal_order(trade: Dict[str, Any]) -> int:
+    # Signals are at most one per bar, so the global bar index orders them
+    return int(trade["signal_bar"])
+
+
+def run_parallel(
+    data_files: List[Path],
+    workers: Optional[int] = None,
+    warmup_bars: Optional[int] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run the sharded backtest and return the backtest_results_full.json payload."""
+    shards = plan_shards(data_files, warmup_bars=warmup_bars, config=config)
+    workers = workers or min(len(shards), os.cpu_count() or 1)
+    if workers <= 1:
+        results = [run_shard(s) for s in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_shard, shards))
+
+    file_stats, closed_trades, open_trades = merge_shards(results)
+
+    # Close any remaining open trades (end of dataset)
+    for trade in open_trades:
+        trade["status"] = "open_eod"
+        trade["exit_reason"] = "END_OF_DATA"
+
+    simulator = TradeSimulator()
+    simulator.closed_trades = closed_trades
+    total_bars = sum(f["bars"] for f in file_stats)
+    total_signals = sum(f["signals"] for f in file_stats)
+    return {
+        "summary": simulator.get_stats(),
+        "file_stats": file_stats,
+        "closed_trades": closed_trades,
+        "open_trades": open_trades,
+        "config": {
+            "files_processed": len(data_files),
+            "total_bars": total_bars,
+            "total_signals": total_signals,
+            "date_range": {
+                "start": data_files[0].name.split("_")[-1].split(".")[0],
+                "end": data_files[-1].name.split("_")[-1].split(".")[0],
+            },
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run Strategy V1 backtest in parallel by file.")
+    parser.add_argument("--data-dir", default="data_backtesst", help="Directory of JSONL files")
+    parser.add_argument(
+        "--output", default="backtest_results_full.json", help="Path to write results JSON"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--warmup-bars",
+        type=int,
+        default=None,
+        help="Bars of the previous file replayed before each shard (default: whole file).",
+    )
+    args = parser.parse_args()
+
+    data_files = sorted(Path(args.data_dir).glob("*.jsonl"))
+    if not data_files:
+        print(f"❌ No JSONL files found in {args.data_dir}")
+        return 1
+
+    results = run_parallel(data_files, workers=args.workers, warmup_bars=args.warmup_bars)
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    for stats in results["file_stats"]:
+        print(f"{stats['file']}: {stats['bars']} bars, {stats['signals']} signals")
+    summary = results["summary"]
+    if summary:
+        print(
+            f"Net P&L: ${summary['net_profit']:,.2f} | PF: {summary['profit_factor']:.2f} | "
+            f"WR: {summary['win_rate'] * 100:.1f}% | trades: {summary['total_trades']}"
+        )
+    else:
+        print("⚠️  NO COMPLETED TRADES")
+    print(f"✓ Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
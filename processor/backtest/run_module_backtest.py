@@ -5,14 +5,33 @@ Reads JSONL bar_states, runs module pipeline, writes enriched JSONL and summary
 
 Usage:
 python -m processor.backtest.run_module_backtest --inputs path/to/file.jsonl --output enriched.jsonl --summary summary.json
+
+Add `--profile [profile.json]` to print a per-module timing table and save it as JSON
+(`--profile-memory` also records tracemalloc allocations; slower).
+Add `--use-cache` to load inputs through the columnar cache (see processor.ingest.columnar_cache).
+Add `--project-fields` to decode only the fields the pipeline reads (see
+processor.ingest.projection); the enriched output then omits raw fields no module uses.
+Add `--output-cache [DIR]` to load unchanged modules' outputs from disk and recompute
+only modules whose version/config (or an upstream one) changed (see
+processor.core.module_cache).
+Add `--waves [PATH]` to save the completed swing legs as a WaveTable next to the enriched
+output (default: <output>.waves; see processor.core.wave_table).
+Add `--resume CKPT` to start from a saved pipeline state instead of cold, and
+`--save-checkpoint CKPT` to save the state after the last bar, e.g. to run each day
+incrementally from the previous day's checkpoint (see processor.core.checkpoint).
 """
 from __future__ import annotations
 
 import argparse
 import json
+from collections.abc import Callable
 from pathlib import Path
 from typing import Iterable, List, Dict, Any
 
+from processor.backtest.outcomes import HIT_OPEN, HIT_TP, high_low_arrays, resolve_outcomes
+from processor.core.module_cache import ModuleOutputCache, input_key
+from processor.ingest.columnar_cache import DEFAULT_CACHE_DIRNAME, file_digest, load_records
+from processor.ingest.projection import BACKENDS, ProjectedReader, pipeline_fields
 from processor.smc_processor import SMCDataProcessor
 from processor.modules.fix01_ob_quality import OBQualityModule
 from processor.modules.fix02_fvg_quality import FVGQualityModule
@@ -26,6 +45,7 @@ from processor.modules.fix09_volume_profile import VolumeProfileModule
 from processor.modules.fix10_mtf_alignment import MTFAlignmentModule
 from processor.modules.fix11_liquidity_map import LiquidityMapModule
 from processor.modules.fix12_fvg_retest import FVGRetestModule
+from processor.modules.fix13_wave_delta import WaveDeltaModule
 
 
 def load_jsonl(path: Path) -> Iterable[Dict[str, Any]]:
@@ -42,6 +62,15 @@ def write_jsonl(path: Path, records: Iterable[Dict[str, Any]]) -> None:
             f.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
 
+# Raw fields read after the pipeline by annotate_outcomes() and summarize()
+OUTPUT_FIELDS = (
+    "fvg_retest_detected", "signal_type", "entry", "close", "stop_price", "sl", "tp",
+    "tp1_price", "tp2_price", "tp3_price", "high", "low", "bar.h", "bar.l",
+    "fvg_detected", "fvg_quality_score", "confluence_score", "mtf_data_complete",
+    "market_data_complete", "liquidity_sweep_detected", "divergence_detected",
+)
+
+
 def _get_high_low(rec: Dict[str, Any]) -> tuple[float, float]:
     high = rec.get("high")
     low = rec.get("low")
@@ -53,11 +82,19 @@ def _get_high_low(rec: Dict[str, Any]) -> tuple[float, float]:
     return float(high or 0.0), float(low or 0.0)
 
 
-def annotate_outcomes(records: list[Dict[str, Any]], max_lookahead: int = 80) -> None:
+def annotate_outcomes(
+    records: list[Dict[str, Any]], max_lookahead: int = 80, backend: str = "auto"
+) -> None:
     """
     Annotate records with outcome for FVG retest signals.
     Fields added: outcome_label (win/loss/open), outcome_rr, outcome_bars_to_exit, outcome_hit (tp/sl/open).
+    All signals are resolved in one batch (see processor.backtest.outcomes).
     """
+    signals: List[int] = []
+    directions: List[int] = []
+    entries: List[float] = []
+    sls: List[float] = []
+    tps: List[float] = []
     for i, rec in enumerate(records):
         if not rec.get("fvg_retest_detected"):
             continue
@@ -78,23 +115,29 @@ def annotate_outcomes(records: list[Dict[str, Any]], max_lookahead: int = 80) ->
         risk = (entry - sl) if direction == 1 else (sl - entry)
         if risk <= 0:
             continue
+        signals.append(i)
+        directions.append(direction)
+        entries.append(entry)
+        sls.append(sl)
+        tps.append(tp)
 
-        last_bar = min(len(records) - 1, i + max_lookahead)
-        outcome = {"outcome_label": "open", "outcome_rr": 0.0, "outcome_bars_to_exit": max_lookahead, "outcome_hit": "open"}
-        for j in range(i + 1, last_bar + 1):
-            hi, lo = _get_high_low(records[j])
-            hit_sl = lo <= sl if direction == 1 else hi >= sl
-            hit_tp = hi >= tp if direction == 1 else lo <= tp
-            if hit_sl and hit_tp:
-                outcome = {"outcome_label": "loss", "outcome_rr": -1.0, "outcome_bars_to_exit": j - i, "outcome_hit": "sl_tp_same_bar"}
-                break
-            if hit_sl:
-                outcome = {"outcome_label": "loss", "outcome_rr": -1.0, "outcome_bars_to_exit": j - i, "outcome_hit": "sl"}
-                break
-            if hit_tp:
-                outcome = {"outcome_label": "win", "outcome_rr": (tp - entry) / risk if direction == 1 else (entry - tp) / risk, "outcome_bars_to_exit": j - i, "outcome_hit": "tp"}
-                break
-        rec.update(outcome)
+    if not signals:
+        return
+    highs, lows = high_low_arrays(records, _get_high_low)
+    outcomes = resolve_outcomes(
+        highs, lows, signals, directions, entries, sls, tps, max_lookahead, backend=backend
+    )
+    for i, res in zip(signals, outcomes):
+        if res["hit"] == HIT_OPEN:
+            label = "open"
+        else:
+            label = "win" if res["hit"] == HIT_TP else "loss"
+        records[i].update({
+            "outcome_label": label,
+            "outcome_rr": res["rr"],
+            "outcome_bars_to_exit": res["bars_to_exit"],
+            "outcome_hit": res["hit"],
+        })
 
 
 def build_default_modules() -> List:
@@ -129,7 +172,7 @@ def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
         vals = [r.get(key, 0) for r in records if key in r]
         return round(sum(vals) / len(vals), 4) if vals else 0.0
 
-    def pct(cond):
+    def pct(cond: Callable[[dict[str, Any]], Any]) -> float:
         cnt = sum(1 for r in records if cond(r))
         return round(cnt * 100.0 / total, 2) if total else 0.0
 
@@ -156,25 +199,149 @@ def main() -> None:
         default=80,
         help="Bars to look ahead when annotating outcomes for retest signals.",
     )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="module_profile.json",
+        default=None,
+        metavar="PATH",
+        help="Profile modules, print a ranked table and write it to PATH "
+        "(default: module_profile.json).",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, also track bytes allocated per module via tracemalloc.",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Load input via the memory-mapped columnar cache (built on first use).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Columnar cache root (default: <input dir>/.smc_cache).",
+    )
+    parser.add_argument(
+        "--project-fields",
+        action="store_true",
+        help="Decode only the fields the pipeline and outcome annotation read.",
+    )
+    parser.add_argument(
+        "--output-cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help="Cache per-module outputs keyed by input hash, module version and config "
+        "(default DIR: <input dir>/.smc_cache/modules).",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=BACKENDS,
+        default="auto",
+        help="JSON decoder for --project-fields (auto: orjson when installed).",
+    )
+    parser.add_argument(
+        "--waves",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Save completed waves as a WaveTable (default PATH: <output or input>.waves).",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="CKPT",
+        help="Restore the pipeline state from a checkpoint before the first bar.",
+    )
+    parser.add_argument(
+        "--save-checkpoint",
+        default=None,
+        metavar="CKPT",
+        help="Save the pipeline state to a checkpoint after the last bar.",
+    )
     args = parser.parse_args()
+    if args.waves is not None and args.output_cache is not None:
+        # Replayed stages do not run the wave module, so its table would be incomplete
+        parser.error("--waves cannot be combined with --output-cache")
+    if (args.resume or args.save_checkpoint) and args.output_cache is not None:
+        # Replayed stages leave module state untouched, and cache keys assume a cold start
+        parser.error("--resume/--save-checkpoint cannot be combined with --output-cache")
 
     input_path = Path(args.inputs)
     out_path = Path(args.output) if args.output else None
     summary_path = Path(args.summary) if args.summary else None
 
     modules = build_default_modules()
-    processor = SMCDataProcessor(modules=modules)
+    if args.waves is not None:
+        # The processor's default wave module does not keep a wave table
+        modules.append(WaveDeltaModule(record_waves=True))
+    processor = SMCDataProcessor(
+        modules=modules,
+        profile=bool(args.profile),
+        trace_allocations=bool(args.profile) and args.profile_memory,
+    )
+    if args.resume:
+        processor.restore_checkpoint(Path(args.resume))
+
+    fields = None
+    if args.project_fields:
+        fields = sorted(pipeline_fields(processor.modules, OUTPUT_FIELDS))
+    if args.use_cache:
+        cache_dir = Path(args.cache_dir) if args.cache_dir else None
+        bars: Iterable[Dict[str, Any]] = load_records(input_path, cache_dir, fields)
+    elif fields is not None:
+        bars = ProjectedReader(input_path, fields, backend=args.json_backend)
+    else:
+        bars = load_jsonl(input_path)
+
+    cached_run = None
+    if args.output_cache is not None:
+        cache_root = (
+            Path(args.output_cache)
+            if args.output_cache
+            else input_path.parent / DEFAULT_CACHE_DIRNAME / "modules"
+        )
+        # Projection changes the records modules see, so it is part of the input key
+        reader = json.dumps(sorted(fields)) if fields is not None else "all"
+        root_key = input_key([file_digest(input_path)], reader)
+        cached_run = ModuleOutputCache(cache_root).open_run(root_key, processor.modules)
+        processor.use_output_cache(cached_run)
 
     enriched: List[Dict[str, Any]] = []
-    for bar in load_jsonl(input_path):
+    for bar in bars:
         enriched.append(processor.process_bar(bar))
 
+    if cached_run is not None:
+        cached_run.close()
+        print("Module output cache:\n" + cached_run.summary())
+
+    if args.save_checkpoint:
+        processor.save_checkpoint(Path(args.save_checkpoint))
+        print(f"Checkpoint: {len(processor.history)} bars of history -> {args.save_checkpoint}")
+
+    if processor.profiler is not None:
+        processor.profiler.stop()
+        print(processor.profiler.format_table())
+        processor.profiler.write_json(Path(args.profile))
+
     # Annotate outcomes for retest signals (uses stop/tp if present)
     annotate_outcomes(enriched, max_lookahead=args.max_lookahead)
 
     if out_path:
         write_jsonl(out_path, enriched)
 
+    if args.waves is not None:
+        waves = next(m.waves for m in processor.modules if isinstance(m, WaveDeltaModule))
+        default_path = (out_path or input_path).with_suffix(".waves")
+        waves_path = Path(args.waves) if args.waves else default_path
+        if waves is not None:  # always: the module was built with record_waves=True
+            waves.save(waves_path)
+            print(f"Wave table: {len(waves)} waves -> {waves_path}")
+
     summary = summarize(enriched)
     if summary_path:
         summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
@@ -0,0 +1,246 @@
+"""
+Streaming performance statistics for closed trades.
+
+TradeStats is updated once per closed trade and never needs the trade list:
+
+- counts and P&L sums per outcome, accumulated in closing order, so
+  summary() equals a full pass over the same trades (TradeSimulator.get_stats);
+- Welford mean/variance of P&L and of the R multiple (P&L / risk);
+- running equity peak, trough and max drawdown;
+- per-direction and per-session sub-totals;
+- an R-multiple histogram with fixed-width bins.
+
+Accumulators merge (`a.merge(b)`), e.g. across worker shards: counts, sums,
+moments and histograms are order-free, and equity/drawdown are combined as
+"a's trades, then b's". Merged sums can differ from a sequential pass in the
+last float bits.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Optional
+
+
+class RunningMoments:
+    """Count, mean and variance of a stream (Welford; Chan et al. to merge)."""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0.0 below two values)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class EquityCurve:
+    """Cumulative P&L with running peak, trough and max drawdown (start at 0)."""
+
+    __slots__ = ("total", "peak", "trough", "max_drawdown")
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.peak = 0  # highest cumulative value, including the start
+        self.trough = 0  # lowest cumulative value, including the start
+        self.max_drawdown = 0
+
+    def push(self, pnl: float) -> None:
+        self.total += pnl
+        if self.total > self.peak:
+            self.peak = self.total
+        elif self.total < self.trough:
+            self.trough = self.total
+        drawdown = self.peak - self.total
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+
+    def merge(self, other: "EquityCurve") -> None:
+        """Append `other`'s curve (its trades closed after this one's)."""
+        self.max_drawdown = max(
+            self.max_drawdown, other.max_drawdown, self.peak - (self.total + other.trough)
+        )
+        self.peak = max(self.peak, self.total + other.peak)
+        self.trough = min(self.trough, self.total + other.trough)
+        self.total += other.total
+
+
+class RHistogram:
+    """Counts of R multiples in bins of `width` R, keyed by the bin's lower edge."""
+
+    __slots__ = ("width", "_bins")
+
+    def __init__(self, width: float = 0.5) -> None:
+        if width <= 0:
+            raise ValueError("RHistogram width must be positive")
+        self.width = width
+        self._bins: Dict[int, int] = {}
+
+    def push(self, r: float) -> None:
+        b = math.floor(r / self.width)
+        self._bins[b] = self._bins.get(b, 0) + 1
+
+    def merge(self, other: "RHistogram") -> None:
+        if other.width != self.width:
+            raise ValueError("cannot merge histograms with different bin widths")
+        for b, n in other._bins.items():
+            self._bins[b] = self._bins.get(b, 0) + n
+
+    def to_dict(self) -> Dict[str, int]:
+        """{lower edge: count}, ascending."""
+        return {f"{b * self.width:g}": self._bins[b] for b in sorted(self._bins)}
+
+
+class TradeStats:
+    """Online accumulator over closed trades (dicts with status, pnl, risk, bars_held)."""
+
+    def __init__(self, r_bin_width: float = 0.5, breakdown: bool = True) -> None:
+        """
+        Args:
+            r_bin_width: R-multiple histogram bin width.
+            breakdown: Keep per-direction and per-session sub-totals.
+        """
+        self.total_trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.win_pnl = 0
+        self.loss_pnl = 0
+        self.bars_held = 0
+        self.pnl = RunningMoments()
+        self.r_multiple = RunningMoments()
+        self.equity = EquityCurve()
+        self.r_histogram = RHistogram(r_bin_width)
+        self._breakdown = breakdown
+        self.by_direction: Dict[Any, TradeStats] = {}
+        self.by_session: Dict[Any, TradeStats] = {}
+
+    def add(self, trade: Dict[str, Any], session: Optional[str] = None) -> None:
+        """
+        Record one closed trade, in closing order.
+
+        Args:
+            trade: Closed trade; 'win' / 'loss' status, 'pnl', optional 'risk'
+                (for the R multiple), 'bars_held' and 'direction'.
+            session: Trading session of the trade (default: trade['session']).
+        """
+        pnl = trade['pnl']
+        self.total_trades += 1
+        if trade['status'] == 'win':
+            self.wins += 1
+            self.win_pnl += pnl
+        elif trade['status'] == 'loss':
+            self.losses += 1
+            self.loss_pnl += pnl
+        self.bars_held += trade.get('bars_held', 0)
+        self.pnl.push(pnl)
+        self.equity.push(pnl)
+        risk = trade.get('risk')
+        if risk:
+            r = pnl / risk
+            self.r_multiple.push(r)
+            self.r_histogram.push(r)
+
+        if self._breakdown:
+            if session is None:
+                session = trade.get('session')
+            for groups, key in ((self.by_direction, trade.get('direction')),
+                                (self.by_session, session)):
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = TradeStats(self.r_histogram.width, breakdown=False)
+                group.add(trade)
+
+    def extend(self, trades: Iterable[Dict[str, Any]]) -> "TradeStats":
+        for trade in trades:
+            self.add(trade)
+        return self
+
+    def merge(self, other: "TradeStats") -> "TradeStats":
+        """Fold in another accumulator whose trades closed after this one's."""
+        self.total_trades += other.total_trades
+        self.wins += other.wins
+        self.losses += other.losses
+        self.win_pnl += other.win_pnl
+        self.loss_pnl += other.loss_pnl
+        self.bars_held += other.bars_held
+        self.pnl.merge(other.pnl)
+        self.r_multiple.merge(other.r_multiple)
+        self.equity.merge(other.equity)
+        self.r_histogram.merge(other.r_histogram)
+        if self._breakdown:
+            for mine, theirs in ((self.by_direction, other.by_direction),
+                                 (self.by_session, other.by_session)):
+                for key, group in theirs.items():
+                    if key in mine:
+                        mine[key].merge(group)
+                    else:
+                        mine[key] = TradeStats(self.r_histogram.width, breakdown=False).merge(
+                            group
+                        )
+        return self
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """Performance metrics as TradeSimulator.get_stats() reports them (None if empty)."""
+        total = self.total_trades
+        if not total:
+            return None
+        gross_profit = self.win_pnl
+        gross_loss = abs(self.loss_pnl)
+        return {
+            'total_trades': total,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.wins / total,
+            'gross_profit': gross_profit,
+            'gross_loss': gross_loss,
+            'net_profit': gross_profit - gross_loss,
+            'profit_factor': gross_profit / gross_loss if gross_loss > 0 else 0,
+            'avg_win': gross_profit / self.wins if self.wins > 0 else 0,
+            'avg_loss': gross_loss / self.losses if self.losses > 0 else 0,
+            'max_drawdown': self.equity.max_drawdown,
+            'avg_bars_held': self.bars_held / total,
+        }
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        """summary() plus dispersion, R-multiple histogram and breakdowns."""
+        summary = self.summary()
+        if summary is None:
+            return None
+        summary.update({
+            'pnl_mean': self.pnl.mean,
+            'pnl_std': self.pnl.std,
+            'r_mean': self.r_multiple.mean,
+            'r_std': self.r_multiple.std,
+            'peak_equity': self.equity.peak,
+            'r_histogram': self.r_histogram.to_dict(),
+        })
+        if self._breakdown:
+            summary['by_direction'] = {
+                str(key): group.report() for key, group in self.by_direction.items()
+            }
+            summary['by_session'] = {
+                str(key): group.report() for key, group in self.by_session.items()
+            }
+        return summary
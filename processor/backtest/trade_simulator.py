@@ -0,0 +1,208 @@
+"""
+TradeSimulator: bar-by-bar SL/TP resolution for strategy signals.
+
+Trades are opened from a strategy signal's `trade` dict and closed on the first
+bar whose low/high touches the stop or target (stop checked first). Shared by
+run_full_backtest.py and the parallel runner.
+
+Open trades live in TriggerBooks: per direction, one list of (sl, seq) and one
+of (tp, seq) kept sorted with bisect. A bar only visits the trades whose stop or
+target it reaches (O(log n + hits)) instead of every open trade, and trades hit
+on the same bar close in the order they were opened, as before.
+
+Performance metrics are accumulated per closed trade in a TradeStats
+(processor.backtest.stats); with keep_trades=False the closed trades themselves
+are not retained.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import ItemsView, Iterable
+from math import inf
+from typing import Any
+
+from processor.backtest.stats import TradeStats
+
+LONG = 'LONG'
+SHORT = 'SHORT'
+
+
+class TriggerBooks:
+    """Open trades indexed by stop and target price per direction."""
+
+    def __init__(self) -> None:
+        self._trades: dict[int, dict[str, Any]] = {}  # seq -> trade, in opening order
+        self._sides: dict[int, str | None] = {}  # seq -> LONG / SHORT / None (never triggers)
+        # side -> (sl keys, tp keys), each sorted (price, seq)
+        self._books: dict[str, tuple[list[tuple[float, int]], list[tuple[float, int]]]] = {
+            LONG: ([], []),
+            SHORT: ([], []),
+        }
+        self._next_seq = 0
+
+    def add(self, trade: dict[str, Any], side: str | None) -> int:
+        """
+        Track a trade; returns its seq (opening order).
+
+        Args:
+            trade: Trade dict with 'sl' and 'tp' prices.
+            side: LONG (stop below, target above), SHORT, or None to keep the
+                trade open without ever triggering.
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        self._trades[seq] = trade
+        self._sides[seq] = side
+        if side is not None:
+            sl_keys, tp_keys = self._books[side]
+            insort(sl_keys, (trade['sl'], seq))
+            insort(tp_keys, (trade['tp'], seq))
+        return seq
+
+    def remove(self, seq: int) -> dict[str, Any]:
+        """Stop tracking a trade and return it."""
+        trade = self._trades.pop(seq)
+        side = self._sides.pop(seq)
+        if side is not None:
+            sl_keys, tp_keys = self._books[side]
+            del sl_keys[bisect_left(sl_keys, (trade['sl'], seq))]
+            del tp_keys[bisect_left(tp_keys, (trade['tp'], seq))]
+        return trade
+
+    def hits(self, high: float, low: float) -> list[tuple[int, dict[str, Any], bool]]:
+        """
+        Trades whose stop or target lies within reach of a bar.
+
+        Returns:
+            [(seq, trade, stop_hit)] in opening order; stop_hit is True when the
+            stop was reached (it takes precedence over the target).
+        """
+        stops: set[int] = set()
+        targets: set[int] = set()
+        sl_keys, tp_keys = self._books[LONG]
+        if sl_keys:
+            stops.update(seq for _, seq in sl_keys[bisect_left(sl_keys, (low, -inf)):])
+            targets.update(seq for _, seq in tp_keys[:bisect_right(tp_keys, (high, inf))])
+        sl_keys, tp_keys = self._books[SHORT]
+        if sl_keys:
+            stops.update(seq for _, seq in sl_keys[:bisect_right(sl_keys, (high, inf))])
+            targets.update(seq for _, seq in tp_keys[bisect_left(tp_keys, (low, -inf)):])
+        if not stops and not targets:
+            return []
+        return [(seq, self._trades[seq], seq in stops) for seq in sorted(stops | targets)]
+
+    @property
+    def next_seq(self) -> int:
+        """Seq the next added trade will get."""
+        return self._next_seq
+
+    def items(self) -> ItemsView[int, dict[str, Any]]:
+        """(seq, trade) pairs in opening order."""
+        return self._trades.items()
+
+    def __len__(self) -> int:
+        return len(self._trades)
+
+
+class TradeSimulator:
+    """Simulate trade execution and track outcomes."""
+
+    def __init__(self, keep_trades: bool = True) -> None:
+        """
+        Args:
+            keep_trades: Keep closed trades in `closed_trades`; without them only
+                the running `stats` are available.
+        """
+        self._book = TriggerBooks()
+        self._opened_at: dict[int, int] = {}  # seq -> update count bars_held counts from
+        self._updates = 0
+        self.keep_trades = keep_trades
+        self._closed_trades: list[dict[str, Any]] = []
+        self.stats = TradeStats()
+
+    @property
+    def closed_trades(self) -> list[dict[str, Any]]:
+        """Closed trades in closing order (empty with keep_trades=False)."""
+        return self._closed_trades
+
+    @closed_trades.setter
+    def closed_trades(self, trades: Iterable[dict[str, Any]]) -> None:
+        """
+        Replace the closed trades (e.g. merged shards); stats are rebuilt from
+        them, including the per-session breakdown (each trade's 'session').
+        """
+        self._closed_trades = list(trades)
+        self.stats = TradeStats().extend(self._closed_trades)
+
+    @property
+    def open_trades(self) -> list[dict[str, Any]]:
+        """Open trades in opening order, with bars_held brought up to date."""
+        trades = []
+        for seq, trade in self._book.items():
+            trade['bars_held'] = self._updates - self._opened_at[seq]
+            trades.append(trade)
+        return trades
+
+    @open_trades.setter
+    def open_trades(self, trades: Iterable[dict[str, Any]]) -> None:
+        """Replace the open trades (e.g. carried over from another simulator)."""
+        self._book = TriggerBooks()
+        self._opened_at = {}
+        for trade in trades:
+            self._track(trade)
+
+    def _track(self, trade: dict[str, Any]) -> int:
+        side = LONG if trade['direction'] == LONG else SHORT
+        seq = self._book.add(trade, side)
+        self._opened_at[seq] = self._updates - trade['bars_held']
+        return seq
+
+    def add_signal(
+        self, signal: dict[str, Any], bars_remaining: int, session: str | None = None
+    ) -> None:
+        """Add new signal as pending trade (session: the signal bar's, kept on the trade)."""
+        trade = signal['trade'].copy()
+        trade.update({
+            'signal_time': signal['timestamp'],
+            'signal_bar': signal['bar_index'],
+            'direction': signal['direction'],
+            'leg': signal['leg'],
+            'fvg_new': signal['fvg_new'],
+            'status': 'open',
+            'exit_bar': None,
+            'exit_price': None,
+            'exit_reason': None,
+            'pnl': 0,
+            'bars_held': 0,
+            'session': session,
+        })
+        self._track(trade)
+
+    def update_trades(self, bar: dict[str, Any], bar_index: int) -> None:
+        """Check if any open trades hit SL or TP."""
+        high = bar.get('high', 0)
+        low = bar.get('low', 0)
+        self._updates += 1
+
+        for seq, trade, stop_hit in self._book.hits(high, low):
+            self._book.remove(seq)
+            trade['bars_held'] = self._updates - self._opened_at.pop(seq)
+            if stop_hit:
+                trade['status'] = 'loss'
+                trade['exit_bar'] = bar_index
+                trade['exit_price'] = trade['sl']
+                trade['exit_reason'] = 'SL_HIT'
+                trade['pnl'] = -trade['risk']
+            else:
+                trade['status'] = 'win'
+                trade['exit_bar'] = bar_index
+                trade['exit_price'] = trade['tp']
+                trade['exit_reason'] = 'TP_HIT'
+                trade['pnl'] = trade['reward']
+            self.stats.add(trade)
+            if self.keep_trades:
+                self._closed_trades.append(trade)
+
+    def get_stats(self) -> dict[str, Any] | None:
+        """Calculate performance metrics (None before the first closed trade)."""
+        return self.stats.summary()
@@ -0,0 +1,394 @@
+"""
+Threshold tuning for the Fix14 wave-strength filters (pb_wave_strength_ok,
+impulse_wave_strength_ok and the Hybrid Rule v4 pullback check) against
+strategy trade outcomes.
+
+One pass over the data runs Fix14MgannSwing and the strategy (V1 by default,
+configured as in run_full_backtest.py) and records every signal as a
+candidate: its trade, resolved once against the file's later bars, and the
+wave features the filters saw at that bar (Fix14MgannSwing.pullback_features /
+impulse_features). The wave features do not depend on the thresholds, and the
+strategies do not read the filter flags, so a threshold set only decides
+which candidates pass. The question answered is "what if the strategy also
+required the filter to pass, with these thresholds?" The features are those of
+the last finished pullback/impulse, kept across trend resets. This differs from
+the exported flags, which a reset clears: the strategies signal on leg 1, right
+after a reset, where pb_wave_strength_ok is always False.
+
+The Hybrid v4 gate runs hybrid_v4_ok() on the same pullback features; its
+average volume is the module's 20-bar average.
+
+Each threshold set is evaluated without touching the bars. Every filter check
+depends on one threshold (PULLBACK_CHECKS / IMPULSE_CHECKS / HYBRID_V4_CHECKS),
+so each (gate, threshold, value) becomes a bitset over the candidates. A set's
+trades are the AND of its bitsets, with the same result as
+pullback_strength_ok() / impulse_strength_ok() / hybrid_v4_ok() per candidate.
+max_counter_delta is shared by the pullback and Hybrid v4 gates. Sets are generated as a grid (TUNING_GRID
+or --grid JSON) or by random search over ranges (TUNING_SPACE or --space).
+The output is the Pareto front of trade count against win rate and against
+PF.
+
+Usage:
+python -m processor.backtest.tune_pullback --output tune_pullback.json
+python -m processor.backtest.tune_pullback --random 5000 --gates pullback impulse
+python -m processor.backtest.tune_pullback --gates hybrid_v4
+python -m processor.backtest.tune_pullback --grid grid.json --strategy "v1:risk_reward_ratio=2.0"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from processor.backtest.bitsets import bitset, iter_bits
+from processor.backtest.eval_filtered_signals import resolve_trades, summarize
+from processor.backtest.fanout import build_slot
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix14_mgann_swing import (
+    DEFAULT_THRESHOLDS,
+    HYBRID_V4_CHECKS,
+    IMPULSE_CHECKS,
+    PULLBACK_CHECKS,
+    Fix14MgannSwing,
+    hybrid_v4_ready,
+    impulse_ready,
+    pullback_ready,
+)
+
+# Trades still open this many bars after the signal count as open
+DEFAULT_MAX_LOOKAHEAD = 240
+
+# gate -> (features attribute on the candidate, precondition, per-threshold checks)
+GATES = {
+    "pullback": ("pullback", pullback_ready, PULLBACK_CHECKS),
+    "impulse": ("impulse", impulse_ready, IMPULSE_CHECKS),
+    "hybrid_v4": ("pullback", hybrid_v4_ready, HYBRID_V4_CHECKS),
+}
+
+# Grid search values (keys not listed keep their DEFAULT_THRESHOLDS value)
+TUNING_GRID: Dict[str, List[Any]] = {
+    "pb_delta_mult": [0.5, 0.7, 1.0, 1.5],
+    "pb_volume_mult": [0.5, 0.7, 1.0, 1.5],
+    "pb_speed_mult": [0.5, 0.7, 1.0, 1.5],
+    "max_counter_delta": [20, 35, 50, 100],
+    "v4_max_strength": [30, 40, 50, 70],
+    "v4_delta_ratio": [0.2, 0.3, 0.5, 1.0],
+    "v4_volume_ratio": [0.4, 0.6, 0.8, 1.2],
+    "v4_avg_volume_mult": [0.7, 1.0, 1.5],
+}
+
+# Random search ranges (lo, hi); int bounds sample integers
+TUNING_SPACE: Dict[str, Tuple[float, float]] = {
+    "pb_delta_mult": (0.3, 2.0),
+    "pb_volume_mult": (0.3, 2.0),
+    "pb_speed_mult": (0.3, 2.0),
+    "max_counter_delta": (10, 150),
+    "impulse_delta_mult": (0.5, 2.5),
+    "impulse_volume_mult": (0.5, 2.5),
+    "impulse_speed_mult": (0.5, 2.5),
+    "v4_max_strength": (20, 80),
+    "v4_delta_ratio": (0.1, 1.5),
+    "v4_volume_ratio": (0.2, 1.5),
+    "v4_avg_volume_mult": (0.5, 2.0),
+}
+
+FRONT_METRICS = ("winrate_pct", "pf")
+
+
+def collect_candidates(
+    data_files: Sequence[Path],
+    strategy: str = "v1",
+    threshold_ticks: int = 6,
+    max_lookahead: int = DEFAULT_MAX_LOOKAHEAD,
+) -> List[Dict[str, Any]]:
+    """
+    Run Fix14 and the strategy once and resolve every signal's trade.
+
+    Module state carries across files (as in run_full_backtest.py); trades are
+    resolved within the signal's own file.
+
+    Returns:
+        One dict per signal with positive risk, in file and bar order: file,
+        index, direction, trade (outcome/rr/bars_to_exit), and the pullback /
+        impulse features current at the signal bar (None when none is
+        pending).
+    """
+    mgann = Fix14MgannSwing(threshold_ticks=threshold_ticks)
+    slot = build_slot(strategy)
+    candidates: List[Dict[str, Any]] = []
+    for path in data_files:
+        bars: List[Dict[str, Any]] = []
+        signals: List[Tuple[int, int, float, float, float]] = []
+        features: Dict[int, Tuple[Any, Any]] = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    bar = mgann.process_bar(normalize_bar(json.loads(line)))
+                    bar = slot.module.process_bar(bar)
+                except Exception:  # noqa: BLE001 - skip the bar, as in run_full_backtest
+                    continue
+                signal = slot.adapter(bar)
+                if signal is not None and signal["trade"]["risk"] > 0:
+                    trade = signal["trade"]
+                    direction = 1 if signal["direction"] == "LONG" else -1
+                    signals.append((len(bars), direction, trade["entry"], trade["sl"], trade["tp"]))
+                    features[len(bars)] = (mgann.pullback_features, mgann.impulse_features)
+                bars.append(bar)
+        for trade in resolve_trades(bars, signals, max_lookahead):
+            pullback, impulse = features[trade["index"]]
+            candidates.append({
+                "file": Path(path).name,
+                "index": trade["index"],
+                "direction": trade["direction"],
+                "trade": trade,
+                "pullback": pullback,
+                "impulse": impulse,
+            })
+    return candidates
+
+
+class GateMasks:
+    """Candidate bitsets for the gate preconditions and each threshold value."""
+
+    def __init__(self, candidates: Sequence[Dict[str, Any]], gates: Sequence[str]) -> None:
+        """
+        Args:
+            candidates: collect_candidates() output.
+            gates: Filters a candidate must pass ("pullback", "impulse", "hybrid_v4").
+        """
+        unknown = set(gates) - set(GATES)
+        if unknown:
+            raise ValueError(f"unknown gates {sorted(unknown)}; expected {sorted(GATES)}")
+        self.candidates = candidates
+        self.gates = tuple(gates)
+        # threshold -> gates that check it (max_counter_delta is shared)
+        self.checks: Dict[str, List[str]] = {}
+        for gate in self.gates:
+            for key in GATES[gate][2]:
+                self.checks.setdefault(key, []).append(gate)
+        n = len(candidates)
+        self.ready = bitset(range(n), n)
+        for gate in self.gates:
+            attr, ready, _ = GATES[gate]
+            self.ready &= bitset((i for i, c in enumerate(candidates) if ready(c[attr])), n)
+        self._masks: Dict[Tuple[str, str, Any], int] = {}
+
+    def mask(self, thresholds: Dict[str, Any]) -> int:
+        """Candidates passing every gate with `thresholds` (DEFAULT_THRESHOLDS fill the rest)."""
+        mask = self.ready
+        for key, gates in self.checks.items():
+            value = thresholds.get(key, DEFAULT_THRESHOLDS[key])
+            for gate in gates:
+                if not mask:
+                    return mask
+                mask &= self._value_mask(gate, key, value)
+        return mask
+
+    def _value_mask(self, gate: str, key: str, value: Any) -> int:
+        cached = self._masks.get((gate, key, value))
+        if cached is None:
+            attr, _, checks = GATES[gate]
+            check = checks[key]
+            n = len(self.candidates)
+            # Only candidates past the preconditions have the features a check reads
+            cached = bitset(
+                (i for i in iter_bits(self.ready) if check(self.candidates[i][attr], value)), n
+            )
+            self._masks[gate, key, value] = cached
+        return cached
+
+
+def grid_sets(grid: Dict[str, Sequence[Any]]) -> Iterator[Dict[str, Any]]:
+    """Every combination of the grid values."""
+    keys = list(grid)
+    for combo in product(*(grid[key] for key in keys)):
+        yield dict(zip(keys, combo, strict=True))
+
+
+def random_sets(
+    space: Dict[str, Sequence[float]], samples: int, seed: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """`samples` threshold sets drawn uniformly from the (lo, hi) ranges."""
+    rng = random.Random(seed)
+    for _ in range(samples):
+        values = {}
+        for key, (lo, hi) in space.items():
+            if isinstance(lo, int) and isinstance(hi, int):
+                values[key] = rng.randint(lo, hi)
+            else:
+                values[key] = round(rng.uniform(lo, hi), 2)
+        yield values
+
+
+def evaluate_sets(
+    masks: GateMasks, threshold_sets: Iterable[Dict[str, Any]], min_trades: int = 5
+) -> List[Dict[str, Any]]:
+    """summarize() row plus thresholds for every set with at least `min_trades` trades."""
+    summaries: Dict[int, Dict[str, Any]] = {}
+    rows = []
+    for thresholds in threshold_sets:
+        unknown = set(thresholds) - set(masks.checks)
+        if unknown:
+            raise ValueError(
+                f"thresholds {sorted(unknown)} are not checked by gates {list(masks.gates)}"
+            )
+        mask = masks.mask(thresholds)
+        if mask.bit_count() < min_trades:
+            continue
+        summary = summaries.get(mask)
+        if summary is None:
+            summary = summarize([masks.candidates[i]["trade"] for i in iter_bits(mask)])
+            summaries[mask] = summary
+        rows.append({**summary, "thresholds": thresholds})
+    return rows
+
+
+def pareto_front(rows: Sequence[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+    """
+    Rows not beaten on both trade count and `metric` (both maximised).
+
+    Sets with the same trades and metric appear once (the first evaluated).
+    Ordered by trade count, most first.
+    """
+    ranked = sorted(
+        enumerate(rows), key=lambda item: (-item[1]["trades"], -item[1][metric], item[0])
+    )
+    front = []
+    best = None
+    for _, row in ranked:
+        if best is None or row[metric] > best:
+            front.append(row)
+            best = row[metric]
+    return front
+
+
+def tune(
+    data_files: Sequence[Path],
+    threshold_sets: Iterable[Dict[str, Any]],
+    gates: Sequence[str] = ("pullback",),
+    strategy: str = "v1",
+    min_trades: int = 5,
+    max_lookahead: int = DEFAULT_MAX_LOOKAHEAD,
+) -> Dict[str, Any]:
+    """
+    Evaluate threshold sets over the data and build the Pareto fronts.
+
+    Returns:
+        {"candidates", "evaluated", "ungated", "defaults", "fronts": {metric: rows}};
+        ungated is the strategy alone and defaults the gates at
+        DEFAULT_THRESHOLDS (None when below min_trades).
+    """
+    candidates = collect_candidates(data_files, strategy, max_lookahead=max_lookahead)
+    masks = GateMasks(candidates, gates)
+    rows = evaluate_sets(masks, threshold_sets, min_trades)
+    defaults = evaluate_sets(masks, [{}], min_trades)
+    return {
+        "strategy": strategy,
+        "gates": list(masks.gates),
+        "candidates": len(candidates),
+        "evaluated": len(rows),
+        "ungated": summarize([c["trade"] for c in candidates]),
+        "defaults": defaults[0] if defaults else None,
+        "fronts": {metric: pareto_front(rows, metric) for metric in FRONT_METRICS},
+    }
+
+
+def format_fronts(result: Dict[str, Any]) -> str:
+    """Text table of each Pareto front."""
+    lines = [
+        f"{result['candidates']} {result['strategy']} signals, gates {result['gates']}, "
+        f"{result['evaluated']} threshold sets with enough trades"
+    ]
+
+    def row_line(label: str, row: Optional[Dict[str, Any]]) -> str:
+        if row is None:
+            return f"  {label:<10} (too few trades)"
+        settings = ", ".join(f"{k}={v}" for k, v in row.get("thresholds", {}).items())
+        return (
+            f"  {label:<10} trades {row['trades']:>4}  win {row['winrate_pct']:>6.2f}%  "
+            f"PF {row['pf']:>6.3f}  avgRR {row['avg_rr']:>6.3f}  {settings}"
+        )
+
+    lines.append(row_line("ungated", result["ungated"]))
+    lines.append(row_line("defaults", result["defaults"]))
+    for metric, front in result["fronts"].items():
+        lines.append(f"Pareto front: trades vs {metric}")
+        lines.extend(row_line(str(i), row) for i, row in enumerate(front, 1))
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Tune Fix14 wave-strength thresholds against strategy trade outcomes."
+    )
+    parser.add_argument("--data-dir", default="data_backtesst", help="Directory of JSONL files")
+    parser.add_argument("--strategy", default="v1", help="Strategy spec (see backtest.fanout)")
+    parser.add_argument(
+        "--gates",
+        nargs="+",
+        choices=sorted(GATES),
+        default=["pullback"],
+        help="Filters each signal must pass (default: pullback).",
+    )
+    parser.add_argument("--grid", default=None, help="JSON {threshold: [values]} (grid search)")
+    parser.add_argument(
+        "--random",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Random search: N sets drawn from TUNING_SPACE (or --space)",
+    )
+    parser.add_argument("--space", default=None, help="JSON {threshold: [lo, hi]} for --random")
+    parser.add_argument("--seed", type=int, default=0, help="Random search seed")
+    parser.add_argument("--min-trades", type=int, default=5, help="Skip sets with fewer trades")
+    parser.add_argument(
+        "--max-lookahead",
+        type=int,
+        default=DEFAULT_MAX_LOOKAHEAD,
+        help="Bars after the signal before a trade counts as open.",
+    )
+    parser.add_argument("--output", default=None, help="Path to write results JSON")
+    args = parser.parse_args()
+
+    data_files = sorted(Path(args.data_dir).glob("*.jsonl"))
+    if not data_files:
+        print(f"❌ No JSONL files found in {args.data_dir}")
+        return 1
+
+    checked = {key for gate in args.gates for key in GATES[gate][2]}
+    if args.random is not None:
+        if args.space:
+            space = json.loads(Path(args.space).read_text())
+        else:
+            space = {key: bounds for key, bounds in TUNING_SPACE.items() if key in checked}
+        threshold_sets: Iterable[Dict[str, Any]] = random_sets(space, args.random, args.seed)
+    else:
+        if args.grid:
+            grid = json.loads(Path(args.grid).read_text())
+        else:
+            grid = {key: values for key, values in TUNING_GRID.items() if key in checked}
+        threshold_sets = grid_sets(grid)
+
+    try:
+        result = tune(
+            data_files,
+            threshold_sets,
+            gates=args.gates,
+            strategy=args.strategy,
+            min_trades=args.min_trades,
+            max_lookahead=args.max_lookahead,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(format_fronts(result))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"✓ Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+# Throughput benchmarks for the module pipeline (python -m processor.bench).
@@ -0,0 +1,4 @@
+from processor.bench.suite import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,399 @@
+"""
+Throughput benchmarks: bars/sec, per-bar latency and peak RSS.
+
+Every case replays a dataset through one SMCDataProcessor:
+
+- `pipeline`: the default module pipeline (build_default_modules() plus wave delta),
+- `<module name>`: a single module on its own (e.g. `fix02_fvg_quality`).
+
+Datasets are `real` (every data_backtesst file, in order, as one stream) or a
+bar count for a synthetic scale-up: the real bars repeated until the count is
+reached, with bar_index renumbered so index-based lookbacks keep working.
+Bars are generated lazily, so million-bar runs do not hold their input.
+
+Only process_bar() is timed (perf_counter_ns per bar); the fastest of
+`--repeat` runs is reported, which damps scheduler noise on the small real
+dataset. Each case runs in a fresh spawned process so its peak RSS is its own
+(`resource.getrusage`; not reported where the module is unavailable, e.g.
+Windows).
+
+Results are a JSON document; `compare` flags cases whose metrics got worse
+than a baseline by more than a tolerance and exits non-zero.
+
+Timings only compare between runs on the same host. The checked-in
+baseline.json is one machine's run and serves as a format reference: regenerate
+it on the machine you compare on (last usage line) and do not commit the
+refreshed file. `compare` warns when the baseline's python, machine or host
+differs from the current run's.
+
+Usage:
+python -m processor.bench run --output bench.json
+python -m processor.bench run --datasets real 1000000 --cases pipeline fix07_market_condition
+python -m processor.bench compare bench.json            # against processor/bench/baseline.json
+python -m processor.bench run --compare                   # run, then compare with the baseline
+python -m processor.bench run --output processor/bench/baseline.json   # refresh the baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from processor.backtest.run_module_backtest import build_default_modules, load_jsonl
+from processor.core.profiler import module_label
+from processor.modules.fix13_wave_delta import WaveDeltaModule
+from processor.smc_processor import SMCDataProcessor
+
+resource: Optional[ModuleType]
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMAT_VERSION = 1
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data_backtesst"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+PIPELINE = "pipeline"
+REAL = "real"
+
+# metric -> (higher is better, default tolerated relative change)
+METRICS = {
+    "bars_per_sec": (True, 0.15),
+    "p50_us": (False, 0.20),
+    "p99_us": (False, 0.40),
+    "peak_rss_kb": (False, 0.10),
+}
+
+
+def _module_factories() -> Dict[str, Callable[[], Any]]:
+    factories: Dict[str, Callable[[], Any]] = {
+        module_label(m): type(m) for m in build_default_modules()
+    }
+    factories[module_label(WaveDeltaModule())] = WaveDeltaModule
+    return factories
+
+
+def case_names() -> List[str]:
+    """All benchmark cases: the pipeline, then every module."""
+    return [PIPELINE, *_module_factories()]
+
+
+def build_processor(case: str) -> SMCDataProcessor:
+    """Fresh processor for a case."""
+    if case == PIPELINE:
+        return SMCDataProcessor(modules=build_default_modules())
+    factories = _module_factories()
+    if case not in factories:
+        raise ValueError(f"unknown benchmark case {case!r}; expected one of {case_names()}")
+    return SMCDataProcessor(modules=[factories[case]()], enable_wave_delta=False)
+
+
+def load_real_bars(data_dir: Path) -> List[Dict[str, Any]]:
+    """Every bar of the data directory's JSONL files, in file order."""
+    files = sorted(Path(data_dir).glob("*.jsonl"))
+    if not files:
+        raise FileNotFoundError(f"no JSONL files in {data_dir}")
+    return [bar for path in files for bar in load_jsonl(path)]
+
+
+def scaled_bars(bars: Sequence[Dict[str, Any]], count: int) -> Iterator[Dict[str, Any]]:
+    """`count` bars: `bars` repeated, with bar_index continuing across copies."""
+    indexes = [bar.get("bar_index", i) for i, bar in enumerate(bars)]
+    span = max(indexes) - min(indexes) + 1 if indexes else 0
+    for n, bar in enumerate(islice(cycle(bars), count)):
+        offset = (n // len(bars)) * span
+        yield dict(bar, bar_index=indexes[n % len(bars)] + offset)
+
+
+def dataset_bars(dataset: str, data_dir: Path) -> Iterator[Dict[str, Any]]:
+    """Bars of a dataset name (`real` or a bar count)."""
+    bars = load_real_bars(data_dir)
+    if dataset == REAL:
+        return (dict(bar) for bar in bars)
+    return scaled_bars(bars, int(dataset))
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB (None without `resource`)."""
+    if resource is None:
+        return None
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS
+
+
+def _percentile(sorted_values: Sequence[int], q: float) -> int:
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def measure(processor: SMCDataProcessor, bars: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Time processor.process_bar() per bar."""
+    latencies = array("q")
+    errors = 0
+    clock = time.perf_counter_ns
+    for bar in bars:
+        start = clock()
+        state = processor.process_bar(bar)
+        latencies.append(clock() - start)
+        if "processor_errors" in state:
+            errors += 1
+    rss = peak_rss_kb()
+
+    n = len(latencies)
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "bars": n,
+        "errors": errors,
+        "seconds": round(total / 1e9, 6),
+        "bars_per_sec": round(n * 1e9 / total, 1) if total else 0.0,
+        "p50_us": round(_percentile(ordered, 0.50) / 1e3, 3) if n else 0.0,
+        "p99_us": round(_percentile(ordered, 0.99) / 1e3, 3) if n else 0.0,
+        "max_us": round(ordered[-1] / 1e3, 3) if n else 0.0,
+        "peak_rss_kb": rss,
+    }
+
+
+def run_case(case: str, dataset: str, data_dir: Path, repeat: int = 1) -> Dict[str, Any]:
+    """Benchmark one case on one dataset in the current process (fastest of `repeat` runs)."""
+    runs = [
+        measure(build_processor(case), dataset_bars(dataset, data_dir))
+        for _ in range(max(repeat, 1))
+    ]
+    best = max(runs, key=lambda run: run["bars_per_sec"])
+    # Peak RSS covers every run in the process: report it as of the last one
+    return {
+        "case": case,
+        "dataset": dataset,
+        "repeat": len(runs),
+        **best,
+        "peak_rss_kb": runs[-1]["peak_rss_kb"],
+    }
+
+
+def run_suite(
+    cases: Sequence[str],
+    datasets: Sequence[str],
+    data_dir: Path = DEFAULT_DATA_DIR,
+    repeat: int = 1,
+    isolate: bool = True,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run every case on every dataset.
+
+    Args:
+        cases: Case names (see case_names()).
+        datasets: `real` and/or synthetic bar counts.
+        data_dir: Directory of exporter JSONL files.
+        repeat: Runs per case; the fastest is reported.
+        isolate: Run each case in a fresh process (per-case peak RSS); in-process
+            runs report the peak RSS of the whole process so far.
+        progress: Called with each result as it completes.
+    """
+    unknown = [c for c in cases if c not in case_names()]
+    if unknown:
+        raise ValueError(f"unknown benchmark cases {unknown}; expected some of {case_names()}")
+    results = []
+    for dataset in datasets:
+        for case in cases:
+            if isolate:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    result = pool.submit(run_case, case, dataset, data_dir, repeat).result()
+            else:
+                result = run_case(case, dataset, data_dir, repeat)
+            if progress is not None:
+                progress(result)
+            results.append(result)
+    return {
+        "format_version": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "host": platform.node(),
+        "isolated": isolate,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerances: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Metric changes per (case, dataset) present in both documents.
+
+    Returns:
+        Rows with case, dataset, metric, baseline, current, change (relative,
+        positive = better) and regression (worse by more than the tolerance).
+    """
+    limits = {metric: default for metric, (_, default) in METRICS.items()}
+    limits.update(tolerances or {})
+    before = {(r["case"], r["dataset"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["case"], result["dataset"]))
+        if old is None:
+            continue
+        for metric, (higher_is_better, _) in METRICS.items():
+            was, now = old.get(metric), result.get(metric)
+            if not was or now is None:
+                continue
+            change = (now - was) / was
+            if not higher_is_better:
+                change = -change
+            rows.append({
+                "case": result["case"],
+                "dataset": result["dataset"],
+                "metric": metric,
+                "baseline": was,
+                "current": now,
+                "change": change,
+                "regression": change < -limits[metric],
+            })
+    return rows
+
+
+def format_results(document: Dict[str, Any]) -> str:
+    header = (
+        f"{'case':<28} {'dataset':>9} {'bars':>9} {'bars/s':>10} "
+        f"{'p50_us':>9} {'p99_us':>9} {'rss_mb':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in document["results"]:
+        rss = f"{r['peak_rss_kb'] / 1024:>8.1f}" if r["peak_rss_kb"] is not None else f"{'-':>8}"
+        lines.append(
+            f"{r['case']:<28} {r['dataset']:>9} {r['bars']:>9} {r['bars_per_sec']:>10.0f} "
+            f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {rss}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    header = (
+        f"{'case':<28} {'dataset':>9} {'metric':<12} "
+        f"{'baseline':>11} {'current':>11} {'change':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['case']:<28} {row['dataset']:>9} {row['metric']:<12} "
+            f"{row['baseline']:>11.1f} {row['current']:>11.1f} {row['change']:>+8.1%}{flag}"
+        )
+    regressions = sum(row["regression"] for row in rows)
+    lines.append(f"{regressions} regression(s) in {len(rows)} metric(s)")
+    return "\n".join(lines)
+
+
+def _tolerance(text: str) -> tuple[str, float]:
+    metric, _, value = text.partition("=")
+    if metric not in METRICS or not value:
+        raise argparse.ArgumentTypeError(f"expected METRIC=FRACTION with METRIC in {list(METRICS)}")
+    return metric, float(value)
+
+
+ENVIRONMENT_KEYS = ("python", "machine", "host")
+
+
+def environment_differences(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """ENVIRONMENT_KEYS whose values differ between two result documents."""
+    return [key for key in ENVIRONMENT_KEYS if baseline.get(key) != current.get(key)]
+
+
+def _report_comparison(
+    baseline_path: Path,
+    current: Dict[str, Any],
+    tolerances: Optional[Sequence[tuple[str, float]]],
+) -> int:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    differs = environment_differences(baseline, current)
+    if differs:
+        print(
+            f"⚠ {baseline_path} was recorded with a different {', '.join(differs)}; "
+            "timings are not comparable across hosts, regenerate the baseline here"
+        )
+    rows = compare(baseline, current, dict(tolerances or []))
+    print(format_comparison(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the module pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmark cases and write a results JSON.")
+    run.add_argument("--cases", nargs="+", default=None, help="Cases (default: all).")
+    run.add_argument(
+        "--datasets",
+        nargs="+",
+        default=[REAL],
+        help="'real' and/or synthetic bar counts, e.g. 1000000 (default: real).",
+    )
+    run.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    run.add_argument(
+        "--repeat", type=int, default=5, help="Runs per case; the fastest is kept (default 5)."
+    )
+    run.add_argument("--output", type=Path, default=None, help="Path to write results JSON.")
+    run.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run cases in this process (faster; peak RSS is cumulative).",
+    )
+    run.add_argument(
+        "--compare",
+        type=Path,
+        nargs="?",
+        const=BASELINE_PATH,
+        default=None,
+        help="Compare with a baseline JSON (default: processor/bench/baseline.json).",
+    )
+    run.add_argument("--tolerance", type=_tolerance, action="append", metavar="METRIC=FRACTION")
+
+    cmp_ = commands.add_parser("compare", help="Compare a results JSON with a baseline.")
+    cmp_.add_argument("current", type=Path)
+    cmp_.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    cmp_.add_argument("--tolerance", type=_tolerance, action="append", metavar="METRIC=FRACTION")
+
+    commands.add_parser("cases", help="List benchmark cases.")
+    args = parser.parse_args(argv)
+
+    if args.command == "cases":
+        print("\n".join(case_names()))
+        return 0
+    if args.command == "compare":
+        current = json.loads(args.current.read_text(encoding="utf-8"))
+        return _report_comparison(args.baseline, current, args.tolerance)
+
+    for dataset in args.datasets:
+        if dataset != REAL and not dataset.isdigit():
+            parser.error(f"dataset must be '{REAL}' or a bar count, got {dataset!r}")
+    document = run_suite(
+        args.cases or case_names(),
+        args.datasets,
+        data_dir=args.data_dir,
+        repeat=args.repeat,
+        isolate=not args.in_process,
+        progress=lambda r: print(
+            f"  {r['case']} [{r['dataset']}]: {r['bars_per_sec']:.0f} bars/s", flush=True
+        ),
+    )
+    print(format_results(document))
+    if args.output is not None:
+        args.output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"✓ Results saved to {args.output}")
+    if args.compare is not None:
+        return _report_comparison(args.compare, document, args.tolerance)
+    return 0
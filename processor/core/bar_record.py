@@ -0,0 +1,103 @@
+"""
+Per-bar state containers used by SMCDataProcessor.
+
+BarRecord is the single shared dict a bar's enriched fields are written into as
+it moves through the pipeline; modules merge their outputs into it in place via
+BaseModule.emit() instead of returning a fresh `{**bar_state, ...}` copy.
+
+BarOverlay is a copy-on-write view for modules that need isolation: reads fall
+through to the underlying record, writes and deletes stay local until commit().
+"""
+
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Mapping, Set
+
+_MISSING = object()
+
+
+class BarRecord(dict):
+    """Processor-owned per-bar dict; modules may update it in place."""
+
+    __slots__ = ()
+
+
+class BarOverlay(MutableMapping):
+    """Copy-on-write view over a bar record."""
+
+    __slots__ = ("_base", "_writes", "_deleted")
+
+    def __init__(self, base: Mapping[str, Any]) -> None:
+        self._base = base
+        self._writes: Dict[str, Any] = {}
+        self._deleted: Set[str] = set()
+
+    @property
+    def base(self) -> Mapping[str, Any]:
+        return self._base
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._writes.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._base[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._writes.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self._deleted:
+            return default
+        return self._base.get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._writes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._writes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._writes:
+            return True
+        return key not in self._deleted and key in self._base
+
+    def __iter__(self) -> Iterator[str]:
+        # Same key order as {**base, **writes}
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+        for key in self._writes:
+            if key not in self._base:
+                yield key
+
+    def __len__(self) -> int:
+        extra = sum(1 for key in self._writes if key not in self._base)
+        return len(self._base) - len(self._deleted) + extra
+
+    def changes(self) -> Dict[str, Any]:
+        """Fields written through this overlay."""
+        return dict(self._writes)
+
+    @property
+    def deleted(self) -> Set[str]:
+        return set(self._deleted)
+
+    def commit(self) -> None:
+        """Apply local writes and deletes to the underlying record."""
+        for key in self._deleted:
+            self._base.pop(key, None)  # type: ignore[attr-defined]
+        self._base.update(self._writes)  # type: ignore[attr-defined]
+        self._writes = {}
+        self._deleted = set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"BarOverlay(changes={self._writes!r})"
@@ -0,0 +1,112 @@
+"""
+ColumnStore: columnar side-store for the numeric history fields modules scan.
+
+Each column is a preallocated float64 `array` of twice the capacity; every value
+is written at `pos` and `pos + capacity`, so the last N values (N <= capacity)
+are always one contiguous run and `window()` can hand out a zero-copy
+memoryview instead of rebuilding a list from the history dicts each bar.
+"""
+
+from array import array
+from math import isfinite
+from typing import Any, Dict, Iterable, Tuple
+
+# Numeric fields most modules pull out of history every bar
+DEFAULT_COLUMNS: Tuple[str, ...] = (
+    "volume",
+    "delta",
+    "high",
+    "low",
+    "close",
+    "atr_14",
+    "bar_index",
+)
+
+
+def column_value(value: Any) -> float:
+    """Coerce a bar field to the stored float (missing/non-numeric/non-finite -> 0.0)."""
+    if value is None:
+        return 0.0
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    # NaN would break the sorted windows of RollingOrderStats (json.loads accepts NaN)
+    return value if isfinite(value) else 0.0
+
+
+class ColumnStore:
+    """Fixed-capacity float columns aligned with BarHistory (oldest first)."""
+
+    def __init__(self, capacity: int = 2000, fields: Iterable[str] = DEFAULT_COLUMNS) -> None:
+        """
+        Args:
+            capacity: Number of most recent bars retained per column (> 0).
+            fields: Bar fields to mirror. Missing/non-numeric values are stored as 0.0.
+        """
+        if capacity <= 0:
+            raise ValueError("ColumnStore capacity must be positive")
+        self._capacity = int(capacity)
+        self._fields: Tuple[str, ...] = tuple(fields)
+        self._data: Dict[str, array] = {}
+        self._views: Dict[str, memoryview] = {}
+        self._pos = 0  # next physical write slot in [0, capacity)
+        self._size = 0
+        self._allocate()
+
+    def _allocate(self) -> None:
+        for field in self._fields:
+            buf = array("d", bytes(16 * self._capacity))  # 2 * capacity doubles, zeroed
+            self._data[field] = buf
+            self._views[field] = memoryview(buf)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def append(self, bar_state: Dict[str, Any]) -> None:
+        """Mirror the numeric fields of a processed bar."""
+        pos = self._pos
+        mirror = pos + self._capacity
+        for field, buf in self._data.items():
+            value = column_value(bar_state.get(field))
+            buf[pos] = value
+            buf[mirror] = value
+
+        self._pos = pos + 1 if pos + 1 < self._capacity else 0
+        if self._size < self._capacity:
+            self._size += 1
+
+    def window(self, field: str, n: int | None = None) -> memoryview:
+        """
+        Return the last n values of a column, oldest first, without copying.
+
+        The view aliases the ring buffer and is only valid until the next append.
+
+        Args:
+            field: Column name.
+            n: Window length (defaults to everything stored, capped at len(self)).
+
+        Returns:
+            memoryview of float64 values.
+        """
+        size = self._size if n is None else max(min(int(n), self._size), 0)
+        end = self._pos + self._capacity
+        return self._views[field][end - size : end]
+
+    def clear(self) -> None:
+        self._pos = 0
+        self._size = 0
+
+    def __contains__(self, field: object) -> bool:
+        return field in self._data
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"ColumnStore(len={self._size}, capacity={self._capacity}, fields={self._fields})"
@@ -0,0 +1,155 @@
+"""
+BarHistory: fixed-capacity ring buffer of processed bar states.
+
+SMCDataProcessor hands this to every module as `history`. It behaves like a
+read-only list (len, negative indexing, slicing, iteration, `history + [bar]`),
+so modules written against plain lists keep working unchanged, but appending
+past capacity evicts the oldest bar in O(1) instead of rebuilding the list.
+
+Optionally mirrors numeric fields into a ColumnStore (`history.columns`) so
+modules can read windows such as the last 20 volumes without dict lookups, and
+keeps any RollingOrderStats / RollingExtremes requested via `order_stats()` /
+`extremes()` updated on append.
+"""
+
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .columns import ColumnStore, column_value
+from .rolling import RollingExtremes, RollingOrderStats
+
+# Column window used when the history itself is unbounded
+DEFAULT_COLUMN_CAPACITY = 2000
+
+
+class BarHistory(Sequence):
+    """Ring buffer of bar_state dicts, oldest first."""
+
+    def __init__(self, capacity: int = 2000, columns: Optional[Iterable[str]] = None) -> None:
+        """
+        Args:
+            capacity: Maximum bars retained. Values <= 0 mean unbounded.
+            columns: Numeric fields to mirror into a ColumnStore (None disables it).
+        """
+        self._capacity = max(int(capacity), 0)
+        self._buf: List[Dict[str, Any]] = []
+        self._start = 0  # physical index of the oldest bar once the buffer is full
+        self.columns: Optional[ColumnStore] = None
+        self._order_stats: Dict[Tuple[str, int], RollingOrderStats] = {}
+        self._extremes: Dict[Tuple[str, int], RollingExtremes] = {}
+        if columns is not None:
+            self.columns = ColumnStore(self._capacity or DEFAULT_COLUMN_CAPACITY, columns)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def append(self, bar_state: Dict[str, Any]) -> None:
+        """Append a bar, evicting the oldest one when at capacity."""
+        if self.columns is not None:
+            self.columns.append(bar_state)
+        for (field, _), stats in self._order_stats.items():
+            stats.push(column_value(bar_state.get(field)))
+        for (field, _), extremes in self._extremes.items():
+            extremes.push(column_value(bar_state.get(field)))
+        if not self._capacity or len(self._buf) < self._capacity:
+            self._buf.append(bar_state)
+            return
+        self._buf[self._start] = bar_state
+        self._start += 1
+        if self._start == self._capacity:
+            self._start = 0
+
+    def clear(self) -> None:
+        self._buf = []
+        self._start = 0
+        if self.columns is not None:
+            self.columns.clear()
+        for stats in self._order_stats.values():
+            stats.clear()
+        for extremes in self._extremes.values():
+            extremes.clear()
+
+    def order_stats(self, field: str, window: int) -> Optional[RollingOrderStats]:
+        """
+        Rolling order statistics over the last `window` values of a column.
+
+        Created on first request (backfilled from the column) and updated on
+        every append afterwards. Values match `history.columns.window(field,
+        window)`. Returns None when the field is not mirrored or the window
+        exceeds the column capacity.
+        """
+        key = (field, window)
+        stats = self._order_stats.get(key)
+        if stats is None:
+            columns = self.columns
+            if columns is None or field not in columns or not 0 < window <= columns.capacity:
+                return None
+            stats = RollingOrderStats(window, columns.window(field, window))
+            self._order_stats[key] = stats
+        return stats
+
+    def extremes(self, field: str, window: int) -> Optional[RollingExtremes]:
+        """
+        Rolling max/min over the last `window` values of a column.
+
+        Same lifecycle and availability as order_stats().
+        """
+        key = (field, window)
+        extremes = self._extremes.get(key)
+        if extremes is None:
+            columns = self.columns
+            if columns is None or field not in columns or not 0 < window <= columns.capacity:
+                return None
+            extremes = RollingExtremes(window, columns.window(field, window))
+            self._extremes[key] = extremes
+        return extremes
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Return bars oldest-first as a new list."""
+        if not self._start:
+            return list(self._buf)
+        return self._buf[self._start :] + self._buf[: self._start]
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        size = len(self._buf)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("history index out of range")
+        return self._buf[(self._start + index) % size] if self._start else self._buf[index]
+
+    def _slice(self, index: slice) -> List[Dict[str, Any]]:
+        size = len(self._buf)
+        start, stop, step = index.indices(size)
+        if step != 1:
+            return [self[i] for i in range(start, stop, step)]
+        if stop <= start:
+            return []
+        if not self._start:
+            return self._buf[start:stop]
+        # Map logical [start, stop) onto at most two contiguous physical runs
+        phys_start = (self._start + start) % size
+        phys_stop = phys_start + (stop - start)
+        if phys_stop <= size:
+            return self._buf[phys_start:phys_stop]
+        return self._buf[phys_start:] + self._buf[: phys_stop - size]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self._start:
+            return iter(self._buf)
+        return iter(self.to_list())
+
+    def __reversed__(self) -> Iterator[Dict[str, Any]]:
+        return reversed(self.to_list())
+
+    def __add__(self, other) -> List[Dict[str, Any]]:
+        return self.to_list() + list(other)
+
+    def __repr__(self) -> str:
+        return f"BarHistory(len={len(self)}, capacity={self._capacity})"
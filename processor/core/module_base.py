@@ -3,8 +3,12 @@ Base interface for per-bar processing modules.
 Each module receives BarState (dict-like) and returns an updated dict.
 """
 
+import copy
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from .bar_record import BarOverlay, BarRecord
+from .rolling import RollingExtremes, RollingOrderStats
 
 
 class ValidationError(Exception):
@@ -19,6 +23,26 @@ class BaseModule(ABC):
     # Override in subclass to define required fields for validation
     required_fields: Set[str] = set()
 
+    # Raw record fields the module reads from bar_state or history (top-level keys,
+    # or dotted paths such as "bar.ext_bos_up"); projected readers load only these
+    input_fields: Set[str] = set()
+
+    # Set True to run against a copy-on-write BarOverlay instead of writing
+    # straight into the processor's shared per-bar record
+    isolated: bool = False
+
+    # Bump whenever a change alters the module's outputs; part of the module
+    # output cache key (see processor.core.module_cache)
+    version: str = "1.0.0"
+
+    # Bump whenever the meaning or layout of the module's instance attributes
+    # changes, so get_state() snapshots from older code are rejected
+    state_version: int = 1
+
+    # Instance attributes left out of get_state() (locks, handles, caches that
+    # are rebuilt on demand); set_state() keeps the target's own values
+    transient_state: FrozenSet[str] = frozenset({"_lock"})
+
     @abstractmethod
     def process_bar(
         self, bar_state: Dict[str, Any], history: list | None = None
@@ -28,13 +52,102 @@ class BaseModule(ABC):
 
         Args:
             bar_state: Current bar fields (mutable dict).
-            history: Optional recent bar_state list for context-sensitive logic.
+            history: Optional recent bar_states, oldest first, for context-sensitive
+                logic (a plain list or the processor's BarHistory ring buffer).
 
         Returns:
             Updated bar_state dict.
         """
         raise NotImplementedError
 
+    def emit(self, bar_state: Dict[str, Any], outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge module outputs into bar_state.
+
+        Inside SMCDataProcessor bar_state is the shared BarRecord (or a BarOverlay
+        for isolated modules) and is updated in place. Plain dicts passed by
+        direct callers are left untouched and a merged copy is returned.
+
+        Args:
+            bar_state: Current bar fields.
+            outputs: Fields produced by this module.
+
+        Returns:
+            Updated bar_state dict.
+        """
+        if isinstance(bar_state, (BarRecord, BarOverlay)):
+            bar_state.update(outputs)
+            return bar_state
+        return {**bar_state, **outputs}
+
+    def cache_config(self) -> Dict[str, Any]:
+        """
+        Settings that affect the module's outputs, for the output cache key.
+
+        Defaults to the `enabled` flag and `config` dict most modules carry;
+        override in modules configured through other attributes.
+        """
+        return {"enabled": getattr(self, "enabled", True), "config": getattr(self, "config", None)}
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Snapshot of everything the module carries from bar to bar.
+
+        The snapshot is a deep copy of the instance attributes (minus
+        `transient_state`) tagged with the module class, `version`,
+        `state_version` and cache_config(), so it can be pickled and later
+        restored with set_state() on a fresh instance built with the same
+        settings. Processing then continues exactly as if the module had seen
+        the bars itself.
+
+        Returns:
+            Dict with keys module, version, state_version, config and attrs.
+        """
+        attrs = {k: v for k, v in vars(self).items() if k not in self.transient_state}
+        return {
+            "module": type(self).__name__,
+            "version": self.version,
+            "state_version": self.state_version,
+            "config": self.cache_config(),
+            "attrs": copy.deepcopy(attrs),
+        }
+
+    def check_state(self, state: Dict[str, Any]) -> None:
+        """
+        Check that a get_state() snapshot can be restored into this module.
+
+        Raises:
+            ValueError: If the snapshot comes from another module class,
+                module/state version or configuration.
+        """
+        expected = {
+            "module": type(self).__name__,
+            "version": self.version,
+            "state_version": self.state_version,
+            "config": self.cache_config(),
+        }
+        for key, value in expected.items():
+            if state.get(key) != value:
+                raise ValueError(
+                    f"{self.name}: state {key} {state.get(key)!r} does not match {value!r}"
+                )
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restore a snapshot taken by get_state().
+
+        Args:
+            state: Snapshot dict (it is copied, so it can be restored again).
+
+        Raises:
+            ValueError: See check_state().
+        """
+        self.check_state(state)
+        attrs = copy.deepcopy(state["attrs"])
+        for key in self.transient_state:
+            attrs.pop(key, None)
+        self.__dict__.update(attrs)
+
     def validate_bar(
         self,
         bar_state: Dict[str, Any],
@@ -114,3 +227,71 @@ class BaseModule(ABC):
         if value is None:
             return default
         return bool(value)
+
+    def history_values(self, history: Sequence | None, field: str, n: int) -> Sequence:
+        """
+        Get the last n values of a field from history, oldest first.
+
+        Reads the processor's columnar side-store when available (zero-copy
+        window, missing values as 0.0); otherwise extracts from the bar dicts.
+
+        Args:
+            history: Plain list of bar_states or the processor's BarHistory.
+            field: Field name to retrieve.
+            n: Window length.
+
+        Returns:
+            Sequence of values (memoryview or list).
+        """
+        if not history:
+            return []
+        columns = getattr(history, "columns", None)
+        if columns is not None and field in columns and 0 < n <= columns.capacity:
+            return columns.window(field, n)
+        return [b.get(field, 0) for b in history[-n:]]
+
+    def history_order_stats(
+        self, history: Sequence | None, field: str, n: int
+    ) -> Optional[RollingOrderStats]:
+        """
+        Get rolling order statistics over the last n values of a field.
+
+        Only available on the processor's BarHistory (kept up to date as bars
+        are appended, values as in history_values()); returns None for plain
+        lists so callers fall back to sorting history_values().
+
+        Args:
+            history: Plain list of bar_states or the processor's BarHistory.
+            field: Field name.
+            n: Window length.
+
+        Returns:
+            RollingOrderStats or None.
+        """
+        order_stats = getattr(history, "order_stats", None)
+        if order_stats is None:
+            return None
+        return order_stats(field, n)
+
+    def history_extremes(
+        self, history: Sequence | None, field: str, n: int
+    ) -> Optional[RollingExtremes]:
+        """
+        Get the rolling max/min over the last n values of a field.
+
+        Only available on the processor's BarHistory (values as in
+        history_values()); returns None for plain lists so callers fall back
+        to scanning the bars.
+
+        Args:
+            history: Plain list of bar_states or the processor's BarHistory.
+            field: Field name.
+            n: Window length.
+
+        Returns:
+            RollingExtremes or None.
+        """
+        extremes = getattr(history, "extremes", None)
+        if extremes is None:
+            return None
+        return extremes(field, n)
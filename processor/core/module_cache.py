@@ -0,0 +1,243 @@
+"""
+Content-addressed cache of per-module outputs.
+
+Every module in a pipeline is a stage whose key is chained from the stage
+before it:
+
+    key_0 = input_key(source digests, reader)
+    key_i = H(key_{i-1}, module label, module.version, module.cache_config())
+
+so a stage's key changes exactly when its input data, or the version/config
+of the module or of anything upstream of it, changes. A stage's entry stores
+what the module did to each bar (fields written and deleted, a replaced
+record, or the exception it raised). On a hit the entry is replayed instead
+of running the module, so changing only the strategy module re-runs only the
+strategy while every upstream stage loads from disk.
+
+Entries cover a whole run (all bars, in order), since modules carry state
+from bar to bar. Modules must report their outputs as top-level field writes
+(emit() or `bar_state[key] = ...`); in-place edits of nested input objects
+are not captured. Bump a module's `version` whenever a code change alters
+its outputs.
+
+Usage:
+    cache = ModuleOutputCache(cache_dir)
+    run = cache.open_run(input_key([file_digest(path)], reader="jsonl"), modules)
+    for bar in bars:
+        for stage, module in enumerate(modules):
+            bar = run.run(stage, module, bar, lambda m, view: m.process_bar(view))
+    run.close()  # stores the stages that ran
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .bar_record import BarOverlay
+from .profiler import module_label
+
+FORMAT_VERSION = 1
+
+_UPDATE = "update"
+_REPLACE = "replace"
+
+
+def _digest(payload: Any) -> str:
+    text = json.dumps(payload, sort_keys=True, default=repr)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def input_key(source_digests: Sequence[str], reader: str = "") -> str:
+    """
+    Root key of a run.
+
+    Args:
+        source_digests: Content hashes of the input files, in processing order
+            (see processor.ingest.columnar_cache.file_digest).
+        reader: How records were produced from the files (decoder, projected
+            fields, normalisation), since that changes the modules' input.
+    """
+    return _digest(["input", list(source_digests), reader])
+
+
+def stage_key(upstream_key: str, module: Any) -> str:
+    """Key of a module's outputs given the key of its input."""
+    config = module.cache_config() if hasattr(module, "cache_config") else None
+    version = getattr(module, "version", None)
+    return _digest(["stage", upstream_key, module_label(module), version, config])
+
+
+def _picklable(exc: BaseException) -> BaseException:
+    try:
+        pickle.loads(pickle.dumps(exc))
+    except Exception:  # noqa: BLE001 - any pickling failure
+        return RuntimeError(str(exc))
+    return exc
+
+
+class ModuleOutputCache:
+    """Directory of stage entries, one pickle file per stage key."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path_for(self, key: str, label: str) -> Path:
+        return self.root / f"{label}.{key}.pkl"
+
+    def load(self, key: str, label: str) -> Optional[List[Tuple]]:
+        """Per-bar outputs stored under key, or None if absent or unreadable."""
+        path = self.path_for(key, label)
+        try:
+            with path.open("rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(entry, dict) or entry.get("format_version") != FORMAT_VERSION:
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry["rows"]
+
+    def store(self, key: str, label: str, rows: List[Tuple], meta: Dict[str, Any]) -> Path:
+        """Write a stage entry atomically."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key, label)
+        tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+        entry = {"format_version": FORMAT_VERSION, "key": key, **meta, "rows": rows}
+        with tmp.open("wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(path)
+        return path
+
+    def open_run(self, root_key: str, modules: Sequence[Any]) -> "CachedRun":
+        """
+        Look up every stage of a pipeline for one run.
+
+        Modules should be freshly constructed: cached outputs assume they
+        start from their initial state.
+        """
+        return CachedRun(self, root_key, modules)
+
+
+class CachedRun:
+    """One pass over the input: replays cached stages, records the others."""
+
+    def __init__(self, cache: ModuleOutputCache, root_key: str, modules: Sequence[Any]) -> None:
+        self.cache = cache
+        self.labels: List[str] = [module_label(m) for m in modules]
+        self.keys: List[str] = []
+        self._meta: List[Dict[str, Any]] = []
+        key = root_key
+        for module in modules:
+            key = stage_key(key, module)
+            self.keys.append(key)
+            self._meta.append({
+                "module": module_label(module),
+                "version": getattr(module, "version", None),
+                "config": repr(module.cache_config()) if hasattr(module, "cache_config") else None,
+            })
+        # Cached rows for hit stages, None for stages that run
+        self._cached: List[Optional[List[Tuple]]] = [
+            cache.load(k, label) for k, label in zip(self.keys, self.labels, strict=True)
+        ]
+        self._recorded: List[List[bytes]] = [[] for _ in modules]
+        self._next_row: List[int] = [0] * len(modules)
+
+    @property
+    def hits(self) -> List[bool]:
+        """Whether each stage is replayed from the cache."""
+        return [rows is not None for rows in self._cached]
+
+    def run(
+        self,
+        stage: int,
+        module: Any,
+        state: Any,
+        call: Callable[[Any, BarOverlay], Any],
+        isolated: bool = False,
+    ) -> Any:
+        """
+        Run (or replay) one stage on one bar.
+
+        Live modules see the bar through a BarOverlay, whose writes are applied
+        to `state` afterwards; for non-isolated modules that also happens when
+        the module raises, as with in-place writes.
+
+        Args:
+            stage: Index of the module in the pipeline.
+            module: The module.
+            state: Mutable bar record.
+            call: Invokes the module on a bar view, e.g.
+                `lambda m, view: m.process_bar(view)`.
+            isolated: Discard the module's writes when it raises.
+
+        Returns:
+            `state` with the module's outputs applied, or the record the
+            module returned in its place. Exceptions raised by the module
+            (live or replayed) propagate.
+        """
+        rows = self._cached[stage]
+        if rows is not None:
+            row = self._next_row[stage]
+            self._next_row[stage] = row + 1
+            return self._replay(rows[row], state)
+
+        view = BarOverlay(state)
+        try:
+            result = call(module, view)
+        except Exception as exc:
+            delta = None
+            if not isolated:
+                delta = (_UPDATE, view.changes(), tuple(view.deleted))
+                view.commit()
+            self._record(stage, delta, _picklable(exc))
+            raise
+        if result is view:
+            delta = (_UPDATE, view.changes(), tuple(view.deleted))
+            view.commit()
+            self._record(stage, delta, None)
+            return state
+        self._record(stage, (_REPLACE, dict(result)), None)
+        return result
+
+    def _record(self, stage: int, delta: Optional[Tuple], error: Optional[BaseException]) -> None:
+        # Serialised now so later in-place edits by downstream code are not captured
+        self._recorded[stage].append(pickle.dumps((delta, error), pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _replay(row: Tuple, state: Any) -> Any:
+        delta, error = row
+        if delta is not None:
+            if delta[0] == _REPLACE:
+                state = delta[1]
+            else:
+                _, changes, deleted = delta
+                for key in deleted:
+                    state.pop(key, None)
+                state.update(changes)
+        if error is not None:
+            raise error
+        return state
+
+    def close(self) -> List[Path]:
+        """Store the outputs of every stage that ran; call once the run completed."""
+        written = []
+        for stage, rows in enumerate(self._cached):
+            if rows is None:
+                recorded = [pickle.loads(row) for row in self._recorded[stage]]
+                written.append(self.cache.store(
+                    self.keys[stage], self.labels[stage], recorded, self._meta[stage]
+                ))
+        return written
+
+    def summary(self) -> str:
+        """One line per stage: label and whether it was loaded or computed."""
+        return "\n".join(
+            f"  {label:<28} {'cached' if hit else 'computed'}"
+            for label, hit in zip(self.labels, self.hits, strict=True)
+        )
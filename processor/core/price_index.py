@@ -0,0 +1,125 @@
+"""
+Sorted price indexes for range, nearest and zone lookups.
+
+PriceLevelIndex keeps levels as (price, seq) keys in a bisect-maintained list,
+where seq is the caller's insertion order. Ties on price resolve to the lowest
+seq, so lookups return the same level as a first-match scan over the
+insertion-ordered list they replace (`min(levels, key=price)` / `max(...)` /
+first hit in a loop).
+
+PriceZoneIndex keeps closed [low, high] zones sorted by low. A zone containing
+a price must start within the widest zone span below it, so stabbing queries
+only visit that slice: O(log n + zones starting in the slice).
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from math import inf, nextafter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Key = Tuple[float, int]
+
+
+class PriceLevelIndex:
+    """Sorted (price, seq) keys with O(log n) nearest and range lookups."""
+
+    def __init__(self, keys: Iterable[Key] = ()) -> None:
+        """
+        Args:
+            keys: Optional initial (price, seq) keys in any order.
+        """
+        self._keys: List[Key] = sorted(keys)
+
+    def add(self, price: float, seq: int) -> None:
+        insort(self._keys, (price, seq))
+
+    def discard(self, price: float, seq: int) -> None:
+        """Remove a key if present."""
+        i = bisect_left(self._keys, (price, seq))
+        if i < len(self._keys) and self._keys[i] == (price, seq):
+            del self._keys[i]
+
+    def clear(self) -> None:
+        self._keys = []
+
+    def first_above(self, price: float) -> Optional[Key]:
+        """Lowest price strictly above `price` (lowest seq among ties)."""
+        i = bisect_right(self._keys, (price, inf))
+        return self._keys[i] if i < len(self._keys) else None
+
+    def last_below(self, price: float) -> Optional[Key]:
+        """Highest price strictly below `price` (lowest seq among ties)."""
+        i = bisect_left(self._keys, (price, -inf))
+        if i == 0:
+            return None
+        best = self._keys[i - 1][0]
+        return self._keys[bisect_left(self._keys, (best, -inf))]
+
+    def between(self, low: float, high: float, inclusive: bool = False) -> Iterator[Key]:
+        """Keys with low < price < high (low <= price <= high if inclusive), ascending."""
+        keys = self._keys
+        if inclusive:
+            i = bisect_left(keys, (low, -inf))
+            end = bisect_right(keys, (high, inf))
+        else:
+            i = bisect_right(keys, (low, inf))
+            end = bisect_left(keys, (high, -inf))
+        return iter(keys[i:end])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Key]:
+        return iter(self._keys)
+
+    def __repr__(self) -> str:
+        return f"PriceLevelIndex(len={len(self)})"
+
+
+class PriceZoneIndex:
+    """Closed price zones [low, high] keyed by seq, with stabbing queries."""
+
+    def __init__(self) -> None:
+        self._lows: List[Key] = []  # (low, seq), sorted
+        self._zones: Dict[int, Tuple[float, float]] = {}
+        self._max_span = 0.0  # widest zone added since the index was last empty
+
+    def add(self, low: float, high: float, seq: int) -> None:
+        insort(self._lows, (low, seq))
+        self._zones[seq] = (low, high)
+        if high - low > self._max_span:
+            self._max_span = high - low
+
+    def discard(self, seq: int) -> None:
+        """Remove a zone if present."""
+        zone = self._zones.pop(seq, None)
+        if zone is None:
+            return
+        i = bisect_left(self._lows, (zone[0], seq))
+        del self._lows[i]
+        if not self._zones:
+            self._max_span = 0.0
+
+    def clear(self) -> None:
+        self._lows = []
+        self._zones = {}
+        self._max_span = 0.0
+
+    def containing(self, price: float) -> Iterator[int]:
+        """Seqs of zones with low <= price <= high, in ascending low order."""
+        # Widened by a span and one ulp so float rounding never drops a zone;
+        # the comparison below is exact
+        floor = nextafter(price - 2 * self._max_span, -inf)
+        start = bisect_left(self._lows, (floor, -inf))
+        end = bisect_right(self._lows, (price, inf))
+        zones = self._zones
+        return (seq for _, seq in self._lows[start:end] if price <= zones[seq][1])
+
+    def first_containing(self, price: float) -> Optional[int]:
+        """Lowest seq among the zones containing price."""
+        return min(self.containing(price), default=None)
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+    def __repr__(self) -> str:
+        return f"PriceZoneIndex(len={len(self)})"
@@ -0,0 +1,134 @@
+"""
+ModuleProfiler: opt-in per-module instrumentation for SMCDataProcessor.
+
+Records wall time, call counts and exception counts per module and, when
+`trace_allocations` is on, bytes allocated via tracemalloc (which slows the
+run down noticeably, so it is off by default).
+"""
+
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class ModuleStats:
+    name: str
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    alloc_bytes: int = 0  # net bytes still allocated after each call, summed
+    peak_bytes: int = 0  # largest transient allocation seen during a single call
+
+    def to_dict(self, pipeline_time: float) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total_time"] = round(self.total_time, 6)
+        data["max_time"] = round(self.max_time, 6)
+        data["avg_time_us"] = round(self.total_time / self.calls * 1e6, 3) if self.calls else 0.0
+        share = self.total_time * 100.0 / pipeline_time if pipeline_time else 0.0
+        data["time_pct"] = round(share, 2)
+        return data
+
+
+def module_label(module: Any) -> str:
+    """Module name, falling back to the class name for modules without one."""
+    name = getattr(module, "name", None)
+    if not name or name == "base_module":
+        return type(module).__name__
+    return name
+
+
+class ModuleProfiler:
+    def __init__(self, trace_allocations: bool = False) -> None:
+        self.trace_allocations = trace_allocations
+        self._stats: Dict[str, ModuleStats] = {}
+        self._started_tracing = False
+        self.bars = 0
+
+    def start(self) -> None:
+        """Begin tracemalloc tracing if allocation tracking is enabled."""
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self) -> None:
+        self._stats = {}
+        self.bars = 0
+
+    def run(self, name: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call fn(*args) and attribute its cost to `name`.
+
+        Exceptions are counted and re-raised.
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = ModuleStats(name)
+
+        tracing = self.trace_allocations and tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.calls += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stats.alloc_bytes += current - before
+                stats.peak_bytes = max(stats.peak_bytes, peak - before)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-module stats ranked by total wall time (slowest first)."""
+        pipeline_time = sum(s.total_time for s in self._stats.values())
+        ranked = sorted(self._stats.values(), key=lambda s: s.total_time, reverse=True)
+        return {
+            "bars": self.bars,
+            "pipeline_time": round(pipeline_time, 6),
+            "trace_allocations": self.trace_allocations,
+            "modules": [s.to_dict(pipeline_time) for s in ranked],
+        }
+
+    def format_table(self) -> str:
+        """Render the ranked report as a fixed-width text table."""
+        report = self.report()
+        header = (
+            f"{'#':<3} {'module':<28} {'calls':>8} {'errors':>6} "
+            f"{'total_s':>9} {'avg_us':>9} {'max_ms':>8} {'share':>7}"
+        )
+        if self.trace_allocations:
+            header += f" {'alloc_kb':>10} {'peak_kb':>9}"
+        lines = [header, "-" * len(header)]
+        for rank, row in enumerate(report["modules"], 1):
+            line = (
+                f"{rank:<3} {row['name']:<28} {row['calls']:>8} {row['errors']:>6} "
+                f"{row['total_time']:>9.3f} {row['avg_time_us']:>9.1f} "
+                f"{row['max_time'] * 1000:>8.2f} {row['time_pct']:>6.1f}%"
+            )
+            if self.trace_allocations:
+                line += f" {row['alloc_bytes'] / 1024:>10.1f} {row['peak_bytes'] / 1024:>9.1f}"
+            lines.append(line)
+        lines.append(f"bars: {report['bars']}  pipeline time: {report['pipeline_time']:.3f}s")
+        return "\n".join(lines)
+
+    def write_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
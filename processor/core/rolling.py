@@ -0,0 +1,145 @@
+"""
+Incremental statistics over a sliding window of the most recent values.
+
+RollingOrderStats keeps the window both in arrival order (deque, for eviction)
+and sorted (list maintained with bisect), so a push is an O(log n) search plus a
+short memmove instead of re-sorting the window every bar. Medians use the repo's
+upper-middle convention (`sorted(values)[len // 2]`), so results match the code
+it replaces.
+
+RollingExtremes keeps monotonic deques of window maxima/minima candidates, so
+max() and min() are O(1) and a push is amortised O(1). "Was price X reached in
+the last N bars" becomes a single comparison against max()/min().
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Deque, Iterable, List, Tuple
+
+
+class RollingOrderStats:
+    """Sorted view of the last `window` values pushed (values must be comparable, no NaN)."""
+
+    def __init__(self, window: int, values: Iterable[float] = ()) -> None:
+        """
+        Args:
+            window: Number of most recent values retained (> 0).
+            values: Optional initial values, oldest first.
+        """
+        if window <= 0:
+            raise ValueError("RollingOrderStats window must be positive")
+        self._window = int(window)
+        self._order: Deque[float] = deque()
+        self._sorted: List[float] = []
+        for value in values:
+            self.push(value)
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    def push(self, value: float) -> None:
+        """Add the newest value, evicting the oldest once the window is full."""
+        if len(self._order) == self._window:
+            old = self._order.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._order.append(value)
+        insort(self._sorted, value)
+
+    def clear(self) -> None:
+        self._order.clear()
+        self._sorted = []
+
+    def kth(self, k: int) -> float:
+        """k-th smallest value (0-based; negative k counts from the largest)."""
+        return self._sorted[k]
+
+    def median(self) -> float:
+        """Upper-middle median; raises IndexError when empty."""
+        return self._sorted[len(self._sorted) // 2]
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile `sorted[int(q * n)]` for q in [0, 1]."""
+        n = len(self._sorted)
+        if not n:
+            raise IndexError("quantile of empty window")
+        return self._sorted[min(max(int(q * n), 0), n - 1)]
+
+    def count_le(self, value: float) -> int:
+        """Number of values <= value."""
+        return bisect_right(self._sorted, value)
+
+    def count_lt(self, value: float) -> int:
+        """Number of values < value."""
+        return bisect_left(self._sorted, value)
+
+    def sorted_values(self) -> List[float]:
+        """Copy of the window in ascending order."""
+        return list(self._sorted)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __repr__(self) -> str:
+        return f"RollingOrderStats(len={len(self)}, window={self._window})"
+
+
+class RollingExtremes:
+    """Max and min of the last `window` values pushed (values must be comparable, no NaN)."""
+
+    def __init__(self, window: int, values: Iterable[float] = ()) -> None:
+        """
+        Args:
+            window: Number of most recent values covered (> 0).
+            values: Optional initial values, oldest first.
+        """
+        if window <= 0:
+            raise ValueError("RollingExtremes window must be positive")
+        self._window = int(window)
+        self._count = 0  # values pushed since the last clear
+        # (push number, value); values strictly decreasing / increasing front to back
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        for value in values:
+            self.push(value)
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    def push(self, value: float) -> None:
+        """Add the newest value, dropping values that left the window."""
+        n = self._count
+        self._count = n + 1
+        maxima, minima = self._max, self._min
+        while maxima and maxima[-1][1] <= value:
+            maxima.pop()
+        maxima.append((n, value))
+        while minima and minima[-1][1] >= value:
+            minima.pop()
+        minima.append((n, value))
+
+        oldest = n - self._window  # newest push number that has left the window
+        if maxima[0][0] <= oldest:
+            maxima.popleft()
+        if minima[0][0] <= oldest:
+            minima.popleft()
+
+    def clear(self) -> None:
+        self._count = 0
+        self._max.clear()
+        self._min.clear()
+
+    def max(self) -> float:
+        """Largest value in the window; raises IndexError when empty."""
+        return self._max[0][1]
+
+    def min(self) -> float:
+        """Smallest value in the window; raises IndexError when empty."""
+        return self._min[0][1]
+
+    def __len__(self) -> int:
+        return min(self._count, self._window)
+
+    def __repr__(self) -> str:
+        return f"RollingExtremes(len={len(self)}, window={self._window})"
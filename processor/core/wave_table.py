@@ -0,0 +1,224 @@
+"""
+WaveTable: compact, array-backed table of completed waves (swing legs).
+
+Wave modules append one row per finished wave instead of only repeating the
+wave's stats on every bar, so wave-level analytics and threshold tuning can
+scan thousands of waves without going back to the bar records. Each column is
+a typed `array` (int64 bars, int8 codes, float64 prices/flow), so a table of
+10k waves is a few hundred KB and a column is one contiguous buffer.
+
+Rows carry a `segment` index into `segments` (one label per input file or
+symbol, since bar_index restarts there); a wave belongs to the segment its end
+bar is in. Missing prices are stored as NaN and read back as None, missing bar
+indexes as -1.
+
+save()/load() persist the table as one JSON header line followed by the raw
+column bytes, typically next to the enriched output it was built from.
+"""
+
+import json
+import sys
+from array import array
+from math import isnan, nan
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+FORMAT_VERSION = 1
+
+# Wave classification codes (`kind` column)
+KIND_WAVE = 0  # swing-to-swing leg, not classified against a trend
+KIND_IMPULSE = 1
+KIND_PULLBACK = 2
+KIND_NAMES = ("wave", "impulse", "pullback")
+
+# (column, array typecode), in storage order
+WAVE_COLUMNS = (
+    ("segment", "q"),
+    ("start_bar", "q"),
+    ("end_bar", "q"),
+    ("bars", "q"),
+    ("direction", "b"),  # 1 = up, -1 = down
+    ("kind", "b"),
+    ("strength_ok", "b"),  # -1 = not evaluated, else 0/1
+    ("start_price", "d"),
+    ("end_price", "d"),
+    ("delta", "d"),
+    ("volume", "d"),
+    ("speed", "d"),  # |end_price - start_price| per bar
+)
+
+_PRICE_COLUMNS = ("start_price", "end_price")
+
+
+def _bar(value: Any) -> int:
+    return -1 if value is None else int(value)
+
+
+def _price(value: Any) -> float:
+    return nan if value is None else float(value)
+
+
+class WaveTable:
+    """Append-only columns of completed waves, oldest first."""
+
+    def __init__(self, source: str = "") -> None:
+        """
+        Args:
+            source: Name of the module that fills the table (kept in saved files).
+        """
+        self.source = source
+        self.segments: List[str] = [""]
+        self._segment_rows = 0  # rows appended to the current segment
+        self._columns: Dict[str, array] = {name: array(code) for name, code in WAVE_COLUMNS}
+
+    @property
+    def segment(self) -> int:
+        """Index of the segment new rows are appended to."""
+        return len(self.segments) - 1
+
+    def new_segment(self, label: str) -> int:
+        """Start a new segment (e.g. the next input file); an empty current one is relabelled."""
+        if self._segment_rows:
+            self.segments.append(label)
+            self._segment_rows = 0
+        else:
+            self.segments[-1] = label
+        return self.segment
+
+    def append(
+        self,
+        start_bar: int,
+        end_bar: int,
+        start_price: Optional[float],
+        end_price: Optional[float],
+        delta: float,
+        volume: float,
+        bars: int,
+        direction: int,
+        kind: int = KIND_WAVE,
+        speed: Optional[float] = None,
+        strength_ok: Optional[bool] = None,
+    ) -> None:
+        """
+        Record one completed wave.
+
+        Args:
+            speed: Defaults to |end_price - start_price| / bars (0.0 when a
+                price is missing or bars is 0).
+            strength_ok: Result of the module's strength check, None if the
+                wave was not evaluated.
+        """
+        if speed is None:
+            if start_price is None or end_price is None or bars <= 0:
+                speed = 0.0
+            else:
+                speed = abs(end_price - start_price) / bars
+        columns = self._columns
+        columns["segment"].append(self.segment)
+        columns["start_bar"].append(_bar(start_bar))
+        columns["end_bar"].append(_bar(end_bar))
+        columns["bars"].append(int(bars))
+        columns["direction"].append(int(direction))
+        columns["kind"].append(kind)
+        columns["strength_ok"].append(-1 if strength_ok is None else int(bool(strength_ok)))
+        columns["start_price"].append(_price(start_price))
+        columns["end_price"].append(_price(end_price))
+        columns["delta"].append(float(delta))
+        columns["volume"].append(float(volume))
+        columns["speed"].append(float(speed))
+        self._segment_rows += 1
+
+    def column(self, name: str) -> array:
+        """The live column array (do not modify; prices use NaN for missing)."""
+        return self._columns[name]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One wave as a dict, with `kind` as its name and missing prices as None."""
+        row: Dict[str, Any] = {name: values[index] for name, values in self._columns.items()}
+        row["kind"] = KIND_NAMES[row["kind"]]
+        row["strength_ok"] = None if row["strength_ok"] < 0 else bool(row["strength_ok"])
+        for name in _PRICE_COLUMNS:
+            if isnan(row[name]):
+                row[name] = None
+        return row
+
+    def select(
+        self,
+        kind: Optional[int] = None,
+        direction: Optional[int] = None,
+        segment: Optional[int] = None,
+    ) -> List[int]:
+        """Row indexes matching every filter given."""
+        rows = range(len(self))
+        for name, wanted in (("kind", kind), ("direction", direction), ("segment", segment)):
+            if wanted is not None:
+                values = self._columns[name]
+                rows = [i for i in rows if values[i] == wanted]
+        return list(rows)
+
+    def clear(self) -> None:
+        self.segments = [""]
+        self._segment_rows = 0
+        for values in self._columns.values():
+            del values[:]
+
+    # ---- persistence -------------------------------------------------------
+    def save(self, path: Path) -> Path:
+        """Write the table to `path` (JSON header line + raw column bytes)."""
+        path = Path(path)
+        header = {
+            "format": "wave_table",
+            "version": FORMAT_VERSION,
+            "source": self.source,
+            "rows": len(self),
+            "byteorder": sys.byteorder,
+            "columns": [list(column) for column in WAVE_COLUMNS],
+            "segments": self.segments,
+        }
+        with path.open("wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for values in self._columns.values():
+                values.tofile(f)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "WaveTable":
+        """Read a table written by save()."""
+        with Path(path).open("rb") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != "wave_table" or header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"{path}: not a version {FORMAT_VERSION} wave table")
+            if [tuple(column) for column in header["columns"]] != list(WAVE_COLUMNS):
+                raise ValueError(f"{path}: unexpected wave table columns {header['columns']}")
+            table = cls(header["source"])
+            rows = header["rows"]
+            for values in table._columns.values():
+                values.fromfile(f, rows)
+                if header["byteorder"] != sys.byteorder:
+                    values.byteswap()
+        table.segments = list(header["segments"])
+        segments = table._columns["segment"]
+        table._segment_rows = sum(1 for s in segments if s == table.segment)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._columns["end_bar"])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self.row(i) for i in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WaveTable):
+            return NotImplemented
+        # Byte comparison so NaN prices compare equal
+        return (
+            self.source == other.source
+            and self.segments == other.segments
+            and all(
+                values.tobytes() == other._columns[name].tobytes()
+                for name, values in self._columns.items()
+            )
+        )
+
+    def __repr__(self) -> str:
+        return f"WaveTable(len={len(self)}, source={self.source!r}, segments={len(self.segments)})"
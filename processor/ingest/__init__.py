@@ -0,0 +1 @@
+# Ingestion helpers: columnar caches and loaders for exporter JSONL.
@@ -0,0 +1,577 @@
+"""
+Memory-mapped columnar cache for exporter JSONL files.
+
+Converts a `deepseek_enhanced_*.jsonl` export into one binary file per column
+plus a JSON manifest, stored under a directory keyed by the source file's hash.
+Nested objects are flattened into dotted paths (`bar.volume_stats.total_volume`,
+`mtf_context.m5.structure_dir`). Column encodings:
+
+- float / int: fixed-width float64 / int64; a column mixing ints and floats
+  is float64 plus an int8 flag file marking the rows that held ints
+- bool: int8
+- str: int32 codes into a per-column dictionary (`fvg_type`, `session`, ...)
+- json: anything else (lists, mixed types), dictionary-encoded JSON text
+- object: state-only marker for rows where a nested object is {} or null
+
+Columns where some rows are null or missing get an int8 state column
+(0 = missing, 1 = null, 2 = value). With the int flags, every value comes back
+as the type it was written with (ints too large for float64 go to json), so
+records round-trip exactly.
+
+Loading maps the column files read-only, so numeric columns are available as
+zero-copy memoryviews in milliseconds; `records()` rebuilds the nested dicts
+for code that still wants per-bar records.
+
+Usage:
+python -m processor.ingest.columnar_cache data_backtesst/*.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, cast
+
+FORMAT_VERSION = 2
+DEFAULT_CACHE_DIRNAME = ".smc_cache"
+
+STATE_MISSING = 0
+STATE_NULL = 1
+STATE_VALUE = 2
+
+# A (size, mtime) match only stands in for the content hash when the mtime was
+# already this old when it was recorded: a rewrite within the filesystem's
+# timestamp granularity can keep both size and mtime
+_STAT_MARGIN_NS = 1_000_000_000
+
+_TYPECODES = {"float": "d", "int": "q", "bool": "b", "str": "i", "json": "i"}
+_MISSING = object()
+# Largest magnitude at which every int is exactly representable as a float64
+_MAX_EXACT_INT = 2 ** 53
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a source file (hex blake2b, 128-bit)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def flatten_record(
+    rec: Dict[str, Any],
+    prefix: str = "",
+    out: Optional[Dict[str, Any]] = None,
+    leaves: frozenset = frozenset(),
+) -> Dict[str, Any]:
+    """
+    Flatten nested dicts into dotted keys.
+
+    Lists, empty dicts and any path listed in `leaves` are kept as single values.
+    """
+    if out is None:
+        out = {}
+    for key, value in rec.items():
+        path = prefix + key
+        if isinstance(value, dict) and value and path not in leaves:
+            flatten_record(value, path + ".", out, leaves)
+        else:
+            out[path] = value
+    return out
+
+
+def _infer_kind(values: Iterable[Any]) -> str:
+    kind = None
+    for value in values:
+        if value is None or value is _MISSING:
+            continue
+        if isinstance(value, bool):
+            current = "bool"
+        elif isinstance(value, int):
+            current = "int"
+        elif isinstance(value, float):
+            current = "float"
+        elif isinstance(value, str):
+            current = "str"
+        else:
+            return "json"
+        if kind is None or kind == current:
+            kind = current
+        elif {kind, current} == {"int", "float"}:
+            kind = "float"
+        else:
+            return "json"
+    return kind or "null"
+
+
+def _encode_column(kind: str, values: List[Any]) -> tuple[array, List[str] | None]:
+    if kind in ("str", "json"):
+        lookup: Dict[str, int] = {}
+        categories: List[str] = []
+        codes = array("i")
+        for value in values:
+            if value is None or value is _MISSING:
+                codes.append(-1)
+                continue
+            text = value if kind == "str" else json.dumps(value, ensure_ascii=False)
+            code = lookup.get(text)
+            if code is None:
+                code = lookup[text] = len(categories)
+                categories.append(text)
+            codes.append(code)
+        return codes, categories
+
+    if kind == "float":
+        fill: Any = float("nan")
+        cast: Any = float
+    else:
+        fill = 0
+        cast = int
+    data = array(
+        _TYPECODES[kind],
+        (fill if (v is None or v is _MISSING) else cast(v) for v in values),
+    )
+    return data, None
+
+
+def _column_names(flat_rows: List[Dict[str, Any]]) -> Dict[str, None]:
+    """Ordered set of column paths in first-seen order."""
+    names: Dict[str, None] = {}
+    for flat in flat_rows:
+        for key in flat:
+            if key not in names:
+                names[key] = None
+    return names
+
+
+def _write_array(path: Path, data: array) -> None:
+    with path.open("wb") as f:
+        data.tofile(f)
+
+
+def default_cache_dir(source: Path) -> Path:
+    return Path(source).parent / DEFAULT_CACHE_DIRNAME
+
+
+def cache_path_for(
+    source: Path, cache_dir: Optional[Path] = None, digest: str | None = None
+) -> Path:
+    """Directory holding the cache for `source` (keyed by its content hash)."""
+    source = Path(source)
+    digest = digest or file_digest(source)
+    root = Path(cache_dir) if cache_dir else default_cache_dir(source)
+    return root / f"{source.stem}.{digest[:16]}"
+
+
+def build_cache(source: Path, cache_dir: Optional[Path] = None) -> Path:
+    """
+    Convert a JSONL export into a columnar cache directory.
+
+    Args:
+        source: Exporter JSONL file.
+        cache_dir: Root directory for caches (default: `<source dir>/.smc_cache`).
+
+    Returns:
+        Path of the cache directory.
+    """
+    source = Path(source)
+    stat = source.stat()
+    digest = file_digest(source)
+    target = cache_path_for(source, cache_dir, digest)
+
+    with source.open("r", encoding="utf-8") as f:
+        raw_rows = [json.loads(line) for line in f if line.strip()]
+
+    flat_rows = [flatten_record(rec) for rec in raw_rows]
+    names = _column_names(flat_rows)
+    # A path that is an object in some rows and a scalar in others is stored as
+    # json; if the scalar rows are only {} / null it stays columnar and gets an
+    # "object" state column instead
+    prefixes = {n for n in names if any(m.startswith(n + ".") for m in names)}
+    objects = {
+        n for n in prefixes
+        if all(row.get(n, _MISSING) in ({}, None, _MISSING) for row in flat_rows)
+    }
+    conflicts = frozenset(prefixes - objects)
+    if conflicts:
+        flat_rows = [flatten_record(rec, leaves=conflicts) for rec in raw_rows]
+        names = _column_names(flat_rows)
+
+    tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    columns_meta: List[Dict[str, Any]] = []
+    for idx, name in enumerate(names):
+        values = [row.get(name, _MISSING) for row in flat_rows]
+        kind = "object" if name in objects else _infer_kind(values)
+        int_rows = None
+        if kind == "float":
+            int_rows = array("b", (isinstance(v, int) for v in values))
+            if not any(int_rows):
+                int_rows = None
+            elif any(abs(v) > _MAX_EXACT_INT for v, is_int in zip(values, int_rows, strict=True) if is_int):
+                kind, int_rows = "json", None
+        meta: Dict[str, Any] = {"name": name, "kind": kind}
+
+        states = array("b", (
+            STATE_MISSING if v is _MISSING else STATE_NULL if v is None else STATE_VALUE
+            for v in values
+        ))
+        if any(s != STATE_VALUE for s in states):
+            meta["state_file"] = f"{idx}.state"
+            _write_array(tmp / meta["state_file"], states)
+
+        if kind not in ("null", "object"):
+            data, categories = _encode_column(kind, values)
+            meta["dtype"] = data.typecode
+            meta["file"] = f"{idx}.bin"
+            _write_array(tmp / meta["file"], data)
+            if categories is not None:
+                meta["categories"] = categories
+        if int_rows is not None:
+            meta["int_file"] = f"{idx}.int"
+            _write_array(tmp / meta["int_file"], int_rows)
+        columns_meta.append(meta)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "source": source.name,
+        "source_hash": digest,
+        **_stat_fields(stat),
+        "rows": len(flat_rows),
+        "columns": columns_meta,
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    if target.exists():
+        shutil.rmtree(target)
+    tmp.rename(target)
+    return target
+
+
+class ColumnarCache:
+    """Read-only view of a cache directory; column files are memory-mapped lazily."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.manifest: Dict[str, Any] = json.loads(
+            (self.path / "manifest.json").read_text(encoding="utf-8")
+        )
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format in {self.path}")
+        self._meta: Dict[str, Dict[str, Any]] = {c["name"]: c for c in self.manifest["columns"]}
+        self._maps: List[mmap.mmap] = []
+        self._views: Dict[str, memoryview] = {}
+
+    # ---- basic info -------------------------------------------------------
+
+    @property
+    def rows(self) -> int:
+        return cast(int, self.manifest["rows"])
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._meta)
+
+    def kind(self, name: str) -> str:
+        return cast(str, self._meta[name]["kind"])
+
+    def categories(self, name: str) -> List[str]:
+        return cast(list[str], self._meta[name].get("categories", []))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._meta
+
+    # ---- raw column access -----------------------------------------------
+
+    def _map(self, filename: str, typecode: str) -> memoryview:
+        key = filename
+        view = self._views.get(key)
+        if view is not None:
+            return view
+        path = self.path / filename
+        if path.stat().st_size == 0:
+            view = memoryview(array(typecode))
+        else:
+            with path.open("rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mm)
+            view = memoryview(mm).cast(typecode)
+        self._views[key] = view
+        return view
+
+    def values(self, name: str) -> memoryview:
+        """
+        Zero-copy view of a column's stored values.
+
+        Floats use NaN and ints/bools 0 for null/missing rows (see `state()`);
+        float columns also hold the rows that were ints (see `int_rows()`);
+        str/json columns return int32 codes into `categories(name)` (-1 = null).
+        """
+        meta = self._meta[name]
+        if meta["kind"] in ("null", "object"):
+            return memoryview(array("b", bytes(self.rows)))
+        return self._map(meta["file"], meta["dtype"])
+
+    def state(self, name: str) -> Optional[memoryview]:
+        """Per-row int8 state (missing/null/value), or None if every row has a value."""
+        meta = self._meta[name]
+        if "state_file" not in meta:
+            return None
+        return self._map(meta["state_file"], "b")
+
+    def int_rows(self, name: str) -> Optional[memoryview]:
+        """Per-row int8 flag of a float column's int values, or None if it has none."""
+        meta = self._meta[name]
+        if "int_file" not in meta:
+            return None
+        return self._map(meta["int_file"], "b")
+
+    def column(self, name: str) -> List[Any]:
+        """Decoded Python values for a column, with None for null or missing rows."""
+        meta = self._meta[name]
+        kind = meta["kind"]
+        if kind == "null":
+            return [None] * self.rows
+        if kind == "object":
+            return [{} if st == STATE_VALUE else None for st in self.state(name)]
+        raw = self.values(name).tolist()
+        if kind == "bool":
+            values: List[Any] = [bool(v) for v in raw]
+        elif kind in ("str", "json"):
+            cats = meta["categories"]
+            if kind == "json":
+                cats = [json.loads(c) for c in cats]
+            values = [cats[c] if c >= 0 else None for c in raw]
+        else:
+            values = raw
+            ints = self.int_rows(name)
+            if ints is not None:
+                values = [int(v) if is_int else v for v, is_int in zip(values, ints, strict=True)]
+        states = self.state(name)
+        if states is not None:
+            values = [v if s == STATE_VALUE else None for v, s in zip(values, states, strict=True)]
+        return values
+
+    # ---- record reconstruction -------------------------------------------
+
+    def records(self, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Rebuild nested per-bar dicts (equal to the decoded JSONL records).
+
+        Rows are assembled column-wise: every nested object (`bar`,
+        `bar.volume_stats`, ...) is built for all rows at once with
+        dict(zip(keys, values)), deepest level first.
+
+        Args:
+            fields: Optional top-level keys or dotted prefixes to include
+                (e.g. ["high", "bar.volume_stats"]); default is every column.
+        """
+        names = self.columns
+        if fields is not None:
+            wanted = tuple(fields)
+            names = [
+                n for n in names
+                if any(n == w or n.startswith(w + ".") for w in wanted)
+            ]
+
+        # Group leaves by parent path in first-seen key order; a nested object
+        # takes the slot where its first leaf appeared
+        groups: Dict[str, Dict[str, str]] = {"": {}}
+        for name in names:
+            parts = name.split(".")
+            for depth in range(len(parts)):
+                parent = ".".join(parts[:depth])
+                groups.setdefault(parent, {}).setdefault(parts[depth], ".".join(parts[: depth + 1]))
+
+        built: Dict[str, List[Any]] = {}
+        missing: Dict[str, List[int]] = {}
+        objects: Dict[str, memoryview] = {}
+        for name in names:
+            if self._meta[name]["kind"] == "object":
+                objects[name] = self.state(name)
+                continue
+            values = self.column(name)
+            if self._meta[name]["kind"] == "json":
+                # Decoded once per category; copy so rows never alias each other
+                values = [_copy_json(v) if v is not None else None for v in values]
+            built[name] = values
+            states = self.state(name)
+            if states is not None:
+                absent = [i for i, st in enumerate(states) if st == STATE_MISSING]
+                if absent:
+                    missing[name] = absent
+
+        for path in sorted(groups, key=lambda p: p.count(".") + bool(p), reverse=True):
+            slots = groups[path]
+            keys = list(slots)
+            if keys:
+                columns = [built[src] for src in slots.values()]
+                rows = [dict(zip(keys, vals, strict=True)) for vals in zip(*columns, strict=True)]
+            else:
+                rows = [{} for _ in range(self.rows)]
+            emptied = set()
+            for key, src in slots.items():
+                for i in missing.get(src, ()):
+                    rows[i].pop(key, None)
+                    if not rows[i]:
+                        emptied.add(i)
+            if emptied and path:
+                # All children absent: the object was {}, null or missing
+                marker = objects.get(path)
+                absent = []
+                for i in sorted(emptied):
+                    st = marker[i] if marker is not None else STATE_MISSING
+                    if st == STATE_NULL:
+                        rows[i] = None
+                    elif st == STATE_MISSING:
+                        absent.append(i)
+                if absent:
+                    missing[path] = absent
+            built[path] = rows
+        return built[""]
+
+    def close(self) -> None:
+        self._views.clear()
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                # A caller still holds a view; the map is released when it is dropped
+                pass
+        self._maps = []
+
+    def __enter__(self) -> "ColumnarCache":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _copy_json(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    return value
+
+
+def open_cache(
+    source: Path, cache_dir: Optional[Path] = None, rebuild: bool = False
+) -> ColumnarCache:
+    """
+    Open the cache for `source`, building it first if missing or stale.
+
+    The source is hashed only when no cache records its current size and
+    mtime; a cache found by hash gets the new stat recorded for next time.
+    """
+    source = Path(source)
+    if not rebuild:
+        target = _find_by_stat(source, cache_dir)
+        if target is not None:
+            return ColumnarCache(target)
+    stat = source.stat()
+    target = cache_path_for(source, cache_dir)
+    manifest = _read_manifest(target)
+    if rebuild or manifest is None:
+        target = build_cache(source, cache_dir)
+    else:
+        _write_manifest(target, {**manifest, **_stat_fields(stat)})
+    return ColumnarCache(target)
+
+
+def _read_manifest(target: Path) -> dict[str, Any] | None:
+    """Manifest of the cache at `target`, or None if missing or an older FORMAT_VERSION."""
+    try:
+        manifest = json.loads((target / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(target: Path, manifest: dict[str, Any]) -> None:
+    tmp = target / f"manifest.json.tmp{os.getpid()}"
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, target / "manifest.json")
+
+
+def _stat_fields(stat: os.stat_result) -> dict[str, int]:
+    """Manifest fields that let open_cache skip hashing an unchanged source."""
+    return {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "stat_recorded_ns": time.time_ns(),
+    }
+
+
+def _find_by_stat(source: Path, cache_dir: Path | None = None) -> Path | None:
+    """Cache directory whose manifest records `source`'s current size and mtime."""
+    root = Path(cache_dir) if cache_dir else default_cache_dir(source)
+    stat = source.stat()
+    prefix = source.stem + "."
+    try:
+        # <stem>.<digest[:16]>, as named by cache_path_for
+        candidates = [
+            p for p in root.iterdir()
+            if p.name.startswith(prefix) and len(p.name) == len(prefix) + 16
+        ]
+    except OSError:
+        return None
+    for path in candidates:
+        manifest = _read_manifest(path)
+        if (
+            manifest is not None
+            and manifest.get("source") == source.name
+            and manifest.get("source_size") == stat.st_size
+            and manifest.get("source_mtime_ns") == stat.st_mtime_ns
+            and manifest.get("stat_recorded_ns", 0) - stat.st_mtime_ns >= _STAT_MARGIN_NS
+        ):
+            return path
+    return None
+
+
+def load_records(
+    source: Path, cache_dir: Optional[Path] = None, fields: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """Drop-in replacement for `list(load_jsonl(source))` backed by the cache."""
+    with open_cache(source, cache_dir) as cache:
+        return list(cache.records(fields))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build columnar caches for JSONL exports.")
+    parser.add_argument("inputs", nargs="+", help="Exporter JSONL files")
+    parser.add_argument(
+        "--cache-dir", default=None, help="Cache root (default: <input dir>/.smc_cache)"
+    )
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild even if a cache exists")
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+    for src in args.inputs:
+        start = time.perf_counter()
+        with open_cache(Path(src), cache_dir, rebuild=args.rebuild) as cache:
+            elapsed = time.perf_counter() - start
+            size = sum(p.stat().st_size for p in cache.path.iterdir())
+            print(
+                f"{Path(src).name}: {cache.rows} rows, {len(cache.columns)} columns, "
+                f"{size / 1024:.0f} KB -> {cache.path} ({elapsed * 1000:.0f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Compiled bar normalizer shared by the backtest scripts.
+
+A field spec maps each output field to one of:
+
+- `Field(paths, default)`: first dotted source path present in the raw record
+  (e.g. `bar.volume_stats.total_volume`, then root `volume`), else default.
+  A key that is present wins even if its value is None, like `dict.get`;
+  a nested object that is missing or not a dict counts as empty.
+- `Const(value)`: fixed value.
+- `Derived(fn, *inputs)`: fn applied to already-normalized output fields.
+
+`compile_spec()` turns the spec into a generated Python function once: every
+nested object is fetched a single time and each field becomes a couple of
+local dict lookups, instead of the chained `.get()` walks in the old
+per-script `prepare_bar` copies. `from_cache()` runs the same spec column-wise
+over a ColumnarCache.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+from .columnar_cache import STATE_MISSING, ColumnarCache
+
+
+@dataclass(frozen=True)
+class Field:
+    paths: Tuple[str, ...]
+    default: Any = None
+
+    def __init__(self, paths: str | Sequence[str], default: Any = None) -> None:
+        object.__setattr__(self, "paths", (paths,) if isinstance(paths, str) else tuple(paths))
+        object.__setattr__(self, "default", default)
+
+
+@dataclass(frozen=True)
+class Const:
+    value: Any
+
+
+@dataclass(frozen=True)
+class Derived:
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+
+    def __init__(self, fn: Callable[..., Any], *inputs: str) -> None:
+        object.__setattr__(self, "fn", fn)
+        object.__setattr__(self, "inputs", tuple(inputs))
+
+
+FieldSpec = Mapping[str, Any]
+
+
+def _bar_range(high: Any, low: Any) -> Any:
+    return high - low
+
+
+# Bar layout consumed by Fix14MgannSwing / Fix16 strategies: root-level OHLC, ATR,
+# FVG and swing fields; volume/delta and external structure from the nested `bar`.
+BAR_SPEC: Dict[str, Any] = {
+    # OHLC
+    "high": Field("high", 0),
+    "low": Field("low", 0),
+    "open": Field("open", 0),
+    "close": Field("close", 0),
+    # Volume
+    "volume": Field(("bar.volume_stats.total_volume", "volume"), 0),
+    "delta": Field(("bar.volume_stats.delta_close", "delta"), 0),
+    # Technical
+    "atr14": Field("atr_14", 0),
+    "range": Derived(_bar_range, "high", "low"),
+    "tick_size": Const(0.1),
+    # Timestamp
+    "timestamp": Field("timestamp", ""),
+    "bar_index": Field("bar_index", 0),
+    # External structure
+    "ext_dir": Field(("bar.ext_dir", "current_trend"), 0),
+    "ext_choch_up": Field("bar.ext_choch_up", False),
+    "ext_choch_down": Field("bar.ext_choch_down", False),
+    "ext_bos_up": Field("bar.ext_bos_up", False),
+    "ext_bos_down": Field("bar.ext_bos_down", False),
+    # FVG fields (root level)
+    "fvg_detected": Field("fvg_detected", False),
+    "fvg_type": Field("fvg_type"),
+    "fvg_top": Field("fvg_top"),
+    "fvg_bottom": Field("fvg_bottom"),
+    # Swing points
+    "last_swing_high": Field("last_swing_high"),
+    "last_swing_low": Field("last_swing_low"),
+}
+
+# Everything taken from the nested `bar` object (M1 swing/M5 context scripts).
+NESTED_BAR_SPEC: Dict[str, Any] = {
+    "open": Field("bar.o", 0),
+    "high": Field("bar.h", 0),
+    "low": Field("bar.l", 0),
+    "close": Field("bar.c", 0),
+    "volume": Field("bar.volume_stats.total_volume", 0),
+    "delta": Field("bar.volume_stats.delta_close", 0),
+    "timestamp": Field("timestamp", ""),
+    "ext_bos_up": Field("bar.ext_bos_up", False),
+    "ext_bos_down": Field("bar.ext_bos_down", False),
+    "ext_choch_up": Field("bar.ext_choch_up", False),
+    "ext_choch_down": Field("bar.ext_choch_down", False),
+    "ext_dir": Field("bar.ext_dir", 0),
+}
+
+
+class BarNormalizer:
+    """Callable produced by compile_spec(): raw exporter record -> module bar_state."""
+
+    def __init__(self, spec: FieldSpec) -> None:
+        self.spec: Dict[str, Any] = dict(spec)
+        self._validate()
+        self._fn, self.source = _generate(self.spec)
+
+    def _validate(self) -> None:
+        seen = set()
+        for name, rule in self.spec.items():
+            if isinstance(rule, Derived):
+                unknown = [i for i in rule.inputs if i not in seen]
+                if unknown:
+                    raise ValueError(f"{name}: derived from unknown/later fields {unknown}")
+            elif not isinstance(rule, (Field, Const)):
+                raise TypeError(f"{name}: unsupported rule {rule!r}")
+            seen.add(name)
+
+    def __call__(self, raw: Mapping[str, Any]) -> Dict[str, Any]:
+        return self._fn(raw)
+
+    def from_cache(self, cache: ColumnarCache) -> Dict[str, List[Any]]:
+        """
+        Normalize every row of a columnar cache at once.
+
+        Returns:
+            Mapping of output field -> list of values (row i equals
+            self(record_i), up to int/float widening done by the cache).
+        """
+        rows = cache.rows
+        out: Dict[str, List[Any]] = {}
+        for name, rule in self.spec.items():
+            if isinstance(rule, Const):
+                out[name] = [rule.value] * rows
+            elif isinstance(rule, Derived):
+                out[name] = list(map(rule.fn, *(out[i] for i in rule.inputs)))
+            else:
+                out[name] = _resolve_columns(cache, rule)
+        return out
+
+    def rows_from_cache(self, cache: ColumnarCache) -> List[Dict[str, Any]]:
+        """Column-wise normalization, returned as per-bar dicts."""
+        columns = self.from_cache(cache)
+        keys = list(columns)
+        return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def compile_spec(spec: FieldSpec) -> BarNormalizer:
+    """Compile a field spec into a BarNormalizer."""
+    return BarNormalizer(spec)
+
+
+def _generate(spec: Dict[str, Any]) -> Tuple[Callable[[Mapping[str, Any]], Dict[str, Any]], str]:
+    """Generate the straight-line extraction function for a spec."""
+    env: Dict[str, Any] = {"_EMPTY": {}, "_MISSING": object(), "_dict": dict}
+    lines: List[str] = []
+    objects: Dict[str, str] = {"": "raw"}
+
+    def object_var(path: str) -> str:
+        # Fetch each nested object once; non-dicts (missing/None) become {}
+        if path in objects:
+            return objects[path]
+        parent, _, key = path.rpartition(".")
+        parent_var = object_var(parent)
+        var = f"_o{len(objects)}"
+        lines.append(f"    {var} = {parent_var}.get({key!r}, _EMPTY)")
+        lines.append(f"    if {var}.__class__ is not _dict:")
+        lines.append(f"        {var} = _EMPTY")
+        objects[path] = var
+        return var
+
+    body: List[str] = []
+    out_vars: Dict[str, str] = {}
+    for idx, (name, rule) in enumerate(spec.items()):
+        var = f"_v{idx}"
+        out_vars[name] = var
+        if isinstance(rule, Const):
+            env[f"_c{idx}"] = rule.value
+            body.append(f"    {var} = _c{idx}")
+        elif isinstance(rule, Derived):
+            env[f"_f{idx}"] = rule.fn
+            args = ", ".join(out_vars[i] for i in rule.inputs)
+            body.append(f"    {var} = _f{idx}({args})")
+        else:
+            env[f"_d{idx}"] = rule.default
+            *fallbacks, last = rule.paths
+            depth = ""
+            for path in fallbacks:
+                parent, _, key = path.rpartition(".")
+                body.append(f"    {depth}{var} = {object_var(parent)}.get({key!r}, _MISSING)")
+                body.append(f"    {depth}if {var} is _MISSING:")
+                depth += "    "
+            parent, _, key = last.rpartition(".")
+            body.append(f"    {depth}{var} = {object_var(parent)}.get({key!r}, _d{idx})")
+
+    items = ", ".join(f"{name!r}: {var}" for name, var in out_vars.items())
+    source = "\n".join(
+        ["def normalize(raw):"] + lines + body + [f"    return {{{items}}}"]
+    )
+    exec(compile(source, "<bar-normalizer>", "exec"), env)  # noqa: S102 - generated from spec
+    return env["normalize"], source
+
+
+def _resolve_columns(cache: ColumnarCache, rule: Field) -> List[Any]:
+    """Column-wise equivalent of a Field lookup with fallbacks."""
+    rows = cache.rows
+    result: List[Any] = [rule.default] * rows
+    pending = list(range(rows))  # rows still looking for a present source
+    for path in rule.paths:
+        if not pending:
+            break
+        values = _path_values(cache, path)
+        if values is None:
+            continue
+        column, states = values
+        if states is None:
+            for i in pending:
+                result[i] = column[i]
+            pending = []
+        else:
+            still = []
+            for i in pending:
+                if states[i] == STATE_MISSING:
+                    still.append(i)
+                else:
+                    result[i] = column[i]
+            pending = still
+    return result
+
+
+def _path_values(
+    cache: ColumnarCache, path: str
+) -> tuple[list[Any], list[int] | None] | None:
+    """Values and per-row states for a source path, or None if the cache lacks it."""
+    if path in cache and cache.kind(path) != "object":
+        states = cache.state(path)
+        return cache.column(path), (states.tolist() if states is not None else None)
+    prefix = path + "."
+    if any(name.startswith(prefix) for name in cache.columns) or path in cache:
+        # Whole nested object requested (e.g. "bar"): rebuild it from its columns
+        marker = object()
+        column = [rec.get(path, marker) for rec in cache.records(fields=[path])]
+        return column, [STATE_MISSING if v is marker else 2 for v in column]
+    return None
+
+
+normalize_bar = compile_spec(BAR_SPEC)
+normalize_nested_bar = compile_spec(NESTED_BAR_SPEC)
@@ -0,0 +1,225 @@
+"""
+Projected JSONL reader: decode only the fields a module pipeline reads.
+
+Exporter lines carry large nested blobs (`bar.price_action`, `mtf_context`)
+that the modules never look at. `pipeline_fields()` unions what each module
+declares (`input_fields`, `required_fields` and MODULE_REQUIRED_FIELDS) and
+`ProjectedReader` yields records reduced to those fields:
+
+- orjson is used for decoding when installed (`backend="auto"`), else json.
+- Trailing top-level keys that are not needed (typically `mtf_context`) are cut
+  off the raw line before decoding. The exporter writes one key order, learnt
+  from the first line; a line whose decoded prefix does not match it (different
+  key count or last key, or unbalanced JSON) is decoded in full instead.
+- Kept nested objects are pruned to the requested dotted paths, so resident
+  records stay small.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from processor.core.columns import DEFAULT_COLUMNS
+from processor.validation.schema import MODULE_REQUIRED_FIELDS
+
+# Read by SMCDataProcessor itself (symbol reset) and its columnar side-store
+PROCESSOR_FIELDS = ("symbol",) + tuple(DEFAULT_COLUMNS)
+
+BACKENDS = ("auto", "orjson", "json")
+
+
+def pipeline_fields(modules: Iterable[Any], extra: Iterable[str] = ()) -> Set[str]:
+    """
+    Union of raw record fields needed to run `modules`.
+
+    Args:
+        modules: Pipeline modules (BaseModule instances).
+        extra: Additional fields needed by the caller (e.g. outcome annotation).
+
+    Returns:
+        Set of top-level keys and dotted nested paths.
+    """
+    fields: Set[str] = set(PROCESSOR_FIELDS)
+    for module in modules:
+        fields.update(getattr(module, "input_fields", ()) or ())
+        fields.update(getattr(module, "required_fields", ()) or ())
+        fields.update(MODULE_REQUIRED_FIELDS.get(getattr(module, "name", ""), ()))
+    fields.update(extra)
+    return fields
+
+
+def get_decoder(backend: str = "auto") -> Callable[[bytes], Any]:
+    """Return a `loads(bytes)` callable for the requested JSON backend."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown JSON backend {backend!r}; expected one of {BACKENDS}")
+    if backend in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            if backend == "orjson":
+                raise
+        else:
+            return orjson.loads
+    return json.loads
+
+
+def _field_tree(fields: Iterable[str]) -> Dict[str, Any]:
+    """Nest dotted paths: {"bar": {"h": None}, "close": None}; None keeps the whole value."""
+    tree: Dict[str, Any] = {}
+    for field in sorted(fields, key=lambda f: f.count(".")):
+        node = tree
+        parts = field.split(".")
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # an ancestor is already kept whole
+            node = node.setdefault(part, child)
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _subset(tree: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build a function that reduces a nested object to `tree` (looks up only wanted keys)."""
+    nested = [(key, _subset(sub)) for key, sub in tree.items() if sub is not None]
+    keys = list(tree)
+
+    def subset(obj: Dict[str, Any]) -> Dict[str, Any]:
+        out = {k: obj[k] for k in keys if k in obj}
+        for key, sub in nested:
+            val = out.get(key)
+            if val.__class__ is dict:
+                out[key] = sub(val)
+        return out
+
+    return subset
+
+
+class ProjectedReader:
+    """
+    Stream exporter JSONL records reduced to a set of fields.
+
+    Attributes:
+        lines: Non-empty lines read.
+        truncated: Lines decoded from a truncated prefix.
+        full_decodes: Lines decoded in full (first line, layout mismatches).
+    """
+
+    def __init__(self, path: Path, fields: Iterable[str], backend: str = "auto") -> None:
+        self.path = Path(path)
+        self.fields = set(fields)
+        self.tree = _field_tree(self.fields)
+        self._keys = frozenset(self.tree)
+        self._nested = [(key, _subset(sub)) for key, sub in self.tree.items() if sub is not None]
+        self._loads = get_decoder(backend)
+        self.lines = 0
+        self.truncated = 0
+        self.full_decodes = 0
+        # Learnt from the first line
+        self._marker: Optional[bytes] = None
+        self._prefix_len = 0
+        self._prefix_last: Optional[str] = None
+        self._drop: List[str] = []
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        loads = self._loads
+        nested = self._nested
+        with self.path.open("rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                self.lines += 1
+                rec = None
+                marker = self._marker
+                if marker is not None:
+                    cut = line.find(marker)
+                    if cut > 0:
+                        rec = self._decode_prefix(line[:cut] + b"}")
+                if rec is not None:
+                    # Same layout as the first line: drop its unwanted keys in place
+                    self.truncated += 1
+                    for key in self._drop:
+                        rec.pop(key, None)
+                else:
+                    rec = loads(line)
+                    self.full_decodes += 1
+                    if self.lines == 1:
+                        self._learn_layout(rec)
+                    keys = self._keys
+                    rec = {k: v for k, v in rec.items() if k in keys}
+                for key, subset in nested:
+                    val = rec.get(key)
+                    if val.__class__ is dict:
+                        rec[key] = subset(val)
+                yield rec
+
+    def _decode_prefix(self, head: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            rec = self._loads(head)
+        except ValueError:
+            # Marker matched inside a nested object: braces do not balance
+            return None
+        if not isinstance(rec, dict) or len(rec) != self._prefix_len:
+            return None
+        if next(reversed(rec)) != self._prefix_last:
+            return None
+        return rec
+
+    def _learn_layout(self, rec: Any) -> None:
+        if not isinstance(rec, dict):
+            return
+        keys = list(rec)
+        keep = len(keys)
+        while keep > 0 and keys[keep - 1] not in self.tree:
+            keep -= 1
+        if keep == 0 or keep == len(keys):
+            return
+        self._marker = b',"' + keys[keep].encode("utf-8") + b'":'
+        self._prefix_len = keep
+        self._prefix_last = keys[keep - 1]
+        self._drop = [k for k in keys[:keep] if k not in self.tree]
+
+
+def load_projected(
+    path: Path, fields: Iterable[str], backend: str = "auto"
+) -> List[Dict[str, Any]]:
+    """Read a whole JSONL file with projection."""
+    return list(ProjectedReader(path, fields, backend=backend))
+
+
+def main() -> None:
+    from processor.backtest.run_module_backtest import build_default_modules
+
+    parser = argparse.ArgumentParser(
+        description="Compare full vs projected decoding of exporter JSONL."
+    )
+    parser.add_argument("inputs", nargs="+", help="Exporter JSONL files")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto")
+    args = parser.parse_args()
+
+    fields = pipeline_fields(build_default_modules())
+    loads = get_decoder(args.backend)
+    for src in args.inputs:
+        path = Path(src)
+        start = time.perf_counter()
+        with path.open("rb") as f:
+            full = [loads(line) for line in f if line.strip()]
+        full_time = time.perf_counter() - start
+
+        reader = ProjectedReader(path, fields, backend=args.backend)
+        start = time.perf_counter()
+        projected = list(reader)
+        proj_time = time.perf_counter() - start
+        print(
+            f"{path.name}: {len(full)} rows, full {full_time * 1000:.0f} ms, "
+            f"projected {proj_time * 1000:.0f} ms ({reader.truncated} truncated, "
+            f"{len(fields)} fields, {sum(len(r) for r in projected) / max(len(projected), 1):.0f} "
+            f"of {sum(len(r) for r in full) / max(len(full), 1):.0f} keys/row)"
+        )
+
+
+if __name__ == "__main__":
+    main()
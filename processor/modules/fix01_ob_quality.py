@@ -8,15 +8,21 @@ Calculates ob_strength_score from 0-1 based on:
 - Delta imbalance
 - Liquidity sweep
 """
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 from processor.core.module_base import BaseModule
+from processor.core.rolling import RollingOrderStats
 
 
 class OBQualityModule(BaseModule):
     """Order Block Quality Scoring Module."""
 
     name = "fix01_ob_quality"
+    input_fields = {
+        "ob_detected", "ob_direction", "ob_high", "ob_low", "ob_bar_index", "ob_flip_valid",
+        "ob_volume", "swing_after_price", "volume", "buy_volume", "buy_vol", "sell_volume",
+        "sell_vol", "bar_index", "high", "low", "close",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -46,21 +52,22 @@ class OBQualityModule(BaseModule):
 
         # Check if OB detected
         if not bar_state.get("ob_detected", False):
-            return {**bar_state, **self._default_output()}
+            return self.emit(bar_state, self._default_output())
 
         eligibility, reason = self._check_eligibility(bar_state, history)
         if not eligibility:
-            return {**bar_state, **self._default_output(reason)}
+            return self.emit(bar_state, self._default_output(reason))
 
         # Calculate each component
         displacement_rr = self._calculate_displacement_rr(bar_state)
         displacement_score = min(displacement_rr / 4.0, 1.0)
 
-        historical_volumes = [
-            b.get("volume", 0) for b in history[-self.config["volume_median_period"] :]
-        ]
+        period = self.config["volume_median_period"]
+        historical_volumes = self.history_values(history, "volume", period)
         ob_volume = bar_state.get("ob_volume", bar_state.get("volume", 0) or 0)
-        volume_factor = self._calculate_volume_factor(ob_volume, historical_volumes)
+        volume_factor = self._calculate_volume_factor(
+            ob_volume, historical_volumes, self.history_order_stats(history, "volume", period)
+        )
         volume_score = min(max((volume_factor - 1.0) / 2.0, 0.0), 1.0)
 
         delta_imbalance = self._calculate_delta_imbalance(
@@ -70,9 +77,7 @@ class OBQualityModule(BaseModule):
         )
 
         liquidity_sweep = self._detect_liquidity_sweep(
-            history + [bar_state],
-            len(history),
-            bar_state.get("ob_direction", "bull"),
+            history, bar_state, bar_state.get("ob_direction", "bull")
         )
 
         # Final weighted score using configurable weights
@@ -83,8 +88,7 @@ class OBQualityModule(BaseModule):
             + self.config["weight_sweep"] * (1.0 if liquidity_sweep else 0.0)
         )
 
-        return {
-            **bar_state,
+        outputs = {
             "ob_strength_score": round(ob_strength_score, 3),
             "ob_volume_factor": round(volume_factor, 2),
             "ob_delta_imbalance": round(delta_imbalance, 3),
@@ -93,6 +97,7 @@ class OBQualityModule(BaseModule):
             "ob_valid": True,
             "ob_invalid_reason": "",
         }
+        return self.emit(bar_state, outputs)
 
     def _check_eligibility(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]]
@@ -118,7 +123,7 @@ class OBQualityModule(BaseModule):
         # Require sweep if configured (use detection with available history)
         if self.config["require_sweep"]:
             sweep = self._detect_liquidity_sweep(
-                history + [bar_state], len(history), bar_state.get("ob_direction", "bull")
+                history, bar_state, bar_state.get("ob_direction", "bull")
             )
             if not sweep:
                 return False, "no_sweep"
@@ -162,9 +167,12 @@ class OBQualityModule(BaseModule):
         return ob_move / ob_risk
 
     def _calculate_volume_factor(
-        self, ob_volume: float, historical_volumes: List[float]
+        self,
+        ob_volume: float,
+        historical_volumes: Sequence[float],
+        volume_stats: Optional[RollingOrderStats] = None,
     ) -> float:
-        """Calculate volume factor vs median."""
+        """Calculate volume factor vs median (volume_stats: same window, kept sorted)."""
         if not historical_volumes:
             return 1.0
 
@@ -173,6 +181,8 @@ class OBQualityModule(BaseModule):
             median_vol = (
                 sum(historical_volumes) / len(historical_volumes) if historical_volumes else 1
             )
+        elif volume_stats is not None and len(volume_stats) == lookback:
+            median_vol = volume_stats.median()
         else:
             sorted_vols = sorted(historical_volumes[-lookback:])
             mid = len(sorted_vols) // 2
@@ -202,33 +212,40 @@ class OBQualityModule(BaseModule):
             return raw_imbalance * 0.3  # Wrong direction penalty
 
     def _detect_liquidity_sweep(
-        self, bars: List[Dict[str, Any]], ob_index: int, direction: str
+        self, history: Sequence[Dict[str, Any]], ob_bar: Dict[str, Any], direction: str
     ) -> bool:
-        """Detect if OB formed after liquidity sweep."""
+        """Detect if OB (the current bar, after history) formed after liquidity sweep."""
         lookback = self.config["sweep_lookback_bars"]
         min_bars = self.config["sweep_min_bars"]
 
-        if ob_index < min_bars or ob_index >= len(bars):
+        ob_index = len(history)
+        if ob_index < min_bars:
             return False
 
         # Get recent swing high/low before OB with configurable lookback
-        lookback_bars = bars[max(0, ob_index - lookback) : ob_index]
-        if len(lookback_bars) < min_bars:
+        window = min(lookback, ob_index) if lookback > 0 else 0
+        if window < min_bars or window == 0:
             return False
 
-        recent_swing_high = max(b.get("high", 0) for b in lookback_bars)
-        recent_swing_low = min(b.get("low", float("inf")) for b in lookback_bars)
-
-        ob_bar = bars[ob_index]
         ob_low = ob_bar.get("low", 0)
         ob_high = ob_bar.get("high", 0)
         ob_close = ob_bar.get("close", 0)
 
         if direction == "bull":
+            extremes = self.history_extremes(history, "low", lookback)
+            if extremes is not None:
+                recent_swing_low = extremes.min()
+            else:
+                recent_swing_low = min(b.get("low", float("inf")) for b in history[-window:])
             # Bull OB: Sweep low, then close higher
             if ob_low <= recent_swing_low and ob_close > recent_swing_low:
                 return True
         else:
+            extremes = self.history_extremes(history, "high", lookback)
+            if extremes is not None:
+                recent_swing_high = extremes.max()
+            else:
+                recent_swing_high = max(b.get("high", 0) for b in history[-window:])
             # Bear OB: Sweep high, then close lower
             if ob_high >= recent_swing_high and ob_close < recent_swing_high:
                 return True
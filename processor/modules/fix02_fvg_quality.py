@@ -16,6 +16,12 @@ class FVGQualityModule(BaseModule):
     """FVG Quality Scoring Module - PRIMARY SIGNAL."""
 
     name = "fix02_fvg_quality"
+    input_fields = {
+        "fvg_detected", "fvg_type", "fvg_top", "fvg_bottom", "fvg_gap_size",
+        "fvg_creation_volume", "fvg_creation_delta", "fvg_creation_bar_index", "atr_14",
+        "volume", "delta", "buy_volume", "sell_volume", "bar_index", "close", "vp_session_vah",
+        "vp_session_val", "liquidity_sweep_detected",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -37,7 +43,7 @@ class FVGQualityModule(BaseModule):
             return bar_state
 
         if not bar_state.get("fvg_detected", False):
-            return {**bar_state, **self._default_output()}
+            return self.emit(bar_state, self._default_output())
 
         history = history or []
 
@@ -63,8 +69,7 @@ class FVGQualityModule(BaseModule):
             strength_info, va_info, lifecycle_info
         )
 
-        return {
-            **bar_state,
+        outputs = {
             **strength_info,
             **va_info,
             **lifecycle_info,
@@ -72,6 +77,7 @@ class FVGQualityModule(BaseModule):
             "fvg_quality_score": round(quality_score, 4),
             "fvg_context": context,
         }
+        return self.emit(bar_state, outputs)
 
     def _calculate_fvg_strength(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]]
@@ -146,7 +152,10 @@ class FVGQualityModule(BaseModule):
 
     def _get_volume_median(self, history: List[Dict[str, Any]], period: int) -> float:
         """Get median volume from history."""
-        volumes = [b.get("volume", 0) for b in history[-period:]]
+        stats = self.history_order_stats(history, "volume", period)
+        if stats is not None:
+            return stats.median() if len(stats) else 1.0
+        volumes = self.history_values(history, "volume", period)
         if not volumes:
             return 1.0
         sorted_vols = sorted(volumes)
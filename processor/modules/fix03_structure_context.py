@@ -16,6 +16,11 @@ class StructureContextModule(BaseModule):
     """Structure Context Analysis Module."""
 
     name = "fix03_structure_context"
+    input_fields = {
+        "fvg_detected", "fvg_type", "fvg_bar_index", "fvg_creation_bar_index", "bar_index",
+        "current_trend", "choch_detected", "choch_type", "choch_bars_ago", "bos_detected",
+        "bos_type", "bos_bars_ago",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -40,10 +45,10 @@ class StructureContextModule(BaseModule):
 
         # Only process if FVG detected
         if not bar_state.get("fvg_detected", False):
-            return {**bar_state, **self._default_output()}
+            return self.emit(bar_state, self._default_output())
 
         context = self._detect_structure_context(bar_state, history)
-        return {**bar_state, **context}
+        return self.emit(bar_state, context)
 
     def _detect_structure_context(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]]
@@ -30,6 +30,13 @@ class ConfluenceModule(BaseModule):
     """Confluence Scoring Module."""
 
     name = "fix04_confluence"
+    input_fields = {
+        "fvg_detected", "fvg_type", "fvg_top", "fvg_bottom", "fvg_creation_volume",
+        "fvg_strength_score", "fvg_delta_alignment", "nearest_ob_top", "nearest_ob_bottom",
+        "nearest_liquidity_high", "nearest_liquidity_low", "liquidity_high_type",
+        "liquidity_low_type", "structure_context", "structure_context_score", "htf_trend",
+        "htf_trend_strength", "current_trend", "atr_14", "close", "volume",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -43,7 +50,7 @@ class ConfluenceModule(BaseModule):
 
         # Only calculate confluence for FVG signals
         if not bar_state.get("fvg_detected", False):
-            return {**bar_state, **self._default_output()}
+            return self.emit(bar_state, self._default_output())
 
         history = history or []
 
@@ -69,8 +76,7 @@ class ConfluenceModule(BaseModule):
             factor for factor, score in factor_scores.items() if score >= 0.6
         ]
 
-        return {
-            **bar_state,
+        outputs = {
             "confluence_score": round(weighted_sum, 3),
             "confluence_class": confluence_class,
             "conf_ob_proximity": round(factor_scores["ob_proximity"], 3),
@@ -84,6 +90,7 @@ class ConfluenceModule(BaseModule):
             "confluence_data_complete": len(missing_inputs) == 0,
             "confluence_missing_inputs": missing_inputs,
         }
+        return self.emit(bar_state, outputs)
 
     def _calculate_factor_scores(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]]
@@ -253,12 +260,16 @@ class ConfluenceModule(BaseModule):
         delta_alignment = bar_state.get("fvg_delta_alignment", 0)
 
         # Get median volume
-        volumes = [b.get("volume", 0) for b in history[-20:]]
-        if not volumes:
-            median_vol = fvg_volume
+        stats = self.history_order_stats(history, "volume", 20)
+        if stats is not None:
+            median_vol = stats.median() if len(stats) else fvg_volume
         else:
-            sorted_vols = sorted(volumes)
-            median_vol = sorted_vols[len(sorted_vols) // 2]
+            volumes = self.history_values(history, "volume", 20)
+            if not volumes:
+                median_vol = fvg_volume
+            else:
+                sorted_vols = sorted(volumes)
+                median_vol = sorted_vols[len(sorted_vols) // 2]
 
         if median_vol == 0:
             return 0.5, True
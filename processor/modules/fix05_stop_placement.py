@@ -33,6 +33,11 @@ class StopPlacementModule(BaseModule):
     """Stop Placement Module."""
 
     name = "fix05_stop_placement"
+    input_fields = {
+        "fvg_detected", "fvg_retest_detected", "fvg_active", "fvg_type", "fvg_top",
+        "fvg_bottom", "fvg_strength_class", "entry", "close", "atr_14", "nearest_ob_top",
+        "nearest_ob_bottom", "last_swing_high", "last_swing_low",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -50,7 +55,7 @@ class StopPlacementModule(BaseModule):
             or bar_state.get("fvg_retest_detected", False)
             or bar_state.get("fvg_active", False)
         ):
-            return {**bar_state, **self._default_output(reason="no_fvg")}
+            return self.emit(bar_state, self._default_output(reason="no_fvg"))
 
         # Get required fields
         fvg_type = bar_state.get("fvg_type", "bullish")
@@ -68,11 +73,11 @@ class StopPlacementModule(BaseModule):
 
         # Basic validation
         if not atr or atr <= 0:
-            return {**bar_state, **self._default_output(reason="invalid_atr")}
+            return self.emit(bar_state, self._default_output(reason="invalid_atr"))
         if fvg_top == 0 or fvg_bottom == 0:
-            return {**bar_state, **self._default_output(reason="missing_fvg_levels")}
+            return self.emit(bar_state, self._default_output(reason="missing_fvg_levels"))
         if entry_price == 0 or entry_price is None:
-            return {**bar_state, **self._default_output(reason="missing_entry")}
+            return self.emit(bar_state, self._default_output(reason="missing_entry"))
 
         # Calculate all stop options
         all_options = []
@@ -99,10 +104,9 @@ class StopPlacementModule(BaseModule):
         )
 
         if result is None:
-            return {**bar_state, **self._default_output(reason="no_valid_stop")}
+            return self.emit(bar_state, self._default_output(reason="no_valid_stop"))
 
-        return {
-            **bar_state,
+        outputs = {
             "stop_price": result["stop_price"],
             "stop_type": result["stop_type"],
             "stop_distance": result["stop_distance"],
@@ -112,6 +116,7 @@ class StopPlacementModule(BaseModule):
             "stop_valid": result["valid"],
             "stop_reason": result["reason"],
         }
+        return self.emit(bar_state, outputs)
 
     def _calc_fvg_edge_stop(
         self, direction: int, fvg_top: float, fvg_bottom: float, atr: float
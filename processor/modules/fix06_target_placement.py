@@ -17,6 +17,12 @@ class TargetPlacementModule(BaseModule):
     """Target Placement Module."""
 
     name = "fix06_target_placement"
+    input_fields = {
+        "fvg_detected", "fvg_retest_detected", "fvg_active", "fvg_type", "entry", "close",
+        "stop_price", "atr_14", "last_swing_high", "last_swing_low", "recent_swing_high",
+        "recent_swing_low", "nearest_liquidity_high", "nearest_liquidity_low",
+        "prev_session_high", "prev_session_low", "high", "low",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -54,7 +60,7 @@ class TargetPlacementModule(BaseModule):
             or bar_state.get("fvg_retest_detected", False)
             or bar_state.get("fvg_active", False)
         ):
-            return {**bar_state, **self._default_output(reason="no_fvg")}
+            return self.emit(bar_state, self._default_output(reason="no_fvg"))
 
         fvg_type = bar_state.get("fvg_type", "bullish")
         fvg_direction = 1 if fvg_type == "bullish" else -1
@@ -64,9 +70,9 @@ class TargetPlacementModule(BaseModule):
         atr = bar_state.get("atr_14", 0.01)
 
         if not entry_price or not stop_price or stop_price == entry_price:
-            return {**bar_state, **self._default_output(reason="missing_stop_or_entry")}
+            return self.emit(bar_state, self._default_output(reason="missing_stop_or_entry"))
         if atr is None or atr <= 0:
-            return {**bar_state, **self._default_output(reason="invalid_atr")}
+            return self.emit(bar_state, self._default_output(reason="invalid_atr"))
 
         # Get target sources
         swing_high = bar_state.get("last_swing_high", bar_state.get("recent_swing_high"))
@@ -106,8 +112,7 @@ class TargetPlacementModule(BaseModule):
         rr2 = self._calc_rr(entry_price, stop_price, tp2, fvg_direction) if tp2 else 0
         rr3 = self._calc_rr(entry_price, stop_price, tp3, fvg_direction) if tp3 else 0
 
-        return {
-            **bar_state,
+        outputs = {
             "tp1_price": round(tp1, 5) if tp1 else 0.0,
             "tp1_type": tp1_type,
             "tp1_rr": round(rr1, 2),
@@ -124,6 +129,7 @@ class TargetPlacementModule(BaseModule):
             "target_reason": "ok" if tp1 else "no_target",
             "targets_filtered_count": len(targets),
         }
+        return self.emit(bar_state, outputs)
 
     def _collect_targets(
         self,
@@ -210,6 +216,17 @@ class TargetPlacementModule(BaseModule):
             return targets
 
         lookback = self.config["hit_validation_lookback"]
+
+        # A target was hit iff the window's extreme reached it
+        field = "high" if direction == 1 else "low"
+        extremes = self.history_extremes(history, field, lookback)
+        if extremes is not None:
+            if direction == 1:
+                reached = extremes.max()
+                return [t for t in targets if not reached >= t["price"]]
+            reached = extremes.min()
+            return [t for t in targets if not reached <= t["price"]]
+
         recent_history = history[-lookback:] if len(history) > lookback else history
 
         filtered = []
@@ -16,6 +16,9 @@ class MarketConditionModule(BaseModule):
     """Market Condition Classification Module."""
 
     name = "fix07_market_condition"
+    input_fields = {
+        "adx_14", "di_plus_14", "di_minus_14", "atr_14",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -63,8 +66,7 @@ class MarketConditionModule(BaseModule):
             atr is not None and atr > 0,
         ])
 
-        return {
-            **bar_state,
+        outputs = {
             # Trend classification
             "market_trend": trend_info["trend"],
             "market_trend_strength": round(trend_info["strength"], 3),
@@ -80,6 +82,7 @@ class MarketConditionModule(BaseModule):
             "trade_environment": condition["environment"],
             "market_data_complete": data_complete,
         }
+        return self.emit(bar_state, outputs)
 
     def _classify_trend(
         self, adx: float, di_plus: float, di_minus: float
@@ -129,18 +132,47 @@ class MarketConditionModule(BaseModule):
         self, current_atr: float, history: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Classify volatility regime using ATR percentile."""
-        short_vals = [b.get("atr_14", 0) for b in history[-self.config["atr_lookback_short"] :]]
-        long_vals = [b.get("atr_14", 0) for b in history[-self.config["atr_lookback_long"] :]]
-        values = [a for a in (short_vals + [current_atr]) if a and a > 0]
-        if len(values) < 5:
-            return {"regime": "normal", "percentile": 50.0, "atr_vs_avg": 1.0}
+        short_window = self.config["atr_lookback_short"]
+        long_vals = self.history_values(history, "atr_14", self.config["atr_lookback_long"])
+        stats = self.history_order_stats(history, "atr_14", short_window)
+        if (
+            stats is not None
+            and isinstance(current_atr, (int, float))
+            and current_atr == current_atr  # not NaN
+        ):
+            # Rank among positive ATRs in the window plus the current bar, via the
+            # sorted window instead of sorting a fresh copy
+            non_positive = stats.count_le(0.0)
+            current_positive = 1 if current_atr > 0 else 0
+            count = len(stats) - non_positive + current_positive
+            if count < 5:
+                return {"regime": "normal", "percentile": 50.0, "atr_vs_avg": 1.0}
+            rank = 0
+            if current_positive:
+                rank = stats.count_le(current_atr) - non_positive + 1
+            percentile = (rank / count) * 100
+            values = None
+        else:
+            short_vals = self.history_values(history, "atr_14", short_window)
+            values = [a for a in short_vals if a and a > 0]
+            if current_atr and current_atr > 0:
+                values.append(current_atr)
+            if len(values) < 5:
+                return {"regime": "normal", "percentile": 50.0, "atr_vs_avg": 1.0}
 
-        sorted_atr = sorted(values)
-        rank = sum(1 for a in sorted_atr if a <= current_atr)
-        percentile = (rank / len(sorted_atr)) * 100
+            sorted_atr = sorted(values)
+            rank = sum(1 for a in sorted_atr if a <= current_atr)
+            percentile = (rank / len(sorted_atr)) * 100
 
         # Average over long window if available
-        avg_base = [a for a in long_vals if a and a > 0] or values
+        avg_base = [a for a in long_vals if a and a > 0]
+        if not avg_base:
+            if values is None:
+                short_vals = self.history_values(history, "atr_14", short_window)
+                values = [a for a in short_vals if a and a > 0]
+                if current_atr > 0:
+                    values.append(current_atr)
+            avg_base = values
         avg_atr = sum(avg_base) / len(avg_base) if avg_base else 1.0
         atr_vs_avg = current_atr / avg_atr if avg_atr > 0 else 1.0
 
@@ -16,6 +16,10 @@ class VolumeDivergenceModule(BaseModule):
     """Volume/Delta Divergence Detection Module (thread-safe)."""
 
     name = "fix08_volume_divergence"
+    input_fields = {
+        "symbol", "bar_index", "is_swing_high", "is_swing_low", "high", "low", "delta",
+        "cumulative_delta",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -47,14 +51,14 @@ class VolumeDivergenceModule(BaseModule):
             # Detect divergence
             divergence_info = self._detect_divergence(bar_state, history)
 
-        return {
-            **bar_state,
+        outputs = {
             "divergence_detected": divergence_info["detected"],
             "divergence_type": divergence_info["type"],
             "divergence_strength": round(divergence_info["strength"], 3),
             "divergence_swing_count": divergence_info["swing_count"],
             "divergence_bars_ago": divergence_info["bars_ago"],
         }
+        return self.emit(bar_state, outputs)
 
     def _maybe_reset(self, bar_state: Dict[str, Any]) -> None:
         """Reset swing history on symbol change or early bars."""
@@ -9,7 +9,7 @@ Computes session-based volume profile levels:
 """
 import threading
 from collections import deque
-from typing import Any, Deque, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from processor.core.module_base import BaseModule
 
@@ -18,6 +18,10 @@ class VolumeProfileModule(BaseModule):
     """Volume Profile Module (thread-safe)."""
 
     name = "fix09_volume_profile"
+    input_fields = {
+        "session", "timestamp", "is_session_start", "high", "low", "close", "volume",
+        "tick_size",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -34,6 +38,23 @@ class VolumeProfileModule(BaseModule):
         self._current_session: Optional[str] = None
         self._last_timestamp: Optional[str] = None
         self._lock = threading.Lock()
+        self._reset_profile()
+
+    def _reset_profile(self) -> None:
+        """Drop the incremental profile state (new session)."""
+        self._price_high: Optional[float] = None
+        self._price_low: Optional[float] = None
+        self._tick_size: Optional[float] = None
+        self._tick_counts: dict[float, int] = {}  # session bars per tick size
+        self._profile_stale = False
+        # Binned histogram for the current layout (price_low, price_high, num_bins, bin_size)
+        self._layout: Optional[Tuple[float, float, int, float]] = None
+        self._bins: List[float] = []
+        self._bin_bars: list[int] = []  # bars with volume in each bin
+        self._bin_order: List[int] = []  # bin indexes by volume desc, index asc
+        self._total_volume: float = 0
+        self._poc_bin = 0
+        self._order_dirty = False
 
     def process_bar(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]] | None = None
@@ -49,6 +70,7 @@ class VolumeProfileModule(BaseModule):
             session_changed = self._detect_session_change(bar_state)
             if session_changed:
                 self._session_data.clear()  # Reset profile for new session
+                self._reset_profile()
 
             # Accumulate session data
             self._update_session_data(bar_state)
@@ -60,8 +82,7 @@ class VolumeProfileModule(BaseModule):
         current_close = bar_state.get("close", 0)
         position_info = self._get_price_position(current_close, vp_info)
 
-        return {
-            **bar_state,
+        outputs = {
             "vp_session_vah": round(vp_info["vah"], 5),
             "vp_session_val": round(vp_info["val"], 5),
             "vp_session_poc": round(vp_info["poc"], 5),
@@ -71,6 +92,7 @@ class VolumeProfileModule(BaseModule):
             "vp_distance_to_vah": round(position_info["distance_to_vah"], 5),
             "vp_distance_to_val": round(position_info["distance_to_val"], 5),
         }
+        return self.emit(bar_state, outputs)
 
     def _detect_session_change(self, bar_state: Dict[str, Any]) -> bool:
         """
@@ -128,90 +150,203 @@ class VolumeProfileModule(BaseModule):
             "volume": bar_state.get("volume", 0),
             "tick_size": bar_state.get("tick_size"),
         }
+        if len(self._session_data) == self._session_data.maxlen:
+            # The oldest bar drops out of the profile (the deque evicts it on append)
+            self._evict_bar(self._session_data[0])
         # deque with maxlen automatically handles the cap - O(1) operation
         self._session_data.append(bar_data)
+        tick_size = bar_data["tick_size"]
+        if tick_size:
+            self._tick_counts[tick_size] = self._tick_counts.get(tick_size, 0) + 1
+
+        if self._profile_stale:
+            return
+        # Running session range; strict comparisons keep the first extreme
+        # seen, like max()/min() over the session
+        high, low = bar_data["high"], bar_data["low"]
+        if high > 0 and (self._price_high is None or high > self._price_high):
+            self._price_high = high
+        if low > 0 and (self._price_low is None or low < self._price_low):
+            self._price_low = low
+        if self._tick_size is None and tick_size:
+            self._tick_size = tick_size
+
+    def _evict_bar(self, bar: dict[str, Any]) -> None:
+        """
+        Take the oldest session bar out of the profile.
+
+        Its volume leaves the bins it was added to. The range and tick size are
+        rescanned only when the bar may have held them: its high/low equals the
+        session extreme, or its tick size was the session's and other tick
+        sizes remain. Otherwise the bin layout stays valid.
+        """
+        tick_size = bar["tick_size"]
+        if tick_size:
+            count = self._tick_counts[tick_size] - 1
+            if count:
+                self._tick_counts[tick_size] = count
+            else:
+                del self._tick_counts[tick_size]
+            if tick_size == self._tick_size and set(self._tick_counts) != {tick_size}:
+                self._profile_stale = True
+        if bar["high"] > 0 and bar["high"] == self._price_high:
+            self._profile_stale = True
+        if bar["low"] > 0 and bar["low"] == self._price_low:
+            self._profile_stale = True
+        if self._layout is not None:
+            self._remove_bar_volume(bar)
+
+    def _rescan_session(self) -> None:
+        """Recompute range and tick size from the session bars (after an extreme is evicted)."""
+        highs = [b["high"] for b in self._session_data if b["high"] > 0]
+        lows = [b["low"] for b in self._session_data if b["low"] > 0]
+        self._price_high = max(highs) if highs else None
+        self._price_low = min(lows) if lows else None
+        self._tick_size = next(
+            (b.get("tick_size") for b in self._session_data if b.get("tick_size")), None
+        )
+        self._profile_stale = False
+
+    def _rebin_profile(self, layout: Tuple[float, float, int, float]) -> None:
+        """Rebuild the histogram for a new bin layout from every session bar."""
+        self._layout = layout
+        self._bins = [0.0] * layout[2]
+        self._bin_bars = [0] * layout[2]
+        self._bin_order = list(range(layout[2]))
+        self._total_volume = 0
+        self._poc_bin = 0
+        for bar in self._session_data:
+            self._add_bar_volume(bar)
+        self._order_dirty = True
+
+    def _bar_shares(self, bar: dict[str, Any]) -> list[tuple[int, float]]:
+        """(bin, volume) shares of one bar's volume over the bins its range overlaps."""
+        vol = bar["volume"]
+        if vol <= 0:
+            return []
+
+        bar_high = bar["high"]
+        bar_low = bar["low"]
+        bar_range = bar_high - bar_low
+        if bar_range <= 0:
+            return []
+
+        price_low, _, num_bins, bin_size = self._layout
+        # Candidate bins padded by one on each side; the overlap test below
+        # decides, with the same bin edges as a full rebuild
+        first = max(int((bar_low - price_low) / bin_size) - 1, 0)
+        last = min(int((bar_high - price_low) / bin_size) + 1, num_bins - 1)
+        shares = []
+        for i in range(first, last + 1):
+            bin_low = price_low + (i * bin_size)
+            bin_high = bin_low + bin_size
+
+            # Check overlap between bar range and bin
+            overlap_low = max(bar_low, bin_low)
+            overlap_high = min(bar_high, bin_high)
+
+            if overlap_high > overlap_low:
+                shares.append((i, vol * ((overlap_high - overlap_low) / bar_range)))
+        return shares
+
+    def _add_bar_volume(self, bar: Dict[str, Any]) -> None:
+        """Distribute one bar's volume over the bins its range overlaps."""
+        bins = self._bins
+        poc_bin = self._poc_bin
+        for i, share in self._bar_shares(bar):
+            bins[i] += share
+            self._bin_bars[i] += 1
+            self._total_volume += share
+            # Bins only grow, so the POC can only move to a touched bin
+            # (lowest index wins ties, like bins.index(max(bins)))
+            if bins[i] > bins[poc_bin] or (bins[i] == bins[poc_bin] and i < poc_bin):
+                poc_bin = i
+            self._order_dirty = True
+        self._poc_bin = poc_bin
+
+    def _remove_bar_volume(self, bar: dict[str, Any]) -> None:
+        """Take an evicted bar's volume back out of its bins."""
+        shares = self._bar_shares(bar)
+        if not shares:
+            return
+        bins = self._bins
+        for i, share in shares:
+            self._bin_bars[i] -= 1
+            # An emptied bin is exactly 0, not a subtraction residue
+            bins[i] = bins[i] - share if self._bin_bars[i] else 0.0
+            self._total_volume -= share
+        if not any(self._bin_bars):
+            self._total_volume = 0.0
+        # Bins shrank: the POC can move anywhere (first maximum, as in a rebuild)
+        self._poc_bin = bins.index(max(bins))
+        self._order_dirty = True
 
     def _calculate_volume_profile(self) -> Dict[str, Any]:
-        """Calculate VAH, VAL, POC from session data."""
+        """
+        Calculate VAH, VAL, POC from session data.
+
+        The binned histogram is kept between bars: a new bar only adds its volume
+        to the bins it overlaps, a bar evicted at max_session_bars takes its
+        volume back out, and the session is re-binned only when the bin layout
+        changes (range expansion, first tick size, eviction of the bar holding
+        the session high/low). Results equal a full rebuild per bar; after
+        evictions the bin sums can differ from it in the last float bits.
+        """
         if len(self._session_data) < 5:
             return {"vah": 0.0, "val": 0.0, "poc": 0.0}
 
-        # Find price range
-        all_highs = [b["high"] for b in self._session_data if b["high"] > 0]
-        all_lows = [b["low"] for b in self._session_data if b["low"] > 0]
+        if self._profile_stale:
+            self._rescan_session()
 
-        if not all_highs or not all_lows:
+        if self._price_high is None or self._price_low is None:
+            self._layout = None
             return {"vah": 0.0, "val": 0.0, "poc": 0.0}
 
-        price_high = max(all_highs)
-        price_low = min(all_lows)
+        price_high = self._price_high
+        price_low = self._price_low
         price_range = price_high - price_low
 
         if price_range <= 0:
+            self._layout = None
             return {"vah": price_high, "val": price_low, "poc": (price_high + price_low) / 2}
 
         # Create price bins (tick-aware if provided)
-        tick_size = next((b.get("tick_size") for b in self._session_data if b.get("tick_size")), None)
+        tick_size = self._tick_size
         base_bin = price_range / self.config["price_bins"]
         bin_size = max(base_bin, tick_size) if tick_size else base_bin
         num_bins = max(int(price_range / bin_size), 1)
         bin_size = price_range / num_bins if num_bins > 0 else price_range
-        bins = [0.0] * num_bins
-
-        # Distribute volume to bins
-        total_volume = 0
-        for bar in self._session_data:
-            vol = bar["volume"]
-            if vol <= 0:
-                continue
-
-            # Distribute bar volume across its range
-            bar_high = bar["high"]
-            bar_low = bar["low"]
-
-            for i in range(num_bins):
-                bin_low = price_low + (i * bin_size)
-                bin_high = bin_low + bin_size
-
-                # Check overlap between bar range and bin
-                overlap_low = max(bar_low, bin_low)
-                overlap_high = min(bar_high, bin_high)
+        layout = (price_low, price_high, num_bins, bin_size)
 
-                if overlap_high > overlap_low:
-                    bar_range = bar_high - bar_low
-                    if bar_range > 0:
-                        overlap_pct = (overlap_high - overlap_low) / bar_range
-                        bins[i] += vol * overlap_pct
-                        total_volume += vol * overlap_pct
+        if layout != self._layout:
+            self._rebin_profile(layout)
+        else:
+            self._add_bar_volume(self._session_data[-1])
 
+        total_volume = self._total_volume
         if total_volume == 0:
             return {"vah": price_high, "val": price_low, "poc": (price_high + price_low) / 2}
 
-        # Find POC (bin with highest volume)
-        max_vol = max(bins)
-        poc_bin = bins.index(max_vol)
+        bins = self._bins
+        poc_bin = self._poc_bin
         poc = price_low + (poc_bin + 0.5) * bin_size
 
-        # Find Value Area (70% of volume) using top-volume bins around POC
+        # Find Value Area (70% of volume) using top-volume bins around POC.
+        # The previous order is nearly sorted, so re-sorting it is close to linear.
+        if self._order_dirty:
+            self._bin_order.sort(key=lambda i: (-bins[i], i))
+            self._order_dirty = False
         target_vol = total_volume * self.config["value_area_pct"]
-        included_indices = set([poc_bin])
+        va_low_bin = va_high_bin = poc_bin
         accumulated_vol = bins[poc_bin]
-
-        bin_order = sorted(
-            [(i, v) for i, v in enumerate(bins)],
-            key=lambda x: x[1],
-            reverse=True,
-        )
-        for idx, vol in bin_order:
+        for idx in self._bin_order:
             if accumulated_vol >= target_vol:
                 break
-            if idx in included_indices:
+            if idx == poc_bin:
                 continue
-            included_indices.add(idx)
-            accumulated_vol += vol
-
-        va_low_bin = min(included_indices)
-        va_high_bin = max(included_indices)
+            va_low_bin = min(va_low_bin, idx)
+            va_high_bin = max(va_high_bin, idx)
+            accumulated_vol += bins[idx]
 
         vah = price_low + (va_high_bin + 1) * bin_size
         val = price_low + va_low_bin * bin_size
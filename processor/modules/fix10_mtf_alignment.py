@@ -16,6 +16,11 @@ class MTFAlignmentModule(BaseModule):
     """Multi-Timeframe Alignment Module."""
 
     name = "fix10_mtf_alignment"
+    input_fields = {
+        "htf_high", "htf_low", "htf_close", "htf_ema_20", "htf_ema_50", "htf_is_swing_high",
+        "htf_is_swing_low", "htf_bos_type", "htf_bos_bars_ago", "htf_choch_type",
+        "htf_choch_bars_ago", "high", "low", "close", "fvg_type",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -44,8 +49,7 @@ class MTFAlignmentModule(BaseModule):
 
         # If HTF data missing, return neutral defaults and flag incomplete
         if not ema_alignment.get("data_complete", False):
-            return {
-                **bar_state,
+            outputs = {
                 "mtf_alignment_score": 0.0,
                 "mtf_alignment_points": 0,
                 "htf_trend": "neutral",
@@ -58,6 +62,7 @@ class MTFAlignmentModule(BaseModule):
                 "mtf_is_aligned": False,
                 "mtf_data_complete": False,
             }
+            return self.emit(bar_state, outputs)
 
         # Calculate overall alignment score (0-3/4 points -> normalized to 0-1)
         total_points = 0
@@ -94,8 +99,7 @@ class MTFAlignmentModule(BaseModule):
         is_aligned = fvg_direction == ema_alignment["ema_trend"] if fvg_direction != 0 else False
         data_complete = ema_alignment["data_complete"]
 
-        return {
-            **bar_state,
+        outputs = {
             "mtf_alignment_score": round(alignment_score, 3),
             "mtf_alignment_points": total_points,
             "htf_trend": htf_trend,
@@ -108,6 +112,7 @@ class MTFAlignmentModule(BaseModule):
             "mtf_is_aligned": is_aligned,
             "mtf_data_complete": data_complete,
         }
+        return self.emit(bar_state, outputs)
 
     def _check_ema_alignment(
         self, price: float, ema_20: float, ema_50: float
@@ -8,15 +8,22 @@ Tracks liquidity levels and detects sweeps:
 - Sweep detection
 """
 import threading
+from bisect import bisect_left, bisect_right
 from typing import Any, Dict, List, Optional
 
 from processor.core.module_base import BaseModule
+from processor.core.price_index import PriceLevelIndex
 
 
 class LiquidityMapModule(BaseModule):
     """Liquidity Map Module (thread-safe)."""
 
     name = "fix11_liquidity_map"
+    input_fields = {
+        "bar_index", "high", "low", "close", "tick_size", "is_swing_high", "is_swing_low",
+        "last_swing_high", "last_swing_low", "nearest_liquidity_high", "nearest_liquidity_low",
+        "liquidity_high_type", "liquidity_low_type",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -27,6 +34,11 @@ class LiquidityMapModule(BaseModule):
             "sweep_confirmation_bars": 2,  # Bars to confirm sweep
         }
         self._liquidity_levels: List[Dict[str, Any]] = []
+        # Sorted price indexes over _liquidity_levels, keyed by (price, seq)
+        self._level_index = PriceLevelIndex()  # all levels (swing dedupe)
+        self._unswept_index = PriceLevelIndex()  # unswept levels (sweeps, nearest)
+        self._levels_by_seq: Dict[int, Dict[str, Any]] = {}
+        self._next_level_seq = 0
         self._recent_highs: List[Dict[str, Any]] = []
         self._recent_lows: List[Dict[str, Any]] = []
         self._lock = threading.Lock()
@@ -69,8 +81,7 @@ class LiquidityMapModule(BaseModule):
         eqh_touches = equal_highs[0]["touches"] if equal_highs else 0
         eql_touches = equal_lows[0]["touches"] if equal_lows else 0
 
-        return {
-            **bar_state,
+        outputs = {
             # Liquidity levels (use existing or calculated)
             "nearest_liquidity_high": nearest_liq_high,
             "nearest_liquidity_low": nearest_liq_low,
@@ -89,6 +100,7 @@ class LiquidityMapModule(BaseModule):
             "eqh_touches": eqh_touches,
             "eql_touches": eql_touches,
         }
+        return self.emit(bar_state, outputs)
 
     def _update_swing_tracking(self, bar_state: Dict[str, Any]) -> None:
         """Track recent swing highs and lows."""
@@ -138,17 +150,25 @@ class LiquidityMapModule(BaseModule):
             tolerance_abs = None
         tolerance_ratio = self.config["equal_level_tolerance"]
 
-        for i, price in enumerate(prices):
-            touches = 1
-            for j, other_price in enumerate(prices):
-                if i == j:
-                    continue
-                price_diff = abs(price - other_price)
-                within_tick = tolerance_abs is not None and price_diff <= tolerance_abs
-                relative_diff = price_diff / price if price > 0 else float("inf")
-                within_ratio = relative_diff <= tolerance_ratio
-                if within_tick or within_ratio:
-                    touches += 1
+        def within(price: float, other_price: float) -> bool:
+            price_diff = abs(price - other_price)
+            within_tick = tolerance_abs is not None and price_diff <= tolerance_abs
+            relative_diff = price_diff / price if price > 0 else float("inf")
+            return within_tick or relative_diff <= tolerance_ratio
+
+        # Count touches from the sorted prices inside each price's tolerance
+        # window (padded for rounding; within() makes the exact decision)
+        sorted_prices = sorted(prices)
+        for price in prices:
+            reach = tolerance_abs or 0.0
+            if price > 0:
+                reach = max(reach, tolerance_ratio * price)
+            reach *= 2
+            lo = bisect_left(sorted_prices, price - reach)
+            hi = bisect_right(sorted_prices, price + reach)
+            touches = 1 + sum(1 for other in sorted_prices[lo:hi] if within(price, other))
+            if within(price, price):
+                touches -= 1  # the price itself is in its window
 
             if touches >= self.config["min_touches"]:
                 equal_levels.append({
@@ -180,48 +200,20 @@ class LiquidityMapModule(BaseModule):
 
         # Add equal levels
         for level in equal_highs:
-            self._liquidity_levels.append({
-                "price": level["price"],
-                "type": "equal_highs",
-                "direction": "above",
-                "bar_index": bar_index,
-                "swept": False,
-            })
+            self._add_liquidity_level(level["price"], "equal_highs", "above", bar_index)
 
         for level in equal_lows:
-            self._liquidity_levels.append({
-                "price": level["price"],
-                "type": "equal_lows",
-                "direction": "below",
-                "bar_index": bar_index,
-                "swept": False,
-            })
+            self._add_liquidity_level(level["price"], "equal_lows", "below", bar_index)
 
         # Add swing levels
         swing_high = bar_state.get("last_swing_high")
         swing_low = bar_state.get("last_swing_low")
 
-        if swing_high and not any(
-            abs(l["price"] - swing_high) < 0.0001 for l in self._liquidity_levels
-        ):
-            self._liquidity_levels.append({
-                "price": swing_high,
-                "type": "swing",
-                "direction": "above",
-                "bar_index": bar_index,
-                "swept": False,
-            })
-
-        if swing_low and not any(
-            abs(l["price"] - swing_low) < 0.0001 for l in self._liquidity_levels
-        ):
-            self._liquidity_levels.append({
-                "price": swing_low,
-                "type": "swing",
-                "direction": "below",
-                "bar_index": bar_index,
-                "swept": False,
-            })
+        if swing_high and not self._has_level_near(swing_high, 0.0001):
+            self._add_liquidity_level(swing_high, "swing", "above", bar_index)
+
+        if swing_low and not self._has_level_near(swing_low, 0.0001):
+            self._add_liquidity_level(swing_low, "swing", "below", bar_index)
 
         # Cleanup old levels
         max_levels = 50
@@ -229,6 +221,34 @@ class LiquidityMapModule(BaseModule):
             # Keep most recent and unswept levels
             unswept = [l for l in self._liquidity_levels if not l["swept"]]
             self._liquidity_levels = unswept[-max_levels:]
+            keys = [(l["price"], l["seq"]) for l in self._liquidity_levels]
+            self._level_index = PriceLevelIndex(keys)
+            self._unswept_index = PriceLevelIndex(keys)
+            self._levels_by_seq = {l["seq"]: l for l in self._liquidity_levels}
+
+    def _add_liquidity_level(
+        self, price: float, level_type: str, direction: str, bar_index: int
+    ) -> None:
+        """Append a level and register it in the price indexes."""
+        seq = self._next_level_seq
+        self._next_level_seq += 1
+        level = {
+            "price": price,
+            "type": level_type,
+            "direction": direction,
+            "bar_index": bar_index,
+            "swept": False,
+            "seq": seq,  # insertion order, ties broken like a scan of the list
+        }
+        self._liquidity_levels.append(level)
+        self._levels_by_seq[seq] = level
+        self._level_index.add(price, seq)
+        self._unswept_index.add(price, seq)
+
+    def _has_level_near(self, price: float, tolerance: float) -> bool:
+        """True if any tracked level (swept or not) is within tolerance of price."""
+        window = self._level_index.between(price - 2 * tolerance, price + 2 * tolerance, True)
+        return any(abs(level_price - price) < tolerance for level_price, _ in window)
 
     def _detect_sweep(
         self, bar_state: Dict[str, Any], history: List[Dict[str, Any]]
@@ -246,36 +266,35 @@ class LiquidityMapModule(BaseModule):
         bar_close = bar_state.get("close", 0)
         bar_index = bar_state.get("bar_index", 0)
 
-        for level in self._liquidity_levels:
-            if level["swept"]:
-                continue
-
-            price = level["price"]
-            level_type = level["type"]
-
-            # Check for sweep above (liquidity above current price)
+        # Only unswept levels inside the bar's range can be swept:
+        # above-levels in (close, high), below-levels in (low, close).
+        # The earliest added one wins, as in a scan of the level list.
+        candidates = [
+            seq
+            for _, seq in self._unswept_index.between(bar_close, bar_high)
+            if self._levels_by_seq[seq]["direction"] == "above"
+        ]
+        candidates.extend(
+            seq
+            for _, seq in self._unswept_index.between(bar_low, bar_close)
+            if self._levels_by_seq[seq]["direction"] == "below"
+        )
+        if candidates:
+            level = self._levels_by_seq[min(candidates)]
+            level["swept"] = True
+            self._unswept_index.discard(level["price"], level["seq"])
             if level["direction"] == "above":
-                if bar_high > price and bar_close < price:
-                    # Swept above and closed below = bearish sweep
-                    level["swept"] = True
-                    return {
-                        "detected": True,
-                        "type": f"sweep_above_{level_type}",
-                        "level": price,
-                        "bars_ago": bar_index - level.get("bar_index", bar_index),
-                    }
-
-            # Check for sweep below
-            elif level["direction"] == "below":
-                if bar_low < price and bar_close > price:
-                    # Swept below and closed above = bullish sweep
-                    level["swept"] = True
-                    return {
-                        "detected": True,
-                        "type": f"sweep_below_{level_type}",
-                        "level": price,
-                        "bars_ago": bar_index - level.get("bar_index", bar_index),
-                    }
+                # Swept above and closed below = bearish sweep
+                sweep_type = f"sweep_above_{level['type']}"
+            else:
+                # Swept below and closed above = bullish sweep
+                sweep_type = f"sweep_below_{level['type']}"
+            return {
+                "detected": True,
+                "type": sweep_type,
+                "level": level["price"],
+                "bars_ago": bar_index - level.get("bar_index", bar_index),
+            }
 
         return default
 
@@ -289,15 +308,13 @@ class LiquidityMapModule(BaseModule):
                 "low_type": "",
             }
 
-        unswept = [l for l in self._liquidity_levels if not l["swept"]]
-
         # Find nearest above
-        above_levels = [l for l in unswept if l["price"] > current_price]
-        nearest_above = min(above_levels, key=lambda x: x["price"]) if above_levels else None
+        key = self._unswept_index.first_above(current_price)
+        nearest_above = self._levels_by_seq[key[1]] if key else None
 
         # Find nearest below
-        below_levels = [l for l in unswept if l["price"] < current_price]
-        nearest_below = max(below_levels, key=lambda x: x["price"]) if below_levels else None
+        key = self._unswept_index.last_below(current_price)
+        nearest_below = self._levels_by_seq[key[1]] if key else None
 
         return {
             "nearest_high": nearest_above["price"] if nearest_above else 0,
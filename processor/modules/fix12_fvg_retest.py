@@ -15,6 +15,15 @@ class FVGRetestModule(BaseModule):
     """FVG Retest Detection/Scoring."""
 
     name = "fix12_fvg_retest"
+    input_fields = {
+        "fvg_active", "fvg_detected", "fvg_type", "fvg_top", "fvg_bottom", "fvg_bar_index",
+        "fvg_creation_bar_index", "fvg_fill_percent", "fvg_strength_score", "signal_type",
+        "bar_index", "atr_14", "high", "low", "close", "ext_bos_up", "ext_bos_down",
+        "ext_choch_up", "ext_choch_down", "sweep_prev_high", "sweep_prev_low", "in_premium",
+        "in_discount", "vp_position", "has_ob_ext_bull", "has_ob_ext_bear", "market_condition",
+        "structure_context", "bar.ext_bos_up", "bar.ext_bos_down", "bar.ext_choch_up",
+        "bar.ext_choch_down", "bar.sweep_prev_high", "bar.sweep_prev_low",
+    }
 
     def __init__(self, enabled: bool = True) -> None:
         self.enabled = enabled
@@ -38,8 +47,6 @@ class FVGRetestModule(BaseModule):
             return bar_state
 
         history = history or []
-        # Don't mutate bar_state - pass history separately to avoid serialization issues
-        base_state = dict(bar_state)
 
         # Require active FVG zone
         fvg_active = bar_state.get("fvg_active", False) or bar_state.get(
@@ -53,17 +60,17 @@ class FVGRetestModule(BaseModule):
         atr = bar_state.get("atr_14", 0.0) or 0.0
 
         if not fvg_active or fvg_top == 0 or fvg_bottom == 0 or fvg_type is None:
-            return {**base_state, **self._default_output("no_fvg")}
+            return self.emit(bar_state, self._default_output("no_fvg"))
 
         age_bars = max(bar_index - fvg_bar_index, 0)
         if age_bars < self.config["min_hold_bars"]:
-            return {**base_state, **self._default_output("too_young")}
+            return self.emit(bar_state, self._default_output("too_young"))
         if age_bars > self.config["max_age_bars"]:
-            return {**base_state, **self._default_output("stale")}
+            return self.emit(bar_state, self._default_output("stale"))
 
         gap_size = abs(fvg_top - fvg_bottom)
         if gap_size <= 0:
-            return {**base_state, **self._default_output("invalid_gap")}
+            return self.emit(bar_state, self._default_output("invalid_gap"))
 
         # Compute fill% from current price if not provided
         fill_percent = bar_state.get("fvg_fill_percent")
@@ -77,12 +84,12 @@ class FVGRetestModule(BaseModule):
         )
 
         if fill_percent >= self.config["max_fill_pct"] or retest_type == "break":
-            return {**base_state, **self._default_output("break_or_filled")}
+            return self.emit(bar_state, self._default_output("break_or_filled"))
 
         # Context triggers (must have at least one)
         context_ok = self._has_reversal_context(fvg_type, bar_state, history)
         if not context_ok:
-            return {**base_state, **self._default_output("no_context")}
+            return self.emit(bar_state, self._default_output("no_context"))
 
         # Score retest quality
         strength_score = bar_state.get("fvg_strength_score", 0.5)
@@ -102,8 +109,7 @@ class FVGRetestModule(BaseModule):
         if retest_valid:
             signal_type = "fvg_retest_bull" if fvg_type == "bullish" else "fvg_retest_bear"
 
-        return {
-            **base_state,
+        outputs = {
             "fvg_retest_detected": retest_valid,
             "fvg_retest_type": retest_type,
             "fvg_retest_quality_score": round(retest_quality, 4),
@@ -114,6 +120,7 @@ class FVGRetestModule(BaseModule):
             "fvg_retest_reason": "" if retest_valid else "filtered",
             "signal_type": signal_type or bar_state.get("signal_type", "none"),
         }
+        return self.emit(bar_state, outputs)
 
     def _compute_fill_pct(self, fvg_type: str, top: float, bottom: float, price: float) -> float:
         gap = abs(top - bottom)
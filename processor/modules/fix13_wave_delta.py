@@ -5,19 +5,29 @@ Goal:
 - Sum delta (and volume) for each swing-to-swing leg (LL→LH/HH, LH→LL/HL, etc.).
 - Expose the active leg delta so you can gauge buy/sell pressure inside the current move.
 - Keep the last and previous completed legs for quick comparison.
+- With record_waves=True, record every completed leg once in `self.waves` (a
+  WaveTable, one segment per symbol) for wave-level analytics. The table keeps
+  every leg of the run, so it is off by default (waves is None) and long-lived
+  processors only carry the bounded `_wave_history`.
 """
 import threading
 from typing import Any, Dict, List, Optional
 
 from processor.core.module_base import BaseModule
+from processor.core.wave_table import WaveTable
 
 
 class WaveDeltaModule(BaseModule):
     """Track delta per swing leg using SMC zigzag swings (thread-safe)."""
 
     name = "fix13_wave_delta"
+    input_fields = {
+        "symbol", "bar_index", "is_swing_high", "is_swing_low", "delta", "volume", "buy_volume",
+        "sell_volume", "high", "low", "last_swing_high", "last_swing_low", "swing_high_price",
+        "swing_low_price", "prev_swing_high", "prev_swing_low",
+    }
 
-    def __init__(self, enabled: bool = True) -> None:
+    def __init__(self, enabled: bool = True, record_waves: bool = False) -> None:
         self.enabled = enabled
         self.config = {
             "max_wave_history": 50,  # keep a bounded history of completed legs
@@ -27,6 +37,7 @@ class WaveDeltaModule(BaseModule):
         self._current_accum = self._new_accum()
         self._wave_history: List[Dict[str, Any]] = []
         self._last_symbol: str | None = None
+        self.waves: Optional[WaveTable] = WaveTable(self.name) if record_waves else None
         self._lock = threading.Lock()
 
     def process_bar(
@@ -42,6 +53,8 @@ class WaveDeltaModule(BaseModule):
             if symbol and symbol != self._last_symbol:
                 self._reset_state()
                 self._last_symbol = symbol
+                if self.waves is not None:
+                    self.waves.new_segment(symbol)
 
             # Accumulate into the active leg if we already have an anchor swing
             self._accumulate_active_leg(bar_state)
@@ -55,7 +68,19 @@ class WaveDeltaModule(BaseModule):
                 wave_completed = self._handle_swing_anchor(swing_type, bar_state)
 
             outputs = self._build_output(wave_completed)
-        return {**bar_state, **outputs}
+        return self.emit(bar_state, outputs)
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore a get_state() snapshot, keeping this module's record_waves choice."""
+        waves = self.waves
+        super().set_state(state)
+        if waves is None:
+            self.waves = None
+        elif self.waves is None:
+            # Snapshot taken without a table: record from here on
+            self.waves = waves
+            if self._last_symbol:
+                waves.new_segment(self._last_symbol)
 
     # ---- internal helpers -------------------------------------------------
     def _new_accum(self) -> Dict[str, Any]:
@@ -118,6 +143,17 @@ class WaveDeltaModule(BaseModule):
         }
 
         self._wave_history.append(wave)
+        if self.waves is not None:
+            self.waves.append(
+                wave["start_bar"],
+                bar_index,
+                wave["start_price"],
+                swing_price,
+                wave["delta"],
+                wave["volume"],
+                wave["bars"],
+                direction,
+            )
         if len(self._wave_history) > self.config["max_wave_history"]:
             self._wave_history = self._wave_history[-self.config["max_wave_history"] :]
 
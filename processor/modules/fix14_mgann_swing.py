@@ -6,6 +6,12 @@
 #   - Tracks wave delta/volume for strength calculation
 #   - Leg management with CHoCH/BOS detection
 #   - Pullback strength evaluation (Hybrid Rule v4)
+#   - process_columns(): whole-file batch entry point, bit-identical to
+#     process_bar (column-wise cheap passes, one shared per-bar leg step)
+#   - self.waves: WaveTable with one row per finished impulse/pullback leg
+#     (record_waves=True; None by default, since it grows with the run)
+#   - Wave-strength thresholds in self.thresholds (DEFAULT_THRESHOLDS), checked
+#     by the pure pullback_strength_ok() / impulse_strength_ok() functions
 #
 # VERSION: 1.2.0 (Leg Management)
 # TAG: FIX14-MGANN-v1.2.0
@@ -24,7 +30,11 @@
 #   v1.0.0: Initial threshold-based implementation
 # ============================================================================
 
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
+
 from processor.core.module_base import BaseModule
+from processor.core.wave_table import KIND_IMPULSE, KIND_PULLBACK, WaveTable
 
 
 class Fix14MgannSwing(BaseModule):
@@ -36,13 +46,21 @@ class Fix14MgannSwing(BaseModule):
     - DOWNSWING: 2 consecutive bars with lower lows OR bar low < last swing low
     """
     
-    def __init__(self, threshold_ticks=6):
+    version = "1.2.0"
+    
+    def __init__(self, threshold_ticks=6, thresholds=None, record_waves=False):
         """
         Args:
             threshold_ticks: Kept for compatibility (not used in v1.1.0)
+            thresholds: Overrides for DEFAULT_THRESHOLDS (wave-strength checks)
+            record_waves: Keep every finished leg in self.waves (a WaveTable)
         """
         super().__init__()
         self.threshold_ticks = threshold_ticks
+        unknown = set(thresholds or ()) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"unknown wave-strength thresholds: {sorted(unknown)}")
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
         
         # Swing state
         self.last_swing_high = None
@@ -70,6 +88,8 @@ class Fix14MgannSwing(BaseModule):
         self.impulse_speed = 0.0
         self.impulse_bar_count = 0
         self.impulse_wave_strength_ok = False  # NEW: Impulse validation flag
+        # Inputs of the last impulse check (kept when a reset clears the flag)
+        self.impulse_features = None
         
         # Pullback leg tracking  
         self.pullback_delta = 0.0
@@ -80,6 +100,8 @@ class Fix14MgannSwing(BaseModule):
         self.pullback_speed = 0.0
         self.pullback_bar_count = 0
         self.pb_wave_strength_flag = False # Result of refined validation
+        # Inputs of the last refined check (kept when a reset clears the flag)
+        self.pullback_features = None
         
         # Structure anchors (leg1 levels)
         self.leg1_low = None               # Leg 1 low (uptrend)
@@ -100,6 +122,28 @@ class Fix14MgannSwing(BaseModule):
         self.avg_delta = 0.0
         self.avg_volume = 0.0
         self.avg_speed = 0.0
+        
+        # Finished impulse/pullback legs, one row each (callers may start a
+        # new segment per input file: waves.new_segment(name)). Prices are the
+        # swing extremes a leg ran between; bars are where the swing changes
+        # were confirmed
+        self.waves = WaveTable("fix14_mgann_swing") if record_waves else None
+        self.wave_start_bar = None         # bar_index where the active wave began
+        self.wave_start_price = None       # swing extreme the active wave started from
+
+    def cache_config(self):
+        """Settings that affect outputs (module output cache key)."""
+        return {"threshold_ticks": self.threshold_ticks, "thresholds": self.thresholds}
+
+    def set_state(self, state):
+        """Restore a get_state() snapshot, keeping this module's record_waves choice."""
+        waves = self.waves
+        super().set_state(state)
+        if waves is None:
+            self.waves = None
+        elif self.waves is None:
+            # Snapshot taken without a table: record from here on
+            self.waves = waves
 
     def _hard_reset(self, new_dir, bar_low, bar_high, prev_swing_low=None, prev_swing_high=None):
         """
@@ -147,71 +191,54 @@ class Fix14MgannSwing(BaseModule):
         self.current_leg_fvg_seen = False
 
     
-    def _check_gann_upswing(self, current_high, prev_high, prev_prev_high):
+    def _check_gann_upswing(self, current_high, two_bar_up):
         """
         Gann Rule for UPSWING:
         1. Exception: current high > last swing high → start upswing
         2. Standard: 2 consecutive bars with higher highs → start upswing
+           (two_bar_up, see _two_bar_higher)
         """
         # Exception rule
         if self.last_swing_high is not None and current_high > self.last_swing_high:
             return True
         
         # 2-bar rule
-        if prev_high is not None and prev_prev_high is not None:
-            if current_high > prev_high and prev_high > prev_prev_high:
-                return True
-        
-        return False
+        return two_bar_up
     
-    def _check_gann_downswing(self, current_low, prev_low, prev_prev_low):
+    def _check_gann_downswing(self, current_low, two_bar_down):
         """
         Gann Rule for DOWNSWING:
         1. Exception: current low < last swing low → start downswing
         2. Standard: 2 consecutive bars with lower lows → start downswing
+           (two_bar_down, see _two_bar_lower)
         """
         # Exception rule
         if self.last_swing_low is not None and current_low < self.last_swing_low:
             return True
         
         # 2-bar rule
-        if prev_low is not None and prev_prev_low is not None:
-            if current_low < prev_low and prev_low < prev_prev_low:
-                return True
-        
-        return False
+        return two_bar_down
     
     # === NEW METHODS (v1.2.0) ===
     
-    def _reset_trend(self, bar_state, bar_low, bar_high):
+    def _reset_trend(self, trend_signal, structure_event, bar_low, bar_high):
         """
         Detect trend change from CHoCH/BOS and reset leg tracking.
         
         Args:
-            bar_state: Current bar data
+            trend_signal: Direction implied by the external SMC fields, or None
+                (see _trend_signal)
+            structure_event: Whether any CHoCH/BOS fired on this bar
             bar_low: Current bar low
             bar_high: Current bar high
         """
-        # Read external SMC signals
-        ext_dir = bar_state.get("ext_dir", 0)
-        choch_up = bar_state.get("ext_choch_up", False)
-        choch_down = bar_state.get("ext_choch_down", False)
-        bos_up = bar_state.get("ext_bos_up", False)
-        bos_down = bar_state.get("ext_bos_down", False)
-        
         # Infer trend direction
-        inferred_dir = self.trend_dir
-        if ext_dir in (1, -1):
-            inferred_dir = ext_dir
-        elif choch_down or bos_down:
-            inferred_dir = 1  # Downward CHoCH/BOS indicates uptrend
-        elif choch_up or bos_up:
-            inferred_dir = -1  # Upward CHoCH/BOS indicates downtrend
+        inferred_dir = self.trend_dir if trend_signal is None else trend_signal
         
         # Reset on trend change
         if inferred_dir in (1, -1):
             # New requirement: always reset legs on BOS/CHOCH, even if direction unchanged.
-            if inferred_dir != self.trend_dir or choch_up or choch_down or bos_up or bos_down:
+            if inferred_dir != self.trend_dir or structure_event:
                 self._hard_reset(inferred_dir, bar_low, bar_high, self.last_swing_low, self.last_swing_high)
     
     def _evaluate_pullback_strength(self, bar_state, history):
@@ -221,31 +248,28 @@ class Fix14MgannSwing(BaseModule):
         Returns:
             bool: True if pullback is healthy (weak enough)
         
-        Conditions:
+        Conditions (see hybrid_v4_ok; defaults in DEFAULT_THRESHOLDS):
         1. pullback_strength < 40
         2. pullback_delta < impulse_delta * 0.3
         3. pullback_volume < impulse_volume * 0.6
         4. delta_pb >= -35 (uptrend) or <= 35 (downtrend)
         5. volume_pb <= avg_volume * 1.0
         6. pb_low > leg1_low (uptrend) or pb_high < leg1_high (downtrend)
+        
+        avg_volume comes from the bar, else the last 20 history bars. The
+        recorded pullback_features carry the module's own 20-bar average.
         """
-        if self.trend_dir == 0:
+        features = self._pullback_features()
+        if not hybrid_v4_ready(features):
             return False
-        
-        impulse_vol = self.last_impulse_volume
-        impulse_delta = self.last_impulse_delta
         pb_vol = self.pullback_volume
-        pb_delta = self.pullback_delta
-        
-        if impulse_vol <= 0 or pb_vol <= 0:
-            return False
         
         # Get average volume
         avg_vol = bar_state.get("avg_volume")
         if avg_vol is None:
             # Calculate from history if available
             if history and len(history) > 0:
-                recent_vols = [float(b.get("volume", 0) or 0) for b in history[-20:]]
+                recent_vols = [float(v or 0) for v in self.history_values(history, "volume", 20)]
                 avg_vol = sum(recent_vols) / len(recent_vols) if recent_vols else pb_vol
             else:
                 avg_vol = pb_vol
@@ -253,43 +277,7 @@ class Fix14MgannSwing(BaseModule):
         if avg_vol <= 0:
             avg_vol = pb_vol
         
-        # 6 Conditions of Hybrid Rule v4
-        pb_strength = self.pullback_strength
-        
-        # 1. Wave strength check
-        strength_ok = pb_strength < 40
-        
-        # 2. Delta ratio check
-        delta_ratio_ok = abs(pb_delta) <= abs(impulse_delta) * 0.3
-        
-        # 3. Volume ratio check
-        volume_ratio_ok = pb_vol <= impulse_vol * 0.6
-        
-        # 4. Absolute delta gate
-        if self.trend_dir == 1:
-            delta_gate = pb_delta >= -35
-        else:
-            delta_gate = pb_delta <= 35
-        
-        # 5. Volume vs average check
-        volume_gate = pb_vol <= avg_vol * 1.0
-        
-        # 6. Structure preservation
-        structure_ok = True
-        if self.trend_dir == 1 and self.leg1_low is not None and self.pullback_low is not None:
-            structure_ok = self.pullback_low > self.leg1_low
-        elif self.trend_dir == -1 and self.leg1_high is not None and self.pullback_high is not None:
-            structure_ok = self.pullback_high < self.leg1_high
-        
-        # All conditions must pass
-        return (
-            strength_ok
-            and delta_ratio_ok
-            and volume_ratio_ok
-            and delta_gate
-            and volume_gate
-            and structure_ok
-        )
+        return hybrid_v4_ok({**features, "avg_volume": avg_vol}, self.thresholds)
     
     def _calculate_speed(self, price_start, price_end, bar_count):
         """
@@ -332,7 +320,7 @@ class Fix14MgannSwing(BaseModule):
         """
         Validate IMPULSE wave strength (Leg 1, 3, 5...).
         
-        Criteria:
+        Criteria (see impulse_strength_ok; defaults in DEFAULT_THRESHOLDS):
         1. delta > avg_delta * 1.5
         2. volume > avg_volume * 1.3
         3. speed > avg_speed * 1.2
@@ -341,31 +329,25 @@ class Fix14MgannSwing(BaseModule):
         Returns:
             bool: True if impulse is strong enough
         """
-        if self.avg_delta <= 0 or self.avg_volume <= 0:
-            return False
-        
-        # 1. Delta check
-        delta_ok = abs(self.last_impulse_delta) > self.avg_delta * 1.5
-        
-        # 2. Volume check
-        volume_ok = self.last_impulse_volume > self.avg_volume * 1.3
-        
-        # 3. Speed check
-        if self.avg_speed > 0:
-            speed_ok = self.impulse_speed > self.avg_speed * 1.2
-        else:
-            speed_ok = True  # Skip if no baseline yet
-        
-        # 4. FVG check - check if FVG was seen during this leg
-        has_fvg = self.current_leg_fvg_seen
-        
-        return delta_ok and volume_ok and speed_ok and has_fvg
+        return impulse_strength_ok(self._impulse_features(), self.thresholds)
+    
+    def _impulse_features(self):
+        """Inputs of the impulse check for the impulse that just finished."""
+        return {
+            "delta": self.last_impulse_delta,
+            "volume": self.last_impulse_volume,
+            "speed": self.impulse_speed,
+            "avg_delta": self.avg_delta,
+            "avg_volume": self.avg_volume,
+            "avg_speed": self.avg_speed,
+            "has_fvg": self.current_leg_fvg_seen,
+        }
     
     def _evaluate_pullback_strength_refined(self, bar_state):
         """
         Refined pullback strength validation (Leg 2, 4, 6...).
         
-        Criteria:
+        Criteria (see pullback_strength_ok; defaults in DEFAULT_THRESHOLDS):
         1. abs(delta) < avg_delta * 0.7
         2. volume < avg_volume * 0.7
         3. speed < avg_speed * 0.7
@@ -374,62 +356,48 @@ class Fix14MgannSwing(BaseModule):
         Returns:
             bool: True if pullback is weak (good for entry)
         """
-        if self.trend_dir == 0:
-            return False
-        
-        if self.avg_delta <= 0 or self.avg_volume <= 0:
-            return False
-        
-        # 1. Delta check
-        delta_ok = abs(self.pullback_delta) < self.avg_delta * 0.7
-        
-        # 2. Volume check
-        volume_ok = self.pullback_volume < self.avg_volume * 0.7
-        
-        # 3. Speed check
-        if self.avg_speed > 0:
-            speed_ok = self.pullback_speed < self.avg_speed * 0.7
-        else:
-            speed_ok = True
-        
-        # 4. No momentum reverse (structure + delta gate)
-        if self.trend_dir == 1:  # Uptrend
-            no_momentum = (
-                self.pullback_delta >= -35 and
-                (self.pullback_low is None or self.leg1_low is None or self.pullback_low > self.leg1_low)
+        return pullback_strength_ok(self._pullback_features(), self.thresholds)
+    
+    def _pullback_features(self):
+        """Inputs of the refined and Hybrid v4 checks for the pullback that just finished."""
+        return {
+            "trend_dir": self.trend_dir,
+            "delta": self.pullback_delta,
+            "volume": self.pullback_volume,
+            "speed": self.pullback_speed,
+            "strength": self.pullback_strength,
+            "impulse_delta": self.last_impulse_delta,
+            "impulse_volume": self.last_impulse_volume,
+            "avg_delta": self.avg_delta,
+            "avg_volume": self.avg_volume,
+            "avg_speed": self.avg_speed,
+            "structure_ok": self._pullback_structure_ok(),
+        }
+    
+    def _pullback_structure_ok(self):
+        """Pullback kept leg 1's extreme (pb_low > leg1_low up, pb_high < leg1_high down)."""
+        if self.trend_dir == 1:
+            return (
+                self.pullback_low is None or self.leg1_low is None
+                or self.pullback_low > self.leg1_low
             )
-        else:  # Downtrend
-            no_momentum = (
-                self.pullback_delta <= 35 and
-                (self.pullback_high is None or self.leg1_high is None or self.pullback_high < self.leg1_high)
+        if self.trend_dir == -1:
+            return (
+                self.pullback_high is None or self.leg1_high is None
+                or self.pullback_high < self.leg1_high
             )
-        
-        return delta_ok and volume_ok and speed_ok and no_momentum
+        return True
     
-    def _check_leg_first_fvg(self, bar_state):
+    def _check_leg_first_fvg(self, fvg_dir):
         """
         Detect the first FVG within the current leg.
         
+        Args:
+            fvg_dir: Direction of the bar's FVG, 0 if none (see _fvg_direction)
+        
         Returns:
             bool: True only for FIRST FVG in current leg
         """
-        # Check if FVG detected
-        fvg_detected = bool(
-            bar_state.get("fvg_detected")
-            or bar_state.get("fvg_up")
-            or bar_state.get("fvg_down")
-        )
-        
-        if not fvg_detected:
-            return False
-        
-        # Determine FVG direction
-        fvg_dir = 0
-        if bar_state.get("fvg_up") or bar_state.get("fvg_type") == "bullish":
-            fvg_dir = 1
-        elif bar_state.get("fvg_down") or bar_state.get("fvg_type") == "bearish":
-            fvg_dir = -1
-        
         # Check if this is first FVG in current leg
         if fvg_dir != 0 and fvg_dir == self.active_leg_dir and not self.current_leg_fvg_seen:
             self.current_leg_fvg_seen = True
@@ -437,219 +405,182 @@ class Fix14MgannSwing(BaseModule):
         
         return False
 
-    
-    def process_bar(self, bar_state, history=None):
+    def _init_swings(
+        self, current_high: float, current_low: float, current_delta: float,
+        current_volume: float, bar_index: int | None,
+    ) -> None:
+        """First bar: seed swing levels and the active wave."""
+        self.wave_start_bar = bar_index
+        self.wave_start_price = None
+        self.last_swing_high = current_high
+        self.last_swing_low = current_low
+        self.prev_bar_high = current_high
+        self.prev_bar_low = current_low
+        self.active_wave_delta = current_delta
+        self.active_wave_volume = current_volume
+
+    def _finish_leg(
+        self, prev_dir: int, current_low: float, current_high: float, bar_index: int | None
+    ) -> None:
         """
-        Process bar and update MGann swing fields.
+        Swing direction changed: finalize the leg that ended and start the next.
         
-        Updates bar_state with:
-        - mgann_internal_swing_high: Current swing high level
-        - mgann_internal_swing_low: Current swing low level
-        - mgann_internal_leg_dir: Direction (1=up, -1=down)
-        - mgann_wave_strength: Delta/volume ratio (0-100)
+        Args:
+            prev_dir: Swing direction before this bar (last_swing_dir is the new one)
+            current_low: Current bar low
+            current_high: Current bar high
+            bar_index: Current bar index (end of the finished wave, start of the next)
         """
-        current_high = bar_state.get("high", 0)
-        current_low = bar_state.get("low", 0)
-        current_delta = bar_state.get("delta", 0)
-        current_volume = bar_state.get("volume", 0)
-        
-        # Initialize on first bar
-        if self.last_swing_high is None:
-            self.last_swing_high = current_high
-            self.last_swing_low = current_low
-            self.prev_bar_high = current_high
-            self.prev_bar_low = current_low
-            self.active_wave_delta = current_delta
-            self.active_wave_volume = current_volume
+        # SAVE metrics BEFORE resetting!
+        
+        # Extreme the finished wave reached: the trailing swing level of its
+        # direction (this bar only moved the opposite one)
+        if prev_dir == 1:
+            wave_end_price = self.last_swing_high
+        elif prev_dir == -1:
+            wave_end_price = self.last_swing_low
+        else:
+            wave_end_price = None
+        
+        # Finalize previous leg
+        if prev_dir == self.trend_dir and self.trend_dir != 0:
+            # Previous leg was IMPULSE - save and validate
+            self.last_impulse_delta = self.active_wave_delta
+            self.last_impulse_volume = self.active_wave_volume
+            self.last_impulse_strength = self._compute_wave_strength()
             
-            bar_state["mgann_internal_swing_high"] = self.last_swing_high
-            bar_state["mgann_internal_swing_low"] = self.last_swing_low
-            bar_state["mgann_internal_leg_dir"] = 0
-            bar_state["mgann_internal_dir"] = 0
-            bar_state["mgann_wave_strength"] = 0
-            bar_state["mgann_behavior"] = {"UT": False, "SP": False, "PB": False, "EX3": False}
-            return bar_state
+            # Calculate impulse speed
+            if self.trend_dir == 1:
+                impulse_start = self.leg1_low if self.leg1_low is not None else current_low
+                impulse_end = current_high
+            else:
+                impulse_start = self.leg1_high if self.leg1_high is not None else current_high
+                impulse_end = current_low
+            
+            self.impulse_speed = self._calculate_speed(
+                impulse_start, impulse_end, max(1, self.impulse_bar_count)
+            )
+            
+            # Validate impulse strength
+            self.impulse_features = self._impulse_features()
+            self.impulse_wave_strength_ok = impulse_strength_ok(
+                self.impulse_features, self.thresholds
+            )
+            if self.waves is not None:
+                self.waves.append(
+                    self.wave_start_bar, bar_index, self.wave_start_price, wave_end_price,
+                    self.active_wave_delta, self.active_wave_volume, self.impulse_bar_count,
+                    prev_dir, KIND_IMPULSE, self.impulse_speed, self.impulse_wave_strength_ok,
+                )
+            
+            # Update speed history
+            self.speed_history.append(self.impulse_speed)
+            if len(self.speed_history) > 5:
+                self.speed_history = self.speed_history[-5:]
+            self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
+            
+        elif prev_dir == -self.trend_dir and self.trend_dir != 0:
+            # Previous leg was PULLBACK - save and evaluate
+            self.pullback_delta = self.active_wave_delta
+            self.pullback_volume = self.active_wave_volume
+            self.pullback_strength = self._compute_wave_strength()
+            self.pullback_low = current_low
+            self.pullback_high = current_high
+            
+            # Calculate pullback speed
+            if self.trend_dir == 1:
+                pb_start = self.pullback_high if self.pullback_high is not None else current_high
+                pb_end = current_low
+            else:
+                pb_start = self.pullback_low if self.pullback_low is not None else current_low
+                pb_end = current_high
+            
+            self.pullback_speed = self._calculate_speed(
+                pb_start, pb_end, max(1, self.pullback_bar_count)
+            )
+            
+            # Validate pullback strength (REFINED logic)
+            self.pullback_features = self._pullback_features()
+            self.pb_wave_strength_flag = pullback_strength_ok(
+                self.pullback_features, self.thresholds
+            )
+            if self.waves is not None:
+                self.waves.append(
+                    self.wave_start_bar, bar_index, self.wave_start_price, wave_end_price,
+                    self.active_wave_delta, self.active_wave_volume, self.pullback_bar_count,
+                    prev_dir, KIND_PULLBACK, self.pullback_speed, self.pb_wave_strength_flag,
+                )
+            
+            # Update speed history
+            self.speed_history.append(self.pullback_speed)
+            if len(self.speed_history) > 5:
+                self.speed_history = self.speed_history[-5:]
+            self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
         
+        # NOW reset accumulators for new leg
+        self.active_wave_delta = 0.0
+        self.active_wave_volume = 0.0
+        self.wave_start_bar = bar_index
+        # The new wave starts from the opposite swing extreme (the finished wave's end)
+        if self.last_swing_dir == 1:
+            self.wave_start_price = self.last_swing_low
+        else:
+            self.wave_start_price = self.last_swing_high
+        
+        # Reset bar counts
+        if self.last_swing_dir == self.trend_dir:
+            self.impulse_bar_count = 0
+        else:
+            self.pullback_bar_count = 0
+        
+        # Start new leg
+        if self.last_swing_dir == self.trend_dir:
+            # New impulse leg
+            self.mgann_leg_index += 1
+            self.current_leg_fvg_seen = False
+        elif self.last_swing_dir == -self.trend_dir:
+            # Pullback leg starting
+            self.current_leg_fvg_seen = False
+        
+        self.active_leg_dir = self.last_swing_dir
+
+    def _step(self, current_high: float, current_low: float, current_delta: float,
+              current_volume: float, two_bar_up: bool, two_bar_down: bool,
+              trend_signal: int | None, structure_event: bool, fvg_dir: int,
+              bar_index: int | None) -> tuple[int, bool]:
+        """
+        Advance swing/leg state by one bar (every bar after the first).
+        
+        Shared by process_bar and process_columns; the caller updates the
+        prev-bar highs/lows and the rolling averages, which nothing here reads.
+        
+        Returns:
+            (wave_strength, mgann_leg_first_fvg)
+        """
         prev_dir = self.last_swing_dir
         
         # === NEW: Check for trend reset (CHoCH/BOS) ===
-        self._reset_trend(bar_state, current_low, current_high)
+        self._reset_trend(trend_signal, structure_event, current_low, current_high)
         
         # Check Gann upswing
-        if self._check_gann_upswing(current_high, self.prev_bar_high, self.prev_prev_high):
+        if self._check_gann_upswing(current_high, two_bar_up):
             self.last_swing_high = current_high
             self.last_swing_dir = 1
             
             # === NEW: Leg transition handling ===
             if prev_dir != 1:
                 # Direction changed to UP
-                # SAVE metrics BEFORE resetting!
-                
-                # Finalize previous leg
-                if prev_dir == self.trend_dir and self.trend_dir != 0:
-                    # Previous leg was IMPULSE - save and validate
-                    self.last_impulse_delta = self.active_wave_delta
-                    self.last_impulse_volume = self.active_wave_volume
-                    self.last_impulse_strength = self._compute_wave_strength()
-                    
-                    # Calculate impulse speed
-                    if self.trend_dir == 1:
-                        impulse_start = self.leg1_low if self.leg1_low is not None else current_low
-                        impulse_end = current_high
-                    else:
-                        impulse_start = self.leg1_high if self.leg1_high is not None else current_high
-                        impulse_end = current_low
-                    
-                    self.impulse_speed = self._calculate_speed(
-                        impulse_start, impulse_end, max(1, self.impulse_bar_count)
-                    )
-                    
-                    # Validate impulse strength
-                    self.impulse_wave_strength_ok = self._evaluate_impulse_strength(bar_state)
-                    
-                    # Update speed history
-                    self.speed_history.append(self.impulse_speed)
-                    if len(self.speed_history) > 5:
-                        self.speed_history = self.speed_history[-5:]
-                    self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
-                    
-                elif prev_dir == -self.trend_dir and self.trend_dir != 0:
-                    # Previous leg was PULLBACK - save and evaluate
-                    self.pullback_delta = self.active_wave_delta
-                    self.pullback_volume = self.active_wave_volume
-                    self.pullback_strength = self._compute_wave_strength()
-                    self.pullback_low = current_low
-                    self.pullback_high = current_high
-                    
-                    # Calculate pullback speed
-                    if self.trend_dir == 1:
-                        pb_start = self.pullback_high if self.pullback_high is not None else current_high
-                        pb_end = current_low
-                    else:
-                        pb_start = self.pullback_low if self.pullback_low is not None else current_low
-                        pb_end = current_high
-                    
-                    self.pullback_speed = self._calculate_speed(
-                        pb_start, pb_end, max(1, self.pullback_bar_count)
-                    )
-                    
-                    # Validate pullback strength (REFINED logic)
-                    self.pb_wave_strength_flag = self._evaluate_pullback_strength_refined(bar_state)
-                    
-                    # Update speed history
-                    self.speed_history.append(self.pullback_speed)
-                    if len(self.speed_history) > 5:
-                        self.speed_history = self.speed_history[-5:]
-                    self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
-                
-                # NOW reset accumulators for new leg
-                self.active_wave_delta = 0.0
-                self.active_wave_volume = 0.0
-                
-                # Reset bar counts
-                if self.last_swing_dir == self.trend_dir:
-                    self.impulse_bar_count = 0
-                else:
-                    self.pullback_bar_count = 0
-                
-                # Start new leg
-                if self.last_swing_dir == self.trend_dir:
-                    # New impulse leg
-                    self.mgann_leg_index += 1
-                    self.current_leg_fvg_seen = False
-                elif self.last_swing_dir == -self.trend_dir:
-                    # Pullback leg starting
-                    self.current_leg_fvg_seen = False
-                
-                self.active_leg_dir = self.last_swing_dir
+                self._finish_leg(prev_dir, current_low, current_high, bar_index)
         
         # Check Gann downswing
-        elif self._check_gann_downswing(current_low, self.prev_bar_low, self.prev_prev_low):
+        elif self._check_gann_downswing(current_low, two_bar_down):
             self.last_swing_low = current_low
             self.last_swing_dir = -1
             
             # === NEW: Leg transition handling ===
             if prev_dir != -1:
                 # Direction changed to DOWN
-                # SAVE metrics BEFORE resetting!
-                
-                # Finalize previous leg
-                if prev_dir == self.trend_dir and self.trend_dir != 0:
-                    # Previous leg was IMPULSE - save and validate
-                    self.last_impulse_delta = self.active_wave_delta
-                    self.last_impulse_volume = self.active_wave_volume
-                    self.last_impulse_strength = self._compute_wave_strength()
-                    
-                    # Calculate impulse speed
-                    if self.trend_dir == 1:
-                        impulse_start = self.leg1_low if self.leg1_low is not None else current_low
-                        impulse_end = current_high
-                    else:
-                        impulse_start = self.leg1_high if self.leg1_high is not None else current_high
-                        impulse_end = current_low
-                    
-                    self.impulse_speed = self._calculate_speed(
-                        impulse_start, impulse_end, max(1, self.impulse_bar_count)
-                    )
-                    
-                    # Validate impulse strength
-                    self.impulse_wave_strength_ok = self._evaluate_impulse_strength(bar_state)
-                    
-                    # Update speed history
-                    self.speed_history.append(self.impulse_speed)
-                    if len(self.speed_history) > 5:
-                        self.speed_history = self.speed_history[-5:]
-                    self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
-                    
-                elif prev_dir == -self.trend_dir and self.trend_dir != 0:
-                    # Previous leg was PULLBACK - save and evaluate
-                    self.pullback_delta = self.active_wave_delta
-                    self.pullback_volume = self.active_wave_volume
-                    self.pullback_strength = self._compute_wave_strength()
-                    self.pullback_low = current_low
-                    self.pullback_high = current_high
-                    
-                    # Calculate pullback speed
-                    if self.trend_dir == 1:
-                        pb_start = self.pullback_high if self.pullback_high is not None else current_high
-                        pb_end = current_low
-                    else:
-                        pb_start = self.pullback_low if self.pullback_low is not None else current_low
-                        pb_end = current_high
-                    
-                    self.pullback_speed = self._calculate_speed(
-                        pb_start, pb_end, max(1, self.pullback_bar_count)
-                    )
-                    
-                    # Validate pullback strength (REFINED logic)
-                    self.pb_wave_strength_flag = self._evaluate_pullback_strength_refined(bar_state)
-                    
-                    # Update speed history
-                    self.speed_history.append(self.pullback_speed)
-                    if len(self.speed_history) > 5:
-                        self.speed_history = self.speed_history[-5:]
-                    self.avg_speed = sum(self.speed_history) / len(self.speed_history) if self.speed_history else 0
-                
-                # NOW reset accumulators for new leg
-                self.active_wave_delta = 0.0
-                self.active_wave_volume = 0.0
-                
-                # Reset bar counts
-                if self.last_swing_dir == self.trend_dir:
-                    self.impulse_bar_count = 0
-                else:
-                    self.pullback_bar_count = 0
-                
-                # Start new leg
-                if self.last_swing_dir == self.trend_dir:
-                    # New impulse leg
-                    self.mgann_leg_index += 1
-                    self.current_leg_fvg_seen = False
-                elif self.last_swing_dir == -self.trend_dir:
-                    # Pullback leg starting
-                    self.current_leg_fvg_seen = False
-                
-                self.active_leg_dir = self.last_swing_dir
+                self._finish_leg(prev_dir, current_low, current_high, bar_index)
         
         # Update trailing swing levels
         else:
@@ -662,19 +593,10 @@ class Fix14MgannSwing(BaseModule):
                 if current_low < self.last_swing_low:
                     self.last_swing_low = current_low
         
-        # Update prev tracking
-        self.prev_prev_high = self.prev_bar_high
-        self.prev_prev_low = self.prev_bar_low
-        self.prev_bar_high = current_high
-        self.prev_bar_low = current_low
-        
         # Accumulate delta and volume for active wave
         self.active_wave_delta += current_delta
         self.active_wave_volume += current_volume
         
-        # === NEW: Update rolling averages ===
-        self._update_averages(bar_state)
-        
         # === NEW: Track bar counts ===
         # Increment appropriate counter based on leg direction
         if self.active_leg_dir == self.trend_dir and self.trend_dir != 0:
@@ -718,7 +640,7 @@ class Fix14MgannSwing(BaseModule):
         wave_strength = self._compute_wave_strength()
 
         # === NEW: Check for first FVG in current leg ===
-        mgann_leg_first_fvg = self._check_leg_first_fvg(bar_state)
+        mgann_leg_first_fvg = self._check_leg_first_fvg(fvg_dir)
 
         # === NEW: Track whether current leg1 breaks previous trend extreme ===
         if self.mgann_leg_index == 1 and self.trend_dir != 0:
@@ -738,6 +660,75 @@ class Fix14MgannSwing(BaseModule):
             self.last_swing_low = current_low
             self.last_swing_dir = -1
         
+        return wave_strength, mgann_leg_first_fvg
+
+    def process_bar(self, bar_state, history=None):
+        """
+        Process bar and update MGann swing fields.
+        
+        Updates bar_state with:
+        - mgann_internal_swing_high: Current swing high level
+        - mgann_internal_swing_low: Current swing low level
+        - mgann_internal_leg_dir: Direction (1=up, -1=down)
+        - mgann_wave_strength: Delta/volume ratio (0-100)
+        - leg fields (mgann_leg_index, pb_wave_strength_ok, impulse_*, ...;
+          OUTPUT_FIELDS), except on the very first bar
+        """
+        current_high = bar_state.get("high", 0)
+        current_low = bar_state.get("low", 0)
+        current_delta = bar_state.get("delta", 0)
+        current_volume = bar_state.get("volume", 0)
+        
+        # Initialize on first bar
+        if self.last_swing_high is None:
+            self._init_swings(
+                current_high, current_low, current_delta, current_volume,
+                bar_state.get("bar_index"),
+            )
+            
+            bar_state["mgann_internal_swing_high"] = self.last_swing_high
+            bar_state["mgann_internal_swing_low"] = self.last_swing_low
+            bar_state["mgann_internal_leg_dir"] = 0
+            bar_state["mgann_internal_dir"] = 0
+            bar_state["mgann_wave_strength"] = 0
+            bar_state["mgann_behavior"] = {"UT": False, "SP": False, "PB": False, "EX3": False}
+            return bar_state
+        
+        trend_signal, structure_event = _trend_signal(
+            bar_state.get("ext_dir", 0),
+            bar_state.get("ext_choch_up", False),
+            bar_state.get("ext_choch_down", False),
+            bar_state.get("ext_bos_up", False),
+            bar_state.get("ext_bos_down", False),
+        )
+        fvg_dir = _fvg_direction(
+            bar_state.get("fvg_detected"),
+            bar_state.get("fvg_up"),
+            bar_state.get("fvg_down"),
+            bar_state.get("fvg_type"),
+        )
+        wave_strength, mgann_leg_first_fvg = self._step(
+            current_high,
+            current_low,
+            current_delta,
+            current_volume,
+            _two_bar_higher(current_high, self.prev_bar_high, self.prev_prev_high),
+            _two_bar_lower(current_low, self.prev_bar_low, self.prev_prev_low),
+            trend_signal,
+            structure_event,
+            fvg_dir,
+            bar_state.get("bar_index"),
+        )
+        
+        # Update prev tracking
+        self.prev_prev_high = self.prev_bar_high
+        self.prev_prev_low = self.prev_bar_low
+        self.prev_bar_high = current_high
+        self.prev_bar_low = current_low
+        
+        # === NEW: Update rolling averages ===
+        self._update_averages(bar_state)
+        
         # Update bar_state with original fields
         bar_state["mgann_internal_swing_high"] = self.last_swing_high
         bar_state["mgann_internal_swing_low"] = self.last_swing_low
@@ -770,6 +761,146 @@ class Fix14MgannSwing(BaseModule):
         }
         
         return bar_state
+
+    def process_columns(self, columns: Mapping[str, Sequence[Any]]) -> dict[str, list[Any]]:
+        """
+        Batch form of process_bar for a whole file of bars.
+        
+        Gives bit-identical outputs and leaves the module in the same state as
+        calling process_bar on each bar in turn, so files can be mixed with
+        streaming calls. The per-bar cheap passes (2-bar higher-high/lower-low
+        flags, CHoCH/BOS trend signals, FVG directions, 20-bar delta/volume
+        averages) run column-wise up front; only the leg state machine loops.
+        
+        Args:
+            columns: Mapping of field -> per-bar sequence, all the same length:
+                high, low, delta, volume, ext_dir, ext_choch_up, ext_choch_down,
+                ext_bos_up, ext_bos_down, fvg_detected, fvg_up, fvg_down,
+                fvg_type, bar_index (wave table rows). Missing columns take
+                process_bar's defaults.
+        
+        Returns:
+            dict of OUTPUT_FIELDS -> list. On the very first bar of a fresh
+            module the leg fields are None (process_bar does not write them
+            there) and the swing direction / strength fields are 0.
+            apply_columns() writes the result into bar records.
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+        n = lengths.pop() if lengths else 0
+
+        def column(name: str, default: Any) -> Sequence[Any]:
+            values = columns.get(name)
+            return values if values is not None else [default] * n
+
+        highs = column("high", 0)
+        lows = column("low", 0)
+        deltas = column("delta", 0)
+        volumes = column("volume", 0)
+        bar_indexes = column("bar_index", None)
+        outputs: dict[str, list[Any]] = {key: [] for key in OUTPUT_FIELDS}
+        start = 0
+        if n and self.last_swing_high is None:
+            self._init_swings(highs[0], lows[0], deltas[0], volumes[0], bar_indexes[0])
+            for key, value in zip(OUTPUT_FIELDS, (highs[0], lows[0], 0, 0, 0)):
+                outputs[key].append(value)
+            for key in OUTPUT_FIELDS[5:]:
+                outputs[key].append(None)
+            start = 1
+        if start >= n:
+            return outputs
+
+        # --- Column-wise passes ---
+        highs = list(highs[start:])
+        lows = list(lows[start:])
+        deltas = list(deltas[start:])
+        volumes = list(volumes[start:])
+        prev_highs = [self.prev_prev_high, self.prev_bar_high] + highs
+        prev_lows = [self.prev_prev_low, self.prev_bar_low] + lows
+        two_bar_up = [
+            pp is not None and p is not None and h > p and p > pp
+            for h, p, pp in zip(highs, prev_highs[1:], prev_highs)
+        ]
+        two_bar_down = [
+            pp is not None and p is not None and low < p and p < pp
+            for low, p, pp in zip(lows, prev_lows[1:], prev_lows)
+        ]
+        trend = [
+            _trend_signal(*flags)
+            for flags in zip(
+                column("ext_dir", 0)[start:],
+                column("ext_choch_up", False)[start:],
+                column("ext_choch_down", False)[start:],
+                column("ext_bos_up", False)[start:],
+                column("ext_bos_down", False)[start:],
+            )
+        ]
+        fvg_dirs = [
+            _fvg_direction(*fields)
+            for fields in zip(
+                column("fvg_detected", None)[start:],
+                column("fvg_up", None)[start:],
+                column("fvg_down", None)[start:],
+                column("fvg_type", None)[start:],
+            )
+        ]
+        # Rolling 20-bar means, summed in the same order as _update_averages
+        delta_window = self.delta_history + [abs(d) for d in deltas]
+        volume_window = self.volume_history + volumes
+        offset = len(self.delta_history) + 1
+        avg_deltas = []
+        avg_volumes = []
+        for end in range(offset, offset + len(highs)):
+            lo = max(0, end - 20)
+            avg_deltas.append(sum(delta_window[lo:end]) / (end - lo))
+            avg_volumes.append(sum(volume_window[lo:end]) / (end - lo))
+
+        # --- Leg state machine ---
+        step = self._step
+        rows: list[tuple[Any, ...]] = []
+        append = rows.append
+        for args, avg_delta, avg_volume in zip(
+            zip(highs, lows, deltas, volumes, two_bar_up, two_bar_down,
+                (signal for signal, _ in trend), (event for _, event in trend), fvg_dirs,
+                bar_indexes[start:]),
+            avg_deltas,
+            avg_volumes,
+        ):
+            wave_strength, first_fvg = step(*args)
+            self.avg_delta = avg_delta
+            self.avg_volume = avg_volume
+            append((
+                self.last_swing_high, self.last_swing_low, self.last_swing_dir, wave_strength,
+                self.mgann_leg_index, first_fvg, self.pb_wave_strength_flag,
+                self.impulse_wave_strength_ok, self.impulse_speed, self.pullback_speed,
+                self.avg_speed, self.leg1_cut_prev_extreme,
+            ))
+
+        # --- Output columns (same conversions as process_bar) ---
+        (swing_high, swing_low, swing_dir, strength, leg_index, leg_first_fvg, pb_ok, impulse_ok,
+         impulse_speed, pullback_speed, avg_speed, leg1_cut) = zip(*rows)
+        outputs["mgann_internal_swing_high"] += swing_high
+        outputs["mgann_internal_swing_low"] += swing_low
+        outputs["mgann_internal_leg_dir"] += swing_dir
+        outputs["mgann_internal_dir"] += swing_dir
+        outputs["mgann_wave_strength"] += strength
+        outputs["mgann_leg_index"] += [int(v) if v else 0 for v in leg_index]
+        outputs["mgann_leg_first_fvg"] += leg_first_fvg
+        outputs["pb_wave_strength_ok"] += map(bool, pb_ok)
+        outputs["impulse_wave_strength_ok"] += map(bool, impulse_ok)
+        outputs["impulse_speed"] += _rounded(impulse_speed, 4)
+        outputs["pullback_speed"] += _rounded(pullback_speed, 4)
+        outputs["avg_delta"] += [round(v, 2) for v in avg_deltas]
+        outputs["avg_volume"] += [round(v, 2) for v in avg_volumes]
+        outputs["avg_speed"] += _rounded(avg_speed, 4)
+        outputs["leg1_breaks_prev_extreme"] += map(bool, leg1_cut)
+
+        self.prev_prev_high, self.prev_bar_high = prev_highs[-2:]
+        self.prev_prev_low, self.prev_bar_low = prev_lows[-2:]
+        self.delta_history = delta_window[-20:]
+        self.volume_history = volume_window[-20:]
+        return outputs
     
     def _compute_wave_strength(self):
         """
@@ -786,3 +917,228 @@ class Fix14MgannSwing(BaseModule):
         strength = min(1.0, delta_ratio) * 100
         
         return int(strength)
+
+
+OUTPUT_FIELDS = (
+    "mgann_internal_swing_high",
+    "mgann_internal_swing_low",
+    "mgann_internal_leg_dir",
+    "mgann_internal_dir",
+    "mgann_wave_strength",
+    "mgann_leg_index",
+    "mgann_leg_first_fvg",
+    "pb_wave_strength_ok",
+    "impulse_wave_strength_ok",
+    "impulse_speed",
+    "pullback_speed",
+    "avg_delta",
+    "avg_volume",
+    "avg_speed",
+    "leg1_breaks_prev_extreme",
+)
+
+# Wave-strength thresholds (Fix14MgannSwing(thresholds=...) overrides any of them)
+DEFAULT_THRESHOLDS = {
+    # Hybrid Rule v4 (_evaluate_pullback_strength)
+    "v4_max_strength": 40,         # pullback wave strength below this
+    "v4_delta_ratio": 0.3,         # |pb delta| <= |impulse delta| * ratio
+    "v4_volume_ratio": 0.6,        # pb volume <= impulse volume * ratio
+    "v4_avg_volume_mult": 1.0,     # pb volume <= avg volume * mult
+    # Momentum-reverse gate shared by both pullback rules: pb delta against
+    # the trend may not exceed this (>= -35 in an uptrend, <= 35 in a downtrend)
+    "max_counter_delta": 35,
+    # Refined pullback check (pb_wave_strength_ok): below avg * mult
+    "pb_delta_mult": 0.7,
+    "pb_volume_mult": 0.7,
+    "pb_speed_mult": 0.7,
+    # Impulse check (impulse_wave_strength_ok): above avg * mult
+    "impulse_delta_mult": 1.5,
+    "impulse_volume_mult": 1.3,
+    "impulse_speed_mult": 1.2,
+}
+
+
+def _counter_delta_ok(features, limit):
+    if features["trend_dir"] == 1:
+        return features["delta"] >= -limit
+    return features["delta"] <= limit
+
+
+# One check per threshold: threshold name -> check(features, value). A rule
+# passes when its preconditions hold and every check passes, so tuning can
+# evaluate each threshold value on its own (see processor.backtest.tune_pullback).
+PULLBACK_CHECKS = {
+    "pb_delta_mult": lambda f, mult: abs(f["delta"]) < f["avg_delta"] * mult,
+    "pb_volume_mult": lambda f, mult: f["volume"] < f["avg_volume"] * mult,
+    # Skipped until a speed baseline exists
+    "pb_speed_mult": lambda f, mult: f["avg_speed"] <= 0 or f["speed"] < f["avg_speed"] * mult,
+    "max_counter_delta": _counter_delta_ok,
+}
+
+IMPULSE_CHECKS = {
+    "impulse_delta_mult": lambda f, mult: abs(f["delta"]) > f["avg_delta"] * mult,
+    "impulse_volume_mult": lambda f, mult: f["volume"] > f["avg_volume"] * mult,
+    "impulse_speed_mult": lambda f, mult: f["avg_speed"] <= 0 or f["speed"] > f["avg_speed"] * mult,
+}
+
+HYBRID_V4_CHECKS = {
+    "v4_max_strength": lambda f, limit: f["strength"] < limit,
+    "v4_delta_ratio": lambda f, ratio: abs(f["delta"]) <= abs(f["impulse_delta"]) * ratio,
+    "v4_volume_ratio": lambda f, ratio: f["volume"] <= f["impulse_volume"] * ratio,
+    "max_counter_delta": _counter_delta_ok,
+    "v4_avg_volume_mult": lambda f, mult: f["volume"] <= f["avg_volume"] * mult,
+}
+
+
+def pullback_ready(features):
+    """Preconditions of the refined pullback check (no threshold involved)."""
+    return (
+        features is not None
+        and features["trend_dir"] != 0
+        and features["avg_delta"] > 0
+        and features["avg_volume"] > 0
+        and features["structure_ok"]
+    )
+
+
+def impulse_ready(features):
+    """Preconditions of the impulse check (no threshold involved)."""
+    return (
+        features is not None
+        and features["avg_delta"] > 0
+        and features["avg_volume"] > 0
+        and features["has_fvg"]
+    )
+
+
+def hybrid_v4_ready(features):
+    """Preconditions of the Hybrid Rule v4 check (no threshold involved)."""
+    return (
+        features is not None
+        and features["trend_dir"] != 0
+        and features["impulse_volume"] > 0
+        and features["volume"] > 0
+        and features["structure_ok"]
+    )
+
+
+def pullback_strength_ok(features, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Refined pullback check (pb_wave_strength_ok): the pullback is weak enough.
+    
+    Args:
+        features: Fix14MgannSwing.pullback_features (trend_dir, delta, volume,
+            speed, avg_delta, avg_volume, avg_speed, structure_ok), or None
+        thresholds: DEFAULT_THRESHOLDS-style mapping
+    """
+    return pullback_ready(features) and all(
+        check(features, thresholds[key]) for key, check in PULLBACK_CHECKS.items()
+    )
+
+
+def impulse_strength_ok(features, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Impulse check (impulse_wave_strength_ok): the impulse is strong enough.
+    
+    Args:
+        features: Fix14MgannSwing.impulse_features (delta, volume, speed,
+            avg_delta, avg_volume, avg_speed, has_fvg), or None
+        thresholds: DEFAULT_THRESHOLDS-style mapping
+    """
+    return impulse_ready(features) and all(
+        check(features, thresholds[key]) for key, check in IMPULSE_CHECKS.items()
+    )
+
+
+def hybrid_v4_ok(features, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Hybrid Rule v4 pullback check.
+    
+    Args:
+        features: Fix14MgannSwing.pullback_features (trend_dir, strength,
+            delta, volume, impulse_delta, impulse_volume, avg_volume,
+            structure_ok), or None
+        thresholds: DEFAULT_THRESHOLDS-style mapping
+    """
+    return hybrid_v4_ready(features) and all(
+        check(features, thresholds[key]) for key, check in HYBRID_V4_CHECKS.items()
+    )
+
+
+def _two_bar_higher(
+    current_high: float, prev_high: float | None, prev_prev_high: float | None
+) -> bool:
+    """Gann 2-bar rule: two consecutive bars with higher highs."""
+    if prev_high is None or prev_prev_high is None:
+        return False
+    return current_high > prev_high and prev_high > prev_prev_high
+
+
+def _two_bar_lower(
+    current_low: float, prev_low: float | None, prev_prev_low: float | None
+) -> bool:
+    """Gann 2-bar rule: two consecutive bars with lower lows."""
+    if prev_low is None or prev_prev_low is None:
+        return False
+    return current_low < prev_low and prev_low < prev_prev_low
+
+
+def _trend_signal(
+    ext_dir: Any, choch_up: Any, choch_down: Any, bos_up: Any, bos_down: Any
+) -> tuple[int | None, bool]:
+    """
+    Trend direction implied by the external SMC fields.
+    
+    Returns:
+        (direction or None, whether any CHoCH/BOS fired)
+    """
+    if ext_dir in (1, -1):
+        signal = ext_dir
+    elif choch_down or bos_down:
+        signal = 1  # Downward CHoCH/BOS indicates uptrend
+    elif choch_up or bos_up:
+        signal = -1  # Upward CHoCH/BOS indicates downtrend
+    else:
+        signal = None
+    return signal, bool(choch_up or choch_down or bos_up or bos_down)
+
+
+def _fvg_direction(fvg_detected: Any, fvg_up: Any, fvg_down: Any, fvg_type: Any) -> int:
+    """1 / -1 for a bullish / bearish FVG on the bar, 0 for none."""
+    if not (fvg_detected or fvg_up or fvg_down):
+        return 0
+    if fvg_up or fvg_type == "bullish":
+        return 1
+    if fvg_down or fvg_type == "bearish":
+        return -1
+    return 0
+
+
+def _rounded(values: Iterable[float], digits: int) -> list[float]:
+    """round() over a column that changes rarely (only at leg transitions)."""
+    out = []
+    last = rounded = None
+    for value in values:
+        if value != last or rounded is None:
+            last = value
+            rounded = round(value, digits)
+        out.append(rounded)
+    return out
+
+
+def apply_columns(
+    records: list[dict[str, Any]], outputs: Mapping[str, Sequence[Any]]
+) -> list[dict[str, Any]]:
+    """
+    Write process_columns() outputs into bar records, as process_bar would
+    (same fields, same key order).
+    """
+    names = [key for key in OUTPUT_FIELDS if key in outputs]
+    for i, record in enumerate(records):
+        for key in names:
+            value = outputs[key][i]
+            if value is None and key not in OUTPUT_FIELDS[:5]:
+                continue  # first bar: leg fields are not written
+            record[key] = value
+        record["mgann_behavior"] = {"UT": False, "SP": False, "PB": False, "EX3": False}
+    return records
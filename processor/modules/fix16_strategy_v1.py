@@ -15,7 +15,10 @@ Risk Management:
 - TP: 3R (3x risk)
 """
 
+from collections import deque
+
 from processor.core.module_base import BaseModule
+from processor.core.price_index import PriceZoneIndex
 
 
 TAG = "fix16_strategy_v1"
@@ -47,25 +50,71 @@ class Fix16StrategyV1(BaseModule):
     4. FVG entry (NEW or retest)
     """
     
-    def __init__(self, tick_size=0.1, risk_reward_ratio=3.0, sl_buffer_ticks=2):
+    version = VERSION
+    
+    def __init__(self, tick_size=0.1, risk_reward_ratio=3.0, sl_buffer_ticks=2,
+                 fvg_max_age=100, fvg_cleanup_interval=50, max_fvg_signals=3):
         """
         Args:
             tick_size: Price tick size (default 0.1 for GC)
             risk_reward_ratio: R:R ratio for TP (default 3.0)
             sl_buffer_ticks: Ticks beyond FVG for SL (default 2)
+            fvg_max_age: FVGs this many bars old are dropped at cleanup (default 100)
+            fvg_cleanup_interval: Bars between FVG cleanups (default 50)
+            max_fvg_signals: Signals allowed per FVG, NEW included (default 3)
         """
         super().__init__()
         self.tick_size = tick_size
         self.rr_ratio = risk_reward_ratio
         self.sl_buffer = sl_buffer_ticks * tick_size
-        
-        # FVG tracking for retest limit
-        self.active_fvgs = []  # List of {top, bottom, type, signal_count, bar_created}
+        self.fvg_max_age = fvg_max_age
+        self.fvg_cleanup_interval = fvg_cleanup_interval
+        self.max_fvg_signals = max_fvg_signals
+        
+        # FVG tracking for retest limit: zones by insertion seq, a price index
+        # per FVG type for retest lookups, and creation order for expiry
+        self._fvgs = {}  # seq -> {top, bottom, type, signal_count, bar_created}
+        self._fvg_index = {}  # fvg_type -> PriceZoneIndex
+        self._fvg_expiry = deque()  # (bar_created, seq), oldest first
+        self._fvg_seq = 0
         self.bar_count = 0
     
+    def cache_config(self):
+        """Settings that affect outputs (module output cache key)."""
+        return {
+            'tick_size': self.tick_size,
+            'risk_reward_ratio': self.rr_ratio,
+            'sl_buffer': self.sl_buffer,
+            'fvg_max_age': self.fvg_max_age,
+            'fvg_cleanup_interval': self.fvg_cleanup_interval,
+            'max_fvg_signals': self.max_fvg_signals,
+        }
+    
+    @property
+    def active_fvgs(self):
+        """Tracked FVG zones, oldest first."""
+        return list(self._fvgs.values())
+    
+    @active_fvgs.setter
+    def active_fvgs(self, fvgs):
+        self._fvgs = {}
+        self._fvg_index = {}
+        self._fvg_expiry = deque()
+        for fvg in fvgs:
+            self._track_fvg(fvg)
+        self._fvg_expiry = deque(sorted(self._fvg_expiry))
+    
+    def _track_fvg(self, fvg):
+        seq = self._fvg_seq
+        self._fvg_seq += 1
+        self._fvgs[seq] = fvg
+        index = self._fvg_index.setdefault(fvg['type'], PriceZoneIndex())
+        index.add(fvg['bottom'], fvg['top'], seq)
+        self._fvg_expiry.append((fvg['bar_created'], seq))
+    
     def _add_fvg(self, top, bottom, fvg_type):
         """Add new FVG zone to tracking."""
-        self.active_fvgs.append({
+        self._track_fvg({
             'top': top,
             'bottom': bottom,
             'type': fvg_type,
@@ -76,29 +125,33 @@ class Fix16StrategyV1(BaseModule):
     def _check_fvg_retest(self, price, fvg_type):
         """
         Check if price retests any active FVG.
-        Returns (can_signal, fvg_zone) where can_signal = True if signal_count < 3.
+        Returns (can_signal, fvg_zone) where can_signal = True if signal_count
+        < max_fvg_signals.
+        
+        The oldest zone of the type containing price decides.
         """
-        for fvg in self.active_fvgs:
-            if fvg['type'] != fvg_type:
-                continue
-            
-            # Check if price is in FVG zone
-            if fvg['bottom'] <= price <= fvg['top']:
-                if fvg['signal_count'] < 3:  # Allow max 3 signals
-                    fvg['signal_count'] += 1
-                    return True, fvg
-                else:
-                    # Already 3 signals, invalid
-                    return False, fvg
+        index = self._fvg_index.get(fvg_type)
+        seq = index.first_containing(price) if index is not None else None
+        if seq is None:
+            return False, None
         
-        return False, None
+        fvg = self._fvgs[seq]
+        if fvg['signal_count'] < self.max_fvg_signals:
+            fvg['signal_count'] += 1
+            return True, fvg
+        # Signal limit reached, invalid
+        return False, fvg
     
-    def _cleanup_old_fvgs(self, max_age=100):
-        """Remove FVGs older than max_age bars."""
-        self.active_fvgs = [
-            fvg for fvg in self.active_fvgs
-            if self.bar_count - fvg['bar_created'] < max_age
-        ]
+    def _cleanup_old_fvgs(self, max_age=None):
+        """Remove FVGs older than max_age bars (default: fvg_max_age)."""
+        if max_age is None:
+            max_age = self.fvg_max_age
+        # Zones are created in bar order, so expired ones are at the front
+        expiry = self._fvg_expiry
+        while expiry and self.bar_count - expiry[0][0] >= max_age:
+            _, seq = expiry.popleft()
+            fvg = self._fvgs.pop(seq)
+            self._fvg_index[fvg['type']].discard(seq)
     
     def _check_long_conditions(self, bar_state):
         """
@@ -253,14 +306,18 @@ class Fix16StrategyV1(BaseModule):
         
         return False, None
     
-    def _calculate_long_trade(self, bar_state, fvg_info):
+    def _calculate_long_trade(self, bar_state, fvg_info, rr_ratio=None, sl_buffer=None):
         """
         Calculate LONG trade parameters.
         
         Entry: Close price
         SL: Leg low - 1 tick (leg extreme, not FVG edge)
         TP: Entry + 3R
+        
+        rr_ratio / sl_buffer (price units) override the module settings.
         """
+        rr_ratio = self.rr_ratio if rr_ratio is None else rr_ratio
+        sl_buffer = self.sl_buffer if sl_buffer is None else sl_buffer
         entry = bar_state.get('close', 0)
         
         # === NEW: SL at leg extreme (not FVG) ===
@@ -270,10 +327,10 @@ class Fix16StrategyV1(BaseModule):
             sl = leg_low - (1 * self.tick_size)  # 1 tick below leg low
         else:
             # Fallback to FVG if leg_low not available
-            sl = fvg_info['bottom'] - self.sl_buffer
+            sl = fvg_info['bottom'] - sl_buffer
         
         risk = entry - sl
-        tp = entry + (risk * self.rr_ratio)
+        tp = entry + (risk * rr_ratio)
         
         return {
             'direction': 'LONG',
@@ -281,18 +338,22 @@ class Fix16StrategyV1(BaseModule):
             'sl': round(sl, 2),
             'tp': round(tp, 2),
             'risk': round(risk, 2),
-            'reward': round(risk * self.rr_ratio, 2),
-            'rr_ratio': self.rr_ratio,
+            'reward': round(risk * rr_ratio, 2),
+            'rr_ratio': rr_ratio,
         }
     
-    def _calculate_short_trade(self, bar_state, fvg_info):
+    def _calculate_short_trade(self, bar_state, fvg_info, rr_ratio=None, sl_buffer=None):
         """
         Calculate SHORT trade parameters.
         
         Entry: Close price
         SL: Leg high + 1 tick (leg extreme, not FVG edge)
         TP: Entry - 3R
+        
+        rr_ratio / sl_buffer (price units) override the module settings.
         """
+        rr_ratio = self.rr_ratio if rr_ratio is None else rr_ratio
+        sl_buffer = self.sl_buffer if sl_buffer is None else sl_buffer
         entry = bar_state.get('close', 0)
         
         # === NEW: SL at leg extreme (not FVG) ===
@@ -302,10 +363,10 @@ class Fix16StrategyV1(BaseModule):
             sl = leg_high + (1 * self.tick_size)  # 1 tick above leg high
         else:
             # Fallback to FVG if leg_high not available
-            sl = fvg_info['top'] + self.sl_buffer
+            sl = fvg_info['top'] + sl_buffer
         
         risk = sl - entry
-        tp = entry - (risk * self.rr_ratio)
+        tp = entry - (risk * rr_ratio)
         
         return {
             'direction': 'SHORT',
@@ -313,10 +374,32 @@ class Fix16StrategyV1(BaseModule):
             'sl': round(sl, 2),
             'tp': round(tp, 2),
             'risk': round(risk, 2),
-            'reward': round(risk * self.rr_ratio, 2),
-            'rr_ratio': self.rr_ratio,
+            'reward': round(risk * rr_ratio, 2),
+            'rr_ratio': rr_ratio,
         }
     
+    def price_trade(self, bar_state, direction, fvg_zone, rr_ratio=None, sl_buffer_ticks=None):
+        """
+        Price a signal's trade under another R:R ratio / SL buffer.
+        
+        Which bars signal does not depend on either setting, so a parameter
+        sweep can take the signals of one run and re-price them here.
+        
+        Args:
+            bar_state: Bar the signal fired on
+            direction: 'LONG' or 'SHORT'
+            fvg_zone: Signal's {'top', 'bottom'} FVG zone
+            rr_ratio: R:R ratio for TP (default: module setting)
+            sl_buffer_ticks: Ticks beyond FVG for SL (default: module setting)
+        
+        Returns:
+            dict: Trade parameters as in signal['trade']
+        """
+        sl_buffer = None if sl_buffer_ticks is None else sl_buffer_ticks * self.tick_size
+        if direction == 'LONG':
+            return self._calculate_long_trade(bar_state, fvg_zone, rr_ratio, sl_buffer)
+        return self._calculate_short_trade(bar_state, fvg_zone, rr_ratio, sl_buffer)
+    
     def process_bar(self, bar_state):
         """
         Process bar and generate trade signal if conditions met.
@@ -330,8 +413,8 @@ class Fix16StrategyV1(BaseModule):
         self.bar_count += 1
         
         # Cleanup old FVGs periodically
-        if self.bar_count % 50 == 0:
-            self._cleanup_old_fvgs(max_age=100)
+        if self.bar_count % self.fvg_cleanup_interval == 0:
+            self._cleanup_old_fvgs()
         
         # Check LONG conditions
         long_valid, fvg_info = self._check_long_conditions(bar_state)
@@ -370,9 +453,9 @@ class Fix16StrategyV1(BaseModule):
         # No signal
         return bar_state
     
-    def get_state(self):
-        """Return current module state."""
+    def state_summary(self):
+        """Return module counters (get_state() returns the full snapshot)."""
         return {
             'bar_count': self.bar_count,
-            'active_fvgs': len(self.active_fvgs),
+            'active_fvgs': len(self._fvgs),
         }
@@ -23,6 +23,10 @@ class Fix16StrategyV2(BaseModule):
         self.bar_count = 0
         self.signal_count = 0
     
+    def cache_config(self):
+        """Settings that affect outputs (module output cache key)."""
+        return {'tick_size': self.tick_size, 'risk_reward_ratio': self.rr_ratio}
+    
     def process_bar(self, bar_state):
         """
         Generate signal if all conditions met:
@@ -90,7 +94,7 @@ class Fix16StrategyV2(BaseModule):
         bar_state['signal_type'] = None
         return bar_state
     
-    def get_state(self):
+    def state_summary(self):
         return {
             'bar_count': self.bar_count,
             'signal_count': self.signal_count,
@@ -29,6 +29,10 @@ class Fix16StrategyV3(BaseModule):
         self.last_choch_type = None  # 'UP' or 'DOWN'
         self.last_choch_bar = None
     
+    def cache_config(self):
+        """Settings that affect outputs (module output cache key)."""
+        return {'tick_size': self.tick_size, 'risk_reward_ratio': self.rr_ratio}
+    
     def process_bar(self, bar_state):
         """Generate signal with CHoCH confirmation."""
         self.bar_count += 1
@@ -105,7 +109,7 @@ class Fix16StrategyV3(BaseModule):
         bar_state['signal_type'] = None
         return bar_state
     
-    def get_state(self):
+    def state_summary(self):
         return {
             'bar_count': self.bar_count,
             'signal_count': self.signal_count,
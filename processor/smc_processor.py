@@ -3,9 +3,16 @@ SMCDataProcessor: orchestrates module execution over incoming bars.
 This is a lightweight skeleton; plug in real module implementations as ready.
 """
 
+from pathlib import Path
 from typing import Dict, Any, List
 
+from .core.bar_record import BarOverlay, BarRecord
+from .core.checkpoint import read_checkpoint, write_checkpoint
+from .core.columns import DEFAULT_COLUMNS
+from .core.history import BarHistory
+from .core.module_cache import CachedRun
 from .core.module_base import BaseModule
+from .core.profiler import ModuleProfiler, module_label
 from .modules.fix13_wave_delta import WaveDeltaModule
 
 
@@ -16,46 +23,143 @@ class SMCDataProcessor:
         max_history: int = 2000,
         reset_on_symbol_change: bool = True,
         enable_wave_delta: bool = True,
+        profile: bool = False,
+        trace_allocations: bool = False,
     ) -> None:
         # Copy modules to avoid mutating caller-provided list
         self.modules: List[BaseModule] = list(modules) if modules else []
         if enable_wave_delta and not any(isinstance(m, WaveDeltaModule) for m in self.modules):
             self.modules.append(WaveDeltaModule())
-        self.history: List[Dict[str, Any]] = []
         self.max_history = max_history
+        self.history = BarHistory(max_history, columns=DEFAULT_COLUMNS)
         self.reset_on_symbol_change = reset_on_symbol_change
         self._last_symbol: str | None = None
+        # Opt-in per-module instrumentation (tracemalloc implies profiling)
+        self.profiler: ModuleProfiler | None = None
+        if profile or trace_allocations:
+            self.profiler = ModuleProfiler(trace_allocations=trace_allocations)
+            self.profiler.start()
+        # Optional module output cache run (see use_output_cache)
+        self._cached_run: CachedRun | None = None
+
+    def use_output_cache(self, run: CachedRun | None) -> None:
+        """
+        Replay cached module outputs and record the rest through `run`.
+
+        Open the run with ModuleOutputCache.open_run(key, processor.modules) on a
+        fresh processor, feed it every bar of the input, then call run.close().
+        Pass None to go back to running every module.
+        """
+        self._cached_run = run
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Snapshot of the pipeline: bar history, last symbol and each module's
+        get_state(). Profiler and output-cache state are not included.
+
+        History bars are copied one level deep: like the output cache, this
+        assumes nested input objects (e.g. `bar`) are not edited in place.
+        """
+        return {
+            "last_symbol": self._last_symbol,
+            "history": [dict(bar) for bar in self.history],
+            "modules": [module.get_state() for module in self.modules],
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restore a get_state() snapshot into this processor.
+
+        The processor must be built with the same modules (classes, versions
+        and configuration, in the same order); otherwise ValueError is raised
+        before anything is changed.
+        """
+        snapshots = state["modules"]
+        names = [type(m).__name__ for m in self.modules]
+        if [s.get("module") for s in snapshots] != names:
+            raise ValueError(
+                f"state modules {[s.get('module') for s in snapshots]} do not match {names}"
+            )
+        # Validate every module before restoring any of them
+        for module, snapshot in zip(self.modules, snapshots):
+            module.check_state(snapshot)
+        for module, snapshot in zip(self.modules, snapshots):
+            module.set_state(snapshot)
+        # Re-appending rebuilds the column mirror; a smaller capacity keeps the newest bars
+        self.history.clear()
+        for bar in state["history"]:
+            self.history.append(BarRecord(bar))
+        self._last_symbol = state["last_symbol"]
+
+    def save_checkpoint(self, path: Path) -> Path:
+        """Write get_state() to a checkpoint file (see processor.core.checkpoint)."""
+        return write_checkpoint(path, self.get_state(), self.modules)
+
+    def restore_checkpoint(self, path: Path) -> None:
+        """Restore a checkpoint written by save_checkpoint() for this pipeline."""
+        self.set_state(read_checkpoint(path, self.modules))
 
     def process_bar(self, bar_state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Run bar_state through the configured module pipeline.
 
+        - Copies bar_state once into a shared BarRecord that modules update in place.
         - Protects against module exceptions (captures under `processor_errors`).
-        - Trims history to avoid unbounded growth (memory leak).
+        - Keeps history in a ring buffer capped at max_history (O(1) eviction).
         - Optionally resets history when symbol changes.
         """
-        state = dict(bar_state)
+        state = BarRecord(bar_state)
         errors: List[str] = []
 
         # Reset history when switching symbols/files to avoid state bleed
         symbol = state.get("symbol")
         if self.reset_on_symbol_change and symbol and symbol != self._last_symbol:
-            self.history = []
+            self.history.clear()
         self._last_symbol = symbol
 
-        for module in self.modules:
+        profiler = self.profiler
+        for stage, module in enumerate(self.modules):
             try:
-                state = module.process_bar(state, history=self.history)
+                if profiler is None:
+                    state = self._run_module(module, state, stage)
+                else:
+                    state = profiler.run(
+                        module_label(module), self._run_module, module, state, stage
+                    )
             except Exception as exc:  # noqa: BLE001
                 errors.append(f"{module.name}: {exc}")
 
+        if profiler is not None:
+            profiler.bars += 1
+
         if errors:
             # Attach errors but still return state best-effort
             state["processor_errors"] = errors
 
         self.history.append(state)
-        # Trim history to max_history to prevent unbounded memory use
-        if self.max_history > 0 and len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history :]
 
         return state
+
+    def _run_module(self, module: BaseModule, state: BarRecord, stage: int = 0) -> BarRecord:
+        """Run one module against the shared record (or an overlay if isolated)."""
+        if self._cached_run is not None:
+            result = self._cached_run.run(
+                stage, module, state, self._call_module, isolated=module.isolated
+            )
+            return result if isinstance(result, BarRecord) else BarRecord(result)
+        if module.isolated:
+            view = BarOverlay(state)
+            result = module.process_bar(view, history=self.history)
+            if result is view:
+                # Only commit once the module finished without raising
+                view.commit()
+                return state
+        else:
+            result = module.process_bar(state, history=self.history)
+            if result is state:
+                return state
+        # Module returned a new dict (e.g. third-party module not using emit())
+        return result if isinstance(result, BarRecord) else BarRecord(result)
+
+    def _call_module(self, module: BaseModule, view: BarOverlay) -> Dict[str, Any]:
+        return module.process_bar(view, history=self.history)
@@ -0,0 +1,92 @@
+"""Tests for in-place bar records, copy-on-write overlays and BaseModule.emit."""
+from processor.core.bar_record import BarOverlay, BarRecord
+from processor.core.module_base import BaseModule
+from processor.smc_processor import SMCDataProcessor
+
+
+class _Writer(BaseModule):
+    name = "writer"
+
+    def process_bar(self, bar_state, history=None):
+        return self.emit(bar_state, {"written": bar_state.get("close", 0) * 2})
+
+
+class _IsolatedFailer(BaseModule):
+    name = "isolated_failer"
+    isolated = True
+
+    def process_bar(self, bar_state, history=None):
+        bar_state["partial"] = True
+        raise RuntimeError("boom")
+
+
+class _IsolatedWriter(BaseModule):
+    name = "isolated_writer"
+    isolated = True
+
+    def process_bar(self, bar_state, history=None):
+        bar_state["signal"] = "long"
+        del bar_state["scratch"]
+        return bar_state
+
+
+def test_emit_copies_plain_dicts():
+    bar = {"close": 10.0}
+    result = _Writer().process_bar(bar)
+
+    assert result == {"close": 10.0, "written": 20.0}
+    assert "written" not in bar
+
+
+def test_emit_updates_bar_record_in_place():
+    record = BarRecord({"close": 10.0})
+    result = _Writer().process_bar(record)
+
+    assert result is record
+    assert record["written"] == 20.0
+
+
+def test_overlay_reads_through_and_keeps_writes_local():
+    base = {"a": 1, "b": 2}
+    view = BarOverlay(base)
+    view["b"] = 3
+    view["c"] = 4
+    del view["a"]
+
+    assert dict(view) == {"b": 3, "c": 4}
+    assert "a" not in view
+    assert view.get("a", "gone") == "gone"
+    assert base == {"a": 1, "b": 2}
+    assert view.changes() == {"b": 3, "c": 4}
+
+    view.commit()
+    assert base == {"b": 3, "c": 4}
+
+
+def test_processor_copies_input_once_and_shares_record():
+    processor = SMCDataProcessor(modules=[_Writer()], enable_wave_delta=False)
+    bar = {"close": 5.0}
+    result = processor.process_bar(bar)
+
+    assert isinstance(result, BarRecord)
+    assert result["written"] == 10.0
+    assert "written" not in bar
+    assert processor.history[-1] is result
+
+
+def test_isolated_module_changes_discarded_on_error():
+    processor = SMCDataProcessor(
+        modules=[_IsolatedFailer(), _Writer()], enable_wave_delta=False
+    )
+    result = processor.process_bar({"close": 1.0})
+
+    assert "partial" not in result
+    assert result["written"] == 2.0
+    assert result["processor_errors"] == ["isolated_failer: boom"]
+
+
+def test_isolated_module_changes_committed_on_success():
+    processor = SMCDataProcessor(modules=[_IsolatedWriter()], enable_wave_delta=False)
+    result = processor.process_bar({"close": 1.0, "scratch": 1})
+
+    assert result == {"close": 1.0, "signal": "long"}
@@ -0,0 +1,89 @@
+"""Tests for the processor.bench throughput suite."""
+import json
+import random
+
+import pytest
+
+from processor.bench.suite import (
+    PIPELINE,
+    case_names,
+    compare,
+    environment_differences,
+    main,
+    run_suite,
+    scaled_bars,
+)
+
+
+def _write_bars(path, n=60, seed=2):
+    rng = random.Random(seed)
+    price = 100.0
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(n):
+            price += rng.uniform(-1, 1)
+            bar = {
+                "symbol": "GC",
+                "bar_index": 500 + i,
+                "session": "Asia",
+                "open": price,
+                "high": price + rng.uniform(0, 1),
+                "low": price - rng.uniform(0, 1),
+                "close": price,
+                "volume": rng.randint(50, 500),
+                "delta": rng.randint(-100, 100),
+                "atr_14": 1.5,
+            }
+            f.write(json.dumps(bar) + "\n")
+
+
+def test_scaled_bars_continue_bar_index():
+    bars = [{"bar_index": 10, "close": 1.0}, {"bar_index": 12, "close": 2.0}]
+    scaled = list(scaled_bars(bars, 5))
+    assert [b["bar_index"] for b in scaled] == [10, 12, 13, 15, 16]
+    assert [b["close"] for b in scaled] == [1.0, 2.0, 1.0, 2.0, 1.0]
+    assert bars[0]["bar_index"] == 10
+
+
+def test_run_suite_in_process(tmp_path):
+    _write_bars(tmp_path / "day.jsonl")
+    cases = [PIPELINE, "fix07_market_condition"]
+    document = run_suite(cases, ["real", "150"], data_dir=tmp_path, repeat=2, isolate=False)
+    rows = {(r["case"], r["dataset"]): r for r in document["results"]}
+    assert set(rows) == {(c, d) for c in cases for d in ("real", "150")}
+    assert rows[(PIPELINE, "real")]["bars"] == 60
+    assert rows[(PIPELINE, "150")]["bars"] == 150
+    for row in rows.values():
+        assert row["bars_per_sec"] > 0 and row["p50_us"] <= row["p99_us"] <= row["max_us"]
+    assert len(case_names()) == 14
+    assert not environment_differences(document, run_suite([], [], isolate=False))
+
+    with pytest.raises(ValueError):
+        run_suite(["nope"], ["real"], data_dir=tmp_path, isolate=False)
+
+
+def test_compare_flags_regressions(tmp_path, capsys):
+    def doc(bars_per_sec, p99_us):
+        return {"results": [{
+            "case": PIPELINE, "dataset": "real", "bars_per_sec": bars_per_sec,
+            "p50_us": 10.0, "p99_us": p99_us, "peak_rss_kb": 1000,
+        }]}
+
+    rows = {r["metric"]: r for r in compare(doc(1000.0, 50.0), doc(700.0, 40.0))}
+    assert rows["bars_per_sec"]["regression"] and rows["bars_per_sec"]["change"] == -0.3
+    assert not rows["p99_us"]["regression"] and rows["p99_us"]["change"] == pytest.approx(0.2)
+    assert not any(r["regression"] for r in compare(doc(1000.0, 50.0), doc(700.0, 40.0),
+                                                    {"bars_per_sec": 0.5}))
+
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(doc(1000.0, 50.0)))
+    current.write_text(json.dumps(doc(990.0, 90.0)))
+    assert main(["compare", str(current), "--baseline", str(baseline)]) == 1
+    assert main(["compare", str(current), "--baseline", str(baseline),
+                 "--tolerance", "p99_us=1.0"]) == 0
+    assert "timings are not comparable" not in capsys.readouterr().out
+
+    # A baseline from another host is still compared, with a warning
+    baseline.write_text(json.dumps({**doc(1000.0, 50.0), "host": "elsewhere"}))
+    assert main(["compare", str(current), "--baseline", str(baseline)]) == 1
+    assert "different host" in capsys.readouterr().out
+    assert environment_differences({"python": "3.11", "host": "a"}, {"python": "3.11"}) == ["host"]
@@ -0,0 +1,14 @@
+"""Tests for the candidate bitset helpers."""
+import random
+
+from processor.backtest.bitsets import bitset, iter_bits
+
+
+def test_bitset_round_trips_indices():
+    rng = random.Random(7)
+    for n in (0, 1, 7, 8, 9, 64, 1000):
+        indices = sorted(rng.sample(range(n), rng.randint(0, n))) if n else []
+        mask = bitset(indices, n)
+        assert mask == sum(1 << i for i in indices)
+        assert list(iter_bits(mask)) == indices
+    assert bitset([3, 3, 1], 4) == 0b1010
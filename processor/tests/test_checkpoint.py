@@ -0,0 +1,129 @@
+"""Tests for module state snapshots and processor checkpoints."""
+import json
+import random
+
+import pytest
+
+from processor.backtest.run_module_backtest import build_default_modules
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix09_volume_profile import VolumeProfileModule
+from processor.modules.fix13_wave_delta import WaveDeltaModule
+from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+from processor.smc_processor import SMCDataProcessor
+
+
+def _bars(n, seed, symbol="GC"):
+    rng = random.Random(seed)
+    price, bars = 2000.0, []
+    for i in range(n):
+        price += rng.uniform(-1.5, 1.5)
+        fvg = rng.random() < 0.3
+        bars.append(normalize_bar({
+            "symbol": symbol,
+            "bar_index": i,
+            "open": price,
+            "high": price + rng.uniform(0, 1),
+            "low": price - rng.uniform(0, 1),
+            "close": price + rng.uniform(-0.5, 0.5),
+            "volume": rng.randint(50, 900),
+            "atr_14": 1.2,
+            "fvg_detected": fvg,
+            "fvg_type": rng.choice(["bullish", "bearish"]) if fvg else None,
+            "fvg_top": price + 0.5 if fvg else None,
+            "fvg_bottom": price - 0.5 if fvg else None,
+            "last_swing_high": price + rng.uniform(0.5, 3),
+            "last_swing_low": price - rng.uniform(0.5, 3),
+            "bar": {
+                "volume_stats": {"total_volume": rng.randint(50, 900),
+                                 "delta_close": rng.randint(-200, 200)},
+                "ext_choch_up": rng.random() < 0.02,
+                "ext_choch_down": rng.random() < 0.02,
+            },
+        }))
+    return bars
+
+
+def _processor(max_history=2000):
+    modules = build_default_modules() + [Fix14MgannSwing(record_waves=True), Fix16StrategyV1()]
+    return SMCDataProcessor(modules=modules, max_history=max_history)
+
+
+def _run(processor, bars):
+    return [json.dumps(processor.process_bar(bar), sort_keys=True, default=str) for bar in bars]
+
+
+def test_restored_processor_continues_like_uninterrupted_run(tmp_path):
+    bars = _bars(600, 1)
+    expected = _run(_processor(max_history=200), bars)
+
+    first = _processor(max_history=200)
+    head = _run(first, bars[:350])
+    path = first.save_checkpoint(tmp_path / "day.ckpt")
+
+    resumed = _processor(max_history=200)
+    resumed.restore_checkpoint(path)
+    assert len(resumed.history) == 200
+    assert head + _run(resumed, bars[350:]) == expected
+    # The snapshot is not shared with the processor it came from
+    assert _run(first, bars[350:]) == expected[350:]
+
+    swings = next(m for m in resumed.modules if isinstance(m, Fix14MgannSwing))
+    assert swings.waves == next(m for m in first.modules if isinstance(m, Fix14MgannSwing)).waves
+    assert len(swings.waves) > 0
+
+
+def test_module_state_round_trip():
+    bars = _bars(150, 2)
+    module = Fix14MgannSwing(threshold_ticks=4)
+    for bar in bars[:100]:
+        module.process_bar(dict(bar))
+    state = module.get_state()
+    assert state["module"] == "Fix14MgannSwing" and "_lock" not in state["attrs"]
+
+    clone = Fix14MgannSwing(threshold_ticks=4)
+    clone.set_state(state)
+    for bar in bars[100:]:
+        assert clone.process_bar(dict(bar)) == module.process_bar(dict(bar))
+
+    # The wave table stays the target's choice
+    recording = WaveDeltaModule(record_waves=True)
+    recording.set_state(WaveDeltaModule().get_state())
+    assert recording.waves is not None
+    plain = WaveDeltaModule()
+    plain.set_state(recording.get_state())
+    assert plain.waves is None
+
+    # Locks stay the target's own
+    profile = VolumeProfileModule()
+    lock = profile._lock
+    profile.set_state(VolumeProfileModule().get_state())
+    assert profile._lock is lock
+
+
+def test_mismatched_states_are_rejected(tmp_path):
+    state = Fix14MgannSwing(threshold_ticks=4).get_state()
+    with pytest.raises(ValueError, match="config"):
+        Fix14MgannSwing(threshold_ticks=6).set_state(state)
+    with pytest.raises(ValueError, match="module"):
+        Fix16StrategyV1().set_state(state)
+    with pytest.raises(ValueError, match="state_version"):
+        Fix14MgannSwing(threshold_ticks=4).set_state({**state, "state_version": 0})
+
+    path = _processor().save_checkpoint(tmp_path / "a.ckpt")
+    other = SMCDataProcessor(modules=[Fix14MgannSwing()])
+    with pytest.raises(ValueError, match="modules"):
+        other.restore_checkpoint(path)
+    (tmp_path / "b.ckpt").write_bytes(b"not a checkpoint\n")
+    with pytest.raises(ValueError, match="not a processor checkpoint"):
+        other.restore_checkpoint(tmp_path / "b.ckpt")
+
+    # A bad module snapshot leaves the processor untouched
+    processor = _processor()
+    _run(processor, _bars(20, 3))
+    state = processor.get_state()
+    state["modules"][-1] = {**state["modules"][-1], "version": "0"}
+    fresh = _processor()
+    with pytest.raises(ValueError):
+        fresh.set_state(state)
+    assert len(fresh.history) == 0 and fresh._last_symbol is None
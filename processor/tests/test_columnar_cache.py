@@ -0,0 +1,198 @@
+"""Tests for the memory-mapped columnar cache of exporter JSONL."""
+import json
+import os
+import time
+
+from processor.ingest import columnar_cache
+from processor.ingest.columnar_cache import build_cache, load_records, open_cache
+
+RECORDS = [
+    {
+        "bar_index": 1,
+        "session": "Asia",
+        "close": 100.5,
+        "sl": 0,
+        "fvg_detected": True,
+        "reason": [],
+        "bar": {"h": 101.0, "volume_stats": {"total_volume": 120, "delta_close": -4}},
+        "mtf_context": {"m5": {"structure_dir": 1, "ob_retest_bull_sl": None}},
+    },
+    {
+        "bar_index": 2,
+        "session": "London",
+        "close": 101,
+        "sl": 99.5,
+        "fvg_detected": False,
+        "reason": ["sweep"],
+        "extra": "only here",
+        "bar": {"h": 102.5, "volume_stats": {"total_volume": 80, "delta_close": 10}},
+        "mtf_context": {"m5": {"structure_dir": -1, "ob_retest_bull_sl": 98.0}},
+    },
+    {
+        "bar_index": 3,
+        "session": "Asia",
+        "close": None,
+        "sl": 0,
+        "fvg_detected": True,
+        "reason": [],
+        "bar": {},
+        "mtf_context": {"m5": {"structure_dir": 0, "ob_retest_bull_sl": None}},
+    },
+]
+
+
+def _write(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n", encoding="utf-8")
+
+
+def test_records_round_trip(tmp_path):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS)
+
+    records = load_records(src, tmp_path / "cache")
+    assert records == RECORDS
+    assert list(records[0]) == list(RECORDS[0])
+    # Rows never alias mutable leaves
+    records[0]["reason"].append("x")
+    assert records[2]["reason"] == []
+
+
+def test_columns_are_typed_and_dictionary_encoded(tmp_path):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS)
+
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert len(cache) == 3
+        assert cache.kind("bar_index") == "int"
+        assert cache.kind("sl") == "float"
+        assert cache.kind("session") == "str"
+        assert cache.kind("reason") == "json"
+        assert cache.kind("bar") == "object"
+        assert cache.categories("session") == ["Asia", "London"]
+        assert list(cache.values("session")) == [0, 1, 0]
+        assert list(cache.values("bar.volume_stats.total_volume"))[:2] == [120, 80]
+        assert cache.column("mtf_context.m5.ob_retest_bull_sl") == [None, 98.0, None]
+        assert cache.column("extra") == [None, "only here", None]
+        assert cache.state("bar_index") is None
+
+        projected = cache.records(fields=["bar_index", "bar.volume_stats"])
+        assert projected[0] == {
+            "bar_index": 1,
+            "bar": {"volume_stats": {"total_volume": 120, "delta_close": -4}},
+        }
+
+
+def test_cache_keyed_by_content_hash(tmp_path):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS[:2])
+    first = build_cache(src, tmp_path / "cache")
+
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert cache.path == first
+
+    _write(src, RECORDS)
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert cache.path != first
+        assert cache.rows == 3
+
+
+def _typed(value):
+    """Value with every int/float tagged by type (== alone treats 1 and 1.0 as equal)."""
+    if isinstance(value, dict):
+        return {k: _typed(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_typed(v) for v in value]
+    return (type(value).__name__, value)
+
+
+def test_mixed_int_float_columns_keep_each_value_type(tmp_path):
+    src = tmp_path / "export.jsonl"
+    big = 2 ** 60 + 1
+    records = [
+        {"close": 101, "sl": 0, "size": 1.5, "id": big, "bar": {"delta": -4}},
+        {"close": 100.5, "sl": 99.5, "size": 2, "id": 0.5, "bar": {"delta": 2.25}},
+        {"close": None, "sl": 0, "size": 3, "bar": {"delta": 7}},
+    ]
+    _write(src, records)
+
+    loaded = load_records(src, tmp_path / "cache")
+    assert _typed(loaded) == _typed(records)
+    # Also across the whole RECORDS fixture (close and sl mix ints and floats)
+    _write(src, RECORDS)
+    assert _typed(load_records(src, tmp_path / "cache")) == _typed(RECORDS)
+
+    _write(src, records)
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert cache.kind("close") == "float"
+        assert list(cache.int_rows("close")) == [1, 0, 0]
+        assert cache.column("sl") == [0, 99.5, 0]
+        assert cache.int_rows("bar.delta") is not None
+        # An int past float64's exact range cannot share a float column
+        assert cache.kind("id") == "json"
+
+
+def test_caches_of_an_older_format_are_rebuilt(tmp_path):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS)
+    path = build_cache(src, tmp_path / "cache")
+    manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+    (path / "manifest.json").write_text(json.dumps({**manifest, "format_version": 1}))
+
+    assert load_records(src, tmp_path / "cache") == RECORDS
+    assert json.loads((path / "manifest.json").read_text())["format_version"] != 1
+
+
+def _set_mtime(path, seconds_ago):
+    stamp = time.time_ns() - seconds_ago * 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+def _count_digests(monkeypatch):
+    calls = []
+    digest = columnar_cache.file_digest
+    monkeypatch.setattr(
+        columnar_cache, "file_digest", lambda path, *a: calls.append(path) or digest(path, *a)
+    )
+    return calls
+
+
+def test_unchanged_source_is_not_rehashed(tmp_path, monkeypatch):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS)
+    _set_mtime(src, 60)
+    first = build_cache(src, tmp_path / "cache")
+    digests = _count_digests(monkeypatch)
+
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert cache.path == first
+    assert load_records(src, tmp_path / "cache") == RECORDS
+    assert digests == []
+
+    # Touched but unchanged: hashed once, then the new mtime is trusted
+    _set_mtime(src, 30)
+    with open_cache(src, tmp_path / "cache") as cache:
+        assert cache.path == first
+    assert len(digests) == 1
+    assert load_records(src, tmp_path / "cache") == RECORDS
+    assert len(digests) == 1
+
+    # Rewritten with the same size: the mtime changes, so it is hashed again
+    edited = [{**RECORDS[0], "session": "Euro"}] + RECORDS[1:]
+    _write(src, edited)
+    assert load_records(src, tmp_path / "cache") == edited
+    assert len(digests) > 1
+
+
+def test_recently_written_source_is_always_hashed(tmp_path, monkeypatch):
+    src = tmp_path / "export.jsonl"
+    _write(src, RECORDS[:2])
+    load_records(src, tmp_path / "cache")
+    digests = _count_digests(monkeypatch)
+
+    # Same size and, within the timestamp granularity, possibly the same mtime
+    mtime = src.stat().st_mtime_ns
+    edited = [{**RECORDS[0], "session": "Euro"}, RECORDS[1]]
+    _write(src, edited)
+    os.utime(src, ns=(mtime, mtime))
+    assert load_records(src, tmp_path / "cache") == edited
+    assert digests
@@ -0,0 +1,52 @@
+"""Tests for the columnar history side-store."""
+from processor.core.columns import ColumnStore
+from processor.core.history import BarHistory
+from processor.modules.fix02_fvg_quality import FVGQualityModule
+
+
+def test_window_returns_last_values_oldest_first():
+    store = ColumnStore(capacity=5, fields=("volume",))
+    for v in range(1, 13):
+        store.append({"volume": v})
+
+    assert len(store) == 5
+    assert list(store.window("volume")) == [8.0, 9.0, 10.0, 11.0, 12.0]
+    assert list(store.window("volume", 3)) == [10.0, 11.0, 12.0]
+    assert list(store.window("volume", 50)) == [8.0, 9.0, 10.0, 11.0, 12.0]
+
+
+def test_missing_and_non_numeric_values_stored_as_zero():
+    store = ColumnStore(capacity=3, fields=("volume", "delta"))
+    store.append({"volume": None, "delta": "n/a"})
+    store.append({})
+    store.append({"volume": float("nan"), "delta": float("-inf")})
+
+    assert list(store.window("volume")) == [0.0, 0.0, 0.0]
+    assert list(store.window("delta")) == [0.0, 0.0, 0.0]
+
+
+def test_history_mirrors_columns_and_clears_them():
+    history = BarHistory(capacity=4, columns=("volume", "high"))
+    for i in range(6):
+        history.append({"volume": 100 + i, "high": 10.0 + i})
+
+    assert list(history.columns.window("volume")) == [
+        float(b["volume"]) for b in history
+    ]
+    history.clear()
+    assert len(history.columns) == 0
+
+
+def test_history_values_matches_dict_extraction():
+    module = FVGQualityModule()
+    bars = [{"volume": 1000 + 7 * i} for i in range(30)]
+    history = BarHistory(capacity=25, columns=("volume",))
+    for bar in bars:
+        history.append(bar)
+
+    from_columns = list(module.history_values(history, "volume", 20))
+    from_dicts = module.history_values(history.to_list(), "volume", 20)
+    assert from_columns == [float(v) for v in from_dicts]
+    assert module._get_volume_median(history, 20) == module._get_volume_median(
+        history.to_list(), 20
+    )
@@ -0,0 +1,109 @@
+"""Tests for the bitset filter leaderboard of eval_filtered_signals."""
+import json
+import random
+from itertools import product
+
+import pytest
+
+from processor.backtest.eval_filtered_signals import (
+    DEFAULT_FILTER,
+    FILTER_GRID,
+    filter_leaderboard,
+    passes_filter,
+    process_file,
+    summarize,
+)
+
+GRID = {
+    "min_retest_quality": [0.3, 0.6],
+    "allowed_retest_types": [{"edge"}, {"edge", "shallow"}],
+    "min_fvg_quality": [0.0, 0.5],
+    "min_confluence": [0.1],
+    "require_alignment": [False, True],
+    "allowed_market": [set(), {"trending_strong"}],
+}
+
+
+def _write_file(path, seed, n=300, null_scores=False):
+    rng = random.Random(seed)
+    price, lines = 100.0, []
+    for _ in range(n):
+        price += rng.uniform(-1, 1)
+        rec = {"high": price + rng.uniform(0, 1), "low": price - rng.uniform(0, 1),
+               "close": price, "fvg_type": rng.choice(["bullish", "bearish", None])}
+        if rng.random() < 0.4:
+            direction = rng.choice([1, -1])
+            rec.update({
+                "fvg_retest_detected": rng.random() < 0.9,
+                "signal_type": "fvg_retest_bull" if direction == 1 else "fvg_retest_bear",
+                "fvg_retest_type": rng.choice(["edge", "shallow", "deep"]),
+                "fvg_retest_quality_score": rng.random(),
+                "fvg_quality_score": rng.random(),
+                "confluence_score": rng.random() * 0.3,
+                "mtf_is_aligned": rng.random() < 0.5,
+                "sl": price - direction * rng.uniform(0.5, 2) if rng.random() < 0.7 else 0,
+                "tp": price + direction * rng.uniform(1, 4) if rng.random() < 0.6 else None,
+                "fvg_bottom": price - 1, "fvg_top": price + 1,
+            })
+            if rng.random() < 0.8:
+                rec["market_condition"] = rng.choice(["trending_strong", "ranging_quiet"])
+            if null_scores and rng.random() < 0.3:
+                rec[rng.choice(["fvg_retest_quality_score", "fvg_quality_score",
+                                "confluence_score"])] = None
+        lines.append(json.dumps(rec))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("null_scores", [False, True])
+def test_leaderboard_matches_per_filter_runs(tmp_path, null_scores):
+    paths = [_write_file(tmp_path / f"f{seed}.jsonl", seed, null_scores=null_scores)
+             for seed in range(2)]
+    board = filter_leaderboard(paths, GRID, max_lookahead=40, min_trades=0)
+    assert len(board) == 2 ** 5
+    assert [row["rank"] for row in board] == list(range(1, len(board) + 1))
+    assert [row["pf"] for row in board] == sorted((row["pf"] for row in board), reverse=True)
+
+    rows = {json.dumps(row["filter"], sort_keys=True): row for row in board}
+    for combo in product(*GRID.values()):
+        cfg = dict(zip(GRID, combo), max_lookahead=40)
+        row = dict(rows[json.dumps({k: sorted(v) if isinstance(v, set) else v
+                                    for k, v in zip(GRID, combo)}, sort_keys=True)])
+        del row["rank"], row["filter"]
+        # Pooled over files == summing the per-file trade counts
+        per_file = [process_file(p, cfg) for p in paths]
+        assert row["trades"] == sum(s["trades"] for s in per_file)
+        assert row["wins"] == sum(s["wins"] for s in per_file)
+
+        single = filter_leaderboard(paths[:1], {k: [v] for k, v in zip(GRID, combo)},
+                                    max_lookahead=40, min_trades=0)[0]
+        del single["rank"], single["filter"], per_file[0]["file"]
+        assert single == per_file[0]
+
+
+def test_null_scores_fail_the_filter():
+    rec = {"fvg_retest_detected": True, "fvg_retest_type": "edge",
+           "signal_type": "fvg_retest_bull", "fvg_retest_quality_score": 0.9,
+           "fvg_quality_score": 0.9, "confluence_score": 0.2, "mtf_is_aligned": True}
+    cfg = dict(DEFAULT_FILTER, allowed_market=set())
+    assert passes_filter(rec, cfg)
+    for key in ("fvg_retest_quality_score", "fvg_quality_score", "confluence_score"):
+        assert not passes_filter({**rec, key: None}, cfg)
+        # A missing score counts as 0
+        assert passes_filter({k: v for k, v in rec.items() if k != key},
+                             dict(cfg, min_retest_quality=0, min_fvg_quality=0, min_confluence=0))
+
+
+def test_min_trades_and_bad_settings(tmp_path):
+    path = _write_file(tmp_path / "f.jsonl", 3)
+    board = filter_leaderboard([path], GRID, max_lookahead=40, min_trades=10 ** 6)
+    assert board == []
+    with pytest.raises(ValueError):
+        filter_leaderboard([path], {"min_volume": [1]}, min_trades=0)
+    with pytest.raises(ValueError):
+        filter_leaderboard([path], GRID, rank_by="sharpe")
+    # The default filter is one point of the default grid
+    assert all(
+        DEFAULT_FILTER[key] in values for key, values in FILTER_GRID.items()
+    )
+    assert summarize([])["trades"] == 0
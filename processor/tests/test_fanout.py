@@ -0,0 +1,128 @@
+"""Tests for the multi-strategy fan-out backtest."""
+import json
+import random
+
+import pytest
+
+from processor.backtest.fanout import (
+    StrategySlot,
+    build_slot,
+    level_signal,
+    run_fanout,
+    v1_signal,
+)
+from processor.backtest.trade_simulator import TradeSimulator
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+
+
+def _write_day(path, n, seed):
+    rng = random.Random(seed)
+    price = 2000.0
+    with path.open("w") as f:
+        for i in range(n):
+            price += rng.uniform(-1.5, 1.5)
+            high, low = price + rng.uniform(0, 1), price - rng.uniform(0, 1)
+            fvg = rng.random() < 0.3
+            bar = {
+                "timestamp": f"{seed}-{i}",
+                "bar_index": i,
+                "session": "Asia" if i < n // 2 else "London",
+                "open": price, "high": high, "low": low, "close": price,
+                "atr_14": 1.2,
+                "fvg_detected": fvg,
+                "fvg_type": rng.choice(["bullish", "bearish"]) if fvg else None,
+                "fvg_top": price + 0.5 if fvg else None,
+                "fvg_bottom": price - 0.5 if fvg else None,
+                "last_swing_high": price + rng.uniform(0.5, 3),
+                "last_swing_low": price - rng.uniform(0.5, 3),
+                "bar": {
+                    "volume_stats": {"total_volume": rng.randint(50, 900),
+                                     "delta_close": rng.randint(-200, 200)},
+                    "ext_choch_up": rng.random() < 0.02,
+                    "ext_choch_down": rng.random() < 0.02,
+                },
+            }
+            f.write(json.dumps(bar) + "\n")
+
+
+def _standalone(paths, spec):
+    """One strategy on its own pipeline, fed like run_full_backtest."""
+    slot = build_slot(spec)
+    mgann, sim = Fix14MgannSwing(threshold_ticks=6), TradeSimulator()
+    for path in paths:
+        for i, line in enumerate(path.read_text().splitlines()):
+            raw_bar = json.loads(line)
+            bar = slot.module.process_bar(mgann.process_bar(normalize_bar(raw_bar)))
+            sim.update_trades(bar, i)
+            signal = slot.adapter(bar)
+            if signal is not None:
+                sim.add_signal(signal, 0, session=raw_bar["session"])
+    return sim
+
+
+def test_fanout_matches_separate_runs(tmp_path):
+    paths = [tmp_path / "day1.jsonl", tmp_path / "day2.jsonl"]
+    _write_day(paths[0], 700, 1)
+    _write_day(paths[1], 500, 2)
+    specs = ["v1", "v2", "v3", "v2:risk_reward_ratio=2.0"]
+
+    results = run_fanout(paths, [build_slot(s) for s in specs], keep_trades=True)
+    assert results["bars"] == 1200
+    for spec, result in zip(specs, results["strategies"]):
+        expected = _standalone(paths, spec)
+        assert result["strategy"] == spec
+        assert result["closed_trades"] == expected.closed_trades
+        assert result["summary"] == expected.get_stats()
+        assert result["by_session"] == (expected.stats.report() or {}).get("by_session", {})
+    assert results["strategies"][1]["signals"] > 0
+
+
+class Marker:
+    """Toy strategy: overwrites a shared field and signals on every 10th bar."""
+
+    def __init__(self, value):
+        self.value = value
+        self.seen = []
+
+    def process_bar(self, bar_state):
+        self.seen.append(bar_state.get("marker"))
+        bar_state["marker"] = self.value
+        if bar_state["bar_index"] % 10 == 0:
+            bar_state["signal_type"] = "LONG"
+            bar_state.update(entry_price=bar_state["close"], sl=0.0, tp=1e9, risk=1, reward=1)
+        return bar_state
+
+
+class Counting:
+    def __init__(self):
+        self.calls = 0
+
+    def process_bar(self, bar_state):
+        self.calls += 1
+        return bar_state
+
+
+def test_views_are_isolated_and_upstream_runs_once(tmp_path):
+    path = tmp_path / "day.jsonl"
+    _write_day(path, 50, 3)
+    upstream = Counting()
+    a, b = Marker("a"), Marker("b")
+    results = run_fanout(
+        [path], [StrategySlot("a", a, level_signal), StrategySlot("b", b, level_signal)],
+        upstream=[upstream],
+    )
+    assert upstream.calls == 50
+    assert a.seen == b.seen == [None] * 50
+    assert [r["signals"] for r in results["strategies"]] == [5, 5]
+    assert v1_signal({"signal_type": "LONG"}) is None
+
+
+def test_bad_specs():
+    with pytest.raises(ValueError):
+        build_slot("v9")
+    with pytest.raises(ValueError):
+        build_slot("v1:risk_reward_ratio")
+    with pytest.raises(ValueError):
+        run_fanout([], [build_slot("v1"), build_slot("v1")])
+    assert build_slot("v1:risk_reward_ratio=2.5,sl_buffer_ticks=3").module.rr_ratio == 2.5
@@ -1,4 +1,7 @@
 """Unit tests for Fix #09: Volume Profile Module."""
+import random
+from collections import deque
+
 import pytest
 from processor.modules.fix09_volume_profile import VolumeProfileModule
 
@@ -168,3 +171,81 @@ class TestVolumeProfileModule:
         self.module.process_bar(bar)
 
         assert bar == original_bar
+
+    def test_incremental_profile_matches_full_rebuild(self):
+        """Test per-bar histogram updates give the same levels as re-binning every bar."""
+        rng = random.Random(5)
+        incremental = VolumeProfileModule()
+        rebuilt = VolumeProfileModule()
+        for module in (incremental, rebuilt):
+            module._session_data = deque(maxlen=40)  # exercise eviction too
+
+        price = 100.0
+        for i in range(300):
+            price += rng.choice([-0.3, -0.1, 0.0, 0.1, 0.2])
+            bar = {
+                **self.base_bar,
+                "bar_index": i,
+                "session": f"s{i // 120}",
+                "high": round(price + rng.randint(0, 4) * 0.1, 2),
+                "low": round(price - rng.randint(0, 4) * 0.1, 2),
+                "close": price,
+                "volume": rng.choice([0, 1, 250, 4000]),
+            }
+            rebuilt._layout = None  # force a full re-bin of the session
+            assert incremental.process_bar(bar) == rebuilt.process_bar(bar)
+
+    def test_eviction_is_incremental_and_matches_full_rebuild(self):
+        """Test bars past max_session_bars leave the bins without re-binning the session."""
+        rng = random.Random(11)
+        incremental = VolumeProfileModule()
+        rebuilt = VolumeProfileModule()
+        for module in (incremental, rebuilt):
+            module._session_data = deque(maxlen=60)
+        rebins = []
+        rebin = incremental._rebin_profile
+        incremental._rebin_profile = lambda layout: rebins.append(layout) or rebin(layout)
+
+        price = 100.0
+        for i in range(600):
+            # Ranging (the session extremes stay put) then trending (they roll off)
+            price += rng.uniform(-0.2, 0.2) if i < 400 else rng.uniform(-0.1, 0.3)
+            bar = {
+                **self.base_bar,
+                "bar_index": i,
+                "session": "s0",
+                "high": price + rng.uniform(0, 0.4),
+                "low": price - rng.uniform(0, 0.4),
+                "close": price,
+                "volume": rng.uniform(0, 5000),
+                "tick_size": 0.02 if 100 <= i < 110 else 0.01,
+            }
+            rebuilt._layout = None  # force a full re-bin of the session
+            got, expected = incremental.process_bar(bar), rebuilt.process_bar(bar)
+            assert got.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert got[key] == pytest.approx(value, abs=1e-9), (i, key)
+                else:
+                    assert got[key] == value, (i, key)
+        # Only layout changes re-bin: far fewer than one per evicted bar
+        assert len(rebins) < 300
+
+    def test_default_cap_matches_a_session_of_the_last_bars(self):
+        """Test a session past the default cap equals one holding only its last bars."""
+        rng = random.Random(2)
+        bars = []
+        price = 100.0
+        for i in range(2300):
+            price += rng.uniform(-0.2, 0.2)
+            bars.append({**self.base_bar, "bar_index": i, "session": "s0",
+                         "high": price + rng.uniform(0, 0.4), "low": price - rng.uniform(0, 0.4),
+                         "close": price, "volume": rng.uniform(0, 5000)})
+        for bar in bars:
+            got = self.module.process_bar(bar)
+        fresh = VolumeProfileModule()
+        for bar in bars[-fresh.config["max_session_bars"]:]:
+            expected = fresh.process_bar(bar)
+        for key, value in expected.items():
+            assert got[key] == (pytest.approx(value, abs=1e-9) if isinstance(value, float)
+                                else value)
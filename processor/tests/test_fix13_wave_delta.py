@@ -58,3 +58,38 @@ def test_wave_closes_on_delayed_swing_uses_smc_prices():
     assert out_high["last_wave_end_bar"] == 12
     assert out_high["last_wave_start_price"] == 99.0
     assert out_high["last_wave_end_price"] == 101.0
+
+
+def test_completed_waves_recorded_per_symbol():
+    """Each closed leg is written once to the wave table; a new symbol starts a segment."""
+    module = WaveDeltaModule(record_waves=True)
+    bars = [
+        {"symbol": "GC", "bar_index": 1, "is_swing_low": True, "low": 99.0},
+        {"symbol": "GC", "bar_index": 2, "delta": 4, "volume": 40},
+        {"symbol": "GC", "bar_index": 3, "delta": 6, "volume": 60, "is_swing_high": True,
+         "high": 103.0},
+        {"symbol": "GC", "bar_index": 4, "delta": -3, "volume": 30},
+        {"symbol": "GC", "bar_index": 5, "delta": -5, "volume": 50, "is_swing_low": True,
+         "low": 100.0},
+        {"symbol": "SI", "bar_index": 1, "is_swing_high": True, "high": 30.0},
+        {"symbol": "SI", "bar_index": 3, "delta": -2, "volume": 20, "is_swing_low": True,
+         "low": 29.0},
+    ]
+    for bar in bars:
+        module.process_bar(bar, history=[])
+
+    waves = module.waves
+    assert waves.segments == ["GC", "SI"]
+    assert [w["direction"] for w in waves] == [1, -1, -1]
+    first = waves.row(0)
+    assert (first["start_bar"], first["end_bar"], first["bars"]) == (1, 3, 2)
+    assert (first["start_price"], first["end_price"]) == (99.0, 103.0)
+    assert (first["delta"], first["volume"], first["speed"]) == (10.0, 100.0, 2.0)
+    assert waves.row(2)["segment"] == 1 and waves.row(2)["kind"] == "wave"
+
+    # Off by default: same outputs, no table in the module or its state
+    plain = WaveDeltaModule()
+    for bar in bars:
+        plain.process_bar(bar, history=[])
+    assert plain.waves is None and plain.get_state()["attrs"]["waves"] is None
+    assert plain._wave_history == module._wave_history
@@ -231,3 +231,158 @@ def test_mgann_swing_three_push_exhaustion():
     assert result["mgann_behavior"]["EX3"] == True
     # And push_count should be reset to 0
     assert module.push_count == 0
+
+
+def _random_bars(rng, n, price=100.0):
+    bars = []
+    for i in range(n):
+        price += rng.choice([-1, 0, 1]) * rng.choice([0.1, 0.5, 1.0])
+        bar = {
+            "bar_index": i,
+            "high": price + rng.choice([0, 0.2, 0.5]),
+            "low": price - rng.choice([0, 0.2, 0.5]),
+            "delta": rng.randint(-60, 60),
+            "volume": rng.randint(0, 300),
+            "ext_dir": rng.choice([0, 0, 0, 1, -1]),
+        }
+        for flag in ("ext_choch_up", "ext_choch_down", "ext_bos_up", "ext_bos_down", "fvg_up"):
+            if rng.random() < 0.08:
+                bar[flag] = True
+        if rng.random() < 0.3:
+            bar["fvg_detected"] = True
+            bar["fvg_type"] = rng.choice(["bullish", "bearish"])
+        bars.append(bar)
+    return bars
+
+
+def test_process_columns_matches_process_bar():
+    """Batch outputs and end state are identical to streaming, across mixed calls."""
+    import json
+    import random
+
+    from processor.modules.fix14_mgann_swing import apply_columns
+
+    rng = random.Random(14)
+    for _ in range(40):
+        streaming, batch = Fix14MgannSwing(record_waves=True), Fix14MgannSwing(record_waves=True)
+        for part in range(3):
+            bars = _random_bars(rng, rng.randint(0, 120))
+            expected = [streaming.process_bar(dict(bar)) for bar in bars]
+            if part == 1:
+                got = [batch.process_bar(dict(bar)) for bar in bars]
+            else:
+                columns = {key: [bar.get(key) for bar in bars] for key in (
+                    "high", "low", "delta", "volume", "ext_dir", "ext_choch_up",
+                    "ext_choch_down", "ext_bos_up", "ext_bos_down", "fvg_detected",
+                    "fvg_up", "fvg_type", "bar_index")}
+                got = apply_columns([dict(bar) for bar in bars], batch.process_columns(columns))
+            assert json.dumps(got) == json.dumps(expected)
+            assert vars(batch) == vars(streaming)
+        assert batch.waves == streaming.waves
+
+
+def test_finished_legs_recorded_in_wave_table():
+    """Each impulse/pullback leg becomes one wave row matching the exported speeds."""
+    import random
+
+    from processor.core.wave_table import KIND_IMPULSE, KIND_PULLBACK
+
+    module = Fix14MgannSwing(record_waves=True)
+    module.waves.new_segment("day1")
+    for bar in _random_bars(random.Random(3), 400):
+        out = module.process_bar(dict(bar))
+    last_speeds = {KIND_IMPULSE: out["impulse_speed"], KIND_PULLBACK: out["pullback_speed"]}
+
+    waves = module.waves
+    assert len(waves) > 10
+    assert waves.segments == ["day1"]
+    assert Fix14MgannSwing().waves is None
+    for kind in (KIND_IMPULSE, KIND_PULLBACK):
+        rows = waves.select(kind=kind)
+        assert rows
+        assert round(waves.column("speed")[rows[-1]], 4) == last_speeds[kind]
+    for row in waves:
+        assert row["start_bar"] <= row["end_bar"]
+        assert row["strength_ok"] in (True, False)
+
+
+def test_wave_rows_run_between_swing_extremes():
+    """Hand-built up/pullback/up swings: rows carry the swing extremes, not the last bar."""
+    # (high, low): up to 105, pull back to 99.5, up again to 108, turn down
+    bars = [(101, 99), (102, 100), (103, 101), (105, 102), (104, 101), (103, 100),
+            (102, 99.5), (104, 101), (106, 103), (108, 104), (107, 103), (105, 102)]
+    module = Fix14MgannSwing(record_waves=True)
+    for i, (high, low) in enumerate(bars):
+        module.process_bar({"bar_index": i, "high": high, "low": low, "close": (high + low) / 2,
+                            "delta": 10, "volume": 100, "ext_dir": 1})
+
+    rows = [(r["kind"], r["direction"], r["start_bar"], r["end_bar"], r["start_price"],
+             r["end_price"]) for r in module.waves]
+    assert rows == [
+        ("impulse", 1, 1, 5, 99.0, 105.0),
+        ("pullback", -1, 5, 8, 105.0, 99.5),
+        ("impulse", 1, 8, 11, 99.5, 108.0),
+    ]
+    # The down wave confirmed on the last bar starts from the 108 high
+    assert module.wave_start_price == 108.0
+
+
+def test_thresholds_drive_the_wave_strength_flags():
+    """Overridden thresholds change the flags exactly as the pure checks say."""
+    import random
+
+    import pytest
+
+    from processor.modules.fix14_mgann_swing import pullback_strength_ok
+
+    loose = {"pb_delta_mult": 10.0, "pb_volume_mult": 10.0, "pb_speed_mult": 10.0,
+             "max_counter_delta": 1000}
+    default, relaxed = Fix14MgannSwing(), Fix14MgannSwing(thresholds=loose)
+    flags = {False: 0, True: 0}
+    for bar in _random_bars(random.Random(7), 600):
+        expected = default.process_bar(dict(bar))
+        got = relaxed.process_bar(dict(bar))
+        if "pb_wave_strength_ok" not in got:
+            continue
+        assert got["pb_wave_strength_ok"] >= expected["pb_wave_strength_ok"]
+        if relaxed.pb_wave_strength_flag:
+            assert pullback_strength_ok(relaxed.pullback_features, relaxed.thresholds)
+        flags[got["pb_wave_strength_ok"] != expected["pb_wave_strength_ok"]] += 1
+    assert flags[True] > 0
+    assert relaxed.cache_config()["thresholds"]["pb_delta_mult"] == 10.0
+
+    with pytest.raises(ValueError):
+        Fix14MgannSwing(thresholds={"pb_delta": 1.0})
+
+
+
+def test_hybrid_v4_check_matches_the_rule():
+    """_evaluate_pullback_strength applies the six Hybrid v4 conditions."""
+    import random
+
+    from processor.modules.fix14_mgann_swing import hybrid_v4_ok
+
+    loose = {"v4_max_strength": 90, "v4_delta_ratio": 2.0, "v4_volume_ratio": 2.0}
+    module = Fix14MgannSwing(thresholds=loose)
+    outcomes = set()
+    for bar in _random_bars(random.Random(3), 600):
+        module.process_bar(dict(bar))
+        if module.trend_dir == 0:
+            continue
+        for avg_volume in (module.pullback_volume / 2, module.pullback_volume * 2):
+            m = module
+            expected = (
+                m.last_impulse_volume > 0 and m.pullback_volume > 0
+                and m.pullback_strength < 90
+                and abs(m.pullback_delta) <= abs(m.last_impulse_delta) * 2.0
+                and m.pullback_volume <= m.last_impulse_volume * 2.0
+                and (m.pullback_delta >= -35 if m.trend_dir == 1 else m.pullback_delta <= 35)
+                and m.pullback_volume <= avg_volume
+                and m._pullback_structure_ok()
+            )
+            result = module._evaluate_pullback_strength({"avg_volume": avg_volume}, None)
+            assert result == expected
+            outcomes.add(result)
+    assert outcomes == {False, True}
+    # The recorded features carry every v4 input (the tuner's hybrid_v4 gate)
+    assert isinstance(hybrid_v4_ok(module.pullback_features, module.thresholds), bool)
@@ -0,0 +1,78 @@
+"""Unit tests for Fix #16: Strategy V1 FVG zone tracking."""
+from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+
+
+def _long_setup(close, **fields):
+    """Bar passing the LONG structure/leg filters."""
+    return {
+        "ext_choch_down": True,
+        "ext_dir": -1,
+        "mgann_leg_index": 1,
+        "leg1_breaks_prev_extreme": True,
+        "close": close,
+        **fields,
+    }
+
+
+class TestFix16StrategyV1:
+    """Tests for Fix16StrategyV1 FVG retest tracking."""
+
+    def test_retest_uses_oldest_zone_and_caps_signals(self):
+        strategy = Fix16StrategyV1()
+        strategy._add_fvg(101.0, 99.0, "bullish")
+        strategy._add_fvg(100.5, 99.5, "bullish")
+        strategy._add_fvg(100.5, 99.5, "bearish")
+
+        for expected_count in (2, 3):
+            can_signal, zone = strategy._check_fvg_retest(100.0, "bullish")
+            assert can_signal and zone["signal_count"] == expected_count
+            assert (zone["top"], zone["bottom"]) == (101.0, 99.0)
+
+        # The oldest zone is exhausted and still blocks the newer one
+        can_signal, zone = strategy._check_fvg_retest(100.0, "bullish")
+        assert not can_signal and zone["top"] == 101.0
+        assert strategy._check_fvg_retest(102.0, "bullish") == (False, None)
+
+    def test_cleanup_cadence_and_max_age(self):
+        strategy = Fix16StrategyV1(fvg_max_age=3, fvg_cleanup_interval=2)
+        bar = _long_setup(100.0, fvg_detected=True, fvg_type="bullish", fvg_top=101.0,
+                          fvg_bottom=99.0)
+        assert strategy.process_bar(dict(bar))["signal"]["fvg_new"] is True
+
+        ages = []
+        for _ in range(5):
+            strategy.process_bar({})
+            ages.append(len(strategy.active_fvgs))
+        # Created on bar 1; kept at the bar-2 cleanup, dropped at bar 4 (age 3)
+        assert ages == [1, 1, 0, 0, 0]
+        assert strategy.state_summary() == {"bar_count": 6, "active_fvgs": 0}
+
+    def test_retest_signal_after_new_fvg(self):
+        strategy = Fix16StrategyV1()
+        strategy.process_bar(_long_setup(100.0, fvg_detected=True, fvg_type="bullish",
+                                         fvg_top=101.0, fvg_bottom=99.0))
+        signal = strategy.process_bar(_long_setup(100.4))["signal"]
+        assert signal["fvg_new"] is False
+        assert signal["fvg_zone"] == {"top": 101.0, "bottom": 99.0}
+
+        strategy.active_fvgs = []
+        assert "signal" not in strategy.process_bar(_long_setup(100.4))
+
+    def test_max_fvg_signals_and_price_trade(self):
+        strategy = Fix16StrategyV1(max_fvg_signals=1)
+        strategy._add_fvg(101.0, 99.0, "bullish")
+        assert strategy._check_fvg_retest(100.0, "bullish")[0] is False
+
+        # Re-pricing with the module's own settings gives the signal's trade
+        strategy = Fix16StrategyV1()
+        bar = _long_setup(100.0, fvg_detected=True, fvg_type="bullish", fvg_top=99.8,
+                          fvg_bottom=99.0)
+        signal = strategy.process_bar(dict(bar))["signal"]
+        assert strategy.price_trade(bar, "LONG", signal["fvg_zone"]) == signal["trade"]
+
+        trade = strategy.price_trade(bar, "LONG", signal["fvg_zone"], rr_ratio=2.0,
+                                     sl_buffer_ticks=5)
+        assert (trade["sl"], trade["tp"], trade["rr_ratio"]) == (98.5, 103.0, 2.0)
+        short = strategy.price_trade(dict(bar, mgann_leg_high=101.0), "SHORT",
+                                     signal["fvg_zone"], rr_ratio=1.0)
+        assert (short["sl"], short["tp"]) == (101.1, 98.9)
@@ -0,0 +1,81 @@
+"""Tests for the BarHistory ring buffer and its use in SMCDataProcessor."""
+from processor.core.history import BarHistory
+from processor.smc_processor import SMCDataProcessor
+
+
+def _bars(n, start=0):
+    return [{"bar_index": i, "volume": 100 + i} for i in range(start, start + n)]
+
+
+def test_append_within_capacity_behaves_like_list():
+    history = BarHistory(capacity=5)
+    bars = _bars(3)
+    for bar in bars:
+        history.append(bar)
+
+    assert len(history) == 3
+    assert list(history) == bars
+    assert history[0] is bars[0]
+    assert history[-1] is bars[-1]
+    assert history[-2:] == bars[-2:]
+
+
+def test_eviction_keeps_most_recent_bars():
+    history = BarHistory(capacity=4)
+    bars = _bars(11)
+    for bar in bars:
+        history.append(bar)
+
+    expected = bars[-4:]
+    assert len(history) == 4
+    assert list(history) == expected
+    assert history.to_list() == expected
+    assert list(reversed(history)) == expected[::-1]
+    for i in range(-4, 4):
+        assert history[i] is expected[i]
+
+
+def test_slices_match_list_semantics_after_wraparound():
+    history = BarHistory(capacity=7)
+    bars = _bars(10)
+    for bar in bars:
+        history.append(bar)
+    expected = bars[-7:]
+
+    for n in range(0, 10):
+        assert history[-n:] == expected[-n:]
+    assert history[2:5] == expected[2:5]
+    assert history[::2] == expected[::2]
+    assert history[5:2] == []
+
+
+def test_concatenation_and_truthiness():
+    history = BarHistory(capacity=3)
+    assert not history
+    assert (history or []) == []
+
+    for bar in _bars(5):
+        history.append(bar)
+    current = {"bar_index": 99}
+    combined = history + [current]
+    assert [b["bar_index"] for b in combined] == [2, 3, 4, 99]
+
+
+def test_unbounded_capacity():
+    history = BarHistory(capacity=0)
+    for bar in _bars(50):
+        history.append(bar)
+    assert len(history) == 50
+    assert history[0]["bar_index"] == 0
+
+
+def test_processor_history_is_capped_and_reset_on_symbol_change():
+    processor = SMCDataProcessor(modules=[], max_history=5, enable_wave_delta=False)
+    for bar in _bars(12):
+        processor.process_bar({**bar, "symbol": "GC"})
+
+    assert len(processor.history) == 5
+    assert [b["bar_index"] for b in processor.history] == [7, 8, 9, 10, 11]
+
+    processor.process_bar({"bar_index": 0, "symbol": "NQ"})
+    assert len(processor.history) == 1
@@ -0,0 +1,136 @@
+"""Tests for the content-addressed module output cache."""
+import random
+
+import pytest
+
+from processor.core.module_base import BaseModule
+from processor.core.module_cache import ModuleOutputCache, input_key
+from processor.modules.fix07_market_condition import MarketConditionModule
+from processor.modules.fix08_volume_divergence import VolumeDivergenceModule
+from processor.modules.fix09_volume_profile import VolumeProfileModule
+from processor.smc_processor import SMCDataProcessor
+
+
+class RunningTotal(BaseModule):
+    """Stateful toy module: writes, deletes, and raises on every 7th bar."""
+
+    name = "running_total"
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.total = 0.0
+        self.calls = 0
+
+    def cache_config(self):
+        return {"scale": self.scale}
+
+    def process_bar(self, bar_state, history=None):
+        self.calls += 1
+        self.total += bar_state.get("close", 0) * self.scale
+        bar_state.pop("scratch", None)
+        bar_state["running_total"] = self.total
+        if self.calls % 7 == 0:
+            raise ValueError(f"bad bar {self.calls}")
+        return bar_state
+
+
+def _bars(n=120, seed=5):
+    rng = random.Random(seed)
+    price, bars = 100.0, []
+    for i in range(n):
+        price += rng.uniform(-1, 1)
+        bars.append({
+            "symbol": "GC",
+            "bar_index": i,
+            "open": price,
+            "high": price + rng.uniform(0, 1),
+            "low": price - rng.uniform(0, 1),
+            "close": price + rng.uniform(-0.5, 0.5),
+            "volume": rng.randint(50, 500),
+            "delta": rng.randint(-100, 100),
+            "atr_14": 1.5,
+            "scratch": i,
+        })
+    return bars
+
+
+def _modules(scale=1.0):
+    return [VolumeProfileModule(), RunningTotal(scale), MarketConditionModule(),
+            VolumeDivergenceModule()]
+
+
+def _run(bars, modules, cache=None):
+    processor = SMCDataProcessor(modules=modules, enable_wave_delta=False)
+    run = None
+    if cache is not None:
+        run = cache.open_run(input_key(["digest"], "test"), processor.modules)
+        processor.use_output_cache(run)
+    out = [dict(processor.process_bar(dict(bar))) for bar in bars]
+    if run is not None:
+        run.close()
+    return out, run
+
+
+def test_replay_matches_live_run(tmp_path):
+    bars = _bars()
+    expected, _ = _run(bars, _modules())
+    assert any("processor_errors" in rec for rec in expected)
+
+    cache = ModuleOutputCache(tmp_path)
+    recorded, run = _run(bars, _modules(), cache)
+    assert run.hits == [False] * 4
+    assert recorded == expected
+
+    modules = _modules()
+    replayed, run = _run(bars, modules, cache)
+    assert run.hits == [True] * 4
+    assert replayed == expected
+    assert [list(rec) for rec in replayed] == [list(rec) for rec in expected]
+    assert modules[1].calls == 0
+
+
+def test_only_changed_module_and_downstream_rerun(tmp_path):
+    bars = _bars()
+    cache = ModuleOutputCache(tmp_path)
+    _run(bars, _modules(), cache)
+
+    expected, _ = _run(bars, _modules(scale=2.0))
+    got, run = _run(bars, _modules(scale=2.0), cache)
+    assert run.hits == [True, False, False, False]
+    assert got == expected
+
+    # A version bump invalidates the same way
+    modules = _modules()
+    modules[3].version = "9.9.9"
+    assert _run(bars, modules, cache)[1].hits == [True, True, True, False]
+
+
+def test_keys_and_unreadable_entries(tmp_path):
+    assert input_key(["a", "b"]) != input_key(["b", "a"])
+    assert input_key(["a"], "fields:x") != input_key(["a"], "all")
+
+    cache = ModuleOutputCache(tmp_path)
+    run = cache.open_run(input_key(["a"]), [RunningTotal()])
+    view = {"close": 2.0, "scratch": 1}
+    assert run.run(0, RunningTotal(), view, lambda m, v: m.process_bar(v)) == {
+        "close": 2.0, "running_total": 2.0
+    }
+    (path,) = run.close()
+    path.write_bytes(b"not a pickle")
+    assert cache.open_run(input_key(["a"]), [RunningTotal()]).hits == [False]
+
+
+def test_replayed_errors_reraise(tmp_path):
+    cache = ModuleOutputCache(tmp_path)
+    call = lambda m, v: m.process_bar(v)  # noqa: E731
+    for _ in range(2):
+        run = cache.open_run(input_key(["b"]), [RunningTotal()])
+        module = RunningTotal()
+        module.calls = 6
+        state = {"close": 1.0}
+        with pytest.raises(ValueError, match="bad bar 7"):
+            run.run(0, module, state, call)
+        # Writes made before the error are kept, as with in-place updates
+        assert state == {"close": 1.0, "running_total": 1.0}
+        run.close()
+    assert run.hits == [True]
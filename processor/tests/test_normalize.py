@@ -0,0 +1,139 @@
+"""Tests for the compiled bar normalizer."""
+import json
+
+import pytest
+
+from processor.ingest.columnar_cache import ColumnarCache, build_cache
+from processor.ingest.normalize import (
+    Const,
+    Derived,
+    Field,
+    compile_spec,
+    normalize_bar,
+    normalize_nested_bar,
+)
+
+
+def _legacy_prepare_bar(raw_bar):
+    """prepare_bar as it was copied across the backtest scripts."""
+    bar_data = raw_bar.get('bar', {})
+    return {
+        'high': raw_bar.get('high', 0),
+        'low': raw_bar.get('low', 0),
+        'open': raw_bar.get('open', 0),
+        'close': raw_bar.get('close', 0),
+        'volume': bar_data.get('volume_stats', {}).get('total_volume', raw_bar.get('volume', 0)),
+        'delta': bar_data.get('volume_stats', {}).get('delta_close', raw_bar.get('delta', 0)),
+        'atr14': raw_bar.get('atr_14', 0),
+        'range': raw_bar.get('high', 0) - raw_bar.get('low', 0),
+        'tick_size': 0.1,
+        'timestamp': raw_bar.get('timestamp', ''),
+        'bar_index': raw_bar.get('bar_index', 0),
+        'ext_dir': bar_data.get('ext_dir', raw_bar.get('current_trend', 0)),
+        'ext_choch_up': bar_data.get('ext_choch_up', False),
+        'ext_choch_down': bar_data.get('ext_choch_down', False),
+        'ext_bos_up': bar_data.get('ext_bos_up', False),
+        'ext_bos_down': bar_data.get('ext_bos_down', False),
+        'fvg_detected': raw_bar.get('fvg_detected', False),
+        'fvg_type': raw_bar.get('fvg_type'),
+        'fvg_top': raw_bar.get('fvg_top'),
+        'fvg_bottom': raw_bar.get('fvg_bottom'),
+        'last_swing_high': raw_bar.get('last_swing_high'),
+        'last_swing_low': raw_bar.get('last_swing_low'),
+    }
+
+
+RECORDS = [
+    {
+        "timestamp": "2025-09-24T09:30:00",
+        "bar_index": 1,
+        "high": 101.5, "low": 99.0, "open": 100.0, "close": 101.0,
+        "volume": 900, "delta": 12, "atr_14": 1.2, "current_trend": 1,
+        "fvg_detected": True, "fvg_type": "bullish", "fvg_top": 101.0, "fvg_bottom": 100.2,
+        "bar": {
+            "o": 100.0, "h": 101.5, "l": 99.0, "c": 101.0, "ext_dir": -1, "ext_bos_up": True,
+            "volume_stats": {"total_volume": 1000, "delta_close": 40},
+        },
+    },
+    {
+        # No volume_stats: falls back to root volume/delta and current_trend
+        "bar_index": 2,
+        "high": 102.0, "low": 100.5, "open": 101.0, "close": 101.8,
+        "volume": 500, "delta": -7, "current_trend": -1,
+        "last_swing_high": 102.0,
+        "bar": {"o": 101.0, "h": 102.0, "l": 100.5, "c": 101.8},
+    },
+    {
+        # Present-but-null keys win over fallbacks, exactly like dict.get
+        "bar_index": 3,
+        "high": 101.9, "low": 101.0, "open": 101.8, "close": 101.1,
+        "fvg_type": None,
+        "bar": {"ext_dir": None, "volume_stats": {"total_volume": 300, "delta_close": None}},
+    },
+    {"bar_index": 4, "high": 101.2, "low": 100.9},
+]
+
+
+def test_default_spec_matches_legacy_prepare_bar():
+    for rec in RECORDS:
+        assert normalize_bar(rec) == _legacy_prepare_bar(rec)
+
+
+def test_nested_spec_reads_bar_object():
+    result = normalize_nested_bar(RECORDS[0])
+
+    assert (result["open"], result["high"], result["low"], result["close"]) == (
+        100.0, 101.5, 99.0, 101.0
+    )
+    assert result["volume"] == 1000
+    assert result["delta"] == 40
+    assert result["ext_dir"] == -1
+    assert normalize_nested_bar({})["high"] == 0
+
+
+def test_non_dict_intermediate_treated_as_missing():
+    spec = compile_spec({"volume": Field(("bar.volume_stats.total_volume", "volume"), 0)})
+
+    assert spec({"bar": None, "volume": 5}) == {"volume": 5}
+    assert spec({"bar": {"volume_stats": 3}}) == {"volume": 0}
+
+
+def test_const_and_derived_fields():
+    spec = compile_spec({
+        "high": Field("h", 0.0),
+        "low": Field("l", 0.0),
+        "mid": Derived(lambda high, low: (high + low) / 2, "high", "low"),
+        "tick_size": Const(0.25),
+    })
+
+    assert spec({"h": 4.0, "l": 2.0}) == {"high": 4.0, "low": 2.0, "mid": 3.0, "tick_size": 0.25}
+
+
+def test_derived_must_follow_its_inputs():
+    with pytest.raises(ValueError):
+        compile_spec({"mid": Derived(lambda h: h, "high"), "high": Field("h")})
+
+
+def test_from_cache_matches_row_normalization(tmp_path):
+    source = tmp_path / "bars.jsonl"
+    source.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n", encoding="utf-8")
+
+    with ColumnarCache(build_cache(source, tmp_path / "cache")) as cache:
+        columns = normalize_bar.from_cache(cache)
+        rows = normalize_bar.rows_from_cache(cache)
+        nested = normalize_nested_bar.rows_from_cache(cache)
+
+    assert list(columns) == list(normalize_bar(RECORDS[0]))
+    assert rows == [normalize_bar(r) for r in RECORDS]
+    assert nested == [normalize_nested_bar(r) for r in RECORDS]
+
+
+def test_from_cache_rebuilds_whole_objects(tmp_path):
+    source = tmp_path / "bars.jsonl"
+    source.write_text("\n".join(json.dumps(r) for r in RECORDS) + "\n", encoding="utf-8")
+    spec = compile_spec({"bar": Field("bar", {})})
+
+    with ColumnarCache(build_cache(source, tmp_path / "cache")) as cache:
+        rows = spec.rows_from_cache(cache)
+
+    assert rows == [spec(r) for r in RECORDS]
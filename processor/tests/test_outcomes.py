@@ -0,0 +1,104 @@
+"""Tests for the batch TP/SL outcome resolver."""
+import random
+
+import pytest
+
+from processor.backtest.eval_filtered_signals import evaluate_trade
+from processor.backtest.outcomes import resolve_outcomes, resolve_targets
+from processor.backtest.trade_simulator import LONG, SHORT, TriggerBooks
+
+
+def _scan(highs, lows, i, direction, entry, sl, tp, max_lookahead):
+    """Bar-by-bar reference walk (the loop the resolver replaces)."""
+    for j in range(i + 1, min(len(highs) - 1, i + max_lookahead) + 1):
+        hit_sl = lows[j] <= sl if direction == 1 else highs[j] >= sl
+        hit_tp = highs[j] >= tp if direction == 1 else lows[j] <= tp
+        if hit_sl and hit_tp:
+            return ("sl_tp_same_bar", j - i, -1.0)
+        if hit_sl:
+            return ("sl", j - i, -1.0)
+        if hit_tp:
+            rr = (tp - entry) / (entry - sl) if direction == 1 else (entry - tp) / (sl - entry)
+            return ("tp", j - i, rr)
+    return ("open", max_lookahead, 0.0)
+
+
+def _random_case(seed, n_bars=300, n_signals=60):
+    rng = random.Random(seed)
+    price, highs, lows = 100.0, [], []
+    for _ in range(n_bars):
+        price += rng.uniform(-1, 1)
+        highs.append(price + rng.uniform(0, 1))
+        lows.append(price - rng.uniform(0, 1))
+    signals = []
+    for _ in range(n_signals):
+        i = rng.randrange(n_bars)
+        direction = rng.choice([1, -1])
+        risk = rng.uniform(0.2, 3)
+        entry = (highs[i] + lows[i]) / 2
+        sl, tp = entry - direction * risk, entry + direction * 2 * risk
+        signals.append((i, direction, entry, sl, tp))
+    return highs, lows, signals
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_matches_bar_by_bar_scan(backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    for seed in range(5):
+        highs, lows, signals = _random_case(seed)
+        columns = [list(col) for col in zip(*signals)]
+        for lookahead in (0, 1, 25, 400):
+            got = resolve_outcomes(highs, lows, *columns, lookahead, backend=backend)
+            for sig, res in zip(signals, got):
+                expected = _scan(highs, lows, *sig, lookahead)
+                assert (res["hit"], res["bars_to_exit"], res["rr"]) == expected
+                if res["hit"] != "open":
+                    assert res["exit_index"] == sig[0] + res["bars_to_exit"]
+
+
+def test_same_bar_is_a_loss_and_open_tail():
+    highs = [10.0, 10.5, 12.0, 11.0]
+    lows = [10.0, 9.5, 8.0, 10.0]
+    got = resolve_outcomes(highs, lows, [0, 2], [1, -1], [10.0, 10.0], [9.0, 13.0],
+                           [11.0, 5.0], 5, backend="python")
+    assert [(r["hit"], r["bars_to_exit"], r["rr"]) for r in got] == [
+        ("sl_tp_same_bar", 2, -1.0),
+        ("open", 5, 0.0),
+    ]
+    with pytest.raises(ValueError):
+        resolve_outcomes(highs, lows, [0], [1, 1], [1.0], [1.0], [1.0], 5)
+
+
+def test_evaluate_trade_wrapper():
+    records = [
+        {"high": 10.0, "low": 10.0},
+        {"bar": {"h": 10.4, "l": 9.8}},
+        {"high": 11.2, "low": 10.1},
+    ]
+    assert evaluate_trade(records, 0, 1, 10.0, 9.5, 11.0, 10) == {
+        "outcome": "win", "bars_to_exit": 2, "rr": 2.0
+    }
+    assert evaluate_trade(records, 0, 1, 10.0, 10.5, 11.0, 10) is None  # no risk
+    assert evaluate_trade(records, 0, -1, 10.0, 12.0, 8.0, 1)["outcome"] == "open"
+
+
+def test_resolve_targets_matches_trigger_books():
+    for seed in range(5):
+        highs, lows, signals = _random_case(seed, n_signals=20)
+        for i, direction, entry, sl, _ in signals:
+            targets = [entry + direction * m * abs(entry - sl) for m in (0.5, 3.0, 1.0, 2.0, 2.0)]
+            # Reference: one trade per target, checked on every bar from the entry bar
+            book = TriggerBooks()
+            side = LONG if direction == 1 else SHORT
+            for tp in targets:
+                book.add({"sl": sl, "tp": tp}, side)
+            expected = [("open", None)] * len(targets)
+            for j in range(i, len(highs)):
+                for seq, trade, stop_hit in book.hits(highs[j], lows[j]):
+                    book.remove(seq)
+                    tp_hit = highs[j] >= trade["tp"] if direction == 1 else lows[j] <= trade["tp"]
+                    hit = ("sl_tp_same_bar" if tp_hit else "sl") if stop_hit else "tp"
+                    expected[seq] = (hit, j)
+            assert resolve_targets(highs, lows, i, direction, sl, targets) == expected
+    assert resolve_targets([1.0], [1.0], 0, 1, 0.5, []) == []
@@ -0,0 +1,170 @@
+"""Tests for the file-sharded Strategy V1 backtest merge."""
+import copy
+import json
+import random
+
+import pytest
+
+from processor.backtest.parallel_backtest import (
+    DEFAULT_CONFIG,
+    count_bars,
+    merge_shards,
+    plan_shards,
+    run_parallel,
+)
+from processor.backtest.trade_simulator import TradeSimulator
+from processor.ingest.normalize import normalize_bar
+from processor.modules.fix14_mgann_swing import Fix14MgannSwing
+from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+
+
+def _signal(bar_index, direction="LONG", sl=95.0, tp=110.0):
+    return {
+        "timestamp": f"t{bar_index}",
+        "bar_index": bar_index,
+        "direction": direction,
+        "leg": 1,
+        "fvg_new": True,
+        "trade": {"entry": 100.0, "sl": sl, "tp": tp, "risk": 5.0, "reward": 10.0},
+    }
+
+
+# Two files of (high, low) bars and the signals raised on them (local bar -> signal)
+FILES = [
+    {"bars": [(101, 99), (102, 98), (103, 99), (102, 97)], "signals": {1: _signal(1)}},
+    {
+        "bars": [(104, 99), (111, 100), (101, 94), (100, 96)],
+        "signals": {0: _signal(4, "SHORT", sl=104.5, tp=90.0), 1: _signal(5, sl=99.5)},
+    },
+]
+
+
+def _simulate(files):
+    """Sequential reference: one simulator over every file, like run_full_backtest."""
+    sim = TradeSimulator()
+    for spec in files:
+        for i, (high, low) in enumerate(spec["bars"]):
+            sim.update_trades({"high": high, "low": low}, i)
+            if i in spec["signals"]:
+                sim.add_signal(copy.deepcopy(spec["signals"][i]), 0)
+    return sim
+
+
+def _shard_result(index, spec):
+    sim = _simulate([spec])
+    return {
+        "index": index,
+        "file_stats": {"file": f"f{index}", "bars": len(spec["bars"])},
+        "closed_trades": sim.closed_trades,
+        "open_trades": sim.open_trades,
+        "bars_hl": spec["bars"],
+    }
+
+
+def test_merge_matches_sequential_simulation():
+    expected = _simulate(FILES)
+    results = [_shard_result(i, spec) for i, spec in enumerate(FILES)]
+
+    # Worker completion order must not matter
+    file_stats, closed, still_open = merge_shards(list(reversed(results)))
+
+    assert [f["file"] for f in file_stats] == ["f0", "f1"]
+    assert closed == expected.closed_trades
+    assert still_open == expected.open_trades
+    # The file-0 trade was carried into file 1 and closed there
+    assert (closed[0]["signal_bar"], closed[0]["exit_bar"], closed[0]["bars_held"]) == (1, 1, 4)
+
+
+def test_plan_shards_offsets_and_warmup(tmp_path):
+    paths = []
+    for n, rows in enumerate([3, 5, 2]):
+        path = tmp_path / f"day{n}.jsonl"
+        path.write_text("".join(json.dumps({"i": i}) + "\n" for i in range(rows)) + "\n")
+        paths.append(path)
+
+    shards = plan_shards(paths, warmup_bars=2)
+
+    assert [count_bars(p) for p in paths] == [3, 5, 2]
+    assert [s.offset for s in shards] == [0, 3, 8]
+    assert shards[0].warmup_path is None
+    assert (shards[1].warmup_path, shards[1].warmup_skip) == (paths[0], 1)
+    assert [s.start_count for s in shards] == [0, 1, 6]
+    assert all(s.warmup_path is None for s in plan_shards(paths, warmup_bars=0))
+
+
+def _write_trending_day(path, n, seed):
+    """Trending random walk whose CHoCH flags follow the trend, so V1 trades often."""
+    rng = random.Random(seed)
+    price, direction = 2000.0, 1
+    with path.open("w") as f:
+        for i in range(n):
+            if rng.random() < 0.04:
+                direction = -direction
+            price += direction * rng.uniform(0, 1.2) + rng.uniform(-1.0, 1.0)
+            fvg = rng.random() < 0.3
+            bar = {
+                "timestamp": f"{seed}-{i}",
+                "bar_index": i,
+                "session": ("Asia", "London", "NY")[i * 3 // n],
+                "open": price, "high": price + rng.uniform(0, 1),
+                "low": price - rng.uniform(0, 1), "close": price,
+                "atr_14": 1.2,
+                "fvg_detected": fvg,
+                "fvg_type": rng.choice(["bullish", "bearish"]) if fvg else None,
+                "fvg_top": price + 0.5 if fvg else None,
+                "fvg_bottom": price - 0.5 if fvg else None,
+                "bar": {
+                    "volume_stats": {"total_volume": rng.randint(50, 900),
+                                     "delta_close": rng.randint(-200, 200)},
+                    "ext_dir": direction,
+                    "ext_choch_up": direction == 1 and rng.random() < 0.3,
+                    "ext_choch_down": direction == -1 and rng.random() < 0.3,
+                },
+            }
+            f.write(json.dumps(bar) + "\n")
+
+
+def _sequential(paths):
+    """One module/simulator chain over every file, fed like run_full_backtest.process_file."""
+    cfg = DEFAULT_CONFIG
+    mgann = Fix14MgannSwing(threshold_ticks=cfg["threshold_ticks"])
+    strategy = Fix16StrategyV1(
+        tick_size=cfg["tick_size"],
+        risk_reward_ratio=cfg["risk_reward_ratio"],
+        sl_buffer_ticks=cfg["sl_buffer_ticks"],
+    )
+    sim = TradeSimulator()
+    for path in paths:
+        for i, line in enumerate(path.read_text().splitlines()):
+            raw_bar = json.loads(line)
+            bar = strategy.process_bar(mgann.process_bar(normalize_bar(raw_bar)))
+            sim.update_trades(bar, i)
+            if "signal" in bar:
+                sim.add_signal(bar["signal"], 0, session=raw_bar.get("session"))
+    for trade in sim.open_trades:
+        trade["status"] = "open_eod"
+        trade["exit_reason"] = "END_OF_DATA"
+    return sim
+
+
+@pytest.mark.parametrize("warmup_bars", [None, 200])
+def test_parallel_run_matches_sequential_run(tmp_path, warmup_bars):
+    paths = []
+    for n, rows in enumerate([900, 700, 800, 600]):
+        path = tmp_path / f"GC_M1_2025010{n}.jsonl"
+        _write_trending_day(path, rows, seed=n)
+        paths.append(path)
+    expected = _sequential(paths)
+
+    results = run_parallel(paths, workers=2, warmup_bars=warmup_bars)
+
+    assert len(expected.closed_trades) > 50
+    assert results["closed_trades"] == expected.closed_trades
+    assert results["open_trades"] == expected.open_trades
+    assert results["summary"] == expected.get_stats()
+
+    # Sessions travel with the trades, so the merged per-session stats match too
+    merged = TradeSimulator()
+    merged.closed_trades = results["closed_trades"]
+    assert set(merged.stats.by_session) == {"Asia", "London", "NY"}
+    assert merged.stats.report()["by_session"] == expected.stats.report()["by_session"]
@@ -0,0 +1,58 @@
+"""Tests for PriceLevelIndex and the liquidity map lookups built on it."""
+from processor.core.price_index import PriceLevelIndex, PriceZoneIndex
+from processor.modules.fix11_liquidity_map import LiquidityMapModule
+
+
+def test_nearest_lookups_prefer_first_added():
+    index = PriceLevelIndex([(101.0, 3), (99.0, 1), (101.0, 0), (99.0, 4), (100.0, 2)])
+
+    assert index.first_above(100.0) == (101.0, 0)
+    assert index.last_below(100.0) == (99.0, 1)
+    assert index.first_above(101.0) is None
+    assert index.last_below(99.0) is None
+
+    index.discard(101.0, 0)
+    index.discard(50.0, 9)  # absent keys are ignored
+    assert index.first_above(100.0) == (101.0, 3)
+    assert len(index) == 4
+
+
+def test_between_open_and_closed():
+    index = PriceLevelIndex((p, n) for n, p in enumerate([1.0, 2.0, 2.0, 3.0, 4.0]))
+
+    assert [p for p, _ in index.between(2.0, 4.0)] == [3.0]
+    assert [p for p, _ in index.between(2.0, 4.0, inclusive=True)] == [2.0, 2.0, 3.0, 4.0]
+    assert list(index.between(4.0, 1.0)) == []
+
+
+def test_sweep_takes_earliest_level_in_range():
+    module = LiquidityMapModule()
+    base = {"high": 100.2, "low": 99.8, "close": 100.0}
+    # Swing levels above: 100.5 then 100.3; nearest is the lower one
+    module.process_bar({**base, "bar_index": 1, "last_swing_high": 100.5})
+    result = module.process_bar({**base, "bar_index": 2, "last_swing_high": 100.3})
+    assert result["nearest_liquidity_high"] == 100.3
+
+    # Bar trades through both and closes below: the first-added level is swept
+    result = module.process_bar({**base, "bar_index": 5, "high": 100.6, "close": 100.1})
+    assert result["liquidity_sweep_detected"] is True
+    assert (result["liquidity_sweep_level"], result["bars_since_sweep"]) == (100.5, 4)
+    assert module._find_nearest_liquidity(100.0)["nearest_high"] == 100.3
+
+
+def test_zone_index_containing():
+    zones = PriceZoneIndex()
+    zones.add(100.0, 101.0, 0)
+    zones.add(99.0, 104.0, 1)
+    zones.add(100.5, 100.5, 2)
+    zones.add(102.0, 101.0, 3)  # inverted, never contains anything
+
+    assert sorted(zones.containing(100.5)) == [0, 1, 2]
+    assert zones.first_containing(103.0) == 1
+    assert zones.first_containing(98.0) is None
+
+    zones.discard(1)
+    zones.discard(1)
+    assert zones.first_containing(103.0) is None
+    assert zones.first_containing(101.0) == 0
+    assert len(zones) == 3
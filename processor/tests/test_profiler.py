@@ -0,0 +1,58 @@
+"""Tests for opt-in per-module profiling in SMCDataProcessor."""
+from processor.core.module_base import BaseModule
+from processor.smc_processor import SMCDataProcessor
+
+
+class _Echo(BaseModule):
+    name = "echo"
+
+    def process_bar(self, bar_state, history=None):
+        return self.emit(bar_state, {"echo": True})
+
+
+class _Flaky(BaseModule):
+    def process_bar(self, bar_state, history=None):
+        if bar_state.get("bar_index", 0) % 2:
+            raise ValueError("odd bar")
+        return bar_state
+
+
+def test_profiling_disabled_by_default():
+    processor = SMCDataProcessor(modules=[_Echo()], enable_wave_delta=False)
+    processor.process_bar({"bar_index": 0})
+    assert processor.profiler is None
+
+
+def test_profiler_counts_calls_and_errors():
+    processor = SMCDataProcessor(
+        modules=[_Echo(), _Flaky()], enable_wave_delta=False, profile=True
+    )
+    for i in range(4):
+        processor.process_bar({"bar_index": i})
+
+    report = processor.profiler.report()
+    rows = {row["name"]: row for row in report["modules"]}
+    assert report["bars"] == 4
+    assert rows["echo"]["calls"] == 4
+    assert rows["echo"]["errors"] == 0
+    # Modules without a name are reported under their class name
+    assert rows["_Flaky"]["calls"] == 4
+    assert rows["_Flaky"]["errors"] == 2
+    assert sum(row["time_pct"] for row in report["modules"]) > 99.0
+
+
+def test_profiler_tracks_allocations(tmp_path):
+    processor = SMCDataProcessor(
+        modules=[_Echo()], enable_wave_delta=False, trace_allocations=True
+    )
+    try:
+        for i in range(3):
+            processor.process_bar({"bar_index": i})
+    finally:
+        processor.profiler.stop()
+
+    out = tmp_path / "profile.json"
+    processor.profiler.write_json(out)
+    assert out.exists()
+    assert "echo" in processor.profiler.format_table()
+    assert processor.profiler.report()["trace_allocations"] is True
@@ -0,0 +1,94 @@
+"""Tests for the projected JSONL reader."""
+import json
+
+import pytest
+
+from processor.backtest.run_module_backtest import build_default_modules
+from processor.core.module_base import BaseModule
+from processor.ingest.projection import ProjectedReader, load_projected, pipeline_fields
+
+
+class _Reader(BaseModule):
+    name = "fix07_market_condition"
+    input_fields = {"close", "bar.h"}
+    required_fields = {"atr_14"}
+
+    def process_bar(self, bar_state, history=None):
+        return bar_state
+
+
+def _record(i, **extra):
+    rec = {
+        "bar_index": i,
+        "close": 100.0 + i,
+        "note": "skip",
+        "bar": {"h": 101.0 + i, "l": 99.0, "price_action": {"body": 1.0}},
+        "mtf_context": {"m5": {"close": 1.0, "bar": {"h": 1}}},
+    }
+    rec.update(extra)
+    return rec
+
+
+def _write(path, records):
+    path.write_text(
+        "\n".join(json.dumps(r, separators=(",", ":")) for r in records) + "\n\n",
+        encoding="utf-8",
+    )
+
+
+def test_pipeline_fields_unions_module_declarations():
+    fields = pipeline_fields([_Reader()], extra=("tp",))
+
+    assert {"close", "bar.h", "atr_14", "tp", "symbol"} <= fields
+    # From MODULE_REQUIRED_FIELDS["fix07_market_condition"]
+    assert {"adx_14", "di_plus_14", "di_minus_14"} <= fields
+
+
+def test_default_pipeline_skips_unused_blobs():
+    fields = pipeline_fields(build_default_modules())
+
+    assert "mtf_context" not in fields
+    assert "bar" not in fields
+    assert "bar.ext_bos_up" in fields
+
+
+@pytest.mark.parametrize("backend", ["auto", "json"])
+def test_reader_projects_and_truncates(tmp_path, backend):
+    path = tmp_path / "bars.jsonl"
+    _write(path, [_record(i) for i in range(5)])
+
+    reader = ProjectedReader(path, {"bar_index", "close", "bar.h"}, backend=backend)
+    rows = list(reader)
+
+    assert rows == [{"bar_index": i, "close": 100.0 + i, "bar": {"h": 101.0 + i}} for i in range(5)]
+    assert reader.lines == 5
+    assert reader.full_decodes == 1
+    assert reader.truncated == 4
+
+
+def test_reader_falls_back_when_layout_differs(tmp_path):
+    path = tmp_path / "bars.jsonl"
+    odd = {"bar_index": 2, "mtf_context": {}, "close": 102.0}  # needed key after the blob
+    _write(path, [_record(0), _record(1), odd, _record(3, extra=1)])
+
+    reader = ProjectedReader(path, {"bar_index", "close"})
+    rows = list(reader)
+
+    assert [r["close"] for r in rows] == [100.0, 101.0, 102.0, 103.0]
+    assert reader.full_decodes == 2  # first line and the reordered one
+
+
+def test_nested_marker_match_is_ignored(tmp_path):
+    path = tmp_path / "bars.jsonl"
+    tricky = _record(1)
+    tricky["note"] = {"x": 1, "mtf_context": 2}  # marker text inside a nested object
+    _write(path, [_record(0), tricky])
+
+    rows = load_projected(path, {"bar_index", "close", "note"})
+
+    assert rows[1] == {"bar_index": 1, "close": 101.0, "note": {"x": 1, "mtf_context": 2}}
+
+
+def test_unknown_backend_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ProjectedReader(tmp_path / "x.jsonl", {"close"}, backend="simdjson")
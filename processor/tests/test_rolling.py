@@ -0,0 +1,152 @@
+"""Tests for RollingOrderStats / RollingExtremes and their use through BarHistory."""
+import json
+import math
+import random
+
+import pytest
+
+from processor.core.columns import DEFAULT_COLUMNS
+from processor.core.history import BarHistory
+from processor.core.rolling import RollingExtremes, RollingOrderStats
+from processor.modules.fix01_ob_quality import OBQualityModule
+from processor.modules.fix02_fvg_quality import FVGQualityModule
+from processor.modules.fix04_confluence import ConfluenceModule
+from processor.modules.fix06_target_placement import TargetPlacementModule
+from processor.modules.fix07_market_condition import MarketConditionModule
+
+
+def test_matches_sorted_window():
+    rng = random.Random(7)
+    stats = RollingOrderStats(20)
+    values = []
+    for _ in range(300):
+        value = float(rng.randint(0, 50))  # many duplicates
+        stats.push(value)
+        values.append(value)
+        window = sorted(values[-20:])
+        assert stats.sorted_values() == window
+        assert stats.median() == window[len(window) // 2]
+        assert stats.quantile(0.9) == window[min(int(0.9 * len(window)), len(window) - 1)]
+        assert stats.count_le(25.0) == sum(1 for v in window if v <= 25.0)
+        assert stats.count_lt(25.0) == sum(1 for v in window if v < 25.0)
+
+
+def test_empty_and_invalid():
+    stats = RollingOrderStats(3, [1.0, 2.0, 3.0, 4.0])
+    assert len(stats) == 3
+    assert stats.kth(0) == 2.0 and stats.kth(-1) == 4.0
+
+    stats.clear()
+    with pytest.raises(IndexError):
+        stats.median()
+    with pytest.raises(ValueError):
+        RollingOrderStats(0)
+
+
+def test_history_order_stats_backfill_and_updates():
+    history = BarHistory(capacity=50, columns=DEFAULT_COLUMNS)
+    for i in range(30):
+        history.append({"volume": (i * 7) % 11})
+
+    stats = history.order_stats("volume", 20)
+    assert stats is history.order_stats("volume", 20)
+    assert stats.sorted_values() == sorted(history.columns.window("volume", 20))
+
+    history.append({"volume": "bad"})  # stored as 0.0 like the column
+    assert stats.sorted_values() == sorted(history.columns.window("volume", 20))
+
+    history.clear()
+    assert len(stats) == 0
+    assert history.order_stats("not_a_column", 20) is None
+    assert history.order_stats("volume", 51) is None
+    assert FVGQualityModule().history_order_stats([{"volume": 1}], "volume", 20) is None
+
+
+def test_non_finite_values_do_not_break_the_windows():
+    history = BarHistory(capacity=50, columns=DEFAULT_COLUMNS)
+    stats = history.order_stats("volume", 20)
+    highs = history.extremes("high", 20)
+    for i in range(120):
+        bad = json.loads('{"volume": NaN, "high": Infinity}') if i % 7 == 3 else {}
+        history.append({"volume": float(i % 13), "high": float(i % 5), **bad})
+        window = sorted(history.columns.window("volume", 20))
+        assert stats.sorted_values() == window
+        assert all(math.isfinite(v) for v in window)
+        assert highs.max() == max(history.columns.window("high", 20))
+
+
+def test_modules_agree_with_list_history():
+    rng = random.Random(3)
+    fvg, confluence, market = FVGQualityModule(), ConfluenceModule(), MarketConditionModule()
+    ring = BarHistory(capacity=100, columns=DEFAULT_COLUMNS)
+    plain = []
+    for i in range(150):
+        # Stats are created on first query, then updated by every append
+        assert fvg._get_volume_median(ring, 20) == fvg._get_volume_median(plain, 20)
+        state = {"fvg_creation_volume": 150}
+        assert confluence._calc_volume_score(state, ring) == confluence._calc_volume_score(
+            state, plain
+        )
+        for atr in (0.0, 1.7, 4.0, 9.0):
+            assert market._classify_volatility(atr, ring) == market._classify_volatility(
+                atr, plain
+            )
+        bar = {"volume": rng.randint(0, 400), "atr_14": rng.choice([0, 0.0, 1.5, 2.0]) + i % 7}
+        ring.append(dict(bar))
+        plain = (plain + [bar])[-100:]
+
+
+def test_extremes_match_window():
+    rng = random.Random(11)
+    extremes = RollingExtremes(15)
+    values = []
+    for _ in range(300):
+        value = float(rng.randint(0, 30))
+        extremes.push(value)
+        values.append(value)
+        assert extremes.max() == max(values[-15:])
+        assert extremes.min() == min(values[-15:])
+        assert len(extremes) == len(values[-15:])
+
+    extremes.clear()
+    with pytest.raises(IndexError):
+        extremes.max()
+    with pytest.raises(ValueError):
+        RollingExtremes(0)
+
+
+def test_history_extremes_backfill_and_updates():
+    history = BarHistory(capacity=30, columns=DEFAULT_COLUMNS)
+    for i in range(40):
+        history.append({"high": (i * 13) % 17})
+
+    extremes = history.extremes("high", 10)
+    assert extremes is history.extremes("high", 10)
+    assert extremes.max() == max(history.columns.window("high", 10))
+
+    history.append({"high": 99})
+    assert extremes.max() == 99.0 and extremes.min() == min(history.columns.window("high", 10))
+    assert history.extremes("high", 31) is None
+    assert TargetPlacementModule().history_extremes([{"high": 1}], "high", 10) is None
+
+
+def test_hit_and_sweep_checks_agree_with_list_history():
+    rng = random.Random(4)
+    targets, ob = TargetPlacementModule(), OBQualityModule()
+    ring = BarHistory(capacity=60, columns=DEFAULT_COLUMNS)
+    plain = []
+    price = 100.0
+    for _ in range(400):
+        candidates = [{"price": price + rng.uniform(-4, 4)} for _ in range(8)]
+        for direction in (1, -1):
+            assert targets._filter_hit_targets(
+                candidates, direction, ring
+            ) == targets._filter_hit_targets(candidates, direction, plain)
+        bar = {"high": price + rng.uniform(0, 1), "low": price - rng.uniform(0, 1), "close": price}
+        for direction in ("bull", "bear"):
+            assert ob._detect_liquidity_sweep(ring, bar, direction) == ob._detect_liquidity_sweep(
+                plain, bar, direction
+            )
+        price += rng.uniform(-1, 1)
+        ring.append(dict(bar))
+        plain = (plain + [bar])[-60:]
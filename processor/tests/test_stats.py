@@ -0,0 +1,160 @@
+"""Tests for the streaming TradeStats accumulator."""
+import copy
+import random
+import statistics
+
+import pytest
+
+from processor.backtest.stats import EquityCurve, RHistogram, TradeStats
+from processor.backtest.trade_simulator import LONG, SHORT, TradeSimulator
+
+
+def _full_pass(trades):
+    """Stats computed from the whole trade list (the former get_stats)."""
+    wins = [t for t in trades if t["status"] == "win"]
+    losses = [t for t in trades if t["status"] == "loss"]
+    gross_profit = sum(t["pnl"] for t in wins)
+    gross_loss = abs(sum(t["pnl"] for t in losses))
+    cumulative = peak = max_dd = 0
+    for trade in trades:
+        cumulative += trade["pnl"]
+        peak = max(peak, cumulative)
+        max_dd = max(max_dd, peak - cumulative)
+    return {
+        "total_trades": len(trades),
+        "wins": len(wins),
+        "losses": len(losses),
+        "win_rate": len(wins) / len(trades),
+        "gross_profit": gross_profit,
+        "gross_loss": gross_loss,
+        "net_profit": gross_profit - gross_loss,
+        "profit_factor": gross_profit / gross_loss if gross_loss > 0 else 0,
+        "avg_win": gross_profit / len(wins) if wins else 0,
+        "avg_loss": gross_loss / len(losses) if losses else 0,
+        "max_drawdown": max_dd,
+        "avg_bars_held": sum(t["bars_held"] for t in trades) / len(trades),
+    }
+
+
+def _trades(n, seed, step=0.1):
+    rng = random.Random(seed)
+    trades = []
+    for _ in range(n):
+        risk = rng.randint(1, 30) * step
+        win = rng.random() < 0.4
+        trades.append({
+            "direction": rng.choice([LONG, SHORT]),
+            "session": rng.choice(["Asia", "London", "NY"]),
+            "status": "win" if win else "loss",
+            "risk": risk,
+            "pnl": risk * rng.choice([1, 2, 3]) if win else -risk,
+            "bars_held": rng.randint(1, 50),
+        })
+    return trades
+
+
+def test_summary_matches_full_pass():
+    trades = _trades(500, 1)
+    stats = TradeStats().extend(trades)
+    assert stats.summary() == _full_pass(trades)
+    assert TradeStats().summary() is None
+
+    for direction in (LONG, SHORT):
+        subset = [t for t in trades if t["direction"] == direction]
+        assert stats.by_direction[direction].summary() == _full_pass(subset)
+    asia = [t for t in trades if t["session"] == "Asia"]
+    assert stats.by_session["Asia"].summary() == _full_pass(asia)
+
+    pnls = [t["pnl"] for t in trades]
+    assert stats.pnl.mean == pytest.approx(statistics.fmean(pnls))
+    assert stats.pnl.std == pytest.approx(statistics.stdev(pnls))
+    rs = [t["pnl"] / t["risk"] for t in trades]
+    assert stats.r_multiple.mean == pytest.approx(statistics.fmean(rs))
+    assert sum(stats.r_histogram.to_dict().values()) == len(trades)
+
+
+def test_merged_shards_match_sequential():
+    # Binary fractions keep the sums exact, so the shards must agree exactly
+    trades = _trades(400, 2, step=0.25)
+    sequential = TradeStats().extend(trades)
+    for cuts in ([0, 400], [0, 1, 399, 400], [0, 57, 200, 311, 400]):
+        shards = [TradeStats().extend(trades[a:b]) for a, b in zip(cuts, cuts[1:])]
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        report = merged.report()
+        expected = sequential.report()
+        for key in ("pnl_mean", "pnl_std", "r_mean", "r_std"):
+            assert report.pop(key) == pytest.approx(expected.pop(key))
+        for group in ("by_direction", "by_session"):
+            for row, want in zip(report[group].values(), expected[group].values()):
+                for key in ("pnl_mean", "pnl_std", "r_mean", "r_std"):
+                    assert row.pop(key) == pytest.approx(want.pop(key))
+        assert report == expected
+
+
+def test_equity_and_histogram_merge():
+    rng = random.Random(3)
+    for _ in range(200):
+        pnls = [rng.randint(-5, 5) for _ in range(rng.randint(0, 12))]
+        cut = rng.randint(0, len(pnls))
+        whole, head, tail = EquityCurve(), EquityCurve(), EquityCurve()
+        for i, pnl in enumerate(pnls):
+            whole.push(pnl)
+            (head if i < cut else tail).push(pnl)
+        head.merge(tail)
+        assert (head.total, head.peak, head.trough, head.max_drawdown) == (
+            whole.total, whole.peak, whole.trough, whole.max_drawdown)
+
+    hist = RHistogram(0.5)
+    for r in (-1.0, -0.2, 0.0, 0.49, 2.0):
+        hist.push(r)
+    assert hist.to_dict() == {"-1": 1, "-0.5": 1, "0": 2, "2": 1}
+    with pytest.raises(ValueError):
+        hist.merge(RHistogram(1.0))
+
+
+def _signal(n, direction, entry, risk):
+    sign = 1 if direction == LONG else -1
+    return {
+        "timestamp": f"t{n}",
+        "bar_index": n,
+        "direction": direction,
+        "leg": 1,
+        "fvg_new": True,
+        "trade": {
+            "entry": entry,
+            "sl": round(entry - sign * risk, 1),
+            "tp": round(entry + sign * 2 * risk, 1),
+            "risk": risk,
+            "reward": 2 * risk,
+        },
+    }
+
+
+def test_simulator_without_trade_list():
+    rng = random.Random(4)
+    kept, streamed = TradeSimulator(), TradeSimulator(keep_trades=False)
+    price = 100.0
+    for i in range(400):
+        price += rng.uniform(-1, 1)
+        if rng.random() < 0.3:
+            signal = _signal(i, rng.choice([LONG, SHORT]), round(price, 1), rng.choice([0.5, 1.5]))
+            session = "Asia" if i < 200 else "London"
+            kept.add_signal(copy.deepcopy(signal), 0, session=session)
+            streamed.add_signal(signal, 0, session=session)
+        bar = {"high": round(price + rng.uniform(0, 1), 1),
+               "low": round(price - rng.uniform(0, 1), 1)}
+        kept.update_trades(bar, i)
+        streamed.update_trades(bar, i)
+
+    assert streamed.closed_trades == []
+    assert streamed.get_stats() == kept.get_stats() == _full_pass(kept.closed_trades)
+    assert set(streamed.stats.by_session) == {"Asia", "London"}
+
+    # Replacing the trade list (merged shards) rebuilds the stats
+    rebuilt = TradeSimulator()
+    rebuilt.closed_trades = kept.closed_trades
+    assert rebuilt.get_stats() == kept.get_stats()
+    # ... including the per-session breakdown, from each trade's session
+    assert rebuilt.stats.report()["by_session"] == kept.stats.report()["by_session"]
@@ -0,0 +1,93 @@
+"""Tests for the trigger-book TradeSimulator."""
+import copy
+import random
+
+from processor.backtest.trade_simulator import LONG, SHORT, TradeSimulator, TriggerBooks
+
+
+def _reference(events):
+    """Scan every open trade each bar (the loop TriggerBooks replaces)."""
+    open_trades, closed = [], []
+    for kind, payload, bar_index in events:
+        if kind == "add":
+            open_trades.append(dict(payload, bars_held=0))
+            continue
+        high, low = payload
+        for trade in open_trades[:]:
+            trade["bars_held"] += 1
+            long = trade["direction"] == LONG
+            stop = low <= trade["sl"] if long else high >= trade["sl"]
+            target = high >= trade["tp"] if long else low <= trade["tp"]
+            if stop or target:
+                trade["exit_bar"] = bar_index
+                trade["exit_reason"] = "SL_HIT" if stop else "TP_HIT"
+                closed.append(trade)
+                open_trades.remove(trade)
+    return closed, open_trades
+
+
+def _signal(n, direction, entry, risk):
+    sign = 1 if direction == LONG else -1
+    return {
+        "timestamp": f"t{n}",
+        "bar_index": n,
+        "direction": direction,
+        "leg": 1,
+        "fvg_new": True,
+        "trade": {
+            "entry": entry,
+            "sl": round(entry - sign * risk, 1),
+            "tp": round(entry + sign * 2 * risk, 1),
+            "risk": risk,
+            "reward": 2 * risk,
+        },
+    }
+
+
+def test_matches_scanning_every_trade():
+    rng = random.Random(9)
+    sim = TradeSimulator()
+    events = []
+    price = 100.0
+    for i in range(600):
+        price += rng.uniform(-1, 1)
+        for _ in range(rng.choice([0, 0, 1, 6])):  # clusters of signals
+            signal = _signal(i, rng.choice([LONG, SHORT]), round(price, 1), rng.choice([0.5, 1.5]))
+            sim.add_signal(copy.deepcopy(signal), 0)
+            events.append(("add", dict(signal["trade"], direction=signal["direction"]), i))
+        bar = (round(price + rng.uniform(0, 1), 1), round(price - rng.uniform(0, 1), 1))
+        sim.update_trades({"high": bar[0], "low": bar[1]}, i)
+        events.append(("bar", bar, i))
+
+    closed, still_open = _reference(events)
+    got = [(t["entry"], t["sl"], t["exit_bar"], t["exit_reason"], t["bars_held"])
+           for t in sim.closed_trades]
+    assert got == [(t["entry"], t["sl"], t["exit_bar"], t["exit_reason"], t["bars_held"])
+                   for t in closed]
+    assert [t["bars_held"] for t in sim.open_trades] == [t["bars_held"] for t in still_open]
+
+
+def test_carried_trades_keep_bars_held():
+    sim = TradeSimulator()
+    sim.add_signal(_signal(0, LONG, 100.0, 1.0), 0)
+    sim.update_trades({"high": 100.5, "low": 99.5}, 0)
+
+    carried = TradeSimulator()
+    carried.update_trades({"high": 100.0, "low": 100.0}, 0)
+    carried.open_trades = sim.open_trades
+    carried.update_trades({"high": 102.0, "low": 100.0}, 1)
+    assert carried.closed_trades[0]["bars_held"] == 2
+    assert carried.closed_trades[0]["exit_reason"] == "TP_HIT"
+
+
+def test_books_only_return_reached_levels():
+    books = TriggerBooks()
+    near = books.add({"sl": 99.0, "tp": 102.0}, LONG)
+    books.add({"sl": 90.0, "tp": 120.0}, LONG)
+    books.add({"sl": 101.0, "tp": 95.0}, SHORT)
+    books.add({"sl": 0.0, "tp": 0.0}, None)  # never triggers
+
+    assert [(seq, hit) for seq, _, hit in books.hits(100.5, 99.0)] == [(near, True)]
+    assert [seq for seq, _, _ in books.hits(101.0, 100.0)] == [2]
+    books.remove(near)
+    assert books.hits(100.5, 99.0) == [] and len(books) == 3
@@ -0,0 +1,141 @@
+"""Tests for the Fix14 wave-strength threshold tuner."""
+import json
+import random
+
+import pytest
+
+from processor.backtest.tune_pullback import (
+    GateMasks,
+    evaluate_sets,
+    grid_sets,
+    pareto_front,
+    random_sets,
+    tune,
+)
+from processor.modules.fix14_mgann_swing import (
+    DEFAULT_THRESHOLDS,
+    hybrid_v4_ok,
+    impulse_strength_ok,
+    pullback_strength_ok,
+)
+
+
+def _candidate(rng, i):
+    pullback = None
+    if rng.random() < 0.8:
+        pullback = {
+            "trend_dir": rng.choice([0, 1, -1, 1, -1]),
+            "delta": rng.uniform(-80, 80),
+            "volume": rng.uniform(0, 300),
+            "speed": rng.uniform(0, 2),
+            "strength": rng.uniform(0, 100),
+            "impulse_delta": rng.uniform(-200, 200),
+            "impulse_volume": rng.choice([0.0, rng.uniform(0, 600)]),
+            "avg_delta": rng.choice([0.0, rng.uniform(0, 60)]),
+            "avg_volume": rng.uniform(0, 200),
+            "avg_speed": rng.choice([0.0, rng.uniform(0, 2)]),
+            "structure_ok": rng.random() < 0.8,
+        }
+    impulse = {
+        "delta": rng.uniform(-200, 200),
+        "volume": rng.uniform(0, 600),
+        "speed": rng.uniform(0, 3),
+        "avg_delta": rng.uniform(0, 60),
+        "avg_volume": rng.uniform(0, 200),
+        "avg_speed": rng.uniform(0, 2),
+        "has_fvg": rng.random() < 0.7,
+    }
+    win = rng.random() < 0.4
+    trade = {"outcome": "win" if win else "loss", "bars_to_exit": 3, "rr": 2.0 if win else -1.0,
+             "index": i, "direction": 1}
+    return {"file": "day", "index": i, "direction": 1, "trade": trade,
+            "pullback": pullback, "impulse": impulse}
+
+
+def test_masks_match_the_filter_functions():
+    rng = random.Random(24)
+    candidates = [_candidate(rng, i) for i in range(300)]
+    masks = GateMasks(candidates, ["pullback", "impulse"])
+    space = {"pb_delta_mult": (0.3, 2.0), "pb_volume_mult": (0.3, 2.0),
+             "max_counter_delta": (10, 80), "impulse_speed_mult": (0.5, 2.0)}
+    for thresholds in list(random_sets(space, 50, seed=1)) + [{}]:
+        mask = masks.mask(thresholds)
+        full = {**DEFAULT_THRESHOLDS, **thresholds}
+        expected = [
+            i for i, c in enumerate(candidates)
+            if pullback_strength_ok(c["pullback"], full) and impulse_strength_ok(c["impulse"], full)
+        ]
+        assert [i for i in range(len(candidates)) if mask >> i & 1] == expected
+
+    rows = evaluate_sets(masks, grid_sets({"pb_delta_mult": [0.5, 3.0]}), min_trades=0)
+    assert [row["thresholds"] for row in rows] == [{"pb_delta_mult": 0.5}, {"pb_delta_mult": 3.0}]
+    assert rows[0]["trades"] <= rows[1]["trades"]
+    with pytest.raises(ValueError):
+        evaluate_sets(GateMasks(candidates, ["impulse"]), [{"pb_delta_mult": 1.0}])
+    with pytest.raises(ValueError):
+        GateMasks(candidates, ["nope"])
+
+
+def test_hybrid_v4_masks_match_the_filter_function():
+    rng = random.Random(4)
+    candidates = [_candidate(rng, i) for i in range(300)]
+    masks = GateMasks(candidates, ["pullback", "hybrid_v4"])
+    assert masks.checks["max_counter_delta"] == ["pullback", "hybrid_v4"]
+    space = {"v4_max_strength": (20, 80), "v4_delta_ratio": (0.1, 1.5),
+             "v4_volume_ratio": (0.2, 1.5), "max_counter_delta": (10, 80)}
+    for thresholds in list(random_sets(space, 50, seed=2)) + [{}]:
+        full = {**DEFAULT_THRESHOLDS, **thresholds}
+        expected = [
+            i for i, c in enumerate(candidates)
+            if pullback_strength_ok(c["pullback"], full) and hybrid_v4_ok(c["pullback"], full)
+        ]
+        mask = masks.mask(thresholds)
+        assert [i for i in range(len(candidates)) if mask >> i & 1] == expected
+        v4_only = GateMasks(candidates, ["hybrid_v4"]).mask(thresholds)
+        assert [i for i in range(len(candidates)) if v4_only >> i & 1] == [
+            i for i, c in enumerate(candidates) if hybrid_v4_ok(c["pullback"], full)
+        ]
+
+
+def test_pareto_front_keeps_non_dominated_rows():
+    rows = [
+        {"trades": 10, "winrate_pct": 40.0, "pf": 1.0},
+        {"trades": 8, "winrate_pct": 50.0, "pf": 0.9},
+        {"trades": 8, "winrate_pct": 45.0, "pf": 1.5},
+        {"trades": 5, "winrate_pct": 45.0, "pf": 2.0},
+        {"trades": 10, "winrate_pct": 40.0, "pf": 1.0},
+        {"trades": 3, "winrate_pct": 60.0, "pf": 0.5},
+    ]
+    assert pareto_front(rows, "winrate_pct") == [rows[0], rows[1], rows[5]]
+    assert pareto_front(rows, "pf") == [rows[0], rows[2], rows[3]]
+
+
+def test_tune_end_to_end(tmp_path):
+    rng = random.Random(5)
+    price = 2000.0
+    path = tmp_path / "day.jsonl"
+    with path.open("w") as f:
+        for i in range(1500):
+            price += rng.uniform(-1.5, 1.5)
+            fvg = rng.random() < 0.3
+            f.write(json.dumps({
+                "bar_index": i, "open": price, "close": price,
+                "high": price + rng.uniform(0, 1), "low": price - rng.uniform(0, 1),
+                "atr_14": 1.2, "fvg_detected": fvg,
+                "fvg_type": rng.choice(["bullish", "bearish"]) if fvg else None,
+                "fvg_top": price + 0.5 if fvg else None,
+                "fvg_bottom": price - 0.5 if fvg else None,
+                "last_swing_high": price + 2, "last_swing_low": price - 2,
+                "bar": {"volume_stats": {"total_volume": rng.randint(50, 900),
+                                         "delta_close": rng.randint(-200, 200)},
+                        "ext_choch_up": rng.random() < 0.02,
+                        "ext_choch_down": rng.random() < 0.02},
+            }) + "\n")
+
+    result = tune([path], grid_sets({"pb_speed_mult": [0.5, 1.0, 5.0]}), strategy="v2",
+                  min_trades=0)
+    assert result["candidates"] == result["ungated"]["trades"] > 0
+    assert result["evaluated"] == 3
+    for front in result["fronts"].values():
+        trades = [row["trades"] for row in front]
+        assert trades == sorted(trades, reverse=True)
@@ -0,0 +1,68 @@
+"""Tests for the array-backed wave table."""
+import pytest
+
+from processor.core.wave_table import KIND_IMPULSE, KIND_PULLBACK, KIND_WAVE, WaveTable
+
+
+def _table():
+    table = WaveTable("test")
+    table.new_segment("day1")
+    table.append(10, 14, 100.0, 104.0, 50.0, 400.0, 4, 1, KIND_IMPULSE, strength_ok=True)
+    table.append(14, 16, 104.0, None, -20.0, 150.0, 2, -1, KIND_PULLBACK, speed=0.5)
+    table.new_segment("day2")
+    table.append(3, 9, 101.0, 98.0, -35.0, 300.0, 0, -1)
+    return table
+
+
+def test_rows_and_defaults():
+    table = _table()
+    assert len(table) == 3
+    assert table.segments == ["day1", "day2"]
+    assert table.row(0) == {
+        "segment": 0, "start_bar": 10, "end_bar": 14, "bars": 4, "direction": 1,
+        "kind": "impulse", "strength_ok": True, "start_price": 100.0, "end_price": 104.0,
+        "delta": 50.0, "volume": 400.0, "speed": 1.0,
+    }
+    pullback = table.row(1)
+    assert pullback["end_price"] is None and pullback["speed"] == 0.5
+    assert pullback["strength_ok"] is None
+    # Zero bars: speed falls back to 0.0
+    assert table.row(2)["speed"] == 0.0 and table.row(2)["kind"] == "wave"
+    assert list(table.column("delta")) == [50.0, -20.0, -35.0]
+
+
+def test_select_filters_combine():
+    table = _table()
+    assert table.select(direction=-1) == [1, 2]
+    assert table.select(direction=-1, segment=0) == [1]
+    assert table.select(kind=KIND_WAVE) == [2]
+    assert table.select() == [0, 1, 2]
+
+
+def test_empty_segment_is_relabelled():
+    table = WaveTable()
+    assert table.new_segment("a") == 0
+    assert table.new_segment("b") == 0
+    table.append(0, 1, 1.0, 2.0, 0.0, 0.0, 1, 1)
+    assert table.new_segment("c") == 1
+    assert table.segments == ["b", "c"]
+
+
+def test_save_load_round_trip(tmp_path):
+    table = _table()
+    path = table.save(tmp_path / "day.waves")
+    loaded = WaveTable.load(path)
+    assert loaded == table
+    assert list(loaded) == list(table)
+
+    # Appending after a load continues the last segment
+    loaded.append(9, 12, 98.0, 99.0, 5.0, 80.0, 3, 1)
+    assert loaded.row(3)["segment"] == 1
+    assert loaded.new_segment("day3") == 2
+
+    empty = WaveTable.load(WaveTable("x").save(tmp_path / "empty.waves"))
+    assert len(empty) == 0 and empty.source == "x"
+
+    (tmp_path / "bad.waves").write_bytes(b'{"format": "other"}\n')
+    with pytest.raises(ValueError):
+        WaveTable.load(tmp_path / "bad.waves")
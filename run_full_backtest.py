@@ -7,8 +7,20 @@ Runs Strategy V1 on all files in data_backtesst/ folder
 - Simulates trades (check SL/TP hits)
 - Calculates performance metrics
 - Generates detailed report
+
+--output-cache [DIR] stores each module's outputs keyed by the input data and
+the module's version/config (see processor.core.module_cache), so after editing
+only the strategy, Module 14 is loaded from disk instead of recomputed.
+
+--waves [PATH] saves Module 14's finished impulse/pullback legs as a WaveTable
+(see processor.core.wave_table), one segment per data file.
+
+--use-cache loads each file through the columnar cache (see
+processor.ingest.columnar_cache) instead of re-decoding the JSONL; a file with
+a malformed line cannot be cached, so this needs well-formed exports.
 """
 
+import argparse
 import sys
 import json
 from pathlib import Path
@@ -18,188 +30,34 @@ from collections import defaultdict
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from processor.core.module_cache import ModuleOutputCache, input_key
+from processor.ingest.columnar_cache import DEFAULT_CACHE_DIRNAME, file_digest, load_records
 from processor.modules.fix14_mgann_swing import Fix14MgannSwing
 from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
+from processor.ingest.normalize import normalize_bar
+from processor.backtest.trade_simulator import TradeSimulator
 
 
-def prepare_bar(raw_bar):
-    """Convert JSONL bar to format expected by modules."""
-    bar_data = raw_bar.get('bar', {})
-
-    prepared = {
-        # OHLC
-        'high': raw_bar.get('high', 0),
-        'low': raw_bar.get('low', 0),
-        'open': raw_bar.get('open', 0),
-        'close': raw_bar.get('close', 0),
-
-        # Volume
-        'volume': bar_data.get('volume_stats', {}).get('total_volume', raw_bar.get('volume', 0)),
-        'delta': bar_data.get('volume_stats', {}).get('delta_close', raw_bar.get('delta', 0)),
-
-        # Technical
-        'atr14': raw_bar.get('atr_14', 0),
-        'range': raw_bar.get('high', 0) - raw_bar.get('low', 0),
-        'tick_size': 0.1,
-
-        # Timestamp
-        'timestamp': raw_bar.get('timestamp', ''),
-        'bar_index': raw_bar.get('bar_index', 0),
-
-        # External structure
-        'ext_dir': bar_data.get('ext_dir', raw_bar.get('current_trend', 0)),
-        'ext_choch_up': bar_data.get('ext_choch_up', False),
-        'ext_choch_down': bar_data.get('ext_choch_down', False),
-        'ext_bos_up': bar_data.get('ext_bos_up', False),
-        'ext_bos_down': bar_data.get('ext_bos_down', False),
-
-        # FVG fields (ROOT LEVEL)
-        'fvg_detected': raw_bar.get('fvg_detected', False),
-        'fvg_type': raw_bar.get('fvg_type'),
-        'fvg_top': raw_bar.get('fvg_top'),
-        'fvg_bottom': raw_bar.get('fvg_bottom'),
-
-        # Swing points
-        'last_swing_high': raw_bar.get('last_swing_high'),
-        'last_swing_low': raw_bar.get('last_swing_low'),
-    }
+def _call_module(module, bar):
+    return module.process_bar(bar)
+
+
+def read_jsonl(file_path):
+    """Raw bars of a JSONL file, skipping lines that are not valid JSON."""
+    with open(file_path, 'r') as f:
+        for line in f:
+            try:
+                yield json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
 
-    return prepared
-
-
-class TradeSimulator:
-    """Simulate trade execution and track outcomes."""
-
-    def __init__(self):
-        self.open_trades = []
-        self.closed_trades = []
-
-    def add_signal(self, signal, bars_remaining):
-        """Add new signal as pending trade."""
-        trade = signal['trade'].copy()
-        trade.update({
-            'signal_time': signal['timestamp'],
-            'signal_bar': signal['bar_index'],
-            'direction': signal['direction'],
-            'leg': signal['leg'],
-            'fvg_new': signal['fvg_new'],
-            'status': 'open',
-            'exit_bar': None,
-            'exit_price': None,
-            'exit_reason': None,
-            'pnl': 0,
-            'bars_held': 0,
-        })
-        self.open_trades.append(trade)
-
-    def update_trades(self, bar, bar_index):
-        """Check if any open trades hit SL or TP."""
-        high = bar.get('high', 0)
-        low = bar.get('low', 0)
-
-        for trade in self.open_trades[:]:  # Copy list to allow removal
-            trade['bars_held'] += 1
-
-            if trade['direction'] == 'LONG':
-                # Check SL
-                if low <= trade['sl']:
-                    trade['status'] = 'loss'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['sl']
-                    trade['exit_reason'] = 'SL_HIT'
-                    trade['pnl'] = -trade['risk']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                    continue
-
-                # Check TP
-                if high >= trade['tp']:
-                    trade['status'] = 'win'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['tp']
-                    trade['exit_reason'] = 'TP_HIT'
-                    trade['pnl'] = trade['reward']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                    continue
-
-            else:  # SHORT
-                # Check SL
-                if high >= trade['sl']:
-                    trade['status'] = 'loss'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['sl']
-                    trade['exit_reason'] = 'SL_HIT'
-                    trade['pnl'] = -trade['risk']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                    continue
-
-                # Check TP
-                if low <= trade['tp']:
-                    trade['status'] = 'win'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['tp']
-                    trade['exit_reason'] = 'TP_HIT'
-                    trade['pnl'] = trade['reward']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                    continue
-
-    def get_stats(self):
-        """Calculate performance metrics."""
-        if not self.closed_trades:
-            return None
-
-        wins = [t for t in self.closed_trades if t['status'] == 'win']
-        losses = [t for t in self.closed_trades if t['status'] == 'loss']
-
-        total_trades = len(self.closed_trades)
-        win_count = len(wins)
-        loss_count = len(losses)
-
-        win_rate = win_count / total_trades if total_trades > 0 else 0
-
-        gross_profit = sum(t['pnl'] for t in wins)
-        gross_loss = abs(sum(t['pnl'] for t in losses))
-        net_profit = gross_profit - gross_loss
-
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else 0
-
-        avg_win = gross_profit / win_count if win_count > 0 else 0
-        avg_loss = gross_loss / loss_count if loss_count > 0 else 0
-
-        # Calculate max drawdown
-        cumulative = 0
-        peak = 0
-        max_dd = 0
-
-        for trade in self.closed_trades:
-            cumulative += trade['pnl']
-            if cumulative > peak:
-                peak = cumulative
-            dd = peak - cumulative
-            if dd > max_dd:
-                max_dd = dd
-
-        return {
-            'total_trades': total_trades,
-            'wins': win_count,
-            'losses': loss_count,
-            'win_rate': win_rate,
-            'gross_profit': gross_profit,
-            'gross_loss': gross_loss,
-            'net_profit': net_profit,
-            'profit_factor': profit_factor,
-            'avg_win': avg_win,
-            'avg_loss': avg_loss,
-            'max_drawdown': max_dd,
-            'avg_bars_held': sum(t['bars_held'] for t in self.closed_trades) / total_trades,
-        }
 
+def process_file(file_path, mgann, strategy, simulator, cached_run=None, raw_bars=None):
+    """
+    Process single JSONL file (through cached_run's stages when given).
 
-def process_file(file_path, mgann, strategy, simulator):
-    """Process single JSONL file."""
+    raw_bars replaces reading the file (e.g. records from the columnar cache).
+    """
     file_stats = {
         'file': file_path.name,
         'bars': 0,
@@ -208,46 +66,80 @@ def process_file(file_path, mgann, strategy, simulator):
         'short_signals': 0,
     }
 
-    with open(file_path, 'r') as f:
-        for line in f:
-            try:
-                raw_bar = json.loads(line.strip())
-                bar = prepare_bar(raw_bar)
+    if raw_bars is None:
+        raw_bars = read_jsonl(file_path)
+    for raw_bar in raw_bars:
+        try:
+            bar = normalize_bar(raw_bar)
 
+            if cached_run is None:
                 # Module 14: MGann Swing
                 bar = mgann.process_bar(bar)
 
                 # Strategy V1
                 bar = strategy.process_bar(bar)
+            else:
+                bar = cached_run.run(0, mgann, bar, _call_module)
+                bar = cached_run.run(1, strategy, bar, _call_module)
 
-                # Update open trades
-                simulator.update_trades(bar, file_stats['bars'])
+            # Update open trades
+            simulator.update_trades(bar, file_stats['bars'])
 
-                # Check for new signal
-                if 'signal' in bar:
-                    signal = bar['signal']
-                    file_stats['signals'] += 1
+            # Check for new signal
+            if 'signal' in bar:
+                signal = bar['signal']
+                file_stats['signals'] += 1
 
-                    if signal['direction'] == 'LONG':
-                        file_stats['long_signals'] += 1
-                    else:
-                        file_stats['short_signals'] += 1
+                if signal['direction'] == 'LONG':
+                    file_stats['long_signals'] += 1
+                else:
+                    file_stats['short_signals'] += 1
 
-                    # Add to simulator (pass remaining bars count)
-                    simulator.add_signal(signal, 0)
+                # Add to simulator (pass remaining bars count)
+                simulator.add_signal(signal, 0, session=raw_bar.get('session'))
 
-                file_stats['bars'] += 1
+            file_stats['bars'] += 1
 
-            except json.JSONDecodeError:
-                continue
-            except Exception as e:
-                print(f"⚠️  Error processing bar {file_stats['bars']}: {e}")
-                continue
+        except Exception as e:
+            print(f"⚠️  Error processing bar {file_stats['bars']}: {e}")
+            continue
 
     return file_stats
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Run Strategy V1 on all files in data_backtesst/")
+    parser.add_argument(
+        "--output-cache",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help="Cache module outputs (default DIR: data_backtesst/.smc_cache/modules)",
+    )
+    parser.add_argument(
+        "--waves",
+        nargs="?",
+        const="backtest_results_full.waves",
+        default=None,
+        metavar="PATH",
+        help="Save Module 14's wave table to PATH (default: backtest_results_full.waves)",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="Load inputs via the memory-mapped columnar cache (built on first use).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Columnar cache root (default: data_backtesst/.smc_cache).",
+    )
+    args = parser.parse_args()
+    if args.waves and args.output_cache is not None:
+        # Cached Module 14 outputs are replayed without running the module
+        parser.error("--waves cannot be combined with --output-cache")
+
     print("\n" + "=" * 80)
     print("  FULL BACKTEST - Strategy V1")
     print("=" * 80 + "\n")
@@ -267,11 +159,21 @@ def main():
 
     # Initialize modules
     print("⚙️  Initializing Strategy V1...")
-    mgann = Fix14MgannSwing(threshold_ticks=6)
+    mgann = Fix14MgannSwing(threshold_ticks=6, record_waves=bool(args.waves))
     strategy = Fix16StrategyV1(tick_size=0.1, risk_reward_ratio=3.0, sl_buffer_ticks=2)
     simulator = TradeSimulator()
     print("✓ Modules initialized\n")
 
+    cached_run = None
+    if args.output_cache is not None:
+        cache_root = (
+            Path(args.output_cache) if args.output_cache
+            else data_dir / DEFAULT_CACHE_DIRNAME / "modules"
+        )
+        # Modules carry state across files, so the run is keyed on every file in order
+        root_key = input_key([file_digest(p) for p in data_files], reader="normalize_bar")
+        cached_run = ModuleOutputCache(cache_root).open_run(root_key, [mgann, strategy])
+
     # Process all files
     print(f"🔄 Processing {len(data_files)} files...\n")
 
@@ -281,8 +183,14 @@ def main():
 
     for i, file_path in enumerate(data_files, 1):
         print(f"[{i}/{len(data_files)}] {file_path.name}...", end=" ", flush=True)
-
-        file_stats = process_file(file_path, mgann, strategy, simulator)
+        if mgann.waves is not None:
+            mgann.waves.new_segment(file_path.name)
+
+        raw_bars = None
+        if args.use_cache:
+            cache_dir = Path(args.cache_dir) if args.cache_dir else None
+            raw_bars = load_records(file_path, cache_dir)
+        file_stats = process_file(file_path, mgann, strategy, simulator, cached_run, raw_bars)
         all_file_stats.append(file_stats)
 
         total_bars += file_stats['bars']
@@ -290,7 +198,11 @@ def main():
 
         print(f"✓ {file_stats['bars']} bars, {file_stats['signals']} signals")
 
-    print(f"\n✓ Processing complete!\n")
+    print("\n✓ Processing complete!\n")
+
+    if cached_run is not None:
+        cached_run.close()
+        print("Module output cache:\n" + cached_run.summary() + "\n")
 
     # Close any remaining open trades (end of dataset)
     for trade in simulator.open_trades:
@@ -305,7 +217,7 @@ def main():
     print("📊 BACKTEST RESULTS")
     print("=" * 80)
 
-    print(f"\n📈 DATASET OVERVIEW:")
+    print("\n📈 DATASET OVERVIEW:")
     print(f"   Total files processed: {len(data_files)}")
     print(f"   Total bars: {total_bars:,}")
     print(f"   Total signals generated: {total_signals}")
@@ -331,6 +243,17 @@ def main():
 
         print(f"\n⚠️  RISK METRICS:")
         print(f"   Max Drawdown: ${stats['max_drawdown']:.2f}")
+        print(f"   R multiple: mean {simulator.stats.r_multiple.mean:.2f}, "
+              f"std {simulator.stats.r_multiple.std:.2f}")
+
+        print(f"\n🧭 BY DIRECTION / SESSION:")
+        for label, groups in (("", simulator.stats.by_direction),
+                              ("session ", simulator.stats.by_session)):
+            for key, group in groups.items():
+                row = group.summary()
+                print(f"   {label}{key}: {row['total_trades']} trades, "
+                      f"WR {row['win_rate']*100:.1f}%, PF {row['profit_factor']:.2f}, "
+                      f"net ${row['net_profit']:,.2f}")
 
         # Signal distribution
         long_signals = sum(f['long_signals'] for f in all_file_stats)
@@ -373,6 +296,10 @@ def main():
 
     print(f"✓ Results saved!")
 
+    if args.waves and mgann.waves is not None:
+        waves_file = mgann.waves.save(Path(__file__).parent / args.waves)
+        print(f"✓ Wave table ({len(mgann.waves)} waves) saved to {waves_file.name}")
+
     # Summary
     print("\n" + "=" * 80)
     if stats:
@@ -13,6 +13,7 @@ import json
 from pathlib import Path
 from processor.modules.fix14_mgann_swing import Fix14MgannSwing
 from processor.modules.fix15_m5_context import Fix15M5Context
+from processor.ingest.normalize import normalize_nested_bar
 
 
 def load_jsonl(filepath, max_bars=None):
@@ -26,27 +27,6 @@ def load_jsonl(filepath, max_bars=None):
     return bars
 
 
-def prepare_bar(bar):
-    """Prepare bar for modules."""
-    bar_data = bar.get('bar', {})
-    volume_stats = bar_data.get('volume_stats', {})
-    
-    return {
-        'open': bar_data.get('o', 0),
-        'high': bar_data.get('h', 0),
-        'low': bar_data.get('l', 0),
-        'close': bar_data.get('c', 0),
-        'volume': volume_stats.get('total_volume', 0),
-        'delta': volume_stats.get('delta_close', 0),
-        'timestamp': bar.get('timestamp', ''),
-        'ext_bos_up': bar_data.get('ext_bos_up', False),
-        'ext_bos_down': bar_data.get('ext_bos_down', False),
-        'ext_choch_up': bar_data.get('ext_choch_up', False),
-        'ext_choch_down': bar_data.get('ext_choch_down', False),
-        'ext_dir': bar_data.get('ext_dir', 0),
-    }
-
-
 def main():
     print("=" * 80)
     print("MODULE 15 (M5 Context) - TEST")
@@ -69,7 +49,7 @@ def main():
     results = []
     
     for i, raw_bar in enumerate(raw_bars):
-        bar_state = prepare_bar(raw_bar)
+        bar_state = normalize_nested_bar(raw_bar)
         bar_state = module14.process_bar(bar_state, history=results)
         bar_state = module15.process_bar(bar_state, history=results)
         results.append(bar_state)
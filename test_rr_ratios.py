@@ -2,73 +2,55 @@
 """
 Test Strategy V1 with different Risk:Reward ratios
 Compare 2:1, 3:1, and 4:1 to find optimal setup
+
+By default the whole grid (R:R ratio x SL buffer x max signals per FVG) is
+swept in one pass: Module 14 runs once, Strategy V1 once per max-signals
+setting, and each signal's SL/TP outcomes for every R:R ratio and SL buffer
+are resolved in a single forward scan. --per-ratio reruns the full pipeline
+for every R:R ratio instead (same results).
+
+--use-cache loads the exports through the columnar cache (see
+processor.ingest.columnar_cache) instead of re-decoding the JSONL.
 """
 
+import argparse
 import json
-import sys
 import os
+import sys
+from itertools import product
 from pathlib import Path
 
 # Add processor to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from processor.backtest.outcomes import HIT_OPEN, HIT_TP, resolve_targets
+from processor.backtest.trade_simulator import TriggerBooks
+from processor.ingest.columnar_cache import load_records
+from processor.ingest.normalize import normalize_bar
 from processor.modules.fix14_mgann_swing import Fix14MgannSwing
 from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
 
 
-def prepare_bar(raw_bar):
-    """Convert JSONL bar to format expected by modules."""
-    bar_data = raw_bar.get('bar', {})
-
-    prepared = {
-        # OHLC
-        'high': raw_bar.get('high', 0),
-        'low': raw_bar.get('low', 0),
-        'open': raw_bar.get('open', 0),
-        'close': raw_bar.get('close', 0),
-
-        # Volume
-        'volume': bar_data.get('volume_stats', {}).get('total_volume', raw_bar.get('volume', 0)),
-        'delta': bar_data.get('volume_stats', {}).get('delta_close', raw_bar.get('delta', 0)),
-
-        # Technical
-        'atr14': raw_bar.get('atr_14', 0),
-        'range': raw_bar.get('high', 0) - raw_bar.get('low', 0),
-        'tick_size': 0.1,
-
-        # Timestamp
-        'timestamp': raw_bar.get('timestamp', ''),
-        'bar_index': raw_bar.get('bar_index', 0),
-
-        # External structure
-        'ext_dir': bar_data.get('ext_dir', raw_bar.get('current_trend', 0)),
-        'ext_choch_up': bar_data.get('ext_choch_up', False),
-        'ext_choch_down': bar_data.get('ext_choch_down', False),
-        'ext_bos_up': bar_data.get('ext_bos_up', False),
-        'ext_bos_down': bar_data.get('ext_bos_down', False),
-
-        # FVG fields (ROOT LEVEL)
-        'fvg_detected': raw_bar.get('fvg_detected', False),
-        'fvg_type': raw_bar.get('fvg_type'),
-        'fvg_top': raw_bar.get('fvg_top'),
-        'fvg_bottom': raw_bar.get('fvg_bottom'),
-
-        # Swing points
-        'last_swing_high': raw_bar.get('last_swing_high'),
-        'last_swing_low': raw_bar.get('last_swing_low'),
-    }
-
-    return prepared
-
-
 class TradeSimulator:
     """Simulates trade execution with SL/TP"""
 
     def __init__(self, rr_ratio=3.0):
         self.rr_ratio = rr_ratio
-        self.open_trades = []
+        self._book = TriggerBooks()
+        self._updated_before = 0  # trades with a lower seq have been through an update
+        self._last_bar = None
         self.closed_trades = []
 
+    @property
+    def open_trades(self):
+        """Open trades, with hold_bars as of the last update"""
+        trades = []
+        for seq, trade in self._book.items():
+            if seq < self._updated_before:
+                trade['hold_bars'] = self._last_bar - trade['entry_bar']
+            trades.append(trade)
+        return trades
+
     def add_signal(self, signal_data, bar_index):
         """Add new signal as open trade"""
         trade = {
@@ -84,51 +66,31 @@ class TradeSimulator:
             'hold_bars': 0,
             'signal_data': signal_data
         }
-        self.open_trades.append(trade)
+        # Only LONG/SHORT trades are ever resolved
+        side = trade['direction'] if trade['direction'] in ('LONG', 'SHORT') else None
+        self._book.add(trade, side)
 
     def update_trades(self, bar, bar_index):
-        """Check if any open trades hit SL or TP"""
+        """Check if any open trades hit SL or TP (SL first, conservative)"""
         high = bar.get('high', 0)
         low = bar.get('low', 0)
+        self._last_bar = bar_index
+        self._updated_before = self._book.next_seq
 
-        for trade in self.open_trades[:]:
+        for seq, trade, stop_hit in self._book.hits(high, low):
+            self._book.remove(seq)
             trade['hold_bars'] = bar_index - trade['entry_bar']
-
-            if trade['direction'] == 'LONG':
-                # Check SL first (conservative)
-                if low <= trade['sl']:
-                    trade['status'] = 'loss'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['sl']
-                    trade['pnl'] = -trade['risk']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                # Then check TP
-                elif high >= trade['tp']:
-                    trade['status'] = 'win'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['tp']
-                    trade['pnl'] = trade['reward']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-
-            elif trade['direction'] == 'SHORT':
-                # Check SL first
-                if high >= trade['sl']:
-                    trade['status'] = 'loss'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['sl']
-                    trade['pnl'] = -trade['risk']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
-                # Then check TP
-                elif low <= trade['tp']:
-                    trade['status'] = 'win'
-                    trade['exit_bar'] = bar_index
-                    trade['exit_price'] = trade['tp']
-                    trade['pnl'] = trade['reward']
-                    self.closed_trades.append(trade)
-                    self.open_trades.remove(trade)
+            if stop_hit:
+                trade['status'] = 'loss'
+                trade['exit_bar'] = bar_index
+                trade['exit_price'] = trade['sl']
+                trade['pnl'] = -trade['risk']
+            else:
+                trade['status'] = 'win'
+                trade['exit_bar'] = bar_index
+                trade['exit_price'] = trade['tp']
+                trade['pnl'] = trade['reward']
+            self.closed_trades.append(trade)
 
     def get_stats(self):
         """Calculate performance statistics"""
@@ -170,7 +132,25 @@ class TradeSimulator:
         }
 
 
-def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30):
+def add_signal_stats(stats, total_signals, n_files):
+    """Add signal counts, break-even win rate and expectancy to simulator stats"""
+    stats['signals'] = total_signals
+    stats['signals_per_day'] = total_signals / n_files
+    stats['breakeven_wr'] = 100 / (1 + stats['rr_ratio'])
+    stats['expectancy'] = stats['net_pnl'] / stats['total_trades']
+    return stats
+
+
+def read_bars(file_path, cache_dir=None, use_cache=False):
+    """Raw bars of one export (from the columnar cache with use_cache)"""
+    if use_cache:
+        return load_records(file_path, cache_dir)
+    with open(file_path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+
+def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30,
+                         sl_buffer_ticks=2, max_fvg_signals=3, cache_dir=None, use_cache=False):
     """Run backtest with specified R:R ratio"""
 
     print(f"\n{'='*60}")
@@ -179,7 +159,8 @@ def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30):
 
     # Initialize modules
     mgann = Fix14MgannSwing()
-    strategy = Fix16StrategyV1(risk_reward_ratio=rr_ratio)
+    strategy = Fix16StrategyV1(risk_reward_ratio=rr_ratio, sl_buffer_ticks=sl_buffer_ticks,
+                               max_fvg_signals=max_fvg_signals)
 
     # Initialize simulator
     simulator = TradeSimulator(rr_ratio=rr_ratio)
@@ -198,15 +179,14 @@ def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30):
 
     # Process each file
     for file_idx, file_path in enumerate(jsonl_files, 1):
-        with open(file_path, 'r') as f:
-            bars = [json.loads(line) for line in f]
+        bars = read_bars(file_path, cache_dir, use_cache)
 
         total_bars += len(bars)
 
         # Process bars
         for bar_idx, raw_bar in enumerate(bars):
             # Prepare bar
-            bar = prepare_bar(raw_bar)
+            bar = normalize_bar(raw_bar)
 
             # Module 14: MGann swing
             bar = mgann.process_bar(bar)
@@ -278,10 +258,7 @@ def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30):
         print(f"{'='*60}\n")
 
         # Add signals per day
-        stats['signals'] = total_signals
-        stats['signals_per_day'] = total_signals / len(jsonl_files)
-        stats['breakeven_wr'] = breakeven_wr
-        stats['expectancy'] = expectancy
+        add_signal_stats(stats, total_signals, len(jsonl_files))
 
     else:
         print("⚠️  No closed trades to analyze")
@@ -289,29 +266,145 @@ def run_backtest_with_rr(rr_ratio, data_folder='data_backtesst', max_files=30):
     return stats
 
 
-def compare_rr_ratios():
-    """Test and compare different R:R ratios"""
+def load_pipeline_bars(data_folder='data_backtesst', max_files=30, cache_dir=None,
+                       use_cache=False):
+    """
+    Run bar prep + Module 14 over the data once.
+
+    Returns (bars, n_files): bars is a list of (bar_idx, bar) in processing
+    order, bar_idx counting from 0 in each file as in run_backtest_with_rr.
+    """
+    data_path = Path(data_folder)
+    if not data_path.exists():
+        print(f"❌ Data folder not found: {data_folder}")
+        return None, 0
+
+    jsonl_files = sorted(data_path.glob('*.jsonl'))[:max_files]
+    print(f"📁 Processing {len(jsonl_files)} files...")
+
+    mgann = Fix14MgannSwing()
+    bars = []
+    for file_path in jsonl_files:
+        for bar_idx, raw_bar in enumerate(read_bars(file_path, cache_dir, use_cache)):
+            bars.append((bar_idx, mgann.process_bar(normalize_bar(raw_bar))))
+    return bars, len(jsonl_files)
+
+
+def collect_signals(bars, max_fvg_signals=3):
+    """
+    Run Strategy V1 over cached pipeline bars.
+
+    Returns (strategy, signals) with signals as (position in bars, signal)
+    for every signal carrying trade info. Bars are copied so the cache can
+    be replayed with other settings.
+    """
+    strategy = Fix16StrategyV1(max_fvg_signals=max_fvg_signals)
+    signals = []
+    for pos, (_, bar) in enumerate(bars):
+        bar = strategy.process_bar(dict(bar))
+        if 'signal' in bar and isinstance(bar['signal'], dict) and bar['signal'].get('trade', {}):
+            signals.append((pos, bar['signal']))
+    return strategy, signals
+
+
+def sweep_backtest(rr_ratios, sl_buffers=(2,), max_retests=(3,), data_folder='data_backtesst',
+                   max_files=30, cache_dir=None, use_cache=False):
+    """
+    Backtest every (R:R ratio, SL buffer ticks, max signals per FVG) combination.
+
+    Which bars signal depends only on max signals per FVG, and a signal's SL
+    only on the SL buffer, so each signal is re-priced per combination and all
+    of its R:R targets are resolved in one forward scan per SL buffer. Trades
+    close in the same order as in TradeSimulator, so the stats match
+    run_backtest_with_rr exactly.
+
+    Returns:
+        {(rr_ratio, sl_buffer_ticks, max_fvg_signals): stats}, combinations
+        without closed trades left out.
+    """
+    bars, n_files = load_pipeline_bars(data_folder, max_files, cache_dir, use_cache)
+    if not bars:
+        return {}
+    highs = [bar.get('high', 0) for _, bar in bars]
+    lows = [bar.get('low', 0) for _, bar in bars]
+    print(f"✅ Pipeline: {len(bars):,} bars")
 
-    ratios = [2.0, 3.0, 4.0]
     results = {}
+    for max_fvg_signals in max_retests:
+        strategy, signals = collect_signals(bars, max_fvg_signals)
+        print(f"  max {max_fvg_signals} signals/FVG: {len(signals)} signals")
+
+        # (sort key, trade) per combination; key = (exit position, opening order)
+        closed = {(rr, buf): [] for rr, buf in product(rr_ratios, sl_buffers)}
+        for order, (pos, signal) in enumerate(signals):
+            bar_idx, bar = bars[pos]
+            direction = 1 if signal['direction'] == 'LONG' else -1
+            for buf in sl_buffers:
+                trades = [
+                    strategy.price_trade(bar, signal['direction'], signal['fvg_zone'], rr, buf)
+                    for rr in rr_ratios
+                ]
+                hits = resolve_targets(
+                    highs, lows, pos, direction, trades[0]['sl'], [t['tp'] for t in trades]
+                )
+                for rr, trade, (hit, exit_pos) in zip(rr_ratios, trades, hits, strict=True):
+                    if hit == HIT_OPEN:
+                        continue
+                    won = hit == HIT_TP
+                    closed[rr, buf].append(((exit_pos, order), {
+                        'status': 'win' if won else 'loss',
+                        'pnl': trade['reward'] if won else -trade['risk'],
+                        'hold_bars': bars[exit_pos][0] - bar_idx,
+                    }))
+
+        for (rr, buf), trades in closed.items():
+            simulator = TradeSimulator(rr_ratio=rr)
+            simulator.closed_trades = [trade for _, trade in sorted(trades, key=lambda t: t[0])]
+            stats = simulator.get_stats()
+            if stats:
+                results[rr, buf, max_fvg_signals] = add_signal_stats(stats, len(signals), n_files)
+    return results
+
+
+def compare_rr_ratios(ratios=(2.0, 3.0, 4.0), sl_buffers=(2,), max_retests=(3,), sweep=True,
+                      data_folder='data_backtesst', max_files=30, cache_dir=None,
+                      use_cache=False):
+    """Test and compare different R:R ratios (and SL buffer / max signals per FVG)"""
+
+    ratios = list(ratios)
+    grid = len(sl_buffers) > 1 or len(max_retests) > 1
 
     print(f"\n{'#'*60}")
     print(f"# STRATEGY V1 - R:R RATIO COMPARISON TEST")
     print(f"{'#'*60}\n")
 
-    # Run backtest for each ratio
-    for rr in ratios:
-        stats = run_backtest_with_rr(rr)
-        if stats:
-            results[rr] = stats
+    if sweep:
+        swept = sweep_backtest(ratios, sl_buffers, max_retests, data_folder, max_files,
+                               cache_dir, use_cache)
+        if grid:
+            # One entry per combination, tagged with its settings
+            results = {}
+            for (rr, buf, max_signals), stats in swept.items():
+                stats['sl_buffer_ticks'] = buf
+                stats['max_fvg_signals'] = max_signals
+                results[f"rr={rr}|sl_buffer={buf}|max_signals={max_signals}"] = stats
+        else:
+            results = {rr: stats for (rr, _, _), stats in swept.items()}
+    else:
+        # Run backtest for each ratio
+        results = {}
+        for rr in ratios:
+            stats = run_backtest_with_rr(rr, data_folder, max_files, sl_buffers[0],
+                                         max_retests[0], cache_dir, use_cache)
+            if stats:
+                results[rr] = stats
+
+    columns = list(results) if grid else ratios
 
     # Compare results
     print(f"\n{'='*80}")
     print(f"COMPARISON SUMMARY")
     print(f"{'='*80}")
-    print(f"{'Metric':<20} {'2:1':<20} {'3:1':<20} {'4:1':<20}")
-    print(f"{'-'*80}")
-
     metrics = [
         ('Total Trades', 'total_trades', '{:.0f}'),
         ('Signals/Day', 'signals_per_day', '{:.1f}'),
@@ -324,15 +417,27 @@ def compare_rr_ratios():
         ('Avg Loss', 'avg_loss', '${:.2f}'),
     ]
 
-    for metric_name, metric_key, fmt in metrics:
-        row = f"{metric_name:<20}"
-        for rr in ratios:
-            if rr in results:
-                value = results[rr].get(metric_key, 0)
-                row += f" {fmt.format(value):<20}"
-            else:
-                row += f" {'N/A':<20}"
-        print(row)
+    if grid:
+        # One row per combination
+        print(f"{'Settings':<40}" + ''.join(f" {name:<17}" for name, _, _ in metrics))
+        print(f"{'-'*80}")
+        for key in columns:
+            print(f"{key:<40}" + ''.join(
+                f" {fmt.format(results[key].get(metric_key, 0)):<17}"
+                for _, metric_key, fmt in metrics
+            ))
+    else:
+        print(f"{'Metric':<20}" + ''.join(f" {f'{rr:g}:1':<20}" for rr in ratios))
+        print(f"{'-'*80}")
+        for metric_name, metric_key, fmt in metrics:
+            row = f"{metric_name:<20}"
+            for rr in ratios:
+                if rr in results:
+                    value = results[rr].get(metric_key, 0)
+                    row += f" {fmt.format(value):<20}"
+                else:
+                    row += f" {'N/A':<20}"
+            print(row)
 
     print(f"{'-'*80}\n")
 
@@ -345,30 +450,34 @@ def compare_rr_ratios():
         print("⚠️  No results to analyze - no signals were generated")
         return results
 
+    def label(key):
+        return key if grid else f"{key}:1"
+
     # Find best by net P&L
     best_pnl = max(results.items(), key=lambda x: x[1]['net_pnl'])
-    print(f"🏆 Highest Net P&L:     {best_pnl[0]}:1 (${best_pnl[1]['net_pnl']:.2f})")
+    print(f"🏆 Highest Net P&L:     {label(best_pnl[0])} (${best_pnl[1]['net_pnl']:.2f})")
 
     # Find best by profit factor
     best_pf = max(results.items(), key=lambda x: x[1]['profit_factor'])
-    print(f"📈 Best Profit Factor:  {best_pf[0]}:1 ({best_pf[1]['profit_factor']:.2f})")
+    print(f"📈 Best Profit Factor:  {label(best_pf[0])} ({best_pf[1]['profit_factor']:.2f})")
 
     # Find best by expectancy
     best_exp = max(results.items(), key=lambda x: x[1]['expectancy'])
-    print(f"💰 Best Expectancy:     {best_exp[0]}:1 (${best_exp[1]['expectancy']:.2f}/trade)")
+    print(f"💰 Best Expectancy:     {label(best_exp[0])} "
+          f"(${best_exp[1]['expectancy']:.2f}/trade)")
 
     # Analysis
     print(f"\n📊 ANALYSIS:")
-    for rr in ratios:
-        if rr not in results:
+    for key in columns:
+        if key not in results:
             continue
 
-        stats = results[rr]
+        stats = results[key]
         wr = stats['win_rate']
         be_wr = stats['breakeven_wr']
         pf = stats['profit_factor']
 
-        print(f"\n{rr}:1 R:R:")
+        print(f"\n{label(key)} R:R:" if not grid else f"\n{key}:")
         print(f"  - Break-even WR needed: {be_wr:.1f}%")
         print(f"  - Actual WR achieved: {wr:.1f}%")
 
@@ -398,4 +507,25 @@ def compare_rr_ratios():
 
 
 if __name__ == '__main__':
-    results = compare_rr_ratios()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rr', type=float, nargs='+', default=[2.0, 3.0, 4.0],
+                        help='R:R ratios to compare')
+    parser.add_argument('--sl-buffers', type=int, nargs='+', default=[2],
+                        help='SL buffer ticks beyond the FVG (used when no leg extreme)')
+    parser.add_argument('--max-retests', type=int, nargs='+', default=[3],
+                        help='Max signals per FVG, NEW signal included')
+    parser.add_argument('--per-ratio', action='store_true',
+                        help='Rerun the full pipeline for each R:R ratio instead of sweeping')
+    parser.add_argument('--data-folder', default='data_backtesst')
+    parser.add_argument('--max-files', type=int, default=30)
+    parser.add_argument('--use-cache', action='store_true',
+                        help='Load inputs via the memory-mapped columnar cache (built on first use)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Columnar cache root (default: <data folder>/.smc_cache)')
+    args = parser.parse_args()
+    if args.per_ratio and (len(args.sl_buffers) > 1 or len(args.max_retests) > 1):
+        parser.error('--per-ratio only varies the R:R ratio')
+    results = compare_rr_ratios(args.rr, args.sl_buffers, args.max_retests,
+                                sweep=not args.per_ratio, data_folder=args.data_folder,
+                                max_files=args.max_files, cache_dir=args.cache_dir,
+                                use_cache=args.use_cache)
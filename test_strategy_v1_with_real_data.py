@@ -15,62 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from processor.modules.fix14_mgann_swing import Fix14MgannSwing
 from processor.modules.fix16_strategy_v1 import Fix16StrategyV1
-
-
-def prepare_bar(raw_bar):
-    """
-    Convert JSONL bar to format expected by modules.
-
-    Data has both root-level and nested 'bar' fields.
-    Strategy needs flattened structure.
-    """
-    # Get nested bar data
-    bar_data = raw_bar.get('bar', {})
-
-    # Flatten to root level
-    prepared = {
-        # OHLC
-        'high': raw_bar.get('high', 0),
-        'low': raw_bar.get('low', 0),
-        'open': raw_bar.get('open', 0),
-        'close': raw_bar.get('close', 0),
-
-        # Volume (from nested if available)
-        'volume': bar_data.get('volume_stats', {}).get('total_volume', raw_bar.get('volume', 0)),
-        'delta': bar_data.get('volume_stats', {}).get('delta_close', raw_bar.get('delta', 0)),
-
-        # Technical
-        'atr14': raw_bar.get('atr_14', 0),
-        'range': raw_bar.get('high', 0) - raw_bar.get('low', 0),
-        'tick_size': 0.1,
-
-        # Timestamp
-        'timestamp': raw_bar.get('timestamp', ''),
-        'bar_index': raw_bar.get('bar_index', 0),
-
-        # External structure (from nested bar.*)
-        'ext_dir': bar_data.get('ext_dir', raw_bar.get('current_trend', 0)),
-        'ext_choch_up': bar_data.get('ext_choch_up', False),
-        'ext_choch_down': bar_data.get('ext_choch_down', False),
-        'ext_bos_up': bar_data.get('ext_bos_up', False),
-        'ext_bos_down': bar_data.get('ext_bos_down', False),
-
-        # FVG fields (ROOT LEVEL in export!)
-        'fvg_detected': raw_bar.get('fvg_detected', False),
-        'fvg_type': raw_bar.get('fvg_type'),
-        'fvg_top': raw_bar.get('fvg_top'),
-        'fvg_bottom': raw_bar.get('fvg_bottom'),
-
-        # Swing points (ROOT LEVEL)
-        'last_swing_high': raw_bar.get('last_swing_high'),
-        'last_swing_low': raw_bar.get('last_swing_low'),
-
-        # Will be added by Module 14
-        # 'mgann_leg_index': ...,
-        # 'pb_wave_strength_ok': ...,
-    }
-
-    return prepared
+from processor.ingest.normalize import normalize_bar
 
 
 def main():
@@ -133,7 +78,7 @@ def main():
     for i, raw_bar in enumerate(bars):
         try:
             # Prepare bar
-            bar = prepare_bar(raw_bar)
+            bar = normalize_bar(raw_bar)
 
             # Module 14: MGann Swing
             bar = mgann.process_bar(bar)
@@ -199,9 +144,9 @@ def main():
         print("\nChecking why...")
 
         # Debug: Check conditions
-        has_choch_down = sum(1 for b in bars if prepare_bar(b).get('ext_choch_down'))
-        has_choch_up = sum(1 for b in bars if prepare_bar(b).get('ext_choch_up'))
-        has_fvg = sum(1 for b in bars if prepare_bar(b).get('fvg_detected'))
+        has_choch_down = sum(1 for b in bars if normalize_bar(b).get('ext_choch_down'))
+        has_choch_up = sum(1 for b in bars if normalize_bar(b).get('ext_choch_up'))
+        has_fvg = sum(1 for b in bars if normalize_bar(b).get('fvg_detected'))
 
         print(f"  CHoCH down bars: {has_choch_down}")
         print(f"  CHoCH up bars: {has_choch_up}")